@@ -4,8 +4,12 @@ including management of the options for running.
 """
 #======================================================================
 import os
+import sys
 import json
 import time
+import Queue
+import threading
+import subprocess
 import maya.cmds as cmds
 
 __all__ = ['Runner']
@@ -13,6 +17,7 @@ __all__ = ['Runner']
 from .utilities import list_analytics
 from .utilities import analytic_by_name
 from .maya_file_generator import maya_file_generator, get_maya_files
+from .file_index import FileIndex
 from .ObjectNamer import ObjectNamer
 from .ProgressMatrix import ProgressMatrix
 from .Logger import Logger
@@ -35,6 +40,13 @@ class Runner(object):
                          aggregated by indexing them on the file and analytic name.
                          Use with caution as long runs can make this string huge.
                          Default: False
+        result_sink    : Object to which the JSON results of every analytic
+                         are written as soon as they are produced, with a
+                         write(MAYA_FILE, ANALYTIC_NAME, JSON_DATA) method, e.g.
+                         one of the sinks in maya.analytics.result_sinks. Use
+                         instead of "return_json" on long runs, it is flushed
+                         at the end of the run but left open.
+                         Default: None
         list_only      : True means list the analytics to be run and the files to
                          run them on without actually running the analytic.
                          Return value will be a dictionary of {FILE, [ANALYTICS]}
@@ -64,6 +76,32 @@ class Runner(object):
                          Default: False
         logger       : Message output destination.
                          Default: message object pointing to stdout
+        jobs           : Number of mayapy worker processes the files are
+                         analyzed in. With more than one job the files are
+                         sharded across the workers and each worker sends back
+                         its per-file results as soon as they are done. Since
+                         files whose results are up to date are skipped, a run
+                         that was killed resumes where it stopped. Does not
+                         apply to the current scene or to the list_only mode.
+                         Default: 1 (analyze files in this Maya session)
+        mayapy         : Interpreter used to launch the worker processes.
+                         Default: None (the mayapy next to the running Maya)
+        index_file     : SQLite database in which to keep an index of the
+                         directories walked, the fingerprints of the Maya
+                         files and the analytics completed on them (see
+                         maya.analytics.file_index). Unmodified directories
+                         are not listed again and a (file, analytic) pair
+                         recorded as complete on the current contents of the
+                         file is skipped without checking its output files.
+                         Default: None (walk and check everything)
+        index_hash     : If True the index fingerprints the Maya files by
+                         hashing their contents, so that touching a file
+                         without changing it does not make its analytics
+                         run again. This reads every new or modified file in
+                         full, which on a first run over a large tree can
+                         take as long as the walk itself. If False files are
+                         fingerprinted by their size and modification time.
+                         Default: True
     }
 
     Analytic Options, used here and/or passed in to analytics
@@ -109,7 +147,12 @@ class Runner(object):
         self.skip = []
         self.static = False
         self.return_json = False
+        self.result_sink = None
         self.logger = Logger()
+        self.jobs = 1
+        self.mayapy = None
+        self.index_file = None
+        self.index_hash = True
         #
         self.options = { 'details'   : False,
                          'summary'   : False,
@@ -118,6 +161,14 @@ class Runner(object):
         # This will be filled in when the options are set
         self.files_to_process = []
 
+        # Analytics used by analyze_file(), created on its first call
+        self.__file_analytics = None
+
+        # Index opened from index_file for the duration of a run, and the
+        # { (FILE, ANALYTIC_NAME) : IS_UP_TO_DATE } states it knows about
+        self.__index = None
+        self.__index_states = {}
+
     #----------------------------------------------------------------------
     def __str__(self):
         """Pretty-print the current options"""
@@ -135,6 +186,10 @@ class Runner(object):
         result += 'Summary     [%s]\n' % str(self.options['summary'])
         result += 'Details     [%s]\n' % str(self.options['details'])
         result += 'JSON Return [%s]\n' % str(self.return_json)
+        result += 'Result Sink [%s]\n' % str(self.result_sink)
+        result += 'Jobs        [%s]\n' % str(self.jobs)
+        result += 'Index       [%s]\n' % str(self.index_file)
+        result += 'Index Hash  [%s]\n' % str(self.index_hash)
         return result
 
     #----------------------------------------------------------------------
@@ -265,7 +320,7 @@ class Runner(object):
         # figure out where to put analytics for multiple files in the same
         # directory.
         for path in self.paths:
-            iterator = maya_file_generator( path, descend=self.descend, skip=self.skip )
+            iterator = maya_file_generator( path, descend=self.descend, skip=self.skip, index=self.__index )
             dirList = get_maya_files( iterator )
 
             files_to_analyze = []
@@ -284,24 +339,29 @@ class Runner(object):
                         analytic_path = namer.name(os.path.join(relpath,the_file))
                     analytic_path = os.path.join( analytic_dir, analytic_path )
                     file_path = os.path.join(the_dir, the_file)
-                    file_modified_time = os.path.getmtime(file_path)
+                    if self.__index is not None:
+                        file_modified_time = self.__index.fingerprint(file_path)[1]
+                    else:
+                        file_modified_time = os.path.getmtime(file_path)
                     files_to_analyze.append( (file_path, file_modified_time, analytic_path) )
 
         return files_to_analyze
 
     #======================================================================
-    def __establish_baselines(self):
+    def __establish_baselines(self, analytics_to_run):
         """
-        If not analyzing the current scene clear the scene and let all of the
-        analytics establish an empty-scene baseline.
+        Clear the scene and let all of the analytics establish an empty-scene
+        baseline. Only done when files are loaded, not when analyzing the
+        current scene.
+
+        analytics_to_run: Analytics which will be run on the loaded files
         """
-        if self.paths:
-            cmds.file( force=True, new=True )
-            for analytic in self.__analytics_to_run():
-                try:
-                    analytic.establish_baseline()
-                except Exception, ex:
-                    analytic.error( 'Failed to establish baseline : {0:s}'.format(str(ex)) )
+        cmds.file( force=True, new=True )
+        for analytic in analytics_to_run:
+            try:
+                analytic.establish_baseline()
+            except Exception, ex:
+                analytic.error( 'Failed to establish baseline : {0:s}'.format(str(ex)) )
 
     #======================================================================
     @staticmethod
@@ -344,6 +404,31 @@ class Runner(object):
 
         return False
 
+    #======================================================================
+    def __is_analytic_stale(self, analytic, maya_file, maya_file_modified_time):
+        """
+        Check to see if the analytic has to be run on the file, asking the
+        index first if there is one. Pairs unknown to the index are checked
+        against the analytic output files, and recorded in the index if those
+        are up to date so that the next run need not check them again.
+
+        analytic:                Analytic to be checked, its directory set
+        maya_file:               File being checked for analysis
+        maya_file_modified_time: Modification time of maya_file
+        """
+        if self.__index is None or maya_file is None:
+            return self.__should_analytic_run( analytic, maya_file_modified_time )
+
+        is_up_to_date = self.__index_states.get( (maya_file, analytic.name()) )
+        if is_up_to_date is not None:
+            analytic.debug( 'Index has analytic {0:s}'.format( 'up to date' if is_up_to_date else 'out of date' ) )
+            return not is_up_to_date
+
+        should_run = self.__should_analytic_run( analytic, maya_file_modified_time )
+        if not should_run:
+            self.__index.record_analytic( maya_file, analytic.name() )
+        return should_run
+
     #======================================================================
     def set_option(self, option_name, option_value):
         """
@@ -382,8 +467,25 @@ class Runner(object):
         self.__debug( str(self) )
         start_run_time = cmds.timerX()
 
+        if self.index_file is not None and self.paths:
+            self.__index = FileIndex( self.index_file, hash_contents=self.index_hash )
+        try:
+            return self.__run( start_run_time )
+        finally:
+            if self.__index is not None:
+                self.__index.close()
+                self.__index = None
+                self.__index_states = {}
+
+    #======================================================================
+    def __run(self, start_run_time):
+        """
+        Body of run(), once the index is open.
+        """
         analytics_to_run = self.__analytics_to_run()
         files_to_analyze = self.__files_to_analyze()
+        if self.__index is not None:
+            self.__index_states = self.__index.analytic_states( [analytic.name() for analytic in analytics_to_run] )
 
         # If self.return_json is true then all of the analytic output will be
         # gathered into this JSON-formatted object that looks like this:
@@ -399,10 +501,41 @@ class Runner(object):
         # the list_only mode.
         combinations_run = {}
 
+        if self.jobs > 1 and self.paths and not self.list_only:
+            analytic_count = self.__run_distributed( analytics_to_run, files_to_analyze,
+                                                     combinations_run, json_results )
+        else:
+            analytic_count = self.__run_serial( analytics_to_run, files_to_analyze,
+                                                combinations_run, json_results )
+
+        if self.result_sink is not None:
+            self.result_sink.flush()
+
+        total_elapsed_time = cmds.timerX( st=start_run_time )
+
+        # Always list what was run. In the list_only case this is the only output
+        if len(combinations_run) > 0:
+            print json.dumps( combinations_run, indent=4 )
+            print 'Analytics: {0:d}\nFiles    : {1:d}\nTime     : {2:f} seconds'.format(
+                    analytic_count, len(combinations_run), total_elapsed_time )
+        else:
+            print 'No Analytics run'
+
+        if self.return_json:
+            return { 'analytic_run' : json_results }
+
+    #======================================================================
+    def __run_serial(self, analytics_to_run, files_to_analyze, combinations_run, json_results):
+        """
+        Run all of the analytics on all of the files in this Maya session.
+
+        Returns the number of analytics that were run.
+        """
         # If loading files then give the analytics a chance to establish an
         # empty file baseline. If not loading files the analytic will have to
         # figure some other way to establish a baseline.
-        self.__establish_baselines()
+        if self.paths:
+            self.__establish_baselines( analytics_to_run )
 
         # Create the progress reporter, even if no reporting will be done.
         # It's cheap and avoids a bunch of extra 'if' statements.
@@ -412,140 +545,345 @@ class Runner(object):
                                             progress_fmt='File {0:d}, Analytic {1:d}' )
         progress_reporter.enabled = self.report_progress
         progress_reporter.start()
-        file_load_time = 0.0
         file_number = 0
         analytic_count = 0
         for (maya_file,file_modified_time,analytic_directory) in files_to_analyze:
-            self.__debug( 'Running analytics on file "{0:s}"'.format( maya_file ) )
-            self.__indent(1)
-            json_per_file = {}
-
-            # A file of "None" means analyze the current scene, so it's
-            # already loaded in that case.
-            file_is_loaded = (maya_file is None)
-
-            # Loop through all analytics on the currently loaded file, running
-            # them if necessary.
-            analytic_number = 0
-            for analytic in analytics_to_run:
-                analytic.debug('Starting analytic')
-                self.__indent(1)
-                try:
-                    analytic.set_output_directory( analytic_directory )
-                    analytic.set_options( self.options )
-                    progress_reporter.report( [file_number, analytic_number] )
-                    analytic_number += 1
-
-                    # Check to see if any analytic file is out of date with the data file.
-                    # Analytics on the current scene are assumed always out of date
-                    if not self.__should_analytic_run( analytic, file_modified_time ):
-                        self.__debug( 'Skipping' )
-                        self.__indent( -1 )
-                        continue
-
-                    # This just lets us avoid counting them all later
-                    analytic_count += 1
-
-                    # That's far enough if we're just listing the analytics
-                    # that would run.
-                    combinations_run[maya_file] = combinations_run.get(maya_file,[]) + [analytic.name()]
-                    if self.list_only:
-                        self.__debug( 'Listing only' )
-                        self.__indent( -1 )
-                        continue
-
-                    # By delaying the loading of the file we can skip loading
-                    # any files that have no pending analytics.
-                    if not file_is_loaded:
-                        try:
-                            self.__debug( 'Loading file {0:s}'.format(maya_file) )
-                            start_time = cmds.timerX()
-                            cmds.file( maya_file, open=True, force=True, prompt=False )
-                            file_load_time = cmds.timerX( st=start_time )
-                            file_is_loaded = True
-                        except Exception, ex:
-                            self.__error( 'Problems reading test file "{0:s}" : {1:s}'.format(maya_file, str(ex)) )
-
-                    # Time the analytic, adding the timing information to the
-                    # JSON output data
-                    start_time = cmds.timerX()
-
-                    json_output = analytic.run()
-                    if json_output is None:
-                        json_output = {}
-
-                    # For backwards compatibility embed the former CSV output
-                    # into the JSON data. It's easily extracted by name.
-                    if analytic.csv_output:
-                        analytic.debug( 'Appending the old-style CSV output' )
-                        json_output['csv'] = '\n'.join(analytic.csv_output)
-
-                    json_data = { 'output' : json_output }
-
-                    # Time the analytic, append the timing information to
-                    # the returned JSON and write it out to the analytic file
-                    elapsed_time = cmds.timerX( st=start_time )
-
-                    # Add in the options used for this run
-                    json_data['options'] = self.options
-
-                    # Total elapsed run time for this analytic
-                    json_data['run_time'] = elapsed_time
-
-                    # Total elapsed file load time for this analytic, if it
-                    # loaded a file at all.
-                    if file_load_time > 0.0:
-                        json_data['file_load_time'] = file_load_time
-
-                    json_data = { analytic.name() : json_data }
-
-                    analytic.debug( 'Analytic elapsed time is {0:f}'.format( elapsed_time ) )
-                    analytic.debug( 'Output files {0:s}'.format( analytic.output_files() ) )
-
-                    # The JSON output is dumped here. The analytic is free to
-                    # provide no return values and handle all of the output
-                    # itself, though it cannot use the .json file to do so.
-                    # (e.g. it could do a screen dump and not return anything)
-                    # There is still the timing information to dump though so
-                    # even if no extra output is provided the JSON will be
-                    # written.
-                    try:
-                        with open(analytic.json_file(), 'w') as json_fd:
-                            # Add indentation so that the output is at least a
-                            # little bit human-readable, even though that's not
-                            # the main intent.
-                            json.dump( json_data, json_fd, indent=4 )
-                    except IOError, ex:
-                        analytic.error( 'Could not write JSON output to {0:s} ({1:s}'.format(
-                                        analytic.json_file(), str(ex) ) )
-
-                    if self.return_json:
-                        json_per_file[analytic.name()] = json_data
+            def report_progress(analytic_number):
+                progress_reporter.report( [file_number, analytic_number] )
 
-                except Exception, ex:
-                    analytic.error( 'Unknown failure: "{0:s}"'.format(ex) )
+            (analytics_run, json_per_file) = self.__analyze_file( maya_file, file_modified_time,
+                                                                  analytic_directory, analytics_to_run,
+                                                                  report_progress )
 
-                self.__indent(-1)
+            # This just lets us avoid counting them all later
+            analytic_count += len(analytics_run)
+            if analytics_run:
+                combinations_run[maya_file] = analytics_run
 
             if self.return_json:
                 json_results[maya_file] = { 'analytics' : json_per_file }
 
-            self.__indent(-1)
             file_number += 1
 
         progress_reporter.end()
-        total_elapsed_time = cmds.timerX( st=start_run_time )
+        return analytic_count
 
-        # Always list what was run. In the list_only case this is the only output
-        if len(combinations_run) > 0:
-            print json.dumps( combinations_run, indent=4 )
-            print 'Analytics: {0:d}\nFiles    : {1:d}\nTime     : {2:f} seconds'.format(
-                    analytic_count, len(combinations_run), total_elapsed_time )
-        else:
-            print 'No Analytics run'
+    #======================================================================
+    def analyze_file(self, maya_file, file_modified_time, analytic_directory):
+        """
+        Run the analytics on a single file, the same way run() does for each
+        of the files it finds. This is the unit of work of the distributed
+        mode workers.
 
-        if self.return_json:
-            return { 'analytic_run' : json_results }
+        The analytics are created, and their baselines established, on the
+        first call.
+
+        maya_file:          File to be analyzed, None for the current scene
+        file_modified_time: Modification time of maya_file
+        analytic_directory: Directory in which the results are stored
+
+        Returns a dictionary of {ANALYTIC_NAME : JSON_DATA} for the analytics
+        that were out of date and were run.
+        """
+        if self.__file_analytics is None:
+            self.__file_analytics = self.__analytics_to_run()
+            if maya_file is not None:
+                self.__establish_baselines( self.__file_analytics )
+        return self.__analyze_file( maya_file, file_modified_time, analytic_directory,
+                                    self.__file_analytics )[1]
+
+    #======================================================================
+    def __analyze_file(self, maya_file, file_modified_time, analytic_directory,
+                       analytics_to_run, report_progress=None):
+        """
+        Run the out of date analytics on one file.
+
+        maya_file:          File to be analyzed, None for the current scene
+        file_modified_time: Modification time of maya_file
+        analytic_directory: Directory in which the results are stored
+        analytics_to_run:   Analytics to be run on the file
+        report_progress:    If not None, called with the index of each
+                            analytic before it is checked
+
+        Returns a 2-tuple of the names of the analytics which were run (or
+        would have been run in list_only mode) and a dictionary of
+        {ANALYTIC_NAME : JSON_DATA} of their output.
+        """
+        self.__debug( 'Running analytics on file "{0:s}"'.format( maya_file ) )
+        self.__indent(1)
+        json_per_file = {}
+        analytics_run = []
+
+        # A file of "None" means analyze the current scene, so it's
+        # already loaded in that case.
+        file_is_loaded = (maya_file is None)
+        file_load_time = 0.0
+
+        # Loop through all analytics on the currently loaded file, running
+        # them if necessary.
+        analytic_number = 0
+        for analytic in analytics_to_run:
+            analytic.debug('Starting analytic')
+            self.__indent(1)
+            try:
+                analytic.set_output_directory( analytic_directory )
+                analytic.set_options( self.options )
+                if report_progress is not None:
+                    report_progress( analytic_number )
+                analytic_number += 1
+
+                # Check to see if any analytic file is out of date with the data file.
+                # Analytics on the current scene are assumed always out of date
+                if not self.force and not self.__is_analytic_stale( analytic, maya_file, file_modified_time ):
+                    self.__debug( 'Skipping' )
+                    self.__indent( -1 )
+                    continue
+
+                # That's far enough if we're just listing the analytics
+                # that would run.
+                analytics_run.append( analytic.name() )
+                if self.list_only:
+                    self.__debug( 'Listing only' )
+                    self.__indent( -1 )
+                    continue
+
+                # By delaying the loading of the file we can skip loading
+                # any files that have no pending analytics.
+                if not file_is_loaded:
+                    try:
+                        self.__debug( 'Loading file {0:s}'.format(maya_file) )
+                        start_time = cmds.timerX()
+                        cmds.file( maya_file, open=True, force=True, prompt=False )
+                        file_load_time = cmds.timerX( st=start_time )
+                        file_is_loaded = True
+                    except Exception, ex:
+                        self.__error( 'Problems reading test file "{0:s}" : {1:s}'.format(maya_file, str(ex)) )
+
+                # The marker file flags the analytic as in progress until its
+                # output is written, so that an interrupted run redoes it.
+                if maya_file is not None:
+                    open( analytic.marker_file(), 'w' ).close()
+                    if self.__index is not None:
+                        self.__index.forget_analytic( maya_file, analytic.name() )
+
+                # Time the analytic, adding the timing information to the
+                # JSON output data
+                start_time = cmds.timerX()
+
+                json_output = analytic.run()
+                if json_output is None:
+                    json_output = {}
+
+                # For backwards compatibility embed the former CSV output
+                # into the JSON data. It's easily extracted by name.
+                if analytic.csv_output:
+                    analytic.debug( 'Appending the old-style CSV output' )
+                    json_output['csv'] = '\n'.join(analytic.csv_output)
+
+                json_data = { 'output' : json_output }
+
+                # Time the analytic, append the timing information to
+                # the returned JSON and write it out to the analytic file
+                elapsed_time = cmds.timerX( st=start_time )
+
+                # Add in the options used for this run
+                json_data['options'] = self.options
+
+                # Total elapsed run time for this analytic
+                json_data['run_time'] = elapsed_time
+
+                # Total elapsed file load time for this analytic, if it
+                # loaded a file at all.
+                if file_load_time > 0.0:
+                    json_data['file_load_time'] = file_load_time
+
+                json_data = { analytic.name() : json_data }
+
+                analytic.debug( 'Analytic elapsed time is {0:f}'.format( elapsed_time ) )
+                analytic.debug( 'Output files {0:s}'.format( analytic.output_files() ) )
+
+                # The JSON output is dumped here. The analytic is free to
+                # provide no return values and handle all of the output
+                # itself, though it cannot use the .json file to do so.
+                # (e.g. it could do a screen dump and not return anything)
+                # There is still the timing information to dump though so
+                # even if no extra output is provided the JSON will be
+                # written.
+                try:
+                    with open(analytic.json_file(), 'w') as json_fd:
+                        # Add indentation so that the output is at least a
+                        # little bit human-readable, even though that's not
+                        # the main intent.
+                        json.dump( json_data, json_fd, indent=4 )
+                    if maya_file is not None:
+                        os.remove( analytic.marker_file() )
+                        if self.__index is not None:
+                            self.__index.record_analytic( maya_file, analytic.name() )
+                except (IOError, OSError), ex:
+                    analytic.error( 'Could not write JSON output to {0:s} ({1:s}'.format(
+                                    analytic.json_file(), str(ex) ) )
+
+                json_per_file[analytic.name()] = json_data
+
+                # Stream the results out right away rather than waiting
+                # for the whole run to finish
+                if self.result_sink is not None:
+                    self.result_sink.write( maya_file, analytic.name(), json_data[analytic.name()] )
+
+            except Exception, ex:
+                analytic.error( 'Unknown failure: "{0:s}"'.format(ex) )
+
+            self.__indent(-1)
+
+        self.__indent(-1)
+        return (analytics_run, json_per_file)
+
+    #======================================================================
+    def __mayapy(self):
+        """
+        Get the interpreter used to launch the worker processes. Unless set
+        explicitly it is the mayapy found next to the running executable.
+        """
+        if self.mayapy:
+            return self.mayapy
+        exe_dir = os.path.dirname( sys.executable )
+        for name in ['mayapy', 'mayapy.exe']:
+            candidate = os.path.join( exe_dir, name )
+            if os.path.isfile( candidate ):
+                return candidate
+        return sys.executable
+
+    #======================================================================
+    def __run_distributed(self, analytics_to_run, files_to_analyze, combinations_run, json_results):
+        """
+        Shard the files to be analyzed across self.jobs mayapy worker
+        processes (see runner_worker.py), and gather their results as they
+        come back.
+
+        Files for which no analytic is out of date are not sent to the
+        workers at all, which is what allows an interrupted run to resume.
+
+        Returns the number of analytics that were run.
+        """
+        from .runner_worker import RESULT_TAG
+
+        # Same up-to-date check as the serial run, done up front
+        pending_files = []
+        for (maya_file,file_modified_time,analytic_directory) in files_to_analyze:
+            for analytic in analytics_to_run:
+                analytic.directory = analytic_directory
+                if self.force or self.__is_analytic_stale( analytic, maya_file, file_modified_time ):
+                    pending_files.append( (maya_file,file_modified_time,analytic_directory) )
+                    break
+        self.__log( '{0:d} of {1:d} files have out of date analytics'.format( len(pending_files),
+                                                                               len(files_to_analyze) ) )
+
+        config = { 'analytics' : [analytic.name() for analytic in analytics_to_run],
+                   'options'   : self.options,
+                   'force'     : self.force,
+                   'debugging' : bool(self.logger and self.logger.debugging) }
+        command = [self.__mayapy(), '-m', 'maya.analytics.runner_worker']
+
+        tasks = Queue.Queue()
+        for task in pending_files:
+            tasks.put( task )
+        results = Queue.Queue()
+
+        #----------------------------------------------------------------------
+        def start_worker():
+            worker = subprocess.Popen( command, stdin=subprocess.PIPE, stdout=subprocess.PIPE )
+            worker.stdin.write( json.dumps( config ) + '\n' )
+            worker.stdin.flush()
+            return worker
+
+        #----------------------------------------------------------------------
+        def feed_worker():
+            """
+            Send files to one worker process until none are left, restarting
+            the worker if it dies on a file.
+            """
+            worker = None
+            try:
+                while True:
+                    try:
+                        (maya_file,file_modified_time,analytic_directory) = tasks.get_nowait()
+                    except Queue.Empty:
+                        break
+                    if worker is None:
+                        worker = start_worker()
+                    worker.stdin.write( json.dumps( { 'file'      : maya_file,
+                                                      'modified'  : file_modified_time,
+                                                      'directory' : analytic_directory } ) + '\n' )
+                    worker.stdin.flush()
+                    result = None
+                    for line in iter(worker.stdout.readline, ''):
+                        # The tag is not at the start of the line when an
+                        # analytic printed something without a newline
+                        tag_index = line.find( RESULT_TAG )
+                        if tag_index >= 0:
+                            if tag_index > 0:
+                                sys.stdout.write( line[:tag_index] + '\n' )
+                            result = json.loads( line[tag_index + len(RESULT_TAG):] )
+                            break
+                        # Pass along anything else the worker printed
+                        sys.stdout.write( line )
+                    if result is None:
+                        worker.wait()
+                        worker = None
+                        result = { 'file'    : maya_file,
+                                   'results' : {},
+                                   'error'   : 'Worker process died' }
+                    results.put( result )
+            finally:
+                if worker is not None:
+                    worker.stdin.close()
+                    worker.wait()
+                # Flags the end of this worker
+                results.put( None )
+
+        thread_count = max(1, min(self.jobs, len(pending_files)))
+        threads = [threading.Thread( target=feed_worker ) for _ in range(thread_count)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        progress_reporter = ProgressMatrix( [len(pending_files)],
+                                            title='Total files= {0:d}, Jobs = {1:d}'.format( len(pending_files),
+                                                                                            thread_count ),
+                                            progress_fmt='File {0:d}' )
+        progress_reporter.enabled = self.report_progress
+        progress_reporter.start()
+
+        analytic_count = 0
+        file_number = 0
+        running = thread_count
+        while running > 0:
+            result = results.get()
+            if result is None:
+                running -= 1
+                continue
+            maya_file = result['file']
+            if result.get('error'):
+                self.__error( 'Analysis of "{0:s}" failed : {1:s}'.format( maya_file, result['error'] ) )
+            json_per_file = result['results']
+            if json_per_file:
+                combinations_run[maya_file] = sorted(json_per_file.keys())
+                analytic_count += len(json_per_file)
+            if self.__index is not None:
+                for analytic_name in json_per_file:
+                    self.__index.record_analytic( maya_file, analytic_name )
+            if self.result_sink is not None:
+                for (analytic_name, json_data) in sorted(json_per_file.iteritems()):
+                    self.result_sink.write( maya_file, analytic_name, json_data[analytic_name] )
+            if self.return_json:
+                json_results[maya_file] = { 'analytics' : json_per_file }
+            progress_reporter.report( [file_number] )
+            file_number += 1
+
+        for thread in threads:
+            thread.join()
+        progress_reporter.end()
+        return analytic_count
 
 # ===========================================================================
 # Copyright 2016 Autodesk, Inc. All rights reserved.
@@ -0,0 +1,259 @@
+"""
+Persistent index of the Maya files seen by the analytics, kept in a SQLite
+database so that later runs can avoid re-walking and re-checking everything.
+
+For every directory walked the index keeps its modification time and its
+listing. A directory whose modification time has not changed still has the
+same entries so its listing is reused instead of being read again, which is
+where most of the time goes when walking large network shares.
+
+For every Maya file it keeps the size, modification time and a fingerprint
+of the contents (a SHA-1 hash by default), recomputed only when the size or
+modification time changes, and the analytics that completed on it along with
+the fingerprint the file had at the time. A (file, analytic) pair is up to
+date when the two fingerprints match, so touching a file without changing it
+does not force the analytics to run again.
+
+Usage:
+    from maya.analytics.file_index import FileIndex
+    from maya.analytics.maya_file_generator import maya_file_generator
+    with FileIndex('/Volumes/animFiles/analytics.db') as index:
+        for path in maya_file_generator('/Volumes/animFiles', index=index):
+            index.fingerprint( path )
+        for (path, analytic_name) in sorted(index.stale_pairs(['NodeTypes'])):
+            print path, analytic_name
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+__all__ = [ 'FileIndex' ]
+
+# Timestamps this close to the time they are read are not trusted, since
+# a change made within the file system's timestamp resolution would be missed
+RACY_INTERVAL = 2.0
+
+# Size of the blocks in which files are read to hash them
+HASH_BLOCK_SIZE = 1 << 20
+
+# Number of changes made to the index between commits
+COMMIT_INTERVAL = 1000
+
+#======================================================================
+class FileIndex(object):
+    """
+    SQLite-backed index of directory listings, Maya file fingerprints and
+    completed analytics.
+
+    Every time the index is opened a new generation starts. Files are tagged
+    with the generation in which they were last fingerprinted so that the
+    staleness queries only consider the files found by the current walk.
+    """
+    def __init__(self, file_name, hash_contents=True):
+        """
+        file_name:     SQLite database in which the index is kept
+        hash_contents: If True fingerprint files by hashing their contents,
+                       otherwise by their size and modification time only
+        """
+        self.file_name = file_name
+        self.hash_contents = hash_contents
+        self.__changes = 0
+        self.__connection = sqlite3.connect( file_name )
+        self.__connection.executescript( """
+            CREATE TABLE IF NOT EXISTS meta        (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS directories (path TEXT PRIMARY KEY, mtime REAL,
+                                                    dirs TEXT, files TEXT);
+            CREATE TABLE IF NOT EXISTS files       (path TEXT PRIMARY KEY, size INTEGER, mtime REAL,
+                                                    fingerprint TEXT, generation INTEGER);
+            CREATE TABLE IF NOT EXISTS analytics   (path TEXT, analytic TEXT, fingerprint TEXT,
+                                                    PRIMARY KEY (path, analytic));
+            CREATE INDEX IF NOT EXISTS files_generation ON files (generation);
+            """ )
+        row = self.__connection.execute( "SELECT value FROM meta WHERE key='generation'" ).fetchone()
+        self.generation = (int(row[0]) if row else 0) + 1
+        self.__connection.execute( "INSERT OR REPLACE INTO meta VALUES ('generation',?)", (str(self.generation),) )
+        self.__connection.commit()
+
+    #----------------------------------------------------------------------
+    def __changed(self):
+        """ Count a change, committing them when there are enough """
+        self.__changes += 1
+        if self.__changes >= COMMIT_INTERVAL:
+            self.commit()
+
+    #----------------------------------------------------------------------
+    def commit(self):
+        """ Write all pending changes to the database """
+        if self.__connection is not None:
+            self.__connection.commit()
+        self.__changes = 0
+
+    #----------------------------------------------------------------------
+    def close(self):
+        """ Commit the pending changes and close the database """
+        if self.__connection is not None:
+            self.__connection.commit()
+            self.__connection.close()
+            self.__connection = None
+
+    #----------------------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    #----------------------------------------------------------------------
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    #----------------------------------------------------------------------
+    def __listing(self, directory):
+        """
+        Get the ( [SUBDIRECTORIES], [FILES] ) in a directory, from the index
+        if the directory has not been modified since it was last listed.
+        Returns None if the directory cannot be read.
+        """
+        try:
+            directory_mtime = os.stat( directory ).st_mtime
+        except OSError:
+            return None
+
+        row = self.__connection.execute( 'SELECT mtime, dirs, files FROM directories WHERE path=?',
+                                         (directory,) ).fetchone()
+        if row is not None and row[0] == directory_mtime:
+            return (json.loads(row[1]), json.loads(row[2]))
+
+        try:
+            names = os.listdir( directory )
+        except OSError:
+            return None
+        dirs = []
+        files = []
+        for name in names:
+            if os.path.isdir( os.path.join(directory, name) ):
+                dirs.append( name )
+            else:
+                files.append( name )
+
+        # A directory modified just now could be modified again without its
+        # time changing so leave it to be listed again next time.
+        if time.time() - directory_mtime < RACY_INTERVAL:
+            directory_mtime = None
+        self.__connection.execute( 'INSERT OR REPLACE INTO directories VALUES (?,?,?,?)',
+                                   (directory, directory_mtime, json.dumps(dirs), json.dumps(files)) )
+        self.__changed()
+        return (dirs, files)
+
+    #----------------------------------------------------------------------
+    def walk(self, top):
+        """
+        Replacement for os.walk(top, topdown=True) using the stored listings
+        of unmodified directories. As with os.walk the list of subdirectories
+        can be modified in place to prune the walk.
+        """
+        listing = self.__listing( top )
+        if listing is None:
+            return
+        (dirs, files) = listing
+        yield (top, dirs, files)
+        for name in dirs:
+            for entry in self.walk( os.path.join(top, name) ):
+                yield entry
+
+    #----------------------------------------------------------------------
+    def __hash(self, path, size, mtime):
+        """ Compute the fingerprint of a file's contents """
+        if not self.hash_contents:
+            return '{0:d}:{1!r}'.format( size, mtime )
+        digest = hashlib.sha1()
+        with open(path, 'rb') as maya_fd:
+            while True:
+                block = maya_fd.read( HASH_BLOCK_SIZE )
+                if not block:
+                    break
+                digest.update( block )
+        return digest.hexdigest()
+
+    #----------------------------------------------------------------------
+    def fingerprint(self, path):
+        """
+        Get the current state of a file, hashing it only if its size or
+        modification time changed since the last time it was seen, and mark
+        it as seen in this generation.
+
+        path: File to be checked
+
+        Returns a ( SIZE, MODIFIED_TIME, FINGERPRINT ) tuple.
+        """
+        stat = os.stat( path )
+        (size, mtime) = (stat.st_size, stat.st_mtime)
+        row = self.__connection.execute( 'SELECT size, mtime, fingerprint FROM files WHERE path=?',
+                                         (path,) ).fetchone()
+        if row is not None and row[0] == size and row[1] == mtime:
+            fingerprint = row[2]
+        else:
+            fingerprint = self.__hash( path, size, mtime )
+
+        # Same as for directories, a file modified just now is rechecked
+        stored_mtime = mtime if time.time() - mtime >= RACY_INTERVAL else None
+        self.__connection.execute( 'INSERT OR REPLACE INTO files VALUES (?,?,?,?,?)',
+                                   (path, size, stored_mtime, fingerprint, self.generation) )
+        self.__changed()
+        return (size, mtime, fingerprint)
+
+    #----------------------------------------------------------------------
+    def record_analytic(self, path, analytic_name):
+        """
+        Remember that an analytic completed on a file in its current state.
+        The file must have been fingerprinted first.
+        """
+        self.__connection.execute( 'INSERT OR REPLACE INTO analytics '
+                                   'SELECT path, ?, fingerprint FROM files WHERE path=?',
+                                   (analytic_name, path) )
+        self.__changed()
+
+    #----------------------------------------------------------------------
+    def forget_analytic(self, path, analytic_name):
+        """
+        Forget the completion of an analytic on a file, e.g. because it is
+        being run again.
+        """
+        self.__connection.execute( 'DELETE FROM analytics WHERE path=? AND analytic=?',
+                                   (path, analytic_name) )
+        self.__changed()
+
+    #----------------------------------------------------------------------
+    def analytic_states(self, analytic_names):
+        """
+        Find out with a single query which of the given analytics are up to
+        date on the files seen in this generation.
+
+        Returns a dictionary of { (FILE, ANALYTIC_NAME) : IS_UP_TO_DATE } for
+        every pair the index knows about. Pairs missing from it have never
+        been recorded, the index cannot tell whether they are up to date.
+        """
+        self.commit()
+        names = list(set(analytic_names))
+        if not names:
+            return {}
+        query = ( 'SELECT f.path, a.analytic, f.fingerprint = a.fingerprint FROM files f '
+                  'JOIN analytics a ON a.path = f.path '
+                  'WHERE f.generation = ? AND a.analytic IN ({0:s})'.format( ','.join(['?'] * len(names)) ) )
+        states = {}
+        for (path, analytic_name, is_up_to_date) in self.__connection.execute( query, [self.generation] + names ):
+            states[(path, analytic_name)] = bool(is_up_to_date)
+        return states
+
+    #----------------------------------------------------------------------
+    def stale_pairs(self, analytic_names):
+        """
+        Returns the set of (FILE, ANALYTIC_NAME) pairs among the files seen in
+        this generation for which the analytic has not completed on the
+        current contents of the file.
+        """
+        states = self.analytic_states( analytic_names )
+        paths = [row[0] for row in self.__connection.execute( 'SELECT path FROM files WHERE generation=?',
+                                                              (self.generation,) )]
+        return set( (path, analytic_name) for path in paths for analytic_name in set(analytic_names)
+                    if not states.get( (path, analytic_name), False ) )
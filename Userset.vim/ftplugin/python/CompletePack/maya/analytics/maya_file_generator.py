@@ -6,7 +6,7 @@ import re
 
 __all__ = [ 'maya_file_generator', 'get_maya_files' ]
 
-def maya_file_generator(root_path, skip=None, descend=True):
+def maya_file_generator(root_path, skip=None, descend=True, index=None):
     """
     Generator to walk all Maya files in or below a specific directory.
 
@@ -21,6 +21,8 @@ def maya_file_generator(root_path, skip=None, descend=True):
                  '_version.*'   : Skip all files with a version number in the name
 
     descend    : Recurse into subdirectories
+    index      : FileIndex whose stored listings are used for directories
+                 that were not modified since they were last walked.
 
     Returns list of filepaths in any of the root_paths not matching the skip patterns.
 
@@ -42,12 +44,15 @@ def maya_file_generator(root_path, skip=None, descend=True):
             skip_patterns.append( re.compile(pattern) )
 
     #======================================================================
-    def __is_path_excluded(path_to_check):
+    def __is_path_excluded(path_to_check, is_file):
         """
         Check to see if the named path is excluded by the filters.
         Note that this is not applied at the root directory level. It is
         assumed that if you want to exclude the root you won't bother
         calling the iterator.
+
+        is_file : True if the path is one of the walked files, which saves
+                  having to stat every file to find out
         """
         if not descend:
             return True
@@ -58,7 +63,7 @@ def maya_file_generator(root_path, skip=None, descend=True):
                 return True
 
         # Ensure these are Maya files
-        if os.path.isfile(path_to_check):
+        if is_file:
             (_,file_ext) = os.path.splitext(path_to_check)
             if file_ext != '.ma' and file_ext != '.mb':
                 return True
@@ -68,12 +73,13 @@ def maya_file_generator(root_path, skip=None, descend=True):
     # If just a single path to check put it into a one-item list for simplicity
     root_path_list = root_path if isinstance(root_path, list) else [root_path]
 
+    walk = os.walk if index is None else index.walk
     for root_path in root_path_list:
-        for root, dirs, files in os.walk(root_path, topdown=True):
+        for root, dirs, files in walk(root_path):
             # The [:] is to overwrite the existing list in place so that descent
             # through excluded directories in os.walk is avoided
-            dirs[:] = [d for d in dirs if not __is_path_excluded(d)]
-            for name in (f for f in files if not __is_path_excluded(os.path.join(root,f))):
+            dirs[:] = [d for d in dirs if not __is_path_excluded(d, False)]
+            for name in (f for f in files if not __is_path_excluded(os.path.join(root,f), True)):
                 yield os.path.join(root, name)
 
 #======================================================================
@@ -0,0 +1,236 @@
+"""
+Destinations to which the Runner can stream analytic results as soon as
+they are produced, instead of aggregating them all in memory with the
+"return_json" option, and functions to read them back.
+
+Each record is the JSON data of one analytic run on one file:
+
+    ( MAYA_FILE, ANALYTIC_NAME, { "output" : {...}, "options" : {...}, "run_time" : ... } )
+
+Usage:
+    from maya.analytics import Runner
+    from maya.analytics.result_sinks import JsonLinesSink, read_sink
+    runner = Runner()
+    runner.paths = ['/Volumes/animFiles/filesToAnalyze']
+    with JsonLinesSink('/Volumes/animFiles/results.jsonl') as sink:
+        runner.result_sink = sink
+        runner.run()
+    for (maya_file, analytic_name, json_data) in read_sink('/Volumes/animFiles/results.jsonl'):
+        print maya_file, analytic_name, json_data['run_time']
+"""
+import os
+import json
+import sqlite3
+
+__all__ = [ 'ResultSink'
+          , 'JsonLinesSink'
+          , 'SQLiteSink'
+          , 'CallbackSink'
+          , 'read_json_lines'
+          , 'read_sqlite'
+          , 'read_sink'
+          ]
+
+# Number of records written between automatic flushes
+DEFAULT_FLUSH_INTERVAL = 100
+
+# File extensions recognized as SQLite databases by read_sink
+SQLITE_EXTENSIONS = ['.db', '.sqlite', '.sqlite3']
+
+# Value of the file column for the records of the current scene. NULL cannot be
+# used since NULLs never conflict in a primary key, so the records would pile up.
+SQLITE_CURRENT_SCENE = ''
+
+#======================================================================
+class ResultSink(object):
+    """
+    Base class for the result sinks. Derived classes implement _write(),
+    and flush() and close() if they buffer anything.
+
+    Sinks are context managers, closing themselves on exit.
+    """
+    def __init__(self, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        flush_interval: Number of records written between automatic flushes
+        """
+        self.flush_interval = flush_interval
+        self.record_count = 0
+
+    #----------------------------------------------------------------------
+    def write(self, maya_file, analytic_name, json_data):
+        """
+        Record the results of one analytic on one file.
+
+        maya_file:     File that was analyzed, None for the current scene
+        analytic_name: Name of the analytic that was run
+        json_data:     JSON data produced by the run
+        """
+        self._write( maya_file, analytic_name, json_data )
+        self.record_count += 1
+        if self.flush_interval and (self.record_count % self.flush_interval) == 0:
+            self.flush()
+
+    #----------------------------------------------------------------------
+    def _write(self, maya_file, analytic_name, json_data):
+        """ Write out one record, implemented by the derived classes """
+        raise NotImplementedError
+
+    #----------------------------------------------------------------------
+    def flush(self):
+        """ Make sure all of the records written so far are stored """
+        pass
+
+    #----------------------------------------------------------------------
+    def close(self):
+        """ Flush and release the sink's resources """
+        self.flush()
+
+    #----------------------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    #----------------------------------------------------------------------
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+#======================================================================
+class JsonLinesSink(ResultSink):
+    """
+    Sink writing one JSON object per line to a file:
+
+        { "file" : MAYA_FILE, "analytic" : ANALYTIC_NAME, "data" : JSON_DATA }
+    """
+    def __init__(self, file_name, append=True, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        file_name: File to which the records are written
+        append:    If True add to the records already in the file, otherwise
+                   start a new file
+        """
+        super(JsonLinesSink, self).__init__( flush_interval=flush_interval )
+        self.file_name = file_name
+        self.__file = open( file_name, 'a' if append else 'w' )
+
+    #----------------------------------------------------------------------
+    def _write(self, maya_file, analytic_name, json_data):
+        self.__file.write( json.dumps( { 'file'     : maya_file,
+                                         'analytic' : analytic_name,
+                                         'data'     : json_data } ) )
+        self.__file.write( '\n' )
+
+    #----------------------------------------------------------------------
+    def flush(self):
+        if not self.__file.closed:
+            self.__file.flush()
+
+    #----------------------------------------------------------------------
+    def close(self):
+        if not self.__file.closed:
+            self.__file.close()
+
+#======================================================================
+class SQLiteSink(ResultSink):
+    """
+    Sink storing the records in a SQLite table with the columns
+    (file, analytic, data), data being the JSON text. A later record for the
+    same file and analytic replaces the earlier one. The current scene is
+    stored as the file SQLITE_CURRENT_SCENE.
+    """
+    def __init__(self, file_name, table='analytic_results', flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        file_name: SQLite database file
+        table:     Name of the table holding the records
+        """
+        super(SQLiteSink, self).__init__( flush_interval=flush_interval )
+        self.file_name = file_name
+        self.table = table
+        self.__connection = sqlite3.connect( file_name )
+        self.__connection.execute( 'CREATE TABLE IF NOT EXISTS {0:s} '
+                                   '(file TEXT NOT NULL, analytic TEXT NOT NULL, data TEXT, '
+                                   'PRIMARY KEY (file, analytic))'.format( table ) )
+        self.__connection.commit()
+
+    #----------------------------------------------------------------------
+    def _write(self, maya_file, analytic_name, json_data):
+        self.__connection.execute( 'INSERT OR REPLACE INTO {0:s} VALUES (?,?,?)'.format( self.table ),
+                                   (maya_file if maya_file is not None else SQLITE_CURRENT_SCENE,
+                                    analytic_name, json.dumps( json_data )) )
+
+    #----------------------------------------------------------------------
+    def flush(self):
+        if self.__connection is not None:
+            self.__connection.commit()
+
+    #----------------------------------------------------------------------
+    def close(self):
+        if self.__connection is not None:
+            self.__connection.commit()
+            self.__connection.close()
+            self.__connection = None
+
+#======================================================================
+class CallbackSink(ResultSink):
+    """
+    Sink handing every record to a callable as it is produced.
+    """
+    def __init__(self, callback):
+        """
+        callback: Called with ( MAYA_FILE, ANALYTIC_NAME, JSON_DATA )
+        """
+        super(CallbackSink, self).__init__( flush_interval=0 )
+        self.callback = callback
+
+    #----------------------------------------------------------------------
+    def _write(self, maya_file, analytic_name, json_data):
+        self.callback( maya_file, analytic_name, json_data )
+
+#======================================================================
+def read_json_lines(file_name, analytic_name=None):
+    """
+    Generator returning the ( MAYA_FILE, ANALYTIC_NAME, JSON_DATA ) records
+    of a file written by JsonLinesSink, one line at a time.
+
+    analytic_name: If not None only return the records of this analytic
+    """
+    with open(file_name, 'r') as record_fd:
+        for line in record_fd:
+            if not line.strip():
+                continue
+            record = json.loads( line )
+            if analytic_name is not None and record['analytic'] != analytic_name:
+                continue
+            yield (record['file'], record['analytic'], record['data'])
+
+#======================================================================
+def read_sqlite(file_name, analytic_name=None, table='analytic_results'):
+    """
+    Generator returning the ( MAYA_FILE, ANALYTIC_NAME, JSON_DATA ) records
+    of a database written by SQLiteSink, ordered by file.
+
+    analytic_name: If not None only return the records of this analytic
+    """
+    connection = sqlite3.connect( file_name )
+    try:
+        if analytic_name is None:
+            cursor = connection.execute( 'SELECT file, analytic, data FROM {0:s} '
+                                         'ORDER BY file, analytic'.format( table ) )
+        else:
+            cursor = connection.execute( 'SELECT file, analytic, data FROM {0:s} '
+                                         'WHERE analytic=? ORDER BY file'.format( table ),
+                                         (analytic_name,) )
+        for (maya_file, name, data) in cursor:
+            if maya_file == SQLITE_CURRENT_SCENE:
+                maya_file = None
+            yield (maya_file, name, json.loads( data ))
+    finally:
+        connection.close()
+
+#======================================================================
+def read_sink(file_name, analytic_name=None):
+    """
+    Read the records back from either kind of sink file, recognizing SQLite
+    databases by their extension (see SQLITE_EXTENSIONS).
+    """
+    if os.path.splitext(file_name)[1].lower() in SQLITE_EXTENSIONS:
+        return read_sqlite( file_name, analytic_name=analytic_name )
+    return read_json_lines( file_name, analytic_name=analytic_name )
@@ -0,0 +1,85 @@
+"""
+Worker process for the distributed mode of the analytics Runner (see the
+"jobs" member of Runner). Launched by the Runner as:
+
+    mayapy -m maya.analytics.runner_worker
+
+The protocol is line based JSON on stdin/stdout. The first line received is
+the run configuration:
+
+    { "analytics" : [ANALYTIC_NAMES], "options" : {OPTIONS}, "force" : BOOL, "debugging" : BOOL }
+
+Every following line is one file to analyze:
+
+    { "file" : MAYA_FILE, "modified" : FILE_MODIFIED_TIME, "directory" : ANALYTIC_DIRECTORY }
+
+and is answered, once the file has been analyzed, by RESULT_TAG followed by
+the rest of the line (anything an analytic printed without a newline may
+precede the tag on that line):
+
+    { "file" : MAYA_FILE, "results" : { ANALYTIC_NAME : JSON_DATA }, "error" : MESSAGE_OR_NULL }
+
+Anything else the analytics print is passed along by the Runner. The worker
+exits when its input is closed.
+"""
+import sys
+import json
+
+__all__ = ['RESULT_TAG', 'serve', 'main']
+
+# Prefix of the result lines, distinguishing them from other output
+RESULT_TAG = 'MAYA_ANALYTICS_RESULT:'
+
+#======================================================================
+def serve(input_stream, output_stream):
+    """
+    Answer the analysis requests read from input_stream on output_stream,
+    following the protocol described above. Does not require maya.standalone
+    so it can be driven in-process (e.g. against a stub maya.cmds).
+
+    input_stream:  File-like object the configuration and files are read from
+    output_stream: File-like object the results are written to
+    """
+    from .Runner import Runner
+    from .Logger import Logger
+
+    config_line = input_stream.readline()
+    if not config_line:
+        return
+    config = json.loads( config_line )
+
+    runner = Runner()
+    runner.analytics = config.get('analytics', [])
+    runner.force = config.get('force', False)
+    runner.logger = Logger( debugging=config.get('debugging', False) )
+    for (option_name, option_value) in config.get('options', {}).iteritems():
+        runner.set_option( option_name, option_value )
+
+    for line in iter(input_stream.readline, ''):
+        if not line.strip():
+            continue
+        task = json.loads( line )
+        result = { 'file' : task['file'], 'results' : {}, 'error' : None }
+        try:
+            result['results'] = runner.analyze_file( task['file'], task['modified'], task['directory'] )
+        except Exception, ex:
+            result['error'] = str(ex)
+        output_stream.write( RESULT_TAG + json.dumps( result ) + '\n' )
+        output_stream.flush()
+
+#======================================================================
+def main():
+    """
+    Entry point of the worker processes: start Maya in standalone mode and
+    serve requests on stdin/stdout.
+    """
+    import maya.standalone
+    maya.standalone.initialize( name='python' )
+    try:
+        serve( sys.stdin, sys.stdout )
+    finally:
+        maya.standalone.uninitialize()
+
+if __name__ == '__main__':
+    main()
+
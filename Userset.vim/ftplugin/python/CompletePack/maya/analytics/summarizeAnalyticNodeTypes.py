@@ -52,12 +52,19 @@ summaryNodeTypeCounts.csv
     BLAH there are 125 of them in FILEA, none of them in FILEB, and 50 of
     them in FILEC.  The rows are sorted by node type name, ascending
     alphabetically.
+
+Instead of scanning the directory the results can be read from the sinks the
+Runner streamed them to (see maya.analytics.result_sinks), in which case each
+analyzed file is a column of the summary. The node type counts are taken from
+the JSON output of the NodeTypes analytic, which already excludes the default
+nodes, so the defaultNodes.csv file is not used for those.
 """
 import os
 import csv
 import sys
 import getopt
 import operator
+from maya.analytics.result_sinks import read_sink
 
 # Name of the file to which the node types analytic dumped its results
 # Format is CSV file with four columns containing the count information:
@@ -67,6 +74,9 @@ import operator
 #    Count     : How many nodes of this exact type appeared in the file (including defaults)
 ANALYTIC_FILENAME = 'NodeTypes.csv'
 
+# Name of the analytic whose records are read from the result sinks
+ANALYTIC_NAME = 'NodeTypes'
+
 # Name of files where summarized results will be dumped
 DETAILED_FILENAME = 'summaryNodeTypes.csv'
 SUMMARY_FILENAME = 'summaryNodeTypeCounts.csv'
@@ -84,15 +94,19 @@ class NodeTypeSummary(object):
     Reads in the node type analytic results and summarizes them into
     a more comprehensible format.
     """
-    def __init__(self, rootDir):
+    def __init__(self, rootDir, sinks=None):
         """
         Create the object and initialize everything to be empty.
 
-        rootDir : Topmost directory in which to look for analytics
+        rootDir : Topmost directory in which to look for analytics, and in
+                  which the summaries are written
+        sinks   : List of result sink files (JSON Lines or SQLite) from which
+                  to read the analytics instead of walking rootDir
         """
         self.directoriesToSummarize = []
         self.defaultCounts = {}
         self.rootDir = rootDir
+        self.sinks = sinks or []
         self.maxRowCount = 0
         self.nodeTypeData = {}
         self.nodeTypeTotals = {}
@@ -150,10 +164,9 @@ class NodeTypeSummary(object):
 
     #======================================================================
     #
-    def __readAnalyticResults(self):
+    def __resetResults(self):
         """
-        Walk the directories and read in the results from the analytic
-        files located in those directories.
+        Empty out the summarized results before reading them in.
         """
         self.maxRowCount = 0
         self.nodeTypeData = {}
@@ -162,6 +175,38 @@ class NodeTypeSummary(object):
         self.nodeTypeCountTotals = {}
         self.nodeTypeAppearances = {}
 
+    #======================================================================
+    #
+    def __addNodeTypeCounts(self, column, myNodeTypeCounts):
+        """
+        Merge the node type counts of one analytic into the summarized results.
+
+        column           : Name of the summary column the counts appear in
+        myNodeTypeCounts : Dictionary of {NODE_TYPE : COUNT}, all counts > 0
+        """
+        if len(myNodeTypeCounts) > self.maxRowCount:
+            self.maxRowCount = len(myNodeTypeCounts)
+        # Since we have to extract by index to accommodate writing rows the
+        # dictionary has to be pulled out into two parallel lists.
+        self.nodeTypeData[column] = []
+        self.nodeTypeCounts[column] = {}
+        self.nodeTypeTotals[column] = 0
+        for nodeType,count in sorted(myNodeTypeCounts.iteritems(), key=operator.itemgetter(1), reverse=True):
+            self.nodeTypeData[column].append( nodeType )
+            self.nodeTypeCounts[column][nodeType] = count
+            self.nodeTypeCountTotals[nodeType] = self.nodeTypeCountTotals.get(nodeType, 0) + count
+            self.nodeTypeTotals[column] += count
+            self.nodeTypeAppearances[nodeType] = self.nodeTypeAppearances.get(nodeType,0) + 1
+
+    #======================================================================
+    #
+    def __readAnalyticResults(self):
+        """
+        Walk the directories and read in the results from the analytic
+        files located in those directories.
+        """
+        self.__resetResults()
+
         analyticsFound = 0
         for analyticDir in self.directoriesToSummarize:
             nodeTypeFile = os.path.join(analyticDir, ANALYTIC_FILENAME)
@@ -197,17 +242,54 @@ class NodeTypeSummary(object):
                         count = count - self.defaultCounts[row[0]]
                     if count > 0:
                         myNodeTypeCounts[row[0]]  = count
-                    if len(myNodeTypeCounts) > self.maxRowCount:
-                        self.maxRowCount = len(myNodeTypeCounts)
-            # Since we have to extract by index to accommodate writing rows the
-            # dictionary has to be pulled out into two parallel lists.
-            self.nodeTypeTotals[analyticDir] = 0
-            for nodeType,count in sorted(myNodeTypeCounts.iteritems(), key=operator.itemgetter(1), reverse=True):
-                self.nodeTypeData[analyticDir].append( nodeType )
-                self.nodeTypeCounts[analyticDir][nodeType] = count
-                self.nodeTypeCountTotals[nodeType] = self.nodeTypeCountTotals.get(nodeType, 0) + count
-                self.nodeTypeTotals[analyticDir] += count
-                self.nodeTypeAppearances[nodeType] = self.nodeTypeAppearances.get(nodeType,0) + 1
+            self.__addNodeTypeCounts( analyticDir, myNodeTypeCounts )
+
+    #======================================================================
+    #
+    @staticmethod
+    def __countNodeTypeTree(nodeType, treeLevel, myNodeTypeCounts):
+        """
+        Add the node counts of the hierarchical 'details' output of the
+        analytic, rooted at the level of nodeType, into myNodeTypeCounts.
+        """
+        count = len(treeLevel.get('nodes', []))
+        if count > 0:
+            myNodeTypeCounts[nodeType] = myNodeTypeCounts.get(nodeType, 0) + count
+        for childType,childLevel in treeLevel.get('children', {}).iteritems():
+            NodeTypeSummary.__countNodeTypeTree( childType, childLevel, myNodeTypeCounts )
+
+    #======================================================================
+    #
+    def __readSinkResults(self):
+        """
+        Read in the results of the node type analytic from the result sinks,
+        one record at a time. A file appearing in more than one record keeps
+        the most recent one.
+        """
+        self.__resetResults()
+
+        fileCounts = {}
+        for sink in self.sinks:
+            self.__debug( 'Processing sink %s' % sink )
+            for (mayaFile, _, jsonData) in read_sink( sink, analytic_name=ANALYTIC_NAME ):
+                output = jsonData.get('output', {})
+                myNodeTypeCounts = {}
+                if 'summary' in output:
+                    myNodeTypeCounts = dict( [(nodeType,count) for (nodeType,count) in output['summary'].iteritems() if count > 0] )
+                else:
+                    nodeTypes = output.get('nodeTypes', {})
+                    if 'node' in nodeTypes and isinstance(nodeTypes['node'], dict):
+                        self.__countNodeTypeTree( 'node', nodeTypes['node'], myNodeTypeCounts )
+                    else:
+                        for nodeType,nodes in nodeTypes.iteritems():
+                            if len(nodes) > 0:
+                                myNodeTypeCounts[nodeType] = len(nodes)
+                fileCounts[mayaFile or 'CurrentScene'] = myNodeTypeCounts
+
+        self.directoriesToSummarize = sorted( fileCounts.keys(), key=lambda x: x.lower() )
+        print 'Analyzing a total of %d files' % len(self.directoriesToSummarize)
+        for mayaFile in self.directoriesToSummarize:
+            self.__addNodeTypeCounts( mayaFile, fileCounts[mayaFile] )
 
     #======================================================================
     #
@@ -302,12 +384,16 @@ class NodeTypeSummary(object):
         """
         Main working method.
             Gather the list of default nodes for exclusion.
-            Read all of the analytic results from the files in the specified directory.
+            Read all of the analytic results from the files in the specified
+            directory, or from the result sinks if there are any.
             Report the summarized results
         """
-        self.__readDefaultNodes()
-        self.__findAnalyticDirectories()
-        self.__readAnalyticResults()
+        if self.sinks:
+            self.__readSinkResults()
+        else:
+            self.__readDefaultNodes()
+            self.__findAnalyticDirectories()
+            self.__readAnalyticResults()
         self.__writeDetailedSummary()
         self.__writeCountSummary()
 
@@ -321,27 +407,33 @@ HELP_INFO = """
 Usage: summarizeAnalyticNodeTypes.py [options] [rootDirectoryWithData]
        -h/--help    : Show this usage information
        -v/--verbose : Print details about how the analysis is progressing
+       -s/--sink    : Read the results from this result sink file (.jsonl or
+                      .db/.sqlite) instead of the directory, which is then
+                      only where the summaries go. Can be repeated.
        If no root directory is specified then use the current directory.
 """
 ROOT_DIR = '.'
 IS_VERBOSE = False
+SINKS = []
 
 try:
-    OPTS, ARGS = getopt.getopt(sys.argv[1:], "hv", ["help", "verbose"])
+    OPTS, ARGS = getopt.getopt(sys.argv[1:], "hvs:", ["help", "verbose", "sink="])
     if len(ARGS) > 0:
         ROOT_DIR = ARGS[0]
-    for opt, _ in OPTS:
+    for opt, ARG in OPTS:
         if opt in ("-h", "--help"):
             print HELP_INFO
             sys.exit()
         if opt in ("-v", "--verbose"):
             IS_VERBOSE = True
+        if opt in ("-s", "--sink"):
+            SINKS.append( ARG )
 except getopt.GetoptError as err:
     print str(err) # will print something like "option -a not recognized"
     print HELP_INFO
     sys.exit(2)
 
-SUMMARY = NodeTypeSummary(ROOT_DIR)
+SUMMARY = NodeTypeSummary(ROOT_DIR, SINKS)
 SUMMARY.verbose = IS_VERBOSE
 SUMMARY.createSummary()
 
@@ -5,6 +5,19 @@ Input to a commandPort is handled by a subclass of TcommandHandler.
 Customization of commandPort behaviour could be achieved by implementing
 a custom subclass, and adding it to commandHandlersMap, with a string key
 which will be passed to openCommandPort as the 'lang' parameter.
+
+By default a message ends when the client stops sending for a moment, which
+limits how fast commands can follow each other. Ports opened with
+framed=True use a framed protocol instead, in which every request and
+response is preceded by a header of two unsigned 32 bit big-endian integers:
+
+    REQUEST_ID LENGTH MESSAGE
+
+The response to a request carries the request's id, without the trailing
+response terminator. Clients can send many requests without waiting for
+their responses; all of the requests received at once are executed in a
+single trip to the main thread and their responses are returned in order.
+Request id 0 is reserved for the command output echoed to the client.
 """
 import maya
 maya.utils.loadStringResourcesForModule(__name__)
@@ -16,6 +29,7 @@ import select
 import socket
 import SocketServer
 import StringIO
+import struct
 import threading
 import Queue
 import time
@@ -35,6 +49,12 @@ commandHandlersMap = {}
 transformEncoding = 'utf8'
 # Query Maya encoding
 mayaEncoding = cmds.about(codeset=True)
+# Header of the messages of the framed protocol: request id, message length
+framedHeader = struct.Struct('!II')
+# Request id of the command output echoed with the framed protocol
+echoRequestId = 0
+# Maximum number of framed requests executed in one trip to the main thread
+framedBatchSize = 256
 
 class TcommandHandler(SocketServer.StreamRequestHandler):
     """
@@ -94,27 +114,143 @@ class TcommandHandler(SocketServer.StreamRequestHandler):
                 break
         self.request.settimeout(oldtimeout)
 
+        try:
+            return self.decodeMessage(data)
+        except ValueError, ex:
+            sys.stderr.write(ex.args[0] + "\n")
+            return None
+
+    def decodeMessage(self, data):
+        # Convert a received message from utf8 to the Maya encoding.
+        # Returns the converted message
+        # Raises ValueError holding the warning message if it could not be
+        # converted
+
         # First, decode received utf8 string
         try :
             data = data.strip().decode(transformEncoding)
         except :
-            warnMsg = maya.stringTable['y_CommandPort.kInvalidUTF8' ]
-            sys.stderr.write(warnMsg + "\n")
-            return None
+            raise ValueError(maya.stringTable['y_CommandPort.kInvalidUTF8' ])
         # Second, encode it to the local encoding
         try :
             data = data.encode(mayaEncoding)
         except :
             warnMsg = maya.stringTable['y_CommandPort.kEncodeToNativeFailed' ]
-            warnMsg = warnMsg % mayaEncoding
-            sys.stderr.write(warnMsg + "\n")
-            return None
+            raise ValueError(warnMsg % mayaEncoding)
 
         return data
 
+    def receiveFrames(self):
+        # Called by handleFramed() to accumulate the next batch of requests.
+        # Blocks until one complete request is received, then takes the other
+        # requests the client already sent, up to framedBatchSize of them.
+        # Incomplete requests are kept for the next call.
+        # Returns a list of (request id, message, error), None if the request
+        # should be terminated. The message is None and error holds the
+        # warning for the requests that could not be decoded.
+        # Raises socket.timeout if no data is read
+
+        frames = []
+        while True:
+            # split off the complete frames
+            offset = 0
+            while len(frames) < framedBatchSize and len(self.framedData) - offset >= framedHeader.size:
+                (requestId, length) = framedHeader.unpack_from(self.framedData, offset)
+                end = offset + framedHeader.size + length
+                if len(self.framedData) < end:
+                    break
+                frames.append((requestId, self.framedData[offset + framedHeader.size:end]))
+                offset = end
+            self.framedData = self.framedData[offset:]
+
+            # stop when the batch is full or nothing else is waiting
+            if len(frames) >= framedBatchSize:
+                break
+            if len(frames) > 0 and not select.select([self.request], [], [], 0)[0]:
+                break
+            nextdata = self.request.recv(self.server.bufferSize)
+            if not nextdata:
+                # connection closed, still answer what was received
+                if len(frames) > 0:
+                    break
+                return None
+            self.framedData += nextdata
+
+        requests = []
+        for (requestId, data) in frames:
+            try:
+                requests.append((requestId, self.decodeMessage(data), None))
+            except ValueError, ex:
+                # answered with the warning, the other requests still run
+                sys.stderr.write(ex.args[0] + "\n")
+                requests.append((requestId, None, ex.args[0]))
+        return requests
+
+    def _executeBatch(self, requests):
+        # Called in the main thread by handleFramed() to execute a batch of
+        # requests. Returns their framed responses.
+        responses = []
+        for (requestId, data, error) in requests:
+            if error is not None:
+                responses.append(frameMessage(requestId, unicode(error).encode(transformEncoding)))
+                continue
+            self.data = data
+            try:
+                response = self._languageExecute()
+            except Exception,ex:
+                # one failure must not lose the other responses of the batch
+                response = unicode(ex).encode(transformEncoding)
+            if response.endswith(self.resp_term):
+                response = response[:-len(self.resp_term)]
+            responses.append(frameMessage(requestId, response))
+        return ''.join(responses)
+
+    def handleFramed(self):
+        # Called by handle() when the port uses the framed protocol
+
+        self.framedData = ''
+        try:
+            if self.server.echoOutput:
+                self.request.settimeout(1.5)
+            while not self.server.die:
+                # check for pending command messages
+                if self.server.echoOutput:
+                    messages = []
+                    while not self.server.commandMessageQueue.empty():
+                        messages.append(frameMessage(echoRequestId, self.server.commandMessageQueue.get()))
+                    if messages:
+                        self.wfile.write(''.join(messages))
+                # get the requests received so far
+                try:
+                    requests = self.receiveFrames()
+                except socket.timeout:
+                    continue
+                if requests is None:
+                    break
+                # check if we need to display the security warning
+                # posting the dialog also has to be done in the gui thread
+                if self.server.securityWarning:
+                    self.data = '\n'.join([data for (requestId, data, error) in requests if error is None])
+                    utils.executeInMainThreadWithResult(self.postSecurityWarning)
+                    if self.dialog_result is False:
+                        denied = maya.stringTable['y_CommandPort.kExecutionDeniedByMaya' ]
+                        self.wfile.write(''.join([frameMessage(requestId, denied) for (requestId, data, error) in requests]))
+                        return
+                    elif self.dialog_result is True:
+                        self.server.securityWarning = False
+
+                # execute the whole batch and write all of its responses
+                self.wfile.write(utils.executeInMainThreadWithResult(self._executeBatch, requests))
+        except socket.error:
+            # a socket exception is a normal way to terminate the connection
+            pass
+
     def handle(self):
         # Called to handle each connection request
 
+        if self.server.framed:
+            self.handleFramed()
+            return
         try:
             # if we are echoing output, we hold on to the first request
             # and poll the socket for pending command messages.
@@ -281,6 +417,15 @@ class TpythonCommandHandler(TcommandHandler):
         outp = outp.encode(transformEncoding)
         return (outp + self.resp_term)
 
+def frameMessage(requestId, message):
+    # Prefix a message with the framed protocol header
+    #
+    # requestId - id of the request this message answers
+    # message   - the message string, unicode is sent as utf8
+    if isinstance(message, unicode):
+        message = message.encode(transformEncoding)
+    return framedHeader.pack(requestId, len(message)) + message
+
 def commandOutputCallback(message, msgType, qu):
     # Command callback function
     # When new output comes in, we add the output 
@@ -343,7 +488,7 @@ class TcommandServer(threading.Thread):
 commandHandlersMap['python'] = TpythonCommandHandler
 commandHandlersMap['mel'] = TMELCommandHandler
 
-def openCommandPort(portName, lang, prefix, sendResults, returnNbCommands, echoOutput, bufferSize, securityWarning, pickleOutput = False):
+def openCommandPort(portName, lang, prefix, sendResults, returnNbCommands, echoOutput, bufferSize, securityWarning, pickleOutput = False, framed = False):
     """
     Open a command port with the given name
     Can be INET (host:port) or Unix local format (/tmp/endpoint)
@@ -367,6 +512,8 @@ def openCommandPort(portName, lang, prefix, sendResults, returnNbCommands, echoO
     securityWarning  - True means issue a security warning
     pickleOutput     - True means the return string for python command would be
                        pickled, default is false
+    framed           - True means use the framed protocol described at the top
+                       of this module, default is false
     Returns error string on failure, None on success
     """
     # make sure port name is encodable as str
@@ -513,6 +660,7 @@ def openCommandPort(portName, lang, prefix, sendResults, returnNbCommands, echoO
         socketServer.endpoint =         endpoint              
         socketServer.cleanup =          cleanup
         socketServer.pickleOutput =     pickleOutput
+        socketServer.framed =           framed
 
         # create the command server and start it
         cmdServer = TcommandServer(socketServer)
@@ -0,0 +1,388 @@
+"""
+Client of the command ports opened with the framed protocol (see the
+framed argument of CommandPort.openCommandPort).
+
+A TcommandClient keeps one connection to a command port and pipelines the
+commands sent to it: send() returns a TcommandResult right away and a
+reader thread fills the results in as the responses arrive, so many
+commands can be in flight without waiting on each other. A TcommandPool
+drives several Maya sessions at once, found in the server registry or
+given by name. A command port serves one connection at a time so a
+session should only be driven by one client.
+
+Nothing in here needs Maya, so a controller can run in any Python:
+
+    from maya.app.general.CommandPortClient import TcommandPool
+    pool = TcommandPool(['host1:50007', 'host2:50007'], pickleOutput=True)
+    frames = pool.map(['cmds.currentTime(%d)' % i for i in range(100)])
+    pool.close()
+
+A session accepts at most maxPending commands without a response; send()
+blocks beyond that so a slow session cannot be flooded. A broken
+connection is opened again by the next send(). The commands that were in
+flight when it broke fail with a TcommandError rather than being sent
+again, since they may already have been executed.
+"""
+import cPickle as PICKLE
+import errno
+import itertools
+import Queue
+import socket
+import struct
+import sys
+import threading
+import time
+
+__all__ = [ 'TcommandError', 'TcommandResult', 'TcommandClient', 'TcommandPool',
+            'parseEndpoint', 'registeredEndpoints' ]
+
+# Header of the messages of the framed protocol: request id, message length
+# (must match CommandPort.framedHeader)
+framedHeader = struct.Struct('!II')
+# Request id of the command output echoed by the server
+echoRequestId = 0
+# Transfer string encoding
+transformEncoding = 'utf8'
+
+class TcommandError(RuntimeError):
+    """
+    Raised by TcommandResult.result() when a command got no response
+    """
+    pass
+
+class TcommandResult(object):
+    """
+    Response to one command sent by a TcommandClient, filled in by the
+    client's reader thread.
+    """
+    def __init__(self, command):
+        self.command = command
+        self.__event = threading.Event()
+        self.__value = None
+        self.__error = None
+        self.__callbacks = []
+        self.__lock = threading.Lock()
+
+    def done(self):
+        """ Returns True when the response or an error was received """
+        return self.__event.is_set()
+
+    def result(self, timeout=None):
+        """
+        Wait for the response and return it
+        timeout - seconds to wait, None to wait forever
+        Raises TcommandError if the command failed to get a response
+        """
+        if not self.__event.wait(timeout):
+            raise TcommandError('No response to "%s" after %g seconds' % (self.command, timeout))
+        if self.__error is not None:
+            raise self.__error
+        return self.__value
+
+    def addDoneCallback(self, callback):
+        """
+        Call callback(result) once the result is done, right away if it
+        already is. Callbacks run in the client's reader thread.
+        """
+        with self.__lock:
+            if not self.__event.is_set():
+                self.__callbacks.append(callback)
+                return
+        callback(self)
+
+    def _complete(self, value=None, error=None):
+        # Called by the client when the response or an error is in
+        with self.__lock:
+            if self.__event.is_set():
+                return
+            self.__value = value
+            self.__error = error
+            self.__event.set()
+            callbacks = self.__callbacks
+            self.__callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+def parseEndpoint(portName):
+    """
+    Convert a command port name in the format used by openCommandPort to a
+    (family, address) pair usable by socket.connect
+        'host:port', ':port', '[ipv6]:port' or (host, port) - INET port
+        '/path' or 'name' - Unix domain socket, relative to /tmp
+    A (host, port) tuple is returned as-is.
+    """
+    if isinstance(portName, tuple):
+        return (socket.AF_INET6 if ':' in portName[0] else socket.AF_INET, portName)
+    if portName.startswith('[') and portName.rfind(']') > 0:
+        closing = portName.rfind(']')
+        return (socket.AF_INET6, (portName[1:closing], int(portName[closing+2:])))
+    colonIx = portName.rfind(':')
+    if colonIx >= 0:
+        host = portName[0:colonIx] or 'localhost'
+        return (socket.AF_INET, (host, int(portName[colonIx+1:])))
+    if portName[0] == '/':
+        return (socket.AF_UNIX, portName)
+    return (socket.AF_UNIX, '/tmp/' + portName)
+
+def registeredEndpoints():
+    """
+    Get the command ports of the Maya sessions running on this machine
+    from the server registry (Windows only, where command ports named like
+    Unix sockets are registered there).
+    Returns a dictionary of name -> (host, port), empty elsewhere
+    """
+    if not sys.platform.startswith('win'):
+        return {}
+    # only loads its string resources, which need Maya, when registering
+    import ServerRegistryMMap
+    endpoints = {}
+    for (name, port) in ServerRegistryMMap.getInstance().servers():
+        endpoints[name.rstrip('\x00')] = ('localhost', port)
+    return endpoints
+
+class TcommandClient(object):
+    """
+    Pipelined connection to one framed command port
+
+    portName          - name of the port, see parseEndpoint()
+    maxPending        - number of commands sent without a response after
+                        which send() blocks
+    pickleOutput      - True if the port was opened with pickleOutput, the
+                        responses are then unpickled
+    reconnectAttempts - number of times to try opening the connection
+    reconnectDelay    - seconds between two attempts
+    timeout           - seconds to wait for the connection to open
+    """
+    def __init__(self, portName, maxPending=64, pickleOutput=False, reconnectAttempts=3, reconnectDelay=0.5, timeout=10.0):
+        self.portName = portName
+        (self.family, self.address) = parseEndpoint(portName)
+        self.maxPending = maxPending
+        self.pickleOutput = pickleOutput
+        self.reconnectAttempts = max(1, reconnectAttempts)
+        self.reconnectDelay = reconnectDelay
+        self.timeout = timeout
+        # command output echoed by the server
+        self.echoQueue = Queue.Queue()
+        self.__socket = None
+        self.__reader = None
+        self.__pending = {}
+        self.__lock = threading.Lock()
+        # held while a request is written, so that requests are not interleaved
+        self.__sendLock = threading.Lock()
+        self.__slots = threading.Semaphore(maxPending)
+        self.__ids = itertools.count(1)
+
+    def connect(self):
+        """
+        Open the connection unless it already is, retrying up to
+        reconnectAttempts times
+        Raises socket.error if it could not be opened
+        """
+        with self.__lock:
+            if self.__socket is not None:
+                return
+            for attempt in range(self.reconnectAttempts):
+                try:
+                    if self.family == socket.AF_UNIX:
+                        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                        sock.settimeout(self.timeout)
+                        sock.connect(self.address)
+                    else:
+                        sock = socket.create_connection(self.address, self.timeout)
+                        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    break
+                except socket.error:
+                    if attempt + 1 == self.reconnectAttempts:
+                        raise
+                    time.sleep(self.reconnectDelay)
+            sock.settimeout(None)
+            self.__socket = sock
+            self.__reader = threading.Thread(target=self.__readResponses, args=(sock,))
+            self.__reader.daemon = True
+            self.__reader.start()
+
+    def close(self):
+        """ Close the connection, failing the commands still in flight """
+        with self.__lock:
+            sock = self.__socket
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+            self.__disconnect(sock, TcommandError('Connection to %s closed' % str(self.portName)))
+
+    def pendingCount(self):
+        """ Returns the number of commands waiting for their response """
+        with self.__lock:
+            return len(self.__pending)
+
+    def send(self, command):
+        """
+        Send a command without waiting for its response. Blocks while
+        maxPending commands are in flight, reconnects if needed.
+        command - string to execute, unicode is sent as utf8
+        Returns the TcommandResult of the command
+        """
+        self.__slots.acquire()
+        result = TcommandResult(command)
+        result.addDoneCallback(lambda done: self.__slots.release())
+        try:
+            self.connect()
+            if isinstance(command, unicode):
+                command = command.encode(transformEncoding)
+            with self.__lock:
+                sock = self.__socket
+                if sock is None:
+                    raise socket.error(errno.ENOTCONN, 'Connection to %s closed' % str(self.portName))
+                requestId = self.__nextId()
+                self.__pending[requestId] = result
+            # write without the lock, which the reader thread needs to take the
+            # responses in so that the server can go on reading the requests
+            try:
+                with self.__sendLock:
+                    sock.sendall(framedHeader.pack(requestId, len(command)) + command)
+            except socket.error:
+                with self.__lock:
+                    self.__pending.pop(requestId, None)
+                raise
+        except socket.error,ex:
+            result._complete(error=TcommandError('Could not send "%s" to %s: %s' % (result.command, str(self.portName), ex)))
+        return result
+
+    def execute(self, command, timeout=None):
+        """
+        Send a command and wait for its response
+        Returns the response, raises TcommandError on failure
+        """
+        return self.send(command).result(timeout)
+
+    def decodeResponse(self, response):
+        # Convert a response to the value returned by TcommandResult.result()
+        # Errors and denied executions are not pickled even with pickleOutput
+        if self.pickleOutput:
+            try:
+                return PICKLE.loads(response)
+            except Exception:
+                pass
+        return response.decode(transformEncoding)
+
+    def __nextId(self):
+        # Called with the lock held, request ids wrap around and skip the
+        # one reserved for echoed output
+        while True:
+            requestId = self.__ids.next() & 0xffffffff
+            if requestId != echoRequestId and requestId not in self.__pending:
+                return requestId
+
+    def __readResponses(self, sock):
+        # Reader thread, matches the responses with their commands until the
+        # connection closes
+        data = ''
+        error = None
+        try:
+            while True:
+                nextdata = sock.recv(65536)
+                if not nextdata:
+                    break
+                data += nextdata
+                offset = 0
+                while len(data) - offset >= framedHeader.size:
+                    (requestId, length) = framedHeader.unpack_from(data, offset)
+                    end = offset + framedHeader.size + length
+                    if len(data) < end:
+                        break
+                    response = data[offset + framedHeader.size:end]
+                    offset = end
+                    if requestId == echoRequestId:
+                        self.echoQueue.put(response.decode(transformEncoding))
+                        continue
+                    with self.__lock:
+                        result = self.__pending.pop(requestId, None)
+                    if result is not None:
+                        result._complete(value=self.decodeResponse(response))
+                data = data[offset:]
+        except socket.error,ex:
+            error = ex
+        self.__disconnect(sock, TcommandError('Connection to %s lost%s' % (str(self.portName), ': %s' % error if error else '')))
+
+    def __disconnect(self, sock, error):
+        # Forget a broken connection and fail the commands sent on it
+        with self.__lock:
+            if self.__socket is not sock:
+                return
+            self.__socket = None
+            pending = self.__pending
+            self.__pending = {}
+        try:
+            sock.close()
+        except socket.error:
+            pass
+        for result in pending.itervalues():
+            result._complete(error=error)
+
+class TcommandPool(object):
+    """
+    Set of TcommandClient connected to several Maya sessions
+
+    portNames         - list of port names, see parseEndpoint(), or a
+                        dictionary of session name -> port name. When None
+                        the sessions of registeredEndpoints() are used.
+    connectionOptions - keyword arguments passed to every TcommandClient
+    """
+    def __init__(self, portNames=None, **connectionOptions):
+        if portNames is None:
+            portNames = registeredEndpoints()
+        if not isinstance(portNames, dict):
+            portNames = dict([(str(portName), portName) for portName in portNames])
+        self.clients = dict([(name, TcommandClient(portName, **connectionOptions))
+                             for (name, portName) in portNames.iteritems()])
+        self.__next = itertools.cycle(sorted(self.clients.keys()))
+
+    def sessions(self):
+        """ Returns the names of the sessions in the pool """
+        return sorted(self.clients.keys())
+
+    def send(self, session, command):
+        """ Send a command to one session, returns its TcommandResult """
+        return self.clients[session].send(command)
+
+    def broadcast(self, command, timeout=None):
+        """
+        Execute a command in every session at once
+        Returns a dictionary of session -> response or TcommandError
+        """
+        results = dict([(name, client.send(command)) for (name, client) in self.clients.iteritems()])
+        return dict([(name, self.__collect(result, timeout)) for (name, result) in results.iteritems()])
+
+    def dispatch(self, command):
+        """
+        Send a command to the least busy session, in turn among the ones
+        equally busy
+        Returns its TcommandResult
+        """
+        names = [self.__next.next() for name in self.clients]
+        name = min(names, key=lambda name: self.clients[name].pendingCount())
+        return self.clients[name].send(command)
+
+    def map(self, commands, timeout=None):
+        """
+        Execute independent commands spread over the sessions
+        Returns the list of responses in the order of the commands, with
+        TcommandError in place of the failed ones
+        """
+        results = [self.dispatch(command) for command in commands]
+        return [self.__collect(result, timeout) for result in results]
+
+    def close(self):
+        """ Close every connection """
+        for client in self.clients.itervalues():
+            client.close()
+
+    @staticmethod
+    def __collect(result, timeout):
+        # Wait for a result, returning the error instead of raising it
+        try:
+            return result.result(timeout)
+        except TcommandError,ex:
+            return ex
@@ -3,12 +3,31 @@ Provides an interface to the commandPort mmap registry file which is used to
 keep track of commandPorts on Windows.
 """
 import maya
-maya.utils.loadStringResourcesForModule(__name__)
 
 
+import contextlib
+import itertools
 import mmap
 import socket
 import struct
+import threading
+import time
+import zlib
+
+_stringResourcesLoaded = False
+
+def getString(key):
+    """
+    Returns the string resource of the given key. The resources of this
+    module are loaded on first use rather than on import, so that the
+    registry can be read from outside of Maya (see CommandPortClient).
+    """
+    global _stringResourcesLoaded
+    if not _stringResourcesLoaded:
+        from maya import utils
+        utils.loadStringResourcesForModule(__name__)
+        _stringResourcesLoaded = True
+    return maya.stringTable[key]
 
 def getInstance():
     """ 
@@ -45,7 +64,7 @@ def registerServer(serverName, addrFamily):
         except socket.error:
             continue
     if s is not None:
-        raise RuntimeError(maya.stringTable['y_ServerRegistryMMap.kCouldNotFindFreePort'])
+        raise RuntimeError(getString('y_ServerRegistryMMap.kCouldNotFindFreePort'))
     activeServers = getInstance()
     activeServers.addServer(serverName, sockAddr[1])
     return sockAddr
@@ -54,120 +73,325 @@ def registerServer(serverName, addrFamily):
 class ServerRegistryMMap:
     """
     Windows only, manage the server registry mmap file.  This maps command 
-    port names to port numbers. Is not intended to be used between 
-    Maya instances.
+    port names to port numbers. It is shared by all of the Maya processes
+    of the session.
     """
-    # mmap file is 3808 bytes long and
-    # structured as:
-    # bits 0 - 31 : bit mask indicating active servers
-    # 32 sockmaps: stored in network byte-order
+    # mmap file is 32 + 1024 * 112 bytes long and
+    # structured as, in network byte-order:
+    # struct header {
+    #   char magic[4];          'MSRG'
+    #   unsigned int version;
+    #   unsigned int capacity;  number of records
+    #   unsigned int generation;
+    #   unsigned int count;     number of active records
+    #   unsigned int deleted;   number of deleted records
+    #   8 bytes unused space
+    # }
+    # capacity sockmaps:
     # struct sockmap {
-    #   char unix_path[108];
+    #   unsigned char state;    empty, active or deleted
+    #   1 byte unused space
     #   unsigned short port;
+    #   char unix_path[108];
     # }
-    # 220 bytes usused space
+    #
+    # The records are an open-addressing hash table keyed on the crc32 of
+    # the name, with linear probing. Deleted records are kept as tombstones
+    # so that the probes of the other names still find them, until the
+    # table is compacted.
+    #
+    # Writers hold a named mutex so that the Maya processes update the file
+    # one at a time, and make the generation odd while they write. Readers
+    # take no lock, they read again when the generation was odd or changed
+    # while they were reading.
     #
     instance = None
+    mmapName = 'Maya_Unix_Socket_Share_2'
+    mutexName = u'Maya_Unix_Socket_Share_2_Lock'
+    magic = 'MSRG'
+    version = 2
+    capacity = 1024
+    # records are compacted when active and deleted ones fill this fraction
+    maxLoad = 0.75
+    stateEmpty = 0
+    stateActive = 1
+    stateDeleted = 2
+    # seconds to wait for the other writers
+    mutexTimeout = 5.0
+    # reads of an odd generation before it is taken as left by a dead writer
+    maxReadTries = 1000
+
     def __init__(self):
-        mmap_filename = 'Maya_Unix_Socket_Share'
-        self.recordStruct = struct.Struct('!108sH')
-        sockmap_num_records = 34
-        self.bitmapStruct = struct.Struct('I')
-        mmap_bytes = self.bitmapStruct.size + sockmap_num_records * self.recordStruct.size
-        self._mfile = mmap.mmap(-1, length=mmap_bytes, tagname=mmap_filename, access=mmap.ACCESS_WRITE)
-    
+        self.headerStruct = struct.Struct('!4sIIIII8x')
+        self.generationOffset = 12
+        self.recordStruct = struct.Struct('!BxH108s')
+        mmap_bytes = self.headerStruct.size + self.capacity * self.recordStruct.size
+        self._mfile = mmap.mmap(-1, length=mmap_bytes, tagname=self.mmapName, access=mmap.ACCESS_WRITE)
+        self._mutex = self.openMutex()
+        self.__threadLock = threading.Lock()
+        with self.writeLock():
+            if self._mfile[0:len(self.magic)] != self.magic:
+                self.setHeader(0, 0)
+
+    def openMutex(self):
+        """ Opens the named mutex shared by the writers, None if there is none """
+        try:
+            import ctypes
+            return ctypes.windll.kernel32.CreateMutexW(None, False, self.mutexName)
+        except (ImportError, AttributeError):
+            return None
+
+    @contextlib.contextmanager
+    def writeLock(self):
+        """ Context manager for the updates of the file """
+        with self.__threadLock:
+            if self._mutex is None:
+                yield
+                return
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            # WAIT_OBJECT_0 or WAIT_ABANDONED
+            result = kernel32.WaitForSingleObject(self._mutex, int(self.mutexTimeout * 1000))
+            if result not in (0x0, 0x80):
+                raise RuntimeError('Timed out waiting for the server registry')
+            try:
+                if result == 0x80:
+                    # the previous writer died holding the mutex, possibly
+                    # in the middle of an update
+                    self.repairGeneration()
+                yield
+            finally:
+                kernel32.ReleaseMutex(self._mutex)
+
     def offsetToRecord(self, i):
         """ returns the byte offset to the ith record """
-        return self.bitmapStruct.size + i * self.recordStruct.size
-        
-    def getBitmap(self):
-        """ Gets the active server bitmap """
-        self._mfile.seek(0)
-        return self.bitmapStruct.unpack(self._mfile.read(self.bitmapStruct.size))[0]
-    
-    def setBitmap(self,bitmap):
-        """ Updates the active server bitmap """
-        self._mfile.seek(0)
-        self._mfile.write(self.bitmapStruct.pack(bitmap))
-        self._mfile.flush(0, self.bitmapStruct.size)
-    
+        return self.headerStruct.size + i * self.recordStruct.size
+
+    def getGeneration(self):
+        """ Gets the generation counter, odd while the file is being updated """
+        return struct.unpack('!I', self._mfile[self.generationOffset:self.generationOffset + 4])[0]
+
+    def getHeader(self):
+        """ Gets the (count, deleted) numbers of records """
+        header = self.headerStruct.unpack(self._mfile[0:self.headerStruct.size])
+        return header[4:6]
+
+    def setHeader(self, count, deleted):
+        """ Updates the header, called with the write lock held """
+        header = self.headerStruct.pack(self.magic, self.version, self.capacity, self.getGeneration(), count, deleted)
+        self._mfile[0:self.headerStruct.size] = header
+        self._mfile.flush(0, self.headerStruct.size)
+
+    @contextlib.contextmanager
+    def update(self):
+        """
+        Context manager for a change of the records. Holds the write lock
+        and keeps the generation odd until the change is done.
+        """
+        with self.writeLock():
+            generation = self.getGeneration()
+            self.setGeneration(generation | 1)
+            try:
+                yield
+            finally:
+                self.setGeneration((generation | 1) + 1)
+                self._mfile.flush()
+
+    def setGeneration(self, generation):
+        """ Updates the generation counter, called with the write lock held """
+        self._mfile[self.generationOffset:self.generationOffset + 4] = struct.pack('!I', generation & 0xffffffff)
+
+    def repairGeneration(self):
+        """
+        Makes the generation even again if a writer died before finishing
+        its update, called with the write lock held
+        """
+        generation = self.getGeneration()
+        if generation & 1:
+            self.setGeneration(generation + 1)
+            self._mfile.flush(0, self.headerStruct.size)
+
+    def consistentRead(self, reader):
+        """
+        Returns reader(), called again until no writer changed the file
+        while it ran
+        """
+        tries = 0
+        while True:
+            generation = self.getGeneration()
+            if generation & 1:
+                tries += 1
+                if tries < self.maxReadTries:
+                    time.sleep(0)
+                    continue
+                # no update runs while we hold the write lock, so a
+                # generation still odd then was left by a dead writer
+                with self.writeLock():
+                    self.repairGeneration()
+                tries = 0
+                continue
+            value = reader()
+            if self.getGeneration() == generation:
+                return value
+
+    def getRecord(self, i):
+        """ Gets the ith (state, port, name) record, name is padded with zeros to 108 bytes """
+        offset = self.offsetToRecord(i)
+        return self.recordStruct.unpack(self._mfile[offset:offset + self.recordStruct.size])
+
+    def setRecord(self, i, state, serverName, port):
+        """ Updates the ith record, called with the write lock held """
+        offset = self.offsetToRecord(i)
+        self._mfile[offset:offset + self.recordStruct.size] = self.recordStruct.pack(state, port, serverName)
+
     def getServer(self, i):
         """ Gets the ith server record, name is padded with zeros to 108 bytes """
-        self._mfile.seek(self.offsetToRecord(i))
-        record = self.recordStruct.unpack(self._mfile.read(self.recordStruct.size))
-        return record
-    
+        (state, port, name) = self.getRecord(i)
+        return (name, port)
+
     def setServer(self, i, serverName, port):
         """ Updates the ith server record """
-        offset = self.offsetToRecord(i)
-        self._mfile.seek(offset)
-        self._mfile.write(self.recordStruct.pack(serverName,port))
-        self._mfile.flush(offset, self.recordStruct.size)
-        
+        with self.update():
+            self.setRecord(i, self.stateActive, serverName, port)
+
+    def probe(self, serverName):
+        """ Returns the record indices to look at for serverName, in order """
+        start = (zlib.crc32(serverName) & 0xffffffff) % self.capacity
+        return itertools.chain(xrange(start, self.capacity), xrange(0, start))
+
+    def findRecord(self, serverName):
+        """
+        Returns (index of the server name or -1, index of the first record
+        it could be added to or None)
+        """
+        freeSlot = None
+        for i in self.probe(serverName):
+            (state, port, name) = self.getRecord(i)
+            if state == self.stateEmpty:
+                return (-1, i if freeSlot is None else freeSlot)
+            if state == self.stateDeleted:
+                if freeSlot is None:
+                    freeSlot = i
+            elif name.rstrip('\x00') == serverName:
+                return (i, freeSlot)
+        return (-1, freeSlot)
+
     def findServer(self, serverName):
         """ 
         Returns the index of the server name if it is already in the file
         otherwise return -1
         """
-        for i in range(32):
-            if self.getBitmap() & (0x1 << i):
-                record = self.getServer(i)
-                if record[0].rstrip('\x00') == serverName:
-                    return i
-        return -1
-    
-    def firstFreeSlot(self):
-        """ Returns the first free slot, or None on failure """
-        for i in range(32):
-            if 0 == (self.getBitmap() & (0x1 << i)):
-                return i
-        return None
-    
+        return self.consistentRead(lambda: self.findRecord(serverName)[0])
+
     def addServer(self, serverName, port):
         """ Add a new server record to the file """
-        if self.findServer(serverName) >= 0:
-            msg = maya.stringTable['y_ServerRegistryMMap.kCommandPortStillActive' ]
-            raise RuntimeError(msg % serverName)
-        i = self.firstFreeSlot()
-        if i is None:
-            # no free slots!
-            msg = maya.stringTable['y_ServerRegistryMMap.kNoMoreCommandPortsAvailible' ]
-            raise RuntimeError(msg)
-        self.setBitmap(self.getBitmap() | (0x1 << i))
-        self.setServer(i, serverName, port)
+        with self.update():
+            (count, deleted) = self.getHeader()
+            if count + deleted + 1 > self.maxLoad * self.capacity:
+                self.rehash()
+                (count, deleted) = self.getHeader()
+            (i, freeSlot) = self.findRecord(serverName)
+            if i >= 0:
+                msg = getString('y_ServerRegistryMMap.kCommandPortStillActive')
+                raise RuntimeError(msg % serverName)
+            if freeSlot is None or count + 1 > self.maxLoad * self.capacity:
+                # no free slots!
+                msg = getString('y_ServerRegistryMMap.kNoMoreCommandPortsAvailible')
+                raise RuntimeError(msg)
+            if self.getRecord(freeSlot)[0] == self.stateDeleted:
+                deleted -= 1
+            self.setRecord(freeSlot, self.stateActive, serverName, port)
+            self.setHeader(count + 1, deleted)
 
     def removeServer(self, serverName):
         """ 
         remove a server from the file
         Returns True on success, False otherwise 
         """
-        i = self.findServer(serverName)
-        if i >= 0:
-            self.setBitmap(self.getBitmap() & ~(0x1 << i))
-            self.setServer(i, '\x00', 0)
+        with self.update():
+            i = self.findRecord(serverName)[0]
+            if i < 0:
+                return False
+            (count, deleted) = self.getHeader()
+            self.setRecord(i, self.stateDeleted, '\x00', 0)
+            deleted += 1
+            # tombstones followed by an empty record are not needed by any probe
+            while self.getRecord((i + 1) % self.capacity)[0] == self.stateEmpty \
+                    and self.getRecord(i)[0] == self.stateDeleted:
+                self.setRecord(i, self.stateEmpty, '\x00', 0)
+                deleted -= 1
+                i = (i - 1) % self.capacity
+            self.setHeader(count - 1, deleted)
             return True
-        return False
-    
-    def servers(self):
-        """ Get the list of active servers """
+
+    def rehash(self, keep=None):
+        """
+        Rebuild the table without its deleted records, called with the
+        write lock held
+        keep - function called with (name, port) telling if a server is kept
+        """
+        active = [record for record in self.records() if keep is None or keep(record[0].rstrip('\x00'), record[1])]
+        for i in xrange(self.capacity):
+            self.setRecord(i, self.stateEmpty, '\x00', 0)
+        for (name, port) in active:
+            freeSlot = self.findRecord(name.rstrip('\x00'))[1]
+            self.setRecord(freeSlot, self.stateActive, name, port)
+        self.setHeader(len(active), 0)
+
+    def compact(self, pruneDead=False):
+        """
+        Rebuild the table without its deleted records, optionally also
+        removing the servers of the Maya processes that exited without
+        closing their command port
+        pruneDead - True means remove the servers nothing listens to
+        Returns the number of servers removed
+        """
+        keep = None
+        if pruneDead:
+            keep = lambda name, port: isListening(port)
+        with self.update():
+            before = self.getHeader()[0]
+            self.rehash(keep)
+            return before - self.getHeader()[0]
+
+    def records(self):
+        """ Get the active server records, not protected against writers """
         lst = []
-        for i in range(32):
-            if self.getBitmap() & (0x1 << i):
-                lst.append(self.getServer(i))
+        for i in xrange(self.capacity):
+            (state, port, name) = self.getRecord(i)
+            if state == self.stateActive:
+                lst.append((name, port))
         return lst
+
+    def servers(self):
+        """ Get the list of active servers """
+        return self.consistentRead(self.records)
     
     def __str__(self):
-        s = 'bitmap = '
-        for i in range(32):
-            if self.getBitmap() & (0x1 << (31-i)):
-                s += '1'
-            else:
-                s += '0'
-        s += '\n'
+        (count, deleted) = self.consistentRead(self.getHeader)
+        s = 'generation = %d, %d/%d active, %d deleted\n' % (self.getGeneration(), count, self.capacity, deleted)
         lst = self.servers()
         for name,port in lst:
             s += '%s [%d]\n' %(name.rstrip('\x00'),port)
         return s
+
+def isListening(port):
+    """ Returns True if a server is listening to the given local port """
+    try:
+        s = socket.create_connection(('localhost', port), 0.5)
+        s.close()
+        return True
+    except socket.error:
+        return False
+
+def compactRegistry(pruneDead=True):
+    """
+    Compact the server registry, removing its deleted records and by default
+    the servers of the Maya processes that exited without closing their
+    command port.
+    Returns the number of servers removed
+    """
+    return getInstance().compact(pruneDead)
     
 # ===========================================================================
 # Copyright 2016 Autodesk, Inc. All rights reserved.
@@ -0,0 +1,88 @@
+"""
+Tests of CommandPortClient against a stand-in for a framed command port,
+served on a loopback socket. They do not need Maya:
+
+    python -m unittest maya.app.general.test.commandPortClientTest
+"""
+import socket
+import threading
+import unittest
+
+from maya.app.general.CommandPortClient import TcommandClient, framedHeader
+
+# small socket buffers, so that the tests fill them quickly
+bufferSize = 16 * 1024
+
+class StandInServer(object):
+    """
+    Stand-in for a framed command port serving one connection. Like
+    CommandPort, it reads a batch of requests then writes all of their
+    responses before reading again. The response of a request is its
+    message reversed.
+    """
+    def __init__(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.address = self.listener.getsockname()
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve(self):
+        (conn, addr) = self.listener.accept()
+        conn.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, bufferSize)
+        conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, bufferSize)
+        data = ''
+        try:
+            while True:
+                nextdata = conn.recv(bufferSize)
+                if not nextdata:
+                    break
+                data += nextdata
+                responses = []
+                while len(data) >= framedHeader.size:
+                    (requestId, length) = framedHeader.unpack_from(data)
+                    end = framedHeader.size + length
+                    if len(data) < end:
+                        break
+                    responses.append(framedHeader.pack(requestId, length) + data[framedHeader.size:end][::-1])
+                    data = data[end:]
+                conn.sendall(''.join(responses))
+        except socket.error:
+            pass
+        finally:
+            conn.close()
+
+    def close(self):
+        self.listener.close()
+
+class TcommandClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer()
+        self.client = TcommandClient(self.server.address, maxPending=1024)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def testExecute(self):
+        self.assertEqual(self.client.execute('abc', timeout=10), u'cba')
+
+    def testPipelineMoreThanTheSocketBuffers(self):
+        # the requests and their responses hold many times what the socket
+        # buffers can, so the server blocks writing responses until the
+        # client reads them while it is still sending requests
+        commands = ['%d:%s' % (i, 'x' * 32 * 1024) for i in range(256)]
+        results = []
+        sender = threading.Thread(target=lambda: results.extend(self.client.send(c) for c in commands))
+        sender.daemon = True
+        sender.start()
+        sender.join(30)
+        self.assertFalse(sender.is_alive(), 'sending the commands did not complete')
+        for (command, result) in zip(commands, results):
+            self.assertEqual(result.result(timeout=30), command[::-1])
+
+if __name__ == '__main__':
+    unittest.main()
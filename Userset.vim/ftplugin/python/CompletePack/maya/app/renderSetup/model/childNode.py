@@ -54,6 +54,13 @@ class ChildNode(Observable, NodeNotes, SerializableNode, nodeList.ListItem):
         # their enabled output is being computed, but since they have none,
         # they always answer False.
         self._inEnabledChanged = False
+
+    def itemChanged(self, *posArgs, **kwArgs):
+        """Call item changed callbacks, once at the end of the block when
+        notifications are suspended (see nodeList.SuspendNotifications)."""
+
+        if not nodeList.deferItemChanged(self, posArgs, kwArgs):
+            super(ChildNode, self).itemChanged(*posArgs, **kwArgs)
         
     def setName(self, newName):
         """Rename render setup node."""
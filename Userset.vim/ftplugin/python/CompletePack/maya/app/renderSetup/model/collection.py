@@ -190,6 +190,10 @@ class Collection(nodeList.ListBase, childNode.TreeOrderedItem,
         super(Collection, self).__init__()
         self._enabledDirty = False
         self._callbackIds  = []
+        # (selector, selector version, DAG members) of the last membership query
+        self._dagMembers = None
+        # (selector, selector version) of the selection the overrides were applied to
+        self._appliedSelection = None
         
     def postConstructor(self):
         # Call parent class postConstructor
@@ -563,10 +567,11 @@ class Collection(nodeList.ListBase, childNode.TreeOrderedItem,
         return self.getChildren(cls=Collection)
         
     def getCollectionByName(self, collectionName, nested=False):
-        for collection in nodeList.forwardListNodeClassGenerator(self, cls=Collection):
-            if collection.name() == collectionName:
-                return collection
-            elif nested:
+        collection = nodeList.findByName(self, collectionName)
+        if isinstance(collection, Collection):
+            return collection
+        if nested:
+            for collection in nodeList.forwardListNodeClassGenerator(self, cls=Collection):
                 collection2 = collection.getCollectionByName(collectionName, True)
                 if collection2:
                     return collection2
@@ -622,6 +627,8 @@ class Collection(nodeList.ListBase, childNode.TreeOrderedItem,
     def apply(self):
         """ Apply all children in this collection. """
         with profiler.ProfilerMgr('Collection::apply'):
+            selector = self.getSelector()
+            self._appliedSelection = (selector, selector.getVersion())
             # Apply all our children to the selection
             for child in nodeList.forwardListGenerator(self):
                 child.apply()
@@ -642,6 +649,8 @@ class Collection(nodeList.ListBase, childNode.TreeOrderedItem,
     def unapply(self):
         """Unapply all children in this collection."""
         with profiler.ProfilerMgr('Collection::unapply'):
+            if self.name() not in context.PivotGuard.lockedNames:
+                self._appliedSelection = None
             for child in nodeList.reverseListGenerator(self):
                 child.unapply()
                 # UI Feedback (progressBar)
@@ -650,6 +659,31 @@ class Collection(nodeList.ListBase, childNode.TreeOrderedItem,
     def getOverrides(self): 
         return self.getChildren(cls=override.Override)
 
+    def _getDagMembers(self):
+        '''Returns the DAG node names selected by this collection.
+        The list is cached until the selector computes its selection again,
+        the same list object is returned as long as it is valid.'''
+        selector = self.getSelector()
+        version = selector.getVersion()
+        cached = self._dagMembers
+        if cached is None or cached[0] is not selector or cached[1] != version:
+            nodes = [n for n in selector.getAbsoluteNames() if n.startswith('|')]
+            self._dagMembers = cached = (selector, version, nodes)
+        return cached[2]
+
+    def _appliedSelectionChanged(self):
+        '''Returns True if the selection changed since the overrides were applied,
+        or if they were not applied with the layer (e.g. post applied).'''
+        applied = self._appliedSelection
+        if applied is None:
+            return True
+        selector = self.getSelector()
+        return applied[0] is not selector or selector.isDirty() or applied[1] != selector.getVersion()
+
+    def _childrenChanged(self):
+        '''Children were added while applied, they must be applied again in order on the next refresh.'''
+        self._appliedSelection = None
+
     # Collection interface as list of children.
     # These methods implement the list requirements for the nodeList module.
     #
@@ -9,6 +9,18 @@
 import maya.app.renderSetup.model.jsonTranslatorGlobals as jsonTranslatorGlobals
 import maya.app.renderSetup.model.rendererCallbacks as rendererCallbacks
 
+import json
+import re
+
+kNotAnArray      = "The Json content is not an array"
+kExpectDelimiter = "Expecting ',' or ']' at character %d"
+
+# Number of characters read at a time by the stream decoder
+STREAM_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+
 
 def _isRenderSetup(encodedData):
     return isinstance(encodedData, dict) and jsonTranslatorGlobals.SCENE_SETTINGS_ATTRIBUTE_NAME in encodedData
@@ -114,6 +126,84 @@ class MergePolicy(object):
             raise Exception(jsonTranslatorGlobals.kWrongMergeType % self._mergeType)
                 
 
+class StreamDecoder(object):
+    """
+        Decode a Json file while reading it.
+
+        When the file contains an array (i.e. a render setup template), elements()
+        decodes its elements one by one as soon as they are read, so that the
+        first objects can be imported before the end of the file is reached and
+        the whole text never needs to be held in memory. Any other content
+        (i.e. a complete render setup) is decoded at once by decodeAll().
+    """
+    def __init__(self, file, chunkSize=STREAM_CHUNK_SIZE):
+        self._file = file
+        self._chunkSize = chunkSize
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._isArray = self._skip() == '['
+
+    def isArray(self):
+        return self._isArray
+
+    def decodeAll(self):
+        """ Decode the remaining content of the file """
+        return json.loads(self._buffer[self._pos:] + self._file.read())
+
+    def elements(self):
+        """ Generator decoding the elements of the array contained in the file """
+        if not self._isArray:
+            raise ValueError(kNotAnArray)
+        self._pos += 1
+        if self._skip() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._decodeElement()
+            nextChar = self._skip()
+            self._pos += 1
+            if nextChar == ']':
+                return
+            elif nextChar != ',':
+                raise ValueError(kExpectDelimiter % self._pos)
+            self._skip()
+
+    def _read(self, size):
+        """ Append the next characters of the file to the buffer, return False at the end of the file """
+        chunk = self._file.read(size)
+        if not chunk:
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _skip(self):
+        """ Skip whitespaces, return the next character or an empty string at the end of the file """
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._read(self._chunkSize):
+                return self._buffer[self._pos:self._pos+1]
+
+    def _decodeElement(self):
+        while True:
+            # An element is complete when it decodes and is followed by a character
+            # that cannot continue a number (which could be cut short otherwise).
+            # If not, read as much again as what is buffered, so that large
+            # elements are only decoded a few times.
+            try:
+                (element, end) = self._decoder.raw_decode(self._buffer, self._pos)
+                if end < len(self._buffer) and self._buffer[end] not in _NUMBER_CHARS:
+                    self._pos = end
+                    return element
+            except ValueError:
+                pass
+            if not self._read(max(self._chunkSize, len(self._buffer) - self._pos)):
+                (element, end) = self._decoder.raw_decode(self._buffer, self._pos)
+                self._pos = end
+                return element
+
+
 def decodeObjectArray(list, policy):
     """
         Decode an array of Render Setups Objects
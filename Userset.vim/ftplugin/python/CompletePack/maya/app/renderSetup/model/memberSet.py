@@ -124,6 +124,129 @@ class MemberSet(object):
 
     def paths(self):
         return self.root._paths(EXCLUDE)
+
+class TrieNode(object):
+    '''Node in the TrieMemberSet structure, one per path component.
+    This should only be used by the TrieMemberSet.'''
+
+    __slots__ = ('status', 'children', 'parent', 'component')
+
+    def __init__(self, parent=None, component=None, status=NEUTRAL):
+        self.status = status
+        self.children = dict()
+        self.parent = parent
+        self.component = component
+
+class TrieMemberSet(object):
+    '''Set of layer members handling explicit inclusion and exclusion of dag
+    paths like MemberSet, but working on absolute path names instead of
+    MDagPath: paths are split in interned '|' separated components, stored in
+    a trie and inserted without recursion. Sorted lists of paths can be
+    included or excluded at once, each path then starts from the part of
+    the trie walked for the previous one.
+    
+    "index" gives the dag paths that exist and their children, the scene
+    index by default.'''
+
+    def __init__(self, index=None):
+        self.root = TrieNode(status=EXCLUDE)
+        self._index = index
+
+    def index(self):
+        if self._index is None:
+            import maya.app.renderSetup.model.sceneIndex as sceneIndex
+            self._index = sceneIndex.instance()
+        return self._index
+
+    def include(self, path):
+        self._setAll((path,), INCLUDE)
+        return self
+
+    def exclude(self, path):
+        self._setAll((path,), EXCLUDE)
+        return self
+
+    def includeAll(self, paths):
+        '''Includes all of the given absolute paths, paths that do not exist are ignored.'''
+        self._setAll(paths, INCLUDE)
+        return self
+
+    def excludeAll(self, paths):
+        '''Excludes all of the given absolute paths, paths that do not exist are ignored.'''
+        self._setAll(paths, EXCLUDE)
+        return self
+
+    def _setAll(self, paths, status):
+        index = self.index()
+        # stack[i] = (node at depth i on the previous path, status it has)
+        stack = [(self.root, self.root.status)]
+        previous = ()
+        for path in sorted(p for p in paths if index.exists(p)):
+            components = [intern(c) for c in path.split('|')[1:]]
+            if len(components) == 0:
+                raise RuntimeError('should not include world')
+            # restart from the deepest ancestor shared with the previous path
+            depth = 0
+            limit = min(len(previous), len(components) - 1, len(stack) - 1)
+            while depth < limit and previous[depth] is components[depth]:
+                depth += 1
+            del stack[depth+1:]
+            previous = components
+            if not self._set(stack, components, status):
+                # the trie was pruned, nodes in the stack may be gone
+                del stack[1:]
+
+    def _set(self, stack, components, status):
+        '''Sets the status of the path of the given components, stack holds the
+        path's ancestors walked so far. Returns False if nodes were pruned.'''
+        node, inherited = stack[-1]
+        for component in components[len(stack)-1:-1]:
+            child = node.children.get(component)
+            if child is None:
+                if inherited == status:
+                    # no rule below this ancestor, path already has the status
+                    return True
+                child = TrieNode(node, component)
+                node.children[component] = child
+            elif child.status != NEUTRAL:
+                inherited = child.status
+            node = child
+            stack.append((node, inherited))
+        
+        # the new rule replaces the ones of the path's descendants
+        component = components[-1]
+        if inherited != status:
+            node.children[component] = TrieNode(node, component, status)
+            return True
+        if component not in node.children:
+            return True
+        # remove meaningless tail of neutral elements (they implicitly have the same status as their parent)
+        del node.children[component]
+        while node.parent is not None and node.status == NEUTRAL and len(node.children) == 0:
+            del node.parent.children[node.component]
+            node = node.parent
+        return False
+
+    def names(self):
+        '''Returns the set of the absolute paths of the members.'''
+        index = self.index()
+        names = set()
+        # (node, absolute path, status inherited from ancestors)
+        stack = [(self.root, '', EXCLUDE)]
+        while len(stack) > 0:
+            node, path, status = stack.pop()
+            if node.status != NEUTRAL:
+                status = node.status
+            if status == INCLUDE:
+                if len(node.children) == 0:
+                    # an included leaf is always included
+                    names.add(path)
+                else:
+                    # include mode but not a leaf => has excluded descendant in all subpaths
+                    # => include all children that are not in subpaths
+                    names.update(child for child in index.children(path) if child[child.rfind('|')+1:] not in node.children)
+            stack.extend((child, path + '|' + component, status) for component, child in node.children.iteritems())
+        return names
 # ===========================================================================
 # Copyright 2016 Autodesk, Inc. All rights reserved.
 #
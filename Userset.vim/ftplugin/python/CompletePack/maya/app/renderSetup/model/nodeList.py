@@ -220,6 +220,8 @@ class ListBase(object):
     def __init__(self):
         super(ListBase, self).__init__()
         self._listObservers = []
+        # Order labels and names of the items, see nodeListPrivate.ListIndex
+        self._listIndex = None
 
     # List front and back operations.
     #
@@ -249,10 +251,10 @@ class ListBase(object):
         # activate the item to make it go live.  This might cause nodes to begin listening to scene events, etc.
         listItem.activate()
 
-        self._cleanObservers()
-
-        for o in self._listObservers:
-            o().listItemAdded(listItem)
+        if _deferred is not None:
+            _deferred.listEvent(self, listItem, True)
+        else:
+            self._notifyItemAdded(listItem)
         
     def itemRemoved(self, listItem):
         """Call the listItemRemoved() methods on list item observers
@@ -262,6 +264,18 @@ class ListBase(object):
         # deactivate the item so it stops listening to scene events, etc.
         listItem.deactivate()
 
+        if _deferred is not None:
+            _deferred.listEvent(self, listItem, False)
+        else:
+            self._notifyItemRemoved(listItem)
+
+    def _notifyItemAdded(self, listItem):
+        self._cleanObservers()
+
+        for o in self._listObservers:
+            o().listItemAdded(listItem)
+
+    def _notifyItemRemoved(self, listItem):
         self._cleanObservers()
 
         for o in self._listObservers:
@@ -292,48 +306,165 @@ class ListBase(object):
         self._listObservers[:] = []
 
 def reverseListGenerator(list):
-    node = list.getBack()
-    while node:
+    for node in reversed(nodeListPrivate.getIndex(list).items()):
         yield node
-        node = node.getPrevious()
 
 # Implementation in nodeListPrivate module, as it is needed for implementation
 # of insert().
 forwardListGenerator = nodeListPrivate.forwardListGenerator
 
 def reverseListNodeClassGenerator(list, cls):
-    node = list.getBack()
-    while node:
+    for node in reverseListGenerator(list):
         if isinstance(node, cls):
             yield node
-        node = node.getPrevious()
 
 def forwardListNodeClassGenerator(list, cls):
-    node = list.getFront()
-    while node:
+    for node in forwardListGenerator(list):
         if isinstance(node, cls):
             yield node
-        node = node.getNext()
 
 def isAfter(list, a, b):
     """Return True if a is after b in list.
 
-    No check is made to ensure either argument is a member of the list.
-    This function has O(n) time complexity."""
+    No check is made to ensure either argument is a member of the list.  An
+    item not in the list is considered to be after all the items in it.
+    The order labels of the list index are compared, so this function has
+    O(1) time complexity once the index is built."""
 
-    for item in forwardListGenerator(list):
-        foundA = (item == a)
-        foundB = (item == b)
+    labels = nodeListPrivate.getIndex(list).labels
+    labelB = labels.get(b)
+    if labelB is None:
+        return False
+    labelA = labels.get(a)
+    return labelA is None or labelA > labelB
 
-        # If we find a first (or at the same time as b), it's not after.
-        if foundA:
-            return False
+# Notifications recorded while in a SuspendNotifications block, None otherwise.
+_deferred = None
 
-        # At this point foundA is False, so if we find b first, a is after.
-        if foundB:
-            return True
+class _DeferredNotifications(object):
+    """Record of the notifications deferred by SuspendNotifications."""
+
+    def __init__(self):
+        self._listEvents = []    # (list, item, added) in order
+        self._changed = []       # items in the order of their first change
+        self._changedArgs = dict()
+
+    def listEvent(self, list, item, added):
+        self._listEvents.append((list, item, added))
+
+    def itemChanged(self, item, posArgs, kwArgs):
+        args = self._changedArgs.get(item)
+        if args is None:
+            self._changed.append(item)
+            self._changedArgs[item] = (posArgs, dict(kwArgs))
+        else:
+            args[1].update(kwArgs)
+            self._changedArgs[item] = (posArgs, args[1])
+
+    def send(self):
+        # First and last event of each item in each list, and overall.
+        lists = []
+        events = dict()
+        first = dict()
+        last = dict()
+        for list, item, added in self._listEvents:
+            itemEvents = events.get(list)
+            if itemEvents is None:
+                lists.append(list)
+                itemEvents = events[list] = dict()
+            if item in itemEvents:
+                itemEvents[item][1] = added
+            else:
+                itemEvents[item] = [added, added]
+            first.setdefault(item, added)
+            last[item] = added
+
+        # Items that were not in a list before, and items no longer in one.
+        new = set(item for item, added in first.iteritems() if added)
+        gone = set(item for item, added in last.iteritems() if not added)
+
+        def isNew(node):
+            while node is not None:
+                if node in new:
+                    return True
+                node = node.parent()
+            return False
 
-    return False
+        # All removals first, an item moved from a list to another one must
+        # be removed from the observers of the first list before it is
+        # added to the observers of the second one.
+        lists = [list for list in lists if list not in gone and not isNew(list)]
+        for list in lists:
+            for item, (firstAdded, lastAdded) in events[list].iteritems():
+                if not firstAdded:
+                    list._notifyItemRemoved(item)
+        for list in lists:
+            # Back to front, so that the next item of an added item is
+            # always known to the observers.
+            added = set(item for item, (firstAdded, lastAdded) in events[list].iteritems() if lastAdded)
+            for item in reverseListGenerator(list):
+                if item in added:
+                    list._notifyItemAdded(item)
+
+        for item in self._changed:
+            if item not in gone and not isNew(item):
+                posArgs, kwArgs = self._changedArgs[item]
+                item.itemChanged(*posArgs, **kwArgs)
+
+class SuspendNotifications(object):
+    """Safe way to defer the notifications of lists and list items using
+    the 'with' statement.
+
+    Within the block, list items added or removed are activated or
+    deactivated right away, but list observers and item observers are not
+    called.  On exit from the outermost block the observers are notified of
+    the net changes, once:
+
+    o list observers are told about the items removed, then about the items
+      added from the back to the front of each list.
+    o item observers of each changed item are called once, with the keyword
+      arguments of all its notifications and the positional arguments of
+      the last one.
+    o nothing is sent for the content of items added within the block, as
+      their observers are expected to discover it when they are created.
+
+    Example:
+        with SuspendNotifications():
+            layer = renderSetup.createRenderLayer('layer1')
+            layer.createCollection('collection1')
+        # Observers are told that layer1 was added."""
+
+    def __enter__(self):
+        global _deferred
+        self.outermost = _deferred is None
+        if self.outermost:
+            _deferred = _DeferredNotifications()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        global _deferred
+        if self.outermost:
+            deferred = _deferred
+            _deferred = None
+            deferred.send()
+
+def deferItemChanged(item, posArgs, kwArgs):
+    """Record a list item change notification in a SuspendNotifications
+    block.  Return False if notifications are not suspended, in which case
+    observers must be notified right away."""
+
+    if _deferred is None:
+        return False
+    _deferred.itemChanged(item, posArgs, kwArgs)
+    return True
+
+def findByName(list, name):
+    """Return the item of the list with the given name, None if there is none.
+
+    The name map of the list index is used, so this function has O(1) time
+    complexity once the map is built."""
+
+    return nodeListPrivate.getIndex(list).findByName(name)
 
 def remove(list, x):
     """Remove node x from the list, with support for undo.
@@ -12,15 +12,153 @@ kListCmdPrivate = maya.stringTable['y_nodeListPrivate.kListCmdPrivate' ]
 
    This module provides the implementation for list operations that write
    to lists, without undo / redo support.  It is used by the implementation
-   of the undo-capable write to list operations in the nodeList module."""
-
-# Not a write operation, but needed by the implementation of insert().
-def forwardListGenerator(list):
+   of the undo-capable write to list operations in the nodeList module.
+
+   The list operations also keep each list's ListIndex up to date, which
+   answers order, position and name queries without walking the list
+   through its connections."""
+
+# Incremented when the list indexes may no longer match the list
+# connections: after undo / redo, which can restore connections without
+# going through the list operations, and when a list item node is deleted.
+_generation = 0
+
+# Incremented when a node is renamed, to build the name maps again.
+_namesGeneration = 0
+
+_callbackIds = []
+
+def _invalidateIndexes(*args):
+    global _generation
+    _generation += 1
+
+def _invalidateNames(*args):
+    global _namesGeneration
+    _namesGeneration += 1
+
+def _addCallbacks():
+    if _callbackIds:
+        return
+    _callbackIds.extend([
+        OpenMaya.MEventMessage.addEventCallback('Undo', _invalidateIndexes),
+        OpenMaya.MEventMessage.addEventCallback('Redo', _invalidateIndexes),
+        OpenMaya.MDGMessage.addNodeRemovedCallback(_invalidateIndexes, 'listItem'),
+        OpenMaya.MNodeMessage.addNameChangedCallback(OpenMaya.MObject.kNullObj, _invalidateNames)])
+
+def removeCallbacks():
+    """Remove the callbacks keeping the list indexes up to date.
+
+    Called on file new / open and when the plugin is unloaded.  The list
+    indexes are dropped, the callbacks are added again by the next list
+    index built."""
+    OpenMaya.MMessage.removeCallbacks(_callbackIds)
+    del _callbackIds[:]
+    _invalidateIndexes()
+    _invalidateNames()
+
+def _walkList(list):
     node = list.getFront()
     while node:
         yield node
         node = node.getNext()
 
+class ListIndex(object):
+    """Order labels and names of the items of a list.
+
+    Items are labelled with increasing integers in list order, spaced out
+    so that an item inserted between two others can almost always be
+    labelled without relabelling the list.  Comparing the order of two
+    items is then a dictionary lookup.  The list of items in order and the
+    name to item map are built from the labels when needed.
+
+    The index is updated by the list operations of this module.  It is
+    built again from the list connections when it is dropped: after undo /
+    redo, when a list item node is deleted, or when there is no label left
+    between two items."""
+
+    kGap = 1 << 16
+
+    def __init__(self, list):
+        self.generation = _generation
+        self.labels = dict()
+        self._items = None
+        self._names = None
+        self._namesGeneration = None
+        for i, item in enumerate(_walkList(list)):
+            self.labels[item] = i * ListIndex.kGap
+
+    def items(self):
+        """Return the list items in order.  The returned list must not be modified."""
+        if self._items is None:
+            labels = self.labels
+            self._items = sorted(labels, key=labels.get)
+        return self._items
+
+    def findByName(self, name):
+        """Return the item with the given name, None if there is none."""
+        if self._names is None or self._namesGeneration != _namesGeneration:
+            self._names = dict((item.name(), item) for item in self.labels)
+            self._namesGeneration = _namesGeneration
+        return self._names.get(name)
+
+    def insert(self, item, previous, next):
+        """Label an item inserted between previous and next, either of which
+        can be None.  Returns False if the index must be built again."""
+        labels = self.labels
+        if previous is None and next is None:
+            label = 0
+        elif next is None:
+            if previous not in labels:
+                return False
+            label = labels[previous] + ListIndex.kGap
+        elif previous is None:
+            if next not in labels:
+                return False
+            label = labels[next] - ListIndex.kGap
+        else:
+            if previous not in labels or next not in labels or labels[next] - labels[previous] < 2:
+                return False
+            label = (labels[previous] + labels[next]) // 2
+        labels[item] = label
+        self._items = None
+        if self._names is not None:
+            self._names[item.name()] = item
+        return True
+
+    def remove(self, item):
+        self.labels.pop(item, None)
+        self._items = None
+        if self._names is not None and self._names.get(item.name()) is item:
+            del self._names[item.name()]
+
+def getIndex(list):
+    """Return the ListIndex of the list, building it if needed.
+
+    Building the index has O(n) time complexity, it is then kept up to
+    date by the list operations."""
+
+    index = list._listIndex
+    if index is None or index.generation != _generation:
+        _addCallbacks()
+        index = list._listIndex = ListIndex(list)
+    return index
+
+def _indexInserted(list, x, previous, next):
+    index = list._listIndex
+    if index is not None and not index.insert(x, previous, next):
+        list._listIndex = None
+
+def _indexRemoved(list, x):
+    index = list._listIndex
+    if index is not None:
+        index.remove(x)
+
+def forwardListGenerator(list):
+    """Iterate over the list items in order.  The items are taken from the
+    list index, the list can be modified during the iteration."""
+    for node in getIndex(list).items():
+        yield node
+
 def remove(list, x):
     """ Remove node x from the list.
 
@@ -55,6 +193,7 @@ def remove(list, x):
                 x.setNext(None)
 
         x.setParent(None)
+        _indexRemoved(list, x)
         list.itemRemoved(x)
 
 def insertBefore(list, nextItem, x):
@@ -68,10 +207,12 @@ def insertBefore(list, nextItem, x):
     else:
         if list.getFront() == nextItem:
             list.setFront(x)
-        x.setPrevious(nextItem.getPrevious())
+        previous = nextItem.getPrevious()
+        x.setPrevious(previous)
         x.setNext(nextItem)
         nextItem.setPrevious(x)
         x.setParent(list)
+        _indexInserted(list, x, previous, nextItem)
         list.itemAdded(x)
 
 def append(list, x):
@@ -88,6 +229,7 @@ def append(list, x):
         list.setFront(x)
     list.setBack(x)
     x.setParent(list)
+    _indexInserted(list, x, back, None)
     list.itemAdded(x)
 
 def prepend(list, x):
@@ -105,6 +247,7 @@ def prepend(list, x):
         list.setBack(x)
     list.setFront(x)
     x.setParent(list)
+    _indexInserted(list, x, None, front)
     list.itemAdded(x)
 
 def insert(list, ndx, x):
@@ -112,29 +255,21 @@ def insert(list, ndx, x):
 
     Positions run from 0 to n-1, for a list of length n.  Inserting at
     position 0 calls prepend(), and thus has O(1) time complexity.
-    Inserting mid-list has O(n) time complexity.  Inserting at position n
-    or beyond appends to the list, with O(n) time complexity.  To append to
-    the list use append() directly, as it has O(1) time complexity."""
+    Inserting at position n or beyond appends to the list.  The item at
+    position ndx is found in the list index, which has O(1) time
+    complexity if the index is up to date and the items in order were
+    requested since the last change, O(n log(n)) otherwise."""
 
     # Inserting at front is a trivial special case
     if ndx == 0:
         prepend(list, x)
     else:
-        i = 0
-        for node in forwardListGenerator(list):
-            if ndx == i:
-                previous = node.getPrevious()
-                node.setPrevious(x)
-                previous.setNext(x)
-                x.setPrevious(previous)
-                x.setNext(node)
-                x.setParent(list)
-                list.itemAdded(x)
-                break
-            i += 1
+        items = getIndex(list).items()
+        if ndx < len(items):
+            insertBefore(list, items[ndx], x)
         else:
-            # Ran through the list without finding the index, consider the
-            # insert to be an append.
+            # Index beyond the end of the list, consider the insert to be
+            # an append.
             append(list, x)
 
 def pop(list):
@@ -156,6 +291,7 @@ def pop(list):
             list.setBack(prev)
 
         x.setParent(None)
+        _indexRemoved(list, x)
         list.itemRemoved(x)
 
     return x
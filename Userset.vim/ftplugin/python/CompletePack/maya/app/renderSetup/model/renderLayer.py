@@ -34,7 +34,6 @@ import maya.api.OpenMaya as OpenMaya
 
 import maya.app.renderSetup.model.nodeList as nodeList
 import maya.app.renderSetup.model.utils as utils
-import maya.app.renderSetup.common.utils as commonUtils
 import maya.app.renderSetup.model.typeIDs as typeIDs
 import maya.app.renderSetup.model.collection as collection
 import maya.app.renderSetup.model.selector as selector
@@ -57,7 +56,6 @@ import maya.app.renderSetup.model.jsonTranslatorUtils as jsonTranslatorUtils
 import maya.app.renderSetup.model.jsonTranslatorGlobals as jsonTranslatorGlobals
 from maya.app.renderSetup.model.observable import Observable
 from functools import partial
-import itertools
 
 from maya.app.renderSetup.model.renderSetupPrivate import PostApplyCmd
 
@@ -98,6 +96,15 @@ def memberTraversal(node):
     # return its children.
     return node.getCollections() if node.isEnabled() else []
 
+def _sameContributions(contributions, previous):
+    '''Returns True if the collections' members are the same lists, with the same enabled state.'''
+    if previous is None or len(contributions) != len(previous):
+        return False
+    for (nodes, isEnabled), (prevNodes, prevIsEnabled) in zip(contributions, previous):
+        if nodes is not prevNodes or isEnabled != prevIsEnabled:
+            return False
+    return True
+
 def _syncLegacyRenderLayers(layerName):
     # Suspend and resume undo logging around this callback
     # It will be called for any changes to the data model as well as the undo of any changes so
@@ -196,6 +203,8 @@ class DefaultRenderLayer(RenderLayerBase, Observable):
         pass
     def unapply(self):
         pass
+    def _getReapplyPivot(self):
+        return None
 
 class RenderLayer(RenderLayerBase, nodeList.ListBase, childNode.ChildNode):
     """
@@ -264,6 +273,12 @@ class RenderLayer(RenderLayerBase, nodeList.ListBase, childNode.ChildNode):
         self._currentlyVisibleNodeNames = set()
         self.isUpdatingMembership = False
         self.needsMembershipUpdate = False
+        # Last membership computed by getMembers(), with what it was computed
+        # from: the lights outside of a lights collection, and the
+        # (members list, enabled) of each collection in processing order.
+        self._members = None
+        self._membersLights = None
+        self._membersContributions = None
     
     def postConstructor(self):
         overrideManager.postConstructor(self)
@@ -361,6 +376,10 @@ class RenderLayer(RenderLayerBase, nodeList.ListBase, childNode.ChildNode):
     def descendantAdded(self, child):
         '''If the layer is currently visible and a descendant is added (collection or override), apply it right away.'''
         PostApplyCmd.execute(child)
+        # the descendant is applied last, not at its position
+        parent = child.parent()
+        if isinstance(parent, collection.Collection):
+            parent._childrenChanged()
     
     @_visible
     def _enabledChanged(self, collection):
@@ -511,13 +530,16 @@ class RenderLayer(RenderLayerBase, nodeList.ListBase, childNode.ChildNode):
         if not collectionName:
             raise Exception(kInvalidCollectionName)
 
-        for child in nodeList.forwardListGenerator(self):
-            if child.name() == collectionName:
-                return child
-            elif nested and child.typeId() == typeIDs.collection:
-                child2 = child.getCollectionByName(collectionName, True)
-                if child2:
-                    return child2
+        child = nodeList.findByName(self, collectionName)
+        if child:
+            return child
+
+        if nested:
+            for child in nodeList.forwardListGenerator(self):
+                if child.typeId() == typeIDs.collection:
+                    child2 = child.getCollectionByName(collectionName, True)
+                    if child2:
+                        return child2
 
         raise Exception(kUnknownCollection % (collectionName, self.name()))
         
@@ -685,14 +707,18 @@ class RenderLayer(RenderLayerBase, nodeList.ListBase, childNode.ChildNode):
             # must be excluded, we cannot make the parent member of the
             # layer.
 
-            members = memberSet.MemberSet()
-            
+            # The members of each collection are cached by the collection
+            # until its selector computes its selection again, and the layer
+            # membership is only computed again if the members or the enabled
+            # state of one of the collections changed.
+
+            lights = []
             if not self.hasLightsCollectionInstance():
-                lights = itertools.ifilter(None, (commonUtils.nameToDagPath(name) for name in cmds.ls(type=cmds.listNodeTypes('light'))))
-                reduce(lambda memberset,path: members.include(path), lights, members)
+                lights = cmds.ls(type=cmds.listNodeTypes('light'), long=True) or []
             
             isolateSelectMode = not cmds.about(batch=True) and (self.getNumIsolatedChildren() > 0)
             
+            contributions = []
             for c in traverse.depthFirst(self, memberTraversal):
                 if not isinstance(c, collection.Collection):
                     continue
@@ -706,22 +732,33 @@ class RenderLayer(RenderLayerBase, nodeList.ListBase, childNode.ChildNode):
                     # MAYA-70684: a more maintainable solution should be found.
                     continue
 
-                # The collection selector has a cache, which will always be hit once on
-                # layer switching (to apply overrides).  Therefore, there is no need to
-                # cache or be lazy in accessing the collection's members.
-                nodes = [n for n in c.getSelector().getAbsoluteNames() if n.startswith('|')]
-                paths = itertools.ifilter(None, (commonUtils.nameToDagPath(path) for path in nodes)) 
-                
-                mtd = memberSet.MemberSet.include if c.isEnabled() else memberSet.MemberSet.exclude
-                reduce(lambda memberset,path: mtd(members, path), paths, members)
+                contributions.append((c._getDagMembers(), c.isEnabled()))
+
+            if self._members is None or lights != self._membersLights or \
+               not _sameContributions(contributions, self._membersContributions):
+                members = memberSet.TrieMemberSet()
+                members.includeAll(lights)
+                for nodes, isEnabled in contributions:
+                    if isEnabled:
+                        members.includeAll(nodes)
+                    else:
+                        members.excludeAll(nodes)
+                self._members = members.names()
+                self._membersLights = lights
+                self._membersContributions = contributions
             
-            included = set(p.fullPathName() for p in members.paths())
-
-            return included
+            return set(self._members)
 
     # Required for backward compatibility.
     getEnabledSelectedNodeNames = getMembers
 
+    def _getReapplyPivot(self):
+        """Returns the first collection, in application order, whose
+        selection changed since its overrides were applied, None if there
+        is none.  Refreshing the layer only needs to unapply and apply
+        again the collections from that one on."""
+        return next((c for c in utils.getCollectionsRecursive(self) if c._appliedSelectionChanged()), None)
+
     def findCollection(self, predicate, creator=None):
         '''Find the collection of this layer satisfying the predicate function or creates it
         with the creator function if not found and a creator function is specified.
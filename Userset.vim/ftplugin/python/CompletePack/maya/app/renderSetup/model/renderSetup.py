@@ -25,6 +25,7 @@ import maya.api.OpenMaya as OpenMaya
 import maya.app.renderSetup.model.observable as observable
 import maya.app.renderSetup.model.renderLayer as renderLayer
 import maya.app.renderSetup.model.nodeList as nodeList
+import maya.app.renderSetup.model.nodeListPrivate as nodeListPrivate
 import maya.app.renderSetup.model.utils as utils
 import maya.app.renderSetup.model.typeIDs as typeIDs
 import maya.app.renderSetup.model.nodeNotes as nodeNotes
@@ -58,6 +59,7 @@ import maya.OpenMaya as OpenMaya1_0
 import weakref
 import os
 from collections import deque
+from timeit import default_timer
 
 # Workaround to MAYA-65920: at startup, MSceneMessage.kAfterNew file callback
 # is incorrectly called by Maya before the MSceneMessage.kBeforeNew file
@@ -75,6 +77,9 @@ DECODE_AND_OVERWRITE = jsonTranslatorGlobals.DECODE_AND_ADD     # Flush existing
 DECODE_AND_MERGE     = jsonTranslatorGlobals.DECODE_AND_MERGE   # Merge with the existing render setup objects and rename the unexpected objects
 DECODE_AND_RENAME    = jsonTranslatorGlobals.DECODE_AND_RENAME  # Renaming all decoded render setup objects to not conflict with the existing render setup
 
+# Number of render layers of a template decoded together by importFromFile()
+IMPORT_BATCH_SIZE = 8
+
 
 # List all error messages
 kInvalidRenderLayerName      = maya.stringTable['y_renderSetup.kInvalidRenderLayerName'      ]
@@ -283,10 +288,9 @@ class RenderSetup(nodeList.ListBase, nodeNotes.NodeNotes, serializableNode.Seria
         if not renderLayerName:
             raise Exception(kInvalidRenderLayerName)
 
-        modelRenderLayers = self.getRenderLayers()
-        for modelRenderLayer in modelRenderLayers:
-            if modelRenderLayer.name() == renderLayerName:
-                return modelRenderLayer
+        modelRenderLayer = nodeList.findByName(self, renderLayerName)
+        if modelRenderLayer:
+            return modelRenderLayer
 
         raise Exception(kUnknownRenderLayer % renderLayerName)
 
@@ -598,9 +602,8 @@ class RenderSetup(nodeList.ListBase, nodeNotes.NodeNotes, serializableNode.Seria
                                  mergeType, 
                                  prependToName)
 
-    @undo.chunk('Import a complete render setup')
-    def decode(self, encodedData, behavior=DECODE_AND_MERGE, prependToName=None):
-    
+    def _checkEncodedData(self, encodedData):
+        """ Raise TypeError if the data is not a complete render setup """
         # Check that its a dictionary
         if type(encodedData) != dict:
             raise TypeError(jsonTranslatorGlobals.kUnknownData % str(encodedData))
@@ -609,6 +612,21 @@ class RenderSetup(nodeList.ListBase, nodeNotes.NodeNotes, serializableNode.Seria
         if not self.kTypeName in encodedData:
             raise TypeError(jsonTranslatorGlobals.kUnknownKeys % encodedData.keys()[0])
 
+    def _checkTemplateElements(self, elements):
+        """ Raise TypeError if the elements of a template are not all render layers """
+        for d in elements:
+            if type(d) != dict:
+                raise TypeError(jsonTranslatorGlobals.kUnknownData % str(d))
+            # A 'parentTypeName' key comes from a copy&paste, see jsonTranslatorUtils.decodeObjectArray()
+            typeNames = [key for key in d.keys() if key != 'parentTypeName']
+            if typeNames != [renderLayer.RenderLayer.kTypeName]:
+                raise TypeError(jsonTranslatorGlobals.kUnknownKeys % str(d.keys()))
+
+    @undo.chunk('Import a complete render setup')
+    def decode(self, encodedData, behavior=DECODE_AND_MERGE, prependToName=None):
+    
+        self._checkEncodedData(encodedData)
+
         # Decode the content of the scene settings part
         if jsonTranslatorGlobals.SCENE_SETTINGS_ATTRIBUTE_NAME in encodedData:
             renderSettings.decode(encodedData[jsonTranslatorGlobals.SCENE_SETTINGS_ATTRIBUTE_NAME])
@@ -624,6 +642,62 @@ class RenderSetup(nodeList.ListBase, nodeNotes.NodeNotes, serializableNode.Seria
         super(RenderSetup, self).decode(encodedData[self.kTypeName], behavior, 
                                         prependToName if behavior==DECODE_AND_RENAME else None)
 
+    def importFromFile(self, filePath, behavior=DECODE_AND_MERGE, prependToName=None, batchSize=IMPORT_BATCH_SIZE):
+        """ Import a complete render setup or a render layer template from a file, in bulk.
+
+            A template (a Json array of render layers) is decoded element by
+            element while the file is read, then its render layers are created
+            batchSize at a time.
+            Scene observers are disabled and list and item notifications are
+            deferred during the import: observers are notified once of the net
+            changes at the end (see nodeList.SuspendNotifications). The whole
+            import is a single undo chunk.
+
+            The whole content is checked to be a complete render setup or a
+            template of render layers before the existing render setup is
+            cleared and before anything is created, so that the wrong kind of
+            file raises a TypeError without changing the scene.
+
+            Returns a dictionary of the time spent in each phase, in seconds:
+            'parse' to read and decode the Json content, 'create' to create the
+            render setup objects, 'notify' to notify the observers, and 'total'.
+        """
+        timings = { 'parse' : 0.0, 'create' : 0.0, 'notify' : 0.0 }
+        start = default_timer()
+        with profiler.ProfilerMgr('RenderSetup::importFromFile'), undo.CtxMgr('Import a render setup file'), open(filePath, "r") as file:
+            t0 = default_timer()
+            decoder = jsonTranslatorUtils.StreamDecoder(file)
+            if decoder.isArray():
+                elements = list(decoder.elements())
+                self._checkTemplateElements(elements)
+            else:
+                encodedData = decoder.decodeAll()
+                self._checkEncodedData(encodedData)
+            timings['parse'] += default_timer() - t0
+
+            if behavior==DECODE_AND_OVERWRITE:
+                # Outside of the deferred notifications, so that observers
+                # of the deleted render layers are notified before they are gone.
+                self.clearAll()
+
+            with nodeList.SuspendNotifications():
+                with guard.StateGuardCtx(sceneObservable.sceneObserversEnabled, sceneObservable.enableSceneObservers, False):
+                    if decoder.isArray():
+                        prependToName = prependToName if behavior==DECODE_AND_RENAME else None
+                        t1 = default_timer()
+                        for i in xrange(0, len(elements), batchSize):
+                            self._decodeChildren(elements[i:i+batchSize], behavior, prependToName)
+                        timings['create'] += default_timer() - t1
+                    else:
+                        t1 = default_timer()
+                        self.decode(encodedData, behavior, prependToName)
+                        timings['create'] += default_timer() - t1
+                notifyStart = default_timer()
+            timings['notify'] = default_timer() - notifyStart
+
+        timings['total'] = default_timer() - start
+        return timings
+
     def encode(self, notes=None, includeSceneSettings=True):
         # Note: The includeSceneSettings option should always be true as the scene settings 
         #       should always be exported as part of the renderSetup export. Currently passing 
@@ -777,6 +851,7 @@ class _Subject(object):
     def finalize(self):
         OpenMaya.MMessage.removeCallbacks(self._cbIds)
         self._cbIds = []
+        nodeListPrivate.removeCallbacks()
 
     def _beforeNewCb(self, data):
         global _beforeNewCbCalled
@@ -784,6 +859,7 @@ class _Subject(object):
 
         if hasInstance():
             self.renderSetupPreDelete()
+        nodeListPrivate.removeCallbacks()
         # Render setup hack for 2016_R2.  See MAYA-65530.
         # Required for file new, because we can be deleting a scene where
         # unconnectable attributes are connected.
@@ -792,6 +868,7 @@ class _Subject(object):
     def _beforeOpenCb(self, data):
         if hasInstance():
             self.renderSetupPreDelete()
+        nodeListPrivate.removeCallbacks()
         # Render setup hack for 2016_R2.  See MAYA-65530.
         os.environ['MAYA_RENDER_SETUP_OVERRIDE_CONNECTABLE'] = '1'
 
@@ -9,6 +9,7 @@ import maya.cmds as cmds
 import maya.api.OpenMaya as OpenMaya
 import maya.app.renderSetup.model.undo as undo
 import maya.app.renderSetup.model.namespace as namespace
+import maya.app.renderSetup.model.context as context
 from maya.app.renderSetup.model.renderLayerSwitchObservable import RenderLayerSwitchObservable
 
 kCmdPrivate = maya.stringTable['y_renderSetupPrivate.kCmdPrivate' ]
@@ -81,6 +82,31 @@ class SwitchVisibleRenderLayerCmd(OpenMaya.MPxCommand):
         # be added on the undo/redo stack but only use commands during the doIt
         self._saveAndRestoreCache(self.oldLayer, self.newLayer)
 
+        if oldLayer != newLayer:
+            self._unapplyAndApply(oldLayer, newLayer)
+        else:
+            # Refreshing the visible layer: the collections before the first
+            # one whose selection changed since it was applied keep their
+            # overrides applied.  Without such a collection, an update that
+            # was still requested (e.g. for loaded file references) unapplies
+            # and applies the whole layer.
+            pivot = newLayer._getReapplyPivot()
+            if pivot is not None:
+                with context.PivotGuard(pivot):
+                    self._unapplyAndApply(oldLayer, newLayer)
+            elif newLayer.needsApplyUpdate:
+                self._unapplyAndApply(oldLayer, newLayer)
+            newLayer.needsApplyUpdate = False
+
+        newLayer._updateLegacyRenderLayerVisibility()
+        newLayer.itemChanged()
+        newLayer.makeVisible()
+
+        # UI Feedback (progressBar)
+        RenderLayerSwitchObservable.getInstance().notifyRenderLayerSwitchObserver()
+        _renderSetupInstance()._notifyActiveLayerObservers()
+
+    def _unapplyAndApply(self, oldLayer, newLayer):
         oldLayer.unapply()
         oldLayer.itemChanged()
         # Since the layer is no more visible, clear the cache
@@ -90,13 +116,6 @@ class SwitchVisibleRenderLayerCmd(OpenMaya.MPxCommand):
         RenderLayerSwitchObservable.getInstance().notifyRenderLayerSwitchObserver()
         
         newLayer.apply()
-        newLayer._updateLegacyRenderLayerVisibility()
-        newLayer.itemChanged()
-        newLayer.makeVisible()
-
-        # UI Feedback (progressBar)
-        RenderLayerSwitchObservable.getInstance().notifyRenderLayerSwitchObserver()
-        _renderSetupInstance()._notifyActiveLayerObservers()
 
     def _saveAndRestoreCache(self, oldLayer, newLayer):
         self.newLayer.setMemberNodesCache(self.savedLayerCache)
@@ -0,0 +1,341 @@
+'''
+    This module provides a scene-wide index of node names and types, shared
+    by all the selectors to evaluate their patterns.
+
+    Instead of one ls command per pattern of every selector of every
+    collection, the names and types of all the nodes are listed once and
+    kept up to date from node added/removed/renamed/reparented callbacks.
+    Patterns are matched with the compiled programs of selection.createProgram
+    and the names matching each pattern are cached; the caches are updated
+    as nodes come and go, so only new patterns scan the index.
+
+    The index uses its own callbacks rather than the scene observable's,
+    since those are filtered to the nodes that can be overridden and are
+    disabled while layers are applied, and every node listed by ls must be
+    tracked. Reading a file drops the index, it is built again on the next
+    query.
+'''
+
+import maya.api.OpenMaya as OpenMaya
+import maya.OpenMaya as OpenMaya1_0
+import maya.cmds as cmds
+
+import bisect
+import itertools
+
+from maya.app.renderSetup.model.selection import createProgram
+
+
+def _literalPrefix(pattern):
+    '''Returns the characters that all the node names matching pattern start with.'''
+    if '::' in pattern:
+        # recursive namespace syntax, anything can come first
+        return ''
+    if pattern.startswith(':'):
+        pattern = pattern[1:]
+    wildcard = pattern.find('*')
+    return pattern if wildcard < 0 else pattern[:wildcard]
+
+def _leaf(name):
+    return name[name.rfind('|')+1:]
+
+def _parent(name):
+    return name[:name.rfind('|')]
+
+class SceneIndex(object):
+    '''Index of the names (absolute paths for dag nodes) and types of all the
+    nodes in the scene, with the names matching each pattern cached.'''
+
+    def __init__(self):
+        self._cbIds = []
+        self._sceneCbIds = []
+        # type name => set of the types it inherits from, including itself
+        self._inherited = dict()
+        self._clear()
+        for msg in (OpenMaya.MSceneMessage.kBeforeNew, OpenMaya.MSceneMessage.kBeforeOpen):
+            self._sceneCbIds.append(OpenMaya.MSceneMessage.addCallback(msg, self._beforeNewCb, None))
+
+    def __del__(self):
+        self.deactivate()
+        for id in self._sceneCbIds:
+            OpenMaya.MMessage.removeCallback(id)
+        self._sceneCbIds = []
+
+    def _clear(self):
+        self._valid = False
+        self._types = dict()      # name => type name
+        self._leaves = dict()     # leaf name => list of names
+        # dag path => list of child dag paths, possibly including paths that
+        # were removed since, they are skipped when found in there
+        self._children = dict()
+        self._sortedLeaves = None # sorted leaf names, None when out of date
+        self._patterns = dict()   # pattern => (program, set of matching names)
+        self._pending = []        # MObjectHandle of the nodes to index again
+        self._typeFilters = dict()
+
+    def activated(self):
+        return len(self._cbIds) != 0
+
+    def activate(self):
+        '''Create callbacks to keep the index up to date.'''
+        if self.activated():
+            return
+        self._cbIds = [ OpenMaya.MDGMessage.addNodeAddedCallback(self._nodeAddedCB, "dependNode"),
+                        OpenMaya.MDGMessage.addNodeRemovedCallback(self._nodeRemovedCB, "dependNode"),
+                        OpenMaya.MNodeMessage.addNameChangedCallback(OpenMaya.MObject.kNullObj, self._nodeRenamedCB) ]
+        dagCallbacks = {
+            OpenMaya.MDagMessage.kChildAdded,
+            OpenMaya.MDagMessage.kChildRemoved,
+            OpenMaya.MDagMessage.kInstanceAdded,
+            OpenMaya.MDagMessage.kInstanceRemoved }
+        for type in dagCallbacks:
+            self._cbIds.append(OpenMaya.MDagMessage.addDagCallback(type, self._nodeReparentedCB))
+
+    def deactivate(self):
+        '''Removes the callbacks keeping the index up to date.'''
+        for id in self._cbIds:
+            OpenMaya.MMessage.removeCallback(id)
+        self._cbIds = []
+
+    def invalidate(self):
+        '''Drops the index, it is built again on the next query.'''
+        self.deactivate()
+        self._clear()
+
+    def ls(self, patterns, types=None):
+        '''Returns a set containing all the nodes matching patterns and types.
+        Same as selector.ls, patterns starting with '-' remove their matches
+        and types starting with '-' are excluded.'''
+        if types is None:
+            types = []
+        self._update()
+        selection = set()
+        for pattern in patterns:
+            if pattern.startswith('-'):
+                selection.difference_update(self._match(pattern[1:]))
+            else:
+                selection.update(self._match(pattern))
+        if len(types) > 0:
+            accepts = self._typeFilter(types)
+            nodeTypes = self._types
+            selection = set(name for name in selection if accepts(nodeTypes[name]))
+        return selection
+
+    def exists(self, name):
+        '''Returns True if a node has the given name (absolute path for dag nodes).'''
+        self._update()
+        return name in self._types
+
+    def children(self, path):
+        '''Returns the set of the absolute paths of the children of a dag path.'''
+        self._update()
+        return set(child for child in self._children.get(path, ()) if child in self._types)
+
+    # index maintenance
+    def _update(self):
+        if not self._valid:
+            # ls lists a single path per instanced dag node, so list all
+            # the dag paths too, as the node added callbacks do
+            self._build((cmds.ls(long=True, showType=True) or []) +
+                        (cmds.ls(dag=True, allPaths=True, long=True, showType=True) or []))
+            self.activate()
+        self._flush()
+
+    def _flush(self):
+        '''Indexes the nodes added, renamed or reparented since the last query.'''
+        if len(self._pending) == 0:
+            return
+        pending, self._pending = self._pending, []
+        done = set()
+        dagPaths = []
+        for handle in pending:
+            if not handle.isAlive() or not handle.isValid() or handle.hashCode() in done:
+                continue
+            done.add(handle.hashCode())
+            obj = handle.object()
+            if obj.hasFn(OpenMaya.MFn.kDagNode):
+                dagPaths.extend(path.fullPathName() for path in OpenMaya.MFnDagNode(obj).getAllPaths())
+            else:
+                fn = OpenMaya.MFnDependencyNode(obj)
+                self._add(fn.name(), fn.typeName)
+        if len(dagPaths) > 0:
+            # the descendants are listed too, their paths change with their parent's
+            self._addAll(cmds.ls(dagPaths, dag=True, allPaths=True, long=True, showType=True) or [])
+
+    def _build(self, namesAndTypes):
+        '''Builds the index from scratch, faster than adding the nodes one by one.'''
+        self._clear()
+        it = iter(namesAndTypes)
+        self._types = dict(itertools.izip(it, it))
+        leaves = self._leaves
+        children = self._children
+        for name in self._types.iterkeys():
+            i = name.rfind('|')
+            leaf = name[i+1:]
+            names = leaves.get(leaf)
+            if names is None:
+                leaves[leaf] = [name]
+            else:
+                names.append(name)
+            if i >= 0:
+                parent = name[:i]
+                siblings = children.get(parent)
+                if siblings is None:
+                    children[parent] = [name]
+                else:
+                    siblings.append(name)
+        self._valid = True
+
+    def _addAll(self, namesAndTypes):
+        it = iter(namesAndTypes)
+        for name, typeName in itertools.izip(it, it):
+            self._add(name, typeName)
+
+    def _add(self, name, typeName):
+        isNew = name not in self._types
+        self._types[name] = typeName
+        if not isNew:
+            return
+        leaf = _leaf(name)
+        names = self._leaves.get(leaf)
+        if names is None:
+            self._leaves[leaf] = [name]
+            self._sortedLeaves = None
+        else:
+            names.append(name)
+        if name.startswith('|'):
+            self._children.setdefault(_parent(name), []).append(name)
+        for program, matches in self._patterns.itervalues():
+            if program.match(name):
+                matches.add(name)
+
+    def _removeTree(self, name):
+        '''Removes name and all the dag paths below it from the index.'''
+        stack = [name]
+        while len(stack) > 0:
+            name = stack.pop()
+            stack.extend(self._children.pop(name, ()))
+            if self._types.pop(name, None) is None:
+                continue
+            leaf = _leaf(name)
+            names = self._leaves[leaf]
+            names.remove(name)
+            if len(names) == 0:
+                # left in the sorted leaves, skipped when matching
+                del self._leaves[leaf]
+            for program, matches in self._patterns.itervalues():
+                matches.discard(name)
+
+    # pattern matching
+    def _match(self, pattern):
+        '''Returns the set of names matching pattern, from the cache if possible.'''
+        entry = self._patterns.get(pattern)
+        if entry is None:
+            program = createProgram(pattern)[1]
+            entry = (program, self._scan(pattern, program))
+            self._patterns[pattern] = entry
+        return entry[1]
+
+    def _scan(self, pattern, program):
+        if pattern == '*':
+            return set(self._types.iterkeys())
+        if '|' in pattern:
+            return set(name for name in self._types.iterkeys() if program.match(name))
+        # the program matches the leaf name of a path on its own
+        prefix = _literalPrefix(pattern)
+        leaves = self._leavesStartingWith(prefix) if len(prefix) > 0 else self._leaves.keys()
+        names = set()
+        for leaf in leaves:
+            if leaf in self._leaves and program.match(leaf):
+                names.update(self._leaves[leaf])
+        return names
+
+    def _leavesStartingWith(self, prefix):
+        if self._sortedLeaves is None:
+            self._sortedLeaves = sorted(self._leaves.iterkeys())
+        leaves = self._sortedLeaves
+        for i in xrange(bisect.bisect_left(leaves, prefix), len(leaves)):
+            if not leaves[i].startswith(prefix):
+                break
+            yield leaves[i]
+
+    def _typeFilter(self, types):
+        '''Returns a function telling if a node type passes the type filters.'''
+        key = tuple(types)
+        accepted = self._typeFilters.get(key)
+        if accepted is None:
+            self._typeFilters[key] = accepted = dict()
+        includes = set(t for t in types if not t.startswith('-'))
+        excludes = set(t[1:] for t in types if t.startswith('-'))
+        def accepts(typeName):
+            result = accepted.get(typeName)
+            if result is None:
+                inherited = self._inheritedTypes(typeName)
+                result = inherited.isdisjoint(excludes) and (len(includes) == 0 or not inherited.isdisjoint(includes))
+                accepted[typeName] = result
+            return result
+        return accepts
+
+    def _inheritedTypes(self, typeName):
+        inherited = self._inherited.get(typeName)
+        if inherited is None:
+            try: inherited = set(cmds.nodeType(typeName, inherited=True, isTypeName=True) or ())
+            except: inherited = set()
+            inherited.add(typeName)
+            self._inherited[typeName] = inherited
+        return inherited
+
+    # callbacks
+    def _beforeNewCb(self, data):
+        self.invalidate()
+
+    def _isReadingFile(self):
+        if OpenMaya1_0.MFileIO.isReadingFile() or OpenMaya1_0.MFileIO.isReferencingFile():
+            # too many changes to follow, build the index again when needed
+            self.invalidate()
+            return True
+        return False
+
+    def _nodeAddedCB(self, obj, clientData):
+        if not self._isReadingFile():
+            self._pending.append(OpenMaya.MObjectHandle(obj))
+
+    def _nodeRemovedCB(self, obj, clientData):
+        if self._isReadingFile():
+            return
+        if obj.hasFn(OpenMaya.MFn.kDagNode):
+            for path in OpenMaya.MFnDagNode(obj).getAllPaths():
+                self._removeTree(path.fullPathName())
+        else:
+            self._removeTree(OpenMaya.MFnDependencyNode(obj).name())
+
+    def _nodeRenamedCB(self, obj, oldName, clientData):
+        # an empty old name means the node is being created, it is pending already
+        if len(oldName) == 0 or self._isReadingFile():
+            return
+        if obj.hasFn(OpenMaya.MFn.kDagNode):
+            # Note: The oldName is a node name and not an absolute path
+            for path in OpenMaya.MFnDagNode(obj).getAllPaths():
+                self._removeTree(_parent(path.fullPathName()) + '|' + oldName)
+        else:
+            self._removeTree(oldName)
+        self._pending.append(OpenMaya.MObjectHandle(obj))
+
+    def _nodeReparentedCB(self, msgType, child, parent, clientData):
+        if self._isReadingFile():
+            return
+        if msgType in (OpenMaya.MDagMessage.kChildRemoved, OpenMaya.MDagMessage.kInstanceRemoved):
+            self._removeTree(parent.fullPathName() + '|' + OpenMaya.MFnDependencyNode(child.node()).name())
+        else:
+            self._pending.append(OpenMaya.MObjectHandle(child.node()))
+
+_sceneIndex = None
+
+def instance():
+
+    global _sceneIndex
+
+    if _sceneIndex is None:
+        _sceneIndex = SceneIndex()
+
+    return _sceneIndex
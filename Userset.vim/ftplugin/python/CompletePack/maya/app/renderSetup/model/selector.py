@@ -20,6 +20,7 @@ import maya.app.renderSetup.model.typeIDs as typeIDs
 import maya.app.renderSetup.model.utils as utils
 import maya.app.renderSetup.model.undo as undo
 import maya.app.renderSetup.model.sceneObservable as sceneObservable
+import maya.app.renderSetup.model.sceneIndex as sceneIndex
 
 import maya.app.renderSetup.model.algorithm as algorithm
 from maya.app.renderSetup.model.selection import Selection
@@ -242,31 +243,9 @@ def selectionToAbsoluteNames(selection, permissive=False):
 def ls(patterns, types=None):
     '''
     Returns a set containing all the nodes matching patterns and types.
+    The patterns are matched against the scene index shared by all the selectors.
     '''
-    #Default argument correction
-    if types is None:
-        types = []
-    includeTypes = [t for t in types if not t.startswith('-')]
-    
-    def addPattern(selection, pattern):
-        update = set.update
-        if pattern.startswith(r'-'):
-            pattern = pattern[1:]
-            update = set.difference_update
-        update(selection, cmds.ls(pattern, type=includeTypes, long=True) if pattern != '*' \
-            else cmds.ls(type=includeTypes, long=True))
-        return selection
-    selection = reduce(addPattern, patterns, set())
-    
-    # Apparently, ls -excludeType cannot be used in conjunction with a pattern...
-    # it does the same as -type when we do so... 
-    # i.e. ls -excludeType transform "*" returns all the transforms...
-    # => must exclude types ourselves
-    excludeTypes = [t for t in types if t.startswith('-')]
-    if len(excludeTypes) > 0:
-        selection = itertools.ifilter(createTypeFilter(excludeTypes), selection)
-    
-    return set(selection)
+    return sceneIndex.instance().ls(patterns, types)
 
 class Selector(OpenMaya.MPxNode):
     '''Selector node base class (abstract).
@@ -365,6 +344,8 @@ class Selector(OpenMaya.MPxNode):
         self._selection = None
         self._callbacks = None
         self._cbId = None
+        # incremented every time the selection is computed again
+        self._version = 0
     
     def postConstructor(self):
         self.activate()
@@ -479,6 +460,7 @@ class Selector(OpenMaya.MPxNode):
         self._selection = None
         if plug == Selector.aOut:
             self._update(dataBlock)
+            self._version += 1
             # need to set the input clean to allow correct dirty propagation
             # since we're using it only for this but not actually pulling its value.
             # (setting the output clean implies nothing on the cleanliness of the inputs and
@@ -1228,6 +1210,13 @@ class SimpleSelector(Selector):
     def getDynamicNames(self):
         return self._dynamicCache
     
+    @Selector.synced
+    def getVersion(self):
+        '''Returns a stamp of the selection content. It changes every time the
+        selection is computed again, i.e. after any change dirtying this selector
+        (static selection, filters, pattern, parent or scene changes).'''
+        return self._version
+    
     def getInvalidFilters(self, dataBlock=None):
         return [] if self.getFilterType(dataBlock) != Filters.kCustom else \
             filter(lambda t: not utils.isExistingType(t) and not utils.isExistingClassification(t), # test validity
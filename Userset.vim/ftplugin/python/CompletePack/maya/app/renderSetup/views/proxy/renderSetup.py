@@ -765,7 +765,8 @@ class BaseCollectionProxy(DataModelListObserver, ModelProxyItem):
     @undo.chunk('Import a template render setup file')
     def importTemplate(self, objList):
         """ Import the collection template or override template in the current collection """
-        self._model._decodeChildren(objList, renderSetupModel.DECODE_AND_MERGE, None)
+        with nodeList.SuspendNotifications():
+            self._model._decodeChildren(objList, renderSetupModel.DECODE_AND_MERGE, None)
 
 
 class CollectionProxy(BaseCollectionProxy):
@@ -1308,7 +1309,8 @@ class RenderLayerProxy(DataModelListObserver, ModelProxyItem):
     @undo.chunk('Import a template render setup file')
     def importTemplate(self, objList):
         """ Import the collection template file in the current render layer """
-        self._model._decodeChildren(objList, renderSetupModel.DECODE_AND_RENAME, None)
+        with nodeList.SuspendNotifications():
+            self._model._decodeChildren(objList, renderSetupModel.DECODE_AND_RENAME, None)
 
     def isDropAllowed(self, destinationModel):
         return destinationModel is self._model.parent()
@@ -1678,7 +1680,8 @@ class RenderSetupProxy(DataModelListObserver, Template, QStandardItemModel):
         """ Import the render layer template file in the render setup """
         # Impose the creation of the render setup node
         rs = renderSetupModel.instance()
-        rs._decodeChildren(objList, renderSetupModel.DECODE_AND_MERGE, None)
+        with nodeList.SuspendNotifications():
+            rs._decodeChildren(objList, renderSetupModel.DECODE_AND_MERGE, None)
 
     @undo.chunk('Paste')
     def paste(self, jsonStr):
@@ -39,10 +39,12 @@ import os
 import re
 import sys
 import json
-import math
 import hashlib
 import subprocess
 import maya.cmds as cmds
+from maya.debug.DGStateColumns import DGStateColumns
+# The match constants are defined along with the comparison
+from maya.debug.DGStateColumns import NO_SIGNIFICANT_DIGITS_MATCH
 
 __all__ = [ 'DGState' ]
 
@@ -89,15 +91,6 @@ IMAGEMAGICK_METRIC = 'FUZZ'
 IMF_DIFF_MATCH_TOLERANCE = 1.0
 IMF_DIFF_MIN_DIFFERENCE = '5'
 
-# Constant indicating that values are completely equal
-ALL_SIGNIFICANT_DIGITS_MATCH = 999
-# Constant indicating that values are completely unequal
-NO_SIGNIFICANT_DIGITS_MATCH = 0
-# Number of significant digits to match for regular values
-SIGNIFICANT_DIGITS = 1.9
-# Number of significant digits to match for inverse matrix values (they are less accurate)
-SIGNIFICANT_DIGITS_INVERSE = 0.9
-
 #======================================================================
 class DGState(object):
     """
@@ -124,7 +117,7 @@ class DGState(object):
 
     # Name to match for inverse matrix attributes, who use more lenient
     # tolerances when comparing since their computations are less consistent
-    RE_INVERSE_MATRIX = 'InverseMatrix'
+    RE_INVERSE_MATRIX = DGStateColumns.INVERSE_MATRIX
 
     #----------------------------------------------------------------------
     def __init__(self):
@@ -136,6 +129,9 @@ class DGState(object):
         self.filtered_plugs = {}
         self.state = []
         self.md5_value = MD5_DEFAULT
+        # Columnar form of the state, and the state it was built from
+        self.__columns = None
+        self.__columns_state = None
 
     #----------------------------------------------------------------------
     def __str__(self):
@@ -197,12 +193,26 @@ class DGState(object):
                             if line != '\n'][1:]
 
     #----------------------------------------------------------------------
-    def store_state(self, results_file=None, image_file=None):
+    def columns(self):
+        """
+        Get the state in its columnar form, used for comparisons. It is built
+        once per state and then reused.
+        """
+        if self.__columns is None or self.__columns_state is not self.state:
+            self.__columns = DGStateColumns.from_lines( self.state )
+            self.__columns_state = self.state
+        return self.__columns
+
+    #----------------------------------------------------------------------
+    def store_state(self, results_file=None, image_file=None, columns_file=None):
         """
         Store the existing state in the files passed in.
 
         results_file: Destination for the raw numerical data for comparison
         image_file:   Destination for the viewport screenshot
+        columns_file: Destination for the state in the binary columnar format,
+                      which is faster to read back and can be memory-mapped.
+                      read_state() recognizes either format.
         """
         if results_file != None:
             try:
@@ -214,6 +224,12 @@ class DGState(object):
             except Exception, ex:
                 print 'ERROR: Could not write to results file %s: "%s"' % (results_file, str(ex))
 
+        if columns_file != None:
+            try:
+                self.columns().save( columns_file )
+            except Exception, ex:
+                print 'ERROR: Could not write to columns file %s: "%s"' % (columns_file, str(ex))
+
         if image_file != None:
             # Turn off all HUDS for the snapshot since we're only concerned
             # with correct evaluation here
@@ -250,7 +266,14 @@ class DGState(object):
         self.image_file = image_file
         self.state = []
         # Read the results file state information right away
-        if results_file != None:
+        if results_file != None and DGStateColumns.is_state_file(results_file):
+            try:
+                self.__columns = DGStateColumns.load( results_file )
+                self.state = list(self.__columns.lines())
+                self.__columns_state = self.state
+            except Exception, ex:
+                print 'ERROR: Could not read results file %s: "%s"' % (results_file, str(ex))
+        elif results_file != None:
             try:
                 results_fd = open(results_file, 'r')
                 for line in results_fd:
@@ -317,66 +340,6 @@ class DGState(object):
 
         return program_name
 
-    #----------------------------------------------------------------------
-    @staticmethod
-    def __closeness(first_num, second_num):
-        """
-        Returns measure of equality (for two floats), in unit
-        of decimal significant figures.
-        """
-        # Identical results are obviously equal
-        if first_num == second_num:
-            return float('infinity')
-
-        # Arbitrarily pick two near-zero values for rounding.
-        # This avoids the instability of the log10 method when near zero.
-        if abs(first_num) < 1e-4 and abs(second_num) < 1e-4:
-            return float('infinity')
-
-        # Standard numerical closeness check, the logarithmic
-        # difference of the average divided by the difference gives
-        # the number of significant digits they have in common.
-        difference = abs(first_num - second_num)
-        avg = abs(first_num + second_num)/2
-        return math.log10( avg / difference )
-
-    #----------------------------------------------------------------------
-    def __compare_list_of_floats(self, float_list1, float_list2):
-        """
-        Compare two space-separated lists of floating point numbers.
-        Return True if they are the same, False if they differ.
-
-        float_list1:        First list of floats
-        float_list1:        Second list of floats
-
-        Returns the worst match, in significant digits (0 means no match at all).
-        """
-        if float_list1 == float_list2:
-            return ALL_SIGNIFICANT_DIGITS_MATCH
-
-        worst_match = ALL_SIGNIFICANT_DIGITS_MATCH
-
-        # Values are not trivially equal so compare numerically.
-        float_list1_values = float_list1.split(' ')
-        float_list2_values = float_list2.split(' ')
-
-        # Obviously if the float Lists have different lengths they are different
-        if len(float_list1_values) != len(float_list2_values):
-            return NO_SIGNIFICANT_DIGITS_MATCH
-
-        for float_el in range(len(float_list1_values)):
-            try:
-                tolerance = self.__closeness(float(float_list1_values[float_el])
-                                           , float(float_list2_values[float_el]))
-                if tolerance < worst_match:
-                    worst_match = tolerance
-            except ValueError:
-                # This indicates non-numerical values in the float list. Since
-                # they are undefined they can be assumed to be different.
-                return NO_SIGNIFICANT_DIGITS_MATCH
-
-        return worst_match
-
     #----------------------------------------------------------------------
     def filter_state(self, plug_filter):
         """
@@ -646,50 +609,11 @@ class DGState(object):
                                                   }
                                        }
         """
-        self_values = {}
-        other_values = {}
-        for line in self.state:
-            try:
-                column_values = line.split(',')
-                self_values['%s.%s' % (column_values[0],column_values[1])] = ' '.join(column_values[3:])
-            except IndexError:
-                print 'ERROR: dbpeek line not could not be parsed: "%s"' % line
-        for line in other.state:
-            try:
-                column_values = line.split(',')
-                other_values['%s.%s' % (column_values[0],column_values[1])] = ' '.join(column_values[3:])
-            except IndexError:
-                print 'ERROR: dbpeek line could not be parsed: "%s"' % line
-
-        if output_mode == DGState.OUTPUT_JSON:
-            changed_values = {}
-        else:
-            changed_values = []
-        error_count = 0
-
-        worst_match = ALL_SIGNIFICANT_DIGITS_MATCH
-
-        # Find changed values and values in the original version but not in the new one
-        for (name,value) in self_values.iteritems():
-            if name in other_values:
-                # The inverse matrix attribute calculations are less accurate
-                # so be more lenient with them.
-                if name.find(DGState.RE_INVERSE_MATRIX) >= 0:
-                    significant_digits = SIGNIFICANT_DIGITS_INVERSE
-                else:
-                    significant_digits = SIGNIFICANT_DIGITS
-                match_digits = self.__compare_list_of_floats(value, other_values[name])
-                if match_digits < significant_digits:
-                    error_count += 1
-                    if output_mode == DGState.OUTPUT_JSON:
-                        changed_values[name] = { 'match' : match_digits
-                                               , 'value' : value
-                                               , 'other' : other_values[name]
-                                               }
-                    else:
-                        changed_values.append( '%s,%s,%s,%s' % (name, value, other_values[name], match_digits) )
-                if match_digits < worst_match:
-                    worst_match = match_digits
+        # The plug values are compared in their columnar form, all at once.
+        # The inverse matrix attribute calculations are less accurate so
+        # the comparison is more lenient with them.
+        (changed_values, error_count, worst_match) = self.columns().compare( other.columns(),
+                                                                             as_json=(output_mode == DGState.OUTPUT_JSON) )
 
         # If image files are present run a comparison on them too
         #
@@ -0,0 +1,500 @@
+"""
+Columnar form of the DG state information captured by DGState, built for
+comparing large amounts of plug values quickly.
+
+Instead of one CSV string per plug the values are kept in three columns:
+
+    plugs   : Sorted list of interned plug names, "NODE.ATTRIBUTE"
+    offsets : PLUG_COUNT+1 integers, the values of plugs[i] being
+              values[offsets[i]:offsets[i+1]]
+    values  : One contiguous buffer of doubles holding the values of all plugs
+
+Plugs whose values are not all numeric are kept aside as text, in the
+dictionary texts = { PLUG_INDEX : VALUE_STRING }, and compared as strings.
+
+When numpy is available the columns are numpy arrays, the comparison of two
+states computes the significant-digit closeness of every value of every plug
+in one vectorized pass, and saved states can be memory-mapped. Without numpy
+the columns are array.array objects and the comparison loops over the values,
+which is still much faster than re-parsing the CSV strings.
+
+The binary file format, all integers and doubles little-endian, with every
+section padded to a multiple of 8 bytes:
+
+    MAGIC                               8 bytes
+    PLUG_COUNT, VALUE_COUNT,
+    NAMES_SIZE, TEXTS_SIZE              4 unsigned 64-bit integers
+    NAMES                               Newline-separated plug names
+    TEXTS                               JSON { PLUG_INDEX : VALUE_STRING }
+    OFFSETS                             PLUG_COUNT+1 signed 64-bit integers
+    VALUES                              VALUE_COUNT doubles
+
+Usage:
+    from maya.debug.DGState import DGState
+    from maya.debug.DGStateColumns import DGStateColumns
+    state = DGState()
+    state.scan_scene( do_eval=True, data_types=['matrix','vertex'] )
+    columns = DGStateColumns.from_lines( state.state )
+    columns.save( 'MyDir/state.dgc' )
+    (changes, error_count, worst_match) = columns.compare( DGStateColumns.load( 'MyDir/other.dgc' ) )
+"""
+
+import re
+import sys
+import json
+import math
+import array
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = [ 'DGStateColumns' ]
+
+# Constant indicating that values are completely equal
+ALL_SIGNIFICANT_DIGITS_MATCH = 999
+# Constant indicating that values are completely unequal
+NO_SIGNIFICANT_DIGITS_MATCH = 0
+# Number of significant digits to match for regular values
+SIGNIFICANT_DIGITS = 1.9
+# Number of significant digits to match for inverse matrix values (they are less accurate)
+SIGNIFICANT_DIGITS_INVERSE = 0.9
+# Values closer to zero than this are considered equal
+NEAR_ZERO = 1e-4
+
+# Expression that extracts the root attribute out of an attribute name.
+RE_ROOT_ATTRIBUTE = re.compile( r'([^\.^\[]+)' )
+
+# Identification of the binary file format, including its version
+MAGIC = 'DGSTATE1'
+HEADER_FORMAT = '<8s4Q'
+
+# The binary format is little-endian, which is what the arrays are read as
+IS_LITTLE_ENDIAN = (sys.byteorder == 'little')
+
+#----------------------------------------------------------------------
+def _padding(size):
+    """
+    Returns the number of bytes needed to pad size to a multiple of 8.
+    """
+    return (8 - size % 8) % 8
+
+#----------------------------------------------------------------------
+def _closeness(first_num, second_num):
+    """
+    Returns measure of equality (for two floats), in unit of decimal
+    significant figures. Same as DGState's, except that None is returned
+    where that one would fail (two values averaging to zero).
+    """
+    if first_num == second_num:
+        return float('infinity')
+    if abs(first_num) < NEAR_ZERO and abs(second_num) < NEAR_ZERO:
+        return float('infinity')
+    difference = abs(first_num - second_num)
+    avg = abs(first_num + second_num)/2
+    if avg == 0.0:
+        return None
+    return math.log10( avg / difference )
+
+#======================================================================
+class DGStateColumns(object):
+    """
+    Columnar DG state. See the module documentation for the layout.
+
+    plugs:   Sorted list of plug names
+    offsets: Start of the values of each plug, plus the end of the last one
+    values:  Values of all plugs, one after the other
+    texts:   Values of the plugs that are not numeric, by plug index
+    """
+    INVERSE_MATRIX = 'InverseMatrix'
+
+    #----------------------------------------------------------------------
+    def __init__(self, plugs=None, offsets=None, values=None, texts=None):
+        """
+        Create a state from existing columns. Use from_lines() or load() to
+        create one from the usual sources.
+        """
+        self.plugs = plugs if plugs is not None else []
+        self.offsets = offsets if offsets is not None else self.__index_array( [0] )
+        self.values = values if values is not None else self.__value_array( [] )
+        self.texts = texts if texts is not None else {}
+        self.__plug_index = None
+
+    #----------------------------------------------------------------------
+    def __len__(self):
+        return len(self.plugs)
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def __index_array(index_list):
+        """ Column of offsets in the best available form """
+        if numpy is not None:
+            return numpy.array( index_list, dtype=numpy.int64 )
+        return array.array( 'l', index_list )
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def __value_array(value_list):
+        """ Column of values in the best available form """
+        if not isinstance(value_list, array.array):
+            value_list = array.array( 'd', value_list )
+        if numpy is not None:
+            # Shares the array's buffer rather than copying it
+            return numpy.frombuffer( value_list, dtype=numpy.float64 )
+        return value_list
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def from_lines(state_lines):
+        """
+        Build the columns from the dbpeek CSV lines held in DGState.state:
+
+            NODE,ATTRIBUTE,CLEAN,VALUE[,VALUE...]
+
+        where each VALUE can itself be a space-separated list. Lines are only
+        split once, here. Later lines for the same plug replace earlier ones.
+        """
+        plug_values = {}
+        for line in state_lines:
+            column_values = line.split(',')
+            if len(column_values) < 2:
+                print 'ERROR: dbpeek line could not be parsed: "%s"' % line
+                continue
+            plug_values[intern('%s.%s' % (column_values[0], column_values[1]))] = ' '.join(column_values[3:])
+
+        plugs = sorted(plug_values.keys())
+        offsets = [0]
+        values = array.array( 'd' )
+        texts = {}
+        for plug in plugs:
+            value_string = plug_values[plug]
+            try:
+                plug_floats = [float(value) for value in value_string.split(' ')]
+            except ValueError:
+                texts[len(offsets)-1] = value_string
+                plug_floats = []
+            values.extend( plug_floats )
+            offsets.append( len(values) )
+
+        return DGStateColumns( plugs,
+                               DGStateColumns.__index_array( offsets ),
+                               DGStateColumns.__value_array( values ),
+                               texts )
+
+    #----------------------------------------------------------------------
+    def plug_index(self, plug):
+        """
+        Returns the index of the named plug, None if it is not in the state.
+        """
+        if self.__plug_index is None:
+            self.__plug_index = dict( (name, index) for (index, name) in enumerate(self.plugs) )
+        return self.__plug_index.get( plug )
+
+    #----------------------------------------------------------------------
+    def plug_value(self, index):
+        """
+        Returns the value of the plug at the given index as a string, in the
+        same space-separated form DGState uses.
+        """
+        if index in self.texts:
+            return self.texts[index]
+        return ' '.join( [repr(float(value)) for value in self.values[self.offsets[index]:self.offsets[index+1]]] )
+
+    #----------------------------------------------------------------------
+    def lines(self):
+        """
+        Generator returning the state back as DGState CSV lines. The CLEAN
+        column is not kept so it is left empty.
+        """
+        for index in range(len(self.plugs)):
+            (node, attribute) = self.plugs[index].split('.', 1)
+            yield '%s,%s,,%s' % (node, attribute, ','.join(self.plug_value(index).split(' ')))
+
+    #----------------------------------------------------------------------
+    def filter(self, plug_filter):
+        """
+        Returns a new state holding only the plugs on the plug_filter list,
+        with the same meaning as in DGState.filter_state().
+
+        plug_filter: Dictionary of nodes whose values are dictionaries of
+                     root level attributes that are to be used for the
+                     purpose of the comparison. None means no filter.
+        """
+        if not plug_filter:
+            return self
+
+        kept = []
+        for index in range(len(self.plugs)):
+            (node, attribute) = self.plugs[index].split('.', 1)
+            if node not in plug_filter:
+                continue
+            if RE_ROOT_ATTRIBUTE.match(attribute).group(1) not in plug_filter[node]:
+                continue
+            kept.append( index )
+
+        plugs = [self.plugs[index] for index in kept]
+        texts = {}
+        offsets = [0]
+        values = array.array( 'd' )
+        for (new_index, index) in enumerate(kept):
+            if index in self.texts:
+                texts[new_index] = self.texts[index]
+            values.extend( self.values[self.offsets[index]:self.offsets[index+1]] )
+            offsets.append( len(values) )
+        return DGStateColumns( plugs,
+                               self.__index_array( offsets ),
+                               self.__value_array( values ),
+                               texts )
+
+    #----------------------------------------------------------------------
+    def __common_plugs(self, other):
+        """
+        Returns two lists with the indexes in self and other of the plugs
+        present in both, merging the two sorted plug lists.
+        """
+        self_indexes = []
+        other_indexes = []
+        self_count = len(self.plugs)
+        other_count = len(other.plugs)
+        (self_index, other_index) = (0, 0)
+        while self_index < self_count and other_index < other_count:
+            self_plug = self.plugs[self_index]
+            other_plug = other.plugs[other_index]
+            if self_plug == other_plug:
+                self_indexes.append( self_index )
+                other_indexes.append( other_index )
+                self_index += 1
+                other_index += 1
+            elif self_plug < other_plug:
+                self_index += 1
+            else:
+                other_index += 1
+        return (self_indexes, other_indexes)
+
+    #----------------------------------------------------------------------
+    def __match_numpy(self, other, self_indexes, other_indexes):
+        """
+        Vectorized worst match, in significant digits, of the values of
+        each pair of plugs. Pairs with text values are left to the caller.
+        """
+        self_indexes = numpy.array( self_indexes, dtype=numpy.int64 )
+        other_indexes = numpy.array( other_indexes, dtype=numpy.int64 )
+        self_offsets = numpy.asarray( self.offsets, dtype=numpy.int64 )
+        other_offsets = numpy.asarray( other.offsets, dtype=numpy.int64 )
+        self_starts = self_offsets[self_indexes]
+        other_starts = other_offsets[other_indexes]
+        lengths = self_offsets[self_indexes+1] - self_starts
+
+        matches = numpy.empty( len(self_indexes), dtype=numpy.float64 )
+        matches.fill( ALL_SIGNIFICANT_DIGITS_MATCH )
+        same_length = (lengths == other_offsets[other_indexes+1] - other_starts)
+        matches[~same_length] = NO_SIGNIFICANT_DIGITS_MATCH
+
+        # Gather the values of all the plugs of the same length into two
+        # aligned buffers, then reduce the closeness of each segment.
+        compared = numpy.nonzero( same_length & (lengths > 0) )[0]
+        if len(compared) == 0:
+            return matches
+        segment_lengths = lengths[compared]
+        segment_starts = numpy.cumsum( segment_lengths ) - segment_lengths
+        positions = numpy.arange( segment_lengths.sum() ) - numpy.repeat( segment_starts, segment_lengths )
+        first = numpy.asarray( self.values )[numpy.repeat( self_starts[compared], segment_lengths ) + positions]
+        second = numpy.asarray( other.values )[numpy.repeat( other_starts[compared], segment_lengths ) + positions]
+
+        with numpy.errstate( divide='ignore', invalid='ignore' ):
+            difference = numpy.abs( first - second )
+            avg = numpy.abs( first + second ) / 2
+            closeness = numpy.log10( avg / difference )
+            equal = (first == second) | ((numpy.abs(first) < NEAR_ZERO) & (numpy.abs(second) < NEAR_ZERO))
+        closeness[equal] = numpy.inf
+        # Values averaging to zero cannot be measured, the plug does not match
+        unmeasurable = (avg == 0.0) & ~equal
+
+        # fmin ignores NaN, the same way the scalar comparison does
+        worst = numpy.fmin.reduceat( closeness, segment_starts )
+        worst = numpy.where( numpy.isnan(worst), ALL_SIGNIFICANT_DIGITS_MATCH,
+                             numpy.minimum( worst, ALL_SIGNIFICANT_DIGITS_MATCH ) )
+        worst[numpy.add.reduceat( unmeasurable.astype(numpy.int64), segment_starts ) > 0] = NO_SIGNIFICANT_DIGITS_MATCH
+        matches[compared] = worst
+        return matches
+
+    #----------------------------------------------------------------------
+    def __match_python(self, other, self_indexes, other_indexes):
+        """
+        Same as __match_numpy, one value at a time.
+        """
+        matches = []
+        for (self_index, other_index) in zip(self_indexes, other_indexes):
+            first = self.values[self.offsets[self_index]:self.offsets[self_index+1]]
+            second = other.values[other.offsets[other_index]:other.offsets[other_index+1]]
+            if len(first) != len(second):
+                matches.append( NO_SIGNIFICANT_DIGITS_MATCH )
+                continue
+            worst_match = ALL_SIGNIFICANT_DIGITS_MATCH
+            if first != second:
+                for (first_num, second_num) in zip(first, second):
+                    tolerance = _closeness( first_num, second_num )
+                    if tolerance is None:
+                        worst_match = NO_SIGNIFICANT_DIGITS_MATCH
+                        break
+                    if tolerance < worst_match:
+                        worst_match = tolerance
+            matches.append( worst_match )
+        return matches
+
+    #----------------------------------------------------------------------
+    def plug_matches(self, other):
+        """
+        Compare the values of every plug present in both states.
+
+        other: Other DGStateColumns to compare against
+
+        Returns a list of ( PLUG, SELF_INDEX, OTHER_INDEX, MATCH ) in plug
+        order, MATCH being the worst match of the plug's values in
+        significant digits.
+        """
+        (self_indexes, other_indexes) = self.__common_plugs( other )
+        if numpy is not None:
+            matches = self.__match_numpy( other, self_indexes, other_indexes ).tolist()
+        else:
+            matches = self.__match_python( other, self_indexes, other_indexes )
+
+        # Text values only match when identical
+        if self.texts or other.texts:
+            for (position, self_index) in enumerate(self_indexes):
+                other_index = other_indexes[position]
+                if self_index in self.texts or other_index in other.texts:
+                    same = (self.plug_value(self_index) == other.plug_value(other_index))
+                    matches[position] = ALL_SIGNIFICANT_DIGITS_MATCH if same else NO_SIGNIFICANT_DIGITS_MATCH
+
+        return [(self.plugs[self_index], self_index, other_indexes[position], matches[position])
+                for (position, self_index) in enumerate(self_indexes)]
+
+    #----------------------------------------------------------------------
+    def compare(self, other, as_json=False):
+        """
+        Compare the plug values of two states, with the same tolerances as
+        DGState.compare().
+
+        other:   Other DGStateColumns to compare against
+        as_json: If True return the details as a dictionary, otherwise as a
+                 list of CSV lines (see DGState.compare())
+
+        Returns a tuple of (ERROR_DETAILS, ERROR_COUNT, WORST_ERROR_METRIC)
+        """
+        changed_values = {} if as_json else []
+        error_count = 0
+        worst_match = ALL_SIGNIFICANT_DIGITS_MATCH
+
+        for (plug, self_index, other_index, match_digits) in self.plug_matches( other ):
+            # The inverse matrix attribute calculations are less accurate
+            # so be more lenient with them.
+            if plug.find(self.INVERSE_MATRIX) >= 0:
+                significant_digits = SIGNIFICANT_DIGITS_INVERSE
+            else:
+                significant_digits = SIGNIFICANT_DIGITS
+            if match_digits < significant_digits:
+                error_count += 1
+                value = self.plug_value( self_index )
+                other_value = other.plug_value( other_index )
+                if as_json:
+                    changed_values[plug] = { 'match' : match_digits
+                                           , 'value' : value
+                                           , 'other' : other_value
+                                           }
+                else:
+                    changed_values.append( '%s,%s,%s,%s' % (plug, value, other_value, match_digits) )
+            if match_digits < worst_match:
+                worst_match = match_digits
+
+        return (changed_values, error_count, worst_match)
+
+    #----------------------------------------------------------------------
+    def save(self, file_name):
+        """
+        Write the state to a file in the binary format.
+        """
+        with open(file_name, 'wb') as state_fd:
+            self.write( state_fd )
+
+    #----------------------------------------------------------------------
+    def write(self, state_fd):
+        """
+        Write the state in the binary format at the current position of an
+        open file, so that several states can be stored in the same file.
+
+        Returns the number of bytes written.
+        """
+        names = '\n'.join( self.plugs )
+        texts = json.dumps( dict( (str(index), text) for (index, text) in self.texts.iteritems() ) )
+        if numpy is not None:
+            offsets = numpy.asarray( self.offsets, dtype='<i8' ).tostring()
+            values = numpy.asarray( self.values, dtype='<f8' ).tostring()
+        else:
+            offsets = struct.pack( '<%dq' % len(self.offsets), *self.offsets )
+            values = array.array( 'd', self.values )
+            if not IS_LITTLE_ENDIAN:
+                values.byteswap()
+            values = values.tostring()
+
+        state_fd.write( struct.pack( HEADER_FORMAT, MAGIC, len(self.plugs), len(self.values),
+                                     len(names), len(texts) ) )
+        state_fd.write( names + '\0' * _padding(len(names)) )
+        state_fd.write( texts + '\0' * _padding(len(texts)) )
+        state_fd.write( offsets )
+        state_fd.write( values )
+        return ( struct.calcsize(HEADER_FORMAT) + len(names) + _padding(len(names))
+                 + len(texts) + _padding(len(texts)) + len(offsets) + len(values) )
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def is_state_file(file_name):
+        """
+        Returns True if the file is in the binary state format.
+        """
+        try:
+            with open(file_name, 'rb') as state_fd:
+                return state_fd.read( len(MAGIC) ) == MAGIC
+        except IOError:
+            return False
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def load(file_name, memory_map=True, offset=0):
+        """
+        Read a state from a file in the binary format.
+
+        memory_map: If True, and numpy is available, the offsets and values
+                    are memory-mapped rather than read in.
+        offset:     Position of the state in the file, see write()
+        """
+        with open(file_name, 'rb') as state_fd:
+            state_fd.seek( offset )
+            header = state_fd.read( struct.calcsize(HEADER_FORMAT) )
+            (magic, plug_count, value_count, names_size, texts_size) = struct.unpack( HEADER_FORMAT, header )
+            if magic != MAGIC:
+                raise ValueError( '%s is not a DG state file' % file_name )
+            names = state_fd.read( names_size + _padding(names_size) )[:names_size]
+            texts = state_fd.read( texts_size + _padding(texts_size) )[:texts_size]
+            offsets_start = state_fd.tell()
+            values_start = offsets_start + 8 * (plug_count + 1)
+
+            if numpy is not None and memory_map:
+                offsets = numpy.memmap( file_name, dtype='<i8', mode='r', offset=offsets_start, shape=(plug_count+1,) )
+                values = numpy.memmap( file_name, dtype='<f8', mode='r', offset=values_start, shape=(value_count,) ) \
+                         if value_count > 0 else numpy.zeros( 0, dtype=numpy.float64 )
+            elif numpy is not None:
+                offsets = numpy.fromfile( state_fd, dtype='<i8', count=plug_count+1 )
+                values = numpy.fromfile( state_fd, dtype='<f8', count=value_count )
+            else:
+                offsets = array.array( 'l', struct.unpack( '<%dq' % (plug_count+1), state_fd.read( 8 * (plug_count+1) ) ) )
+                values = array.array( 'd' )
+                values.fromfile( state_fd, value_count )
+                if not IS_LITTLE_ENDIAN:
+                    values.byteswap()
+
+        plugs = [intern(plug) for plug in names.split('\n')] if plug_count > 0 else []
+        texts = dict( (int(index), text) for (index, text) in json.loads( texts ).iteritems() )
+        return DGStateColumns( plugs, offsets, values, texts )
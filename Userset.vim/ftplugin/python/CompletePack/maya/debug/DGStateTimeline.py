@@ -0,0 +1,259 @@
+"""
+Multi-frame DG state capture, stored on disk one frame at a time so that
+the memory used stays the same however many frames are captured or compared.
+
+A timeline file holds the DG state of every captured frame, in frame order,
+each one in the binary format of DGStateColumns:
+
+    MAGIC                               8 bytes
+    { FRAME, SIZE, STATE }*             double, unsigned 64-bit integer, and
+                                        SIZE bytes of DGStateColumns data
+
+Frames are read back one at a time, memory-mapped when numpy is available.
+The differ walks two timelines in step and reports the frames and plugs
+that differ, stopping at the first divergent frame if requested.
+
+Usage:
+    from maya.debug.DGStateTimeline import DGStateTimeline, first_divergence
+    DGStateTimeline.capture( 'MyDir/dg.dgt', range(1,2001), do_eval=True, data_types=['matrix','vertex'] )
+    ...switch evaluation mode...
+    DGStateTimeline.capture( 'MyDir/emp.dgt', range(1,2001), do_eval=False, data_types=['matrix','vertex'] )
+    print first_divergence( 'MyDir/dg.dgt', 'MyDir/emp.dgt' )
+"""
+
+import os
+import struct
+import maya.cmds as cmds
+from maya.debug.DGState import DGState
+from maya.debug.DGStateColumns import DGStateColumns, NO_SIGNIFICANT_DIGITS_MATCH
+
+__all__ = [ 'DGStateTimeline'
+          , 'compare_frames'
+          , 'diff_timelines'
+          , 'first_divergence'
+          , 'worst_plug'
+          , 'MISSING_FRAME_PLUG'
+          ]
+
+# Identification of the timeline file format, including its version
+MAGIC = 'DGTIMEL1'
+FRAME_FORMAT = '<dQ'
+
+# Placeholder plug reported when a frame is in only one of the timelines
+MISSING_FRAME_PLUG = '__frame__.missing'
+
+#======================================================================
+class DGStateTimeline(object):
+    """
+    On-disk sequence of DG states, one per frame.
+
+    file_name: Where the frames are stored
+    """
+    #----------------------------------------------------------------------
+    def __init__(self, file_name):
+        """
+        Create an object giving access to the named timeline file. Nothing
+        is read until frames() is called.
+        """
+        self.file_name = file_name
+        self.__write_fd = None
+
+    #----------------------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    #----------------------------------------------------------------------
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    #----------------------------------------------------------------------
+    def open_for_writing(self):
+        """
+        Start a new timeline, discarding anything already in the file.
+        """
+        self.close()
+        self.__write_fd = open( self.file_name, 'wb' )
+        self.__write_fd.write( MAGIC )
+
+    #----------------------------------------------------------------------
+    def append(self, frame, columns):
+        """
+        Add the state of the next frame to the timeline. Frames have to be
+        appended in increasing order.
+
+        frame:   Frame at which the state was captured
+        columns: DGStateColumns holding the state
+        """
+        if self.__write_fd is None:
+            self.open_for_writing()
+        # The size is only known once the state is written, so reserve room
+        # for the frame header and fill it in afterwards.
+        header_position = self.__write_fd.tell()
+        self.__write_fd.write( struct.pack( FRAME_FORMAT, frame, 0 ) )
+        size = columns.write( self.__write_fd )
+        end_position = self.__write_fd.tell()
+        self.__write_fd.seek( header_position )
+        self.__write_fd.write( struct.pack( FRAME_FORMAT, frame, size ) )
+        self.__write_fd.seek( end_position )
+
+    #----------------------------------------------------------------------
+    def close(self):
+        """
+        Finish writing the timeline, if it was being written.
+        """
+        if self.__write_fd is not None:
+            self.__write_fd.close()
+            self.__write_fd = None
+
+    #----------------------------------------------------------------------
+    def frames(self, memory_map=True):
+        """
+        Generator returning the (FRAME, DGStateColumns) pairs of the timeline
+        one at a time, in frame order. A truncated last frame, e.g. from an
+        interrupted capture, is ignored.
+
+        memory_map: See DGStateColumns.load()
+        """
+        frame_header_size = struct.calcsize( FRAME_FORMAT )
+        with open(self.file_name, 'rb') as timeline_fd:
+            if timeline_fd.read( len(MAGIC) ) != MAGIC:
+                raise ValueError( '%s is not a DG state timeline file' % self.file_name )
+            file_size = os.fstat( timeline_fd.fileno() ).st_size
+            while True:
+                frame_header = timeline_fd.read( frame_header_size )
+                if len(frame_header) < frame_header_size:
+                    return
+                (frame, size) = struct.unpack( FRAME_FORMAT, frame_header )
+                state_position = timeline_fd.tell()
+                if size == 0 or state_position + size > file_size:
+                    return
+                yield (frame, DGStateColumns.load( self.file_name, memory_map=memory_map, offset=state_position ))
+                timeline_fd.seek( state_position + size )
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def capture_frame(do_eval, data_types, plug_filter=None):
+        """
+        Capture the state of the scene at the current frame.
+
+        do_eval:     See DGState.scan_scene()
+        data_types:  See DGState.scan_scene(). Screenshots are not captured.
+        plug_filter: See DGState.filter_state()
+
+        Returns the DGStateColumns holding the state.
+        """
+        state = DGState()
+        state.scan_scene( do_eval=do_eval, data_types=[data_type for data_type in data_types if data_type != 'screen'] )
+        return state.columns().filter( plug_filter )
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def capture(file_name, frames, do_eval, data_types, plug_filter=None):
+        """
+        Step through the frames, capturing the state of the scene at each one
+        into a new timeline file. Only one frame is held in memory at a time.
+
+        file_name: Where the timeline is stored
+        frames:    Frames at which to capture the state, in increasing order
+        do_eval, data_types, plug_filter: See capture_frame()
+
+        Returns the DGStateTimeline created.
+        """
+        timeline = DGStateTimeline( file_name )
+        with timeline:
+            timeline.open_for_writing()
+            for frame in frames:
+                cmds.currentTime( frame )
+                timeline.append( frame, DGStateTimeline.capture_frame( do_eval, data_types, plug_filter ) )
+        return timeline
+
+#======================================================================
+def compare_frames(reference_frames, other_frames, plug_filter=None, as_json=False):
+    """
+    Generator walking two sequences of (FRAME, DGStateColumns) in step and
+    returning the comparison of every frame in either one of them:
+
+        (FRAME, ERROR_DETAILS, ERROR_COUNT, WORST_ERROR_METRIC)
+
+    with the same ERROR_DETAILS as DGStateColumns.compare(). A frame missing
+    from one of the sequences is reported as a single MISSING_FRAME_PLUG
+    error. Stop iterating to stop reading the sequences.
+
+    plug_filter: If not None only compare these plugs, see DGState.filter_state()
+    as_json:     See DGStateColumns.compare()
+    """
+    reference_iterator = iter(reference_frames)
+    other_iterator = iter(other_frames)
+    reference = next(reference_iterator, None)
+    other = next(other_iterator, None)
+    while reference is not None or other is not None:
+        if other is None or (reference is not None and reference[0] < other[0]):
+            (frame, missing) = (reference[0], 'other')
+            reference = next(reference_iterator, None)
+        elif reference is None or other[0] < reference[0]:
+            (frame, missing) = (other[0], 'reference')
+            other = next(other_iterator, None)
+        else:
+            frame = reference[0]
+            yield (frame,) + reference[1].filter( plug_filter ).compare( other[1].filter( plug_filter ), as_json=as_json )
+            reference = next(reference_iterator, None)
+            other = next(other_iterator, None)
+            continue
+
+        if as_json:
+            details = { MISSING_FRAME_PLUG : { 'match' : NO_SIGNIFICANT_DIGITS_MATCH
+                                             , 'value' : missing
+                                             , 'other' : ''
+                                             } }
+        else:
+            details = [ '%s,%s,,%d' % (MISSING_FRAME_PLUG, missing, NO_SIGNIFICANT_DIGITS_MATCH) ]
+        yield (frame, details, 1, NO_SIGNIFICANT_DIGITS_MATCH)
+
+#======================================================================
+def diff_timelines(reference_file, other_file, plug_filter=None, stop_at_first=True, as_json=False):
+    """
+    Stream two timeline files and return the frames where they differ.
+
+    reference_file: Timeline taken as the reference
+    other_file:     Timeline compared against it
+    plug_filter:    If not None only compare these plugs, see DGState.filter_state()
+    stop_at_first:  If True stop reading the timelines at the first divergent frame
+    as_json:        See DGStateColumns.compare()
+
+    Returns a list of (FRAME, ERROR_DETAILS, ERROR_COUNT, WORST_ERROR_METRIC)
+    for the frames with errors.
+    """
+    divergences = []
+    for comparison in compare_frames( DGStateTimeline(reference_file).frames(),
+                                      DGStateTimeline(other_file).frames(),
+                                      plug_filter=plug_filter, as_json=as_json ):
+        if comparison[2] > 0:
+            divergences.append( comparison )
+            if stop_at_first:
+                break
+    return divergences
+
+#======================================================================
+def worst_plug(details):
+    """
+    Returns the (PLUG, MATCH) of the worst matching plug in the JSON form
+    of the ERROR_DETAILS of a comparison.
+    """
+    (match, plug) = min( [(info['match'], plug) for (plug, info) in details.iteritems()] )
+    return (plug, match)
+
+#======================================================================
+def first_divergence(reference_file, other_file, plug_filter=None):
+    """
+    Find where two timelines first differ.
+
+    Returns None if they match on every frame, otherwise the tuple
+    (FRAME, PLUG, MATCH) of the first differing frame and its worst
+    matching plug.
+    """
+    divergences = diff_timelines( reference_file, other_file, plug_filter=plug_filter, as_json=True )
+    if not divergences:
+        return None
+    (frame, details, _, _) = divergences[0]
+    return (frame,) + worst_plug( details )
@@ -14,16 +14,23 @@ Sample usage to run the tests on the current scene and ignore output:
 
     from maya.debug.cacheCorrectnessTest import cacheCorrectnessTest
     cacheErrors = cacheCorrectnessTest(modes=[['transform', 'mesh', 'curves']])
+
+Sample usage to find the first frame on which the cached evaluation differs:
+
+    from maya.debug.cacheCorrectnessTest import cacheCorrectnessTimelineTest
+    divergence = cacheCorrectnessTimelineTest(modes=[['transform', 'mesh']])['transform+mesh']
 """
 
 import maya.cmds as cmds
 import maya.mel as mel
 from maya.debug.TODO import TODO as TODO
 from maya.debug.correctnessUtils import run_correctness_test as run_correctness_test
+from maya.debug.correctnessUtils import run_timeline_correctness_test as run_timeline_correctness_test
 from maya.debug.correctnessUtils import CORRECTNESS_MAX_FRAMECOUNT as CORRECTNESS_MAX_FRAMECOUNT
 from maya.debug.correctnessUtils import CORRECTNESS_NO_SETUP as CORRECTNESS_NO_SETUP
 
 __all__ = [ 'cacheCorrectnessTest'
+          , 'cacheCorrectnessTimelineTest'
           , 'CACHE_TIMEOUT'
           , 'getModeString'
           ]
@@ -174,6 +181,42 @@ def cacheCorrectnessTest( fileName=None
         dataTypes,
         emSetup
         )
+
+def cacheCorrectnessTimelineTest( fileName=None
+                                , resultsPath=None
+                                , verbose=False
+                                , modes=[['transform', 'mesh', 'curves']]
+                                , maxFrames=CORRECTNESS_MAX_FRAMECOUNT
+                                , dataTypes=['matrix','vertex']
+                                , emSetup=CORRECTNESS_NO_SETUP
+                                , cacheTimeout=CACHE_TIMEOUT
+                                , stopAtFirst=True ):
+    """
+    Evaluate the file in multiple caching modes and compare the results on
+    every frame of the playback range.
+
+    modes:        See modes parameter in cacheCorrectnessTest.
+    cacheTimeout: The maximum amount of time to wait for cache to fill.
+    stopAtFirst:  See stopAtFirst parameter in run_timeline_correctness_test.
+    The other parameters are the same as in run_timeline_correctness_test.
+
+    Returns the output of run_timeline_correctness_test().
+    """
+
+    referenceMode = 'emp'
+    testModes = [CacheCorrectnessMode(mode, cacheTimeout) for mode in modes]
+
+    return run_timeline_correctness_test(
+        referenceMode,
+        testModes,
+        fileName,
+        resultsPath,
+        verbose,
+        maxFrames,
+        dataTypes,
+        emSetup,
+        stopAtFirst
+        )
 # ===========================================================================
 # Copyright 2016 Autodesk, Inc. All rights reserved.
 #
@@ -23,6 +23,13 @@ between the reference evaluation and the tested mode. e.g. if you requested 'ems
 mode then you would get back {'ems' : (0, 0, 0)} from a successful comparison.
 
 If fileName is not set then the current scene is analyzed.
+
+run_timeline_correctness_test() does the same comparison on every frame of
+the playback range instead of only the last one. The states are captured
+into DGStateTimeline files (${resultsPath}.${mode}.dgt) one frame at a time,
+so memory use does not grow with the number of frames, and each mode is
+compared to the reference as it is captured, stopping at the first frame
+that differs if requested.
 """
 
 import json
@@ -32,11 +39,15 @@ import tempfile
 import maya.cmds as cmds
 from maya.debug.TODO import TODO as TODO
 from maya.debug.DGState import DGState as DGState
+from maya.debug.DGStateTimeline import DGStateTimeline as DGStateTimeline
+from maya.debug.DGStateTimeline import compare_frames as compare_frames
+from maya.debug.DGStateTimeline import worst_plug as worst_plug
 from maya.debug.emModeManager import emModeManager as emModeManager
 from maya.debug.playbackModeManager import playbackModeManager as playbackModeManager
 
 
 __all__ = [ 'run_correctness_test'
+        ,   'run_timeline_correctness_test'
         ,   'CORRECTNESS_MAX_FRAMECOUNT'
         ,   'CORRECTNESS_NO_SETUP'
         ,   'CORRECTNESS_DOUBLE_PLAYBACK'
@@ -134,6 +145,56 @@ def __find_em_plugs(ignored_nodes):
     return em_plugs
 
 
+#======================================================================
+
+def __unique_modes(modes):
+    """
+    Create a list of unique mode suffixes, appending a count number whenever
+    the same mode appears more than once on the modes list.
+    """
+    mode_counts = {}
+    unique_modes = []
+    mode_counts['ref'] = 1
+    for modeObject in modes:
+        mode = modeObject.getTitle()
+        mode_counts[mode] = mode_counts.get(mode, 0) + 1
+        suffix = ''
+        if mode_counts[mode] > 1:
+            suffix = str(mode_counts[mode])
+        unique_modes.append('%s%s' % (mode, suffix))
+    return unique_modes
+
+
+#======================================================================
+
+def __find_ignored_nodes():
+    """
+    The IK multi-chain solver is known to create inconsistent results so
+    return the list of joints and effectors being controlled by it, to be
+    removed from the list being compared.
+    """
+    TODO('REFACTOR', 'Is this still needed now that we have an evaluator that handles it and disable EM if they are found?', None)
+    ignored_nodes = []
+    for node in cmds.ls(type='ikHandle'):
+        try:
+            solver_type = None
+            solver_type = cmds.nodeType(cmds.ikHandle(node, query=True, solver=True))
+        except Exception:
+            pass
+
+        # Any other kind of IK solver is fine
+        if solver_type != 'ikMCsolver':
+            continue
+
+        multi_chain_joints = cmds.ikHandle(node, query=True, jointList=True)
+        if multi_chain_joints is not None:
+            ignored_nodes += multi_chain_joints
+        multi_chain_effector = cmds.ikHandle(node, query=True, endEffector=True)
+        if multi_chain_effector is not None:
+            ignored_nodes += [multi_chain_effector]
+    return ignored_nodes
+
+
 #======================================================================
 
 def run_correctness_test( referenceMode
@@ -211,18 +272,7 @@ def run_correctness_test( referenceMode
     results = []
     em_plug_file_name = None
 
-    # Create a list of unique mode suffixes, appending a count number whenever
-    # the same mode appears more than once on the modes list.
-    mode_counts = {}
-    unique_modes = []
-    mode_counts['ref'] = 1
-    for modeObject in modes:
-        mode = modeObject.getTitle()
-        mode_counts[mode] = mode_counts.get(mode, 0) + 1
-        suffix = ''
-        if mode_counts[mode] > 1:
-            suffix = str(mode_counts[mode])
-        unique_modes.append('%s%s' % (mode, suffix))
+    unique_modes = __unique_modes(modes)
 
     if resultsPath != None:
         # Make sure the path exists
@@ -244,7 +294,6 @@ def run_correctness_test( referenceMode
             resultsPath = os.path.join(resultsPath, 'SCENE')
 
         ref_results = '%s.ref.txt' % resultsPath
-        mode_counts['ref'] = 1
 
         for mode in unique_modes:
             # mode strings can have '/' which are illegal in filenames, replace with '='.
@@ -287,25 +336,7 @@ def run_correctness_test( referenceMode
 
     # The IK multi-chain solver is known to create inconsistent results so remove
     # any joints that are being controlled by it from the list being compared.
-    TODO('REFACTOR', 'Is this still needed now that we have an evaluator that handles it and disable EM if they are found?', None)
-    ignored_nodes = []
-    for node in cmds.ls(type='ikHandle'):
-        try:
-            solver_type = None
-            solver_type = cmds.nodeType(cmds.ikHandle(node, query=True, solver=True))
-        except Exception:
-            pass
-
-        # Any other kind of IK solver is fine
-        if solver_type != 'ikMCsolver':
-            continue
-
-        multi_chain_joints = cmds.ikHandle(node, query=True, jointList=True)
-        if multi_chain_joints is not None:
-            ignored_nodes += multi_chain_joints
-        multi_chain_effector = cmds.ikHandle(node, query=True, endEffector=True)
-        if multi_chain_effector is not None:
-            ignored_nodes += [multi_chain_effector]
+    ignored_nodes = __find_ignored_nodes()
 
     em_plugs = None
     comparisons = {}
@@ -388,6 +419,140 @@ def run_correctness_test( referenceMode
     # Force restoration of EM state by leaving scope
 
     return comparisons
+
+
+#======================================================================
+
+def run_timeline_correctness_test( referenceMode
+                                 , modes
+                                 , fileName=None
+                                 , resultsPath=None
+                                 , verbose=False
+                                 , maxFrames=CORRECTNESS_MAX_FRAMECOUNT
+                                 , dataTypes=['matrix','vertex']
+                                 , emSetup=CORRECTNESS_NO_SETUP
+                                 , stopAtFirst=True ):
+    """
+    Evaluate the file in multiple modes and compare the results on every
+    frame of the playback range.
+
+    referenceMode: See run_correctness_test()
+    modes:         See run_correctness_test()
+    fileName:      See run_correctness_test()
+    resultsPath:   Where to store the timelines. None means use a temporary
+                   directory, they are always written since they are what
+                   keeps the memory use flat.
+    verbose:       If True then return every divergent frame rather than
+                   only the first divergent plug.
+    maxFrames:     See run_correctness_test()
+    dataTypes:     See run_correctness_test(). 'screen' is ignored, only
+                   the DG state is captured on every frame.
+    emSetup:       See run_correctness_test()
+    stopAtFirst:   If True stop capturing a mode as soon as a frame differs
+                   from the reference.
+
+    Returns a dictionary indexed by mode title. The values are None when the
+    mode matched the reference on every frame, otherwise (FRAME, PLUG, MATCH)
+    identifying the first divergent frame and its worst matching plug.
+
+    If verbose is true then the values are instead lists of
+    (FRAME, ERROR_DETAILS, ERROR_COUNT, WORST_ERROR_METRIC) for every
+    divergent frame, ERROR_DETAILS being in the JSON form described in
+    DGState.compare().
+    """
+    # Fail if the fileName is not a valid Maya file.
+    if fileName != None and not __is_maya_file(fileName):
+        print 'ERROR: %s is not a Maya file' % fileName
+        return {}
+
+    if fileName != None:
+        cmds.file(fileName, force=True, open=True)
+
+    if resultsPath == None:
+        resultsPath = tempfile.mkdtemp()
+    elif not os.path.isdir(resultsPath):
+        os.makedirs(resultsPath)
+    if fileName != None:
+        resultsPath = os.path.join(resultsPath, os.path.basename(fileName))
+    else:
+        resultsPath = os.path.join(resultsPath, 'SCENE')
+
+    ref_timeline = '%s.ref.dgt' % resultsPath
+    # mode strings can have '/' which are illegal in filenames, replace with '='.
+    mode_timelines = ['%s.%s.dgt' % (resultsPath, mode.replace('/', '=')) for mode in __unique_modes(modes)]
+
+    ignored_nodes = __find_ignored_nodes()
+    em_plugs = None
+    comparisons = {}
+
+    with emModeManager() as em_mode:
+        em_mode.setMode(referenceMode)
+
+        with playbackModeManager() as play_mode:
+            play_mode.setOptions( framesPerSecond=0.0, maxPlaybackSpeed=0.0, loop='once' )
+            play_mode.setLimitedRange( maxFrames=maxFrames, fromStart=True )
+            frames = range( int(cmds.playbackOptions(query=True, minTime=True)),
+                            int(cmds.playbackOptions(query=True, maxTime=True)) + 1 )
+
+            # Record the reference evaluation of every frame
+            DGStateTimeline.capture( ref_timeline, frames, do_eval=(referenceMode == 'dg'), data_types=dataTypes )
+
+            for mode_num in range(len(modes)):
+                test_mode = modes[mode_num]
+                with emModeManager() as test_em_mode:
+                    test_em_mode.setMode(test_mode.getEmMode())
+                    extra_context = test_mode.getContext()
+                    if not extra_context:
+                        extra_context = EmptyContext()
+                    with extra_context:
+                        if (emSetup & CORRECTNESS_LOAD != 0) and fileName != None:
+                            cmds.file(fileName, force=True, open=True)
+                        if (emSetup & CORRECTNESS_DOUBLE_PLAYBACK) != 0:
+                            play_mode.playAll()
+                        if (emSetup & CORRECTNESS_INVALIDATE) != 0:
+                            cmds.evaluationManager(invalidate=True)
+                        # Play once so that the EM graph is built before stepping frames
+                        play_mode.playAll()
+                        if em_plugs == None:
+                            em_plugs = __find_em_plugs(ignored_nodes)
+                        em_still_enabled = cmds.evaluationManager(query=True, mode=True) != 'dg' and cmds.evaluationManager(query=True, enabled=True)
+
+                        # Capture the mode one frame at a time, comparing each
+                        # frame with the reference as soon as it is captured.
+                        mode_timeline = DGStateTimeline(mode_timelines[mode_num])
+                        def mode_frames():
+                            for frame in frames:
+                                cmds.currentTime( frame )
+                                columns = DGStateTimeline.capture_frame( not em_still_enabled, dataTypes, em_plugs )
+                                mode_timeline.append( frame, columns )
+                                yield (frame, columns)
+
+                        divergences = []
+                        ref_frames = DGStateTimeline(ref_timeline).frames()
+                        comparison_frames = compare_frames( ref_frames, mode_frames(), plug_filter=em_plugs, as_json=True )
+                        try:
+                            for comparison in comparison_frames:
+                                if comparison[2] > 0:
+                                    divergences.append( comparison )
+                                    if stopAtFirst:
+                                        break
+                        finally:
+                            comparison_frames.close()
+                            ref_frames.close()
+                            mode_timeline.close()
+
+                        mode_title = test_mode.getTitle()
+                        if verbose:
+                            comparisons[mode_title] = divergences
+                        elif divergences:
+                            (frame, details, _, _) = divergences[0]
+                            comparisons[mode_title] = (frame,) + worst_plug(details)
+                        else:
+                            comparisons[mode_title] = None
+
+    # Force restoration of EM state by leaving scope
+
+    return comparisons
 # ===========================================================================
 # Copyright 2016 Autodesk, Inc. All rights reserved.
 #
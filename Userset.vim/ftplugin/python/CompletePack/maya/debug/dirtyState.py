@@ -15,12 +15,22 @@ Allows you to produce a comparision of two sets of state information.
 
     # Compare them to see if they are the same
     stateBefore.compare(stateAfter)
+
+    # Compare two dumps too large to be held in memory, as sorted streams
+    for difference in dirtyState.compare_files( 'Before.dirty', 'After.dirty' ):
+        print difference
+
+The state is kept as sorted lists of unique, interned names so that two
+states are compared by walking their lists side by side rather than by
+searching one list for every entry of the other.
 """
 
 __all__ = ['dirtyState']
 
-import re
+import os
 import sys
+import heapq
+import tempfile
 
 #======================================================================
 #
@@ -42,6 +52,42 @@ def checkMaya():
     print 'ERROR: Cannot perform this operation unless Maya is available'
     return False
 
+# Number of entries sorted in memory at a time when streaming a dump
+SORT_CHUNK_SIZE = 1000000
+
+#======================================================================
+#
+def sorted_differences(first, second):
+    """
+    Merge-join two sorted sequences of unique entries.
+
+    Generator returning ( ENTRY, IN_FIRST ) for every entry that is in only
+    one of the sequences, IN_FIRST telling which one, in sorted order.
+    """
+    first_iterator = iter(first)
+    second_iterator = iter(second)
+    sentinel = object()
+    first_entry = next(first_iterator, sentinel)
+    second_entry = next(second_iterator, sentinel)
+    while first_entry is not sentinel or second_entry is not sentinel:
+        if second_entry is sentinel or (first_entry is not sentinel and first_entry < second_entry):
+            yield (first_entry, True)
+            first_entry = next(first_iterator, sentinel)
+        elif first_entry is sentinel or second_entry < first_entry:
+            yield (second_entry, False)
+            second_entry = next(second_iterator, sentinel)
+        else:
+            first_entry = next(first_iterator, sentinel)
+            second_entry = next(second_iterator, sentinel)
+
+#======================================================================
+#
+def unique_sorted(entries):
+    """
+    Returns the entries as a sorted list without duplicates.
+    """
+    return sorted( set( entries ) )
+
 #######################################################################
 
 class dirtyState(object):
@@ -57,10 +103,8 @@ class dirtyState(object):
     CLEAN_TYPE = 'clean'
     DIRTY_TYPE = 'dirty'
 
-    # Precompile the line expressions for faster matching
-    RE_CONNECTION = re.compile(r'\s*connection\s*([^\t]+)\t([^\s]+)\s*$')
-    RE_PLUG = re.compile(r'\s*plug\s*([^\s]+)\s*$')
-    RE_DATA = re.compile(r'\s*data\s*([^\s]+)\s*$')
+    # Number of names following the keyword of each type of line
+    FIELD_COUNTS = { PLUG_TYPE : 1, DATA_TYPE : 1, CONNECTION_TYPE : 2 }
 
     #======================================================================
     def __init__(self,
@@ -85,9 +129,9 @@ class dirtyState(object):
             check_connections : If True then check for connections that are dirty
 
         This is generated data, not to be used externally:
-            _plugs[]       : List of plugs that are dirty
-            _data[]        : List of data values that are dirty
-            _connections[] : List of connections that are dirty
+            plugs[]       : Sorted list of plugs that are dirty
+            data[]        : Sorted list of data values that are dirty
+            connections[] : Sorted list of (SRC,DST) connections that are dirty
         """
         self.use_long_names = long_names
         self.check_plugs = check_plugs
@@ -125,18 +169,123 @@ class dirtyState(object):
         if self.check_plugs:
             plug_list = cmds.dgdirty( allPlugs=list_all_plugs, list=dirtyState.PLUG_TYPE )
             if plug_list:
-                self.plugs = plug_list
+                self.plugs = unique_sorted( [intern(str(plug)) for plug in plug_list] )
 
         if self.check_data:
             dataList = cmds.dgdirty( allPlugs=list_all_plugs, list=dirtyState.DATA_TYPE )
             if dataList:
-                self.data = dataList
+                self.data = unique_sorted( [intern(str(data)) for data in dataList] )
 
         if self.check_connections:
             connection_list = cmds.dgdirty( allPlugs=list_all_plugs, list=dirtyState.CONNECTION_TYPE )
             if connection_list:
-                for connection in range(0,len(connection_list),2):
-                    self.connections.append( (connection_list[connection], connection_list[connection+1]) )
+                self.connections = unique_sorted( [(intern(str(connection_list[connection])), intern(str(connection_list[connection+1])))
+                                                   for connection in range(0,len(connection_list),2)] )
+
+    #======================================================================
+    @staticmethod
+    def read_entries(state_file_name):
+        """
+        Generator returning the entries of a .dirty file one at a time, as
+        tuples of interned strings:
+
+            (TYPE, NAME)        for plug and data lines
+            (TYPE, SRC, DST)    for connection lines
+
+        Lines are split on tabs, falling back to any whitespace for files
+        written by hand.
+        """
+        with open(state_file_name, 'r') as state_file:
+            for line in state_file:
+                fields = line.strip().split('\t')
+                field_count = dirtyState.FIELD_COUNTS.get( fields[0] )
+                if field_count is None or len(fields) != field_count + 1:
+                    fields = line.split()
+                    if not fields: # Allow blank lines
+                        continue
+                    field_count = dirtyState.FIELD_COUNTS.get( fields[0] )
+                    if field_count is None or len(fields) != field_count + 1:
+                        print 'WARN: Line not recognized: %s' % line,
+                        continue
+                yield tuple( [intern(field) for field in fields] )
+
+    #======================================================================
+    @staticmethod
+    def sorted_entries(state_file_name, chunk_size=SORT_CHUNK_SIZE):
+        """
+        Generator returning the entries of a .dirty file, as in read_entries(),
+        sorted and without duplicates. At most chunk_size entries are held in
+        memory; larger files are sorted in chunks written to temporary files
+        which are then merged.
+        """
+        chunk_files = []
+        chunk_readers = []
+        try:
+            chunk = []
+            for entry in dirtyState.read_entries( state_file_name ):
+                chunk.append( entry )
+                if len(chunk) >= chunk_size:
+                    chunk_files.append( dirtyState.__write_chunk( chunk ) )
+                    chunk = []
+
+            if chunk_files:
+                if chunk:
+                    chunk_files.append( dirtyState.__write_chunk( chunk ) )
+                    chunk = []
+                chunk_readers = [dirtyState.__read_chunk( chunk_file ) for chunk_file in chunk_files]
+                entries = heapq.merge( *chunk_readers )
+            else:
+                entries = unique_sorted( chunk )
+
+            previous = None
+            for entry in entries:
+                if entry != previous:
+                    yield entry
+                previous = entry
+        finally:
+            # When the caller stops early the readers still have their chunk
+            # files open, and open files cannot be removed on Windows.
+            for chunk_reader in chunk_readers:
+                chunk_reader.close()
+            for chunk_file in chunk_files:
+                os.remove( chunk_file )
+
+    #======================================================================
+    @staticmethod
+    def __write_chunk(chunk):
+        """
+        Write a sorted chunk of entries to a temporary file, returning its name.
+        """
+        (chunk_fd, chunk_file) = tempfile.mkstemp( suffix='.dirty' )
+        with os.fdopen(chunk_fd, 'w') as chunk_out:
+            for entry in unique_sorted( chunk ):
+                chunk_out.write( '%s\n' % '\t'.join( entry ) )
+        return chunk_file
+
+    #======================================================================
+    @staticmethod
+    def __read_chunk(chunk_file):
+        """
+        Generator returning the entries written by __write_chunk().
+        """
+        with open(chunk_file, 'r') as chunk_in:
+            for line in chunk_in:
+                yield tuple( [intern(field) for field in line.rstrip('\n').split('\t')] )
+
+    #======================================================================
+    @staticmethod
+    def compare_files(first_file_name, second_file_name, chunk_size=SORT_CHUNK_SIZE):
+        """
+        Compare two .dirty files without loading either one entirely, as a
+        merge-join of their sorted entries (see sorted_entries()).
+
+        Generator returning the same difference strings as compare(), in
+        sorted order of the entries rather than grouped by type.
+        """
+        for (entry, in_first) in sorted_differences( dirtyState.sorted_entries( first_file_name, chunk_size ),
+                                                     dirtyState.sorted_entries( second_file_name, chunk_size ) ):
+            change = dirtyState.CLEAN_TYPE if in_first else dirtyState.DIRTY_TYPE
+            yield ' '.join( (entry[0], change) + entry[1:] )
 
     #======================================================================
     def _init_from_file(self, state_file_name):
@@ -149,29 +298,21 @@ class dirtyState(object):
             data<tab>X                : Plug X has dirty data in the datablock
         """
         self.name = state_file_name
-        self.plugs = []
-        self.data = []
-        self.connections = []
-
-        state_file = open(state_file_name, 'r')
-        for line in state_file:
-            match = dirtyState.RE_CONNECTION.match( line )
-            if match:
-                self.connections.append( (match.group(1), match.group(2)) )
-                continue
-
-            match = dirtyState.RE_PLUG.match( line )
-            if match:
-                self.plugs.append( match.group(1) )
-                continue
-
-            match = dirtyState.RE_DATA.match( line )
-            if match:
-                self.data.append( match.group(1) )
-                continue
-
-            if len(line.rstrip().lstrip()) > 0: # Allow blank lines
-                print 'WARN: Line not recognized: %s' % line,
+        plugs = set()
+        data = set()
+        connections = set()
+
+        for entry in dirtyState.read_entries( state_file_name ):
+            if entry[0] == dirtyState.CONNECTION_TYPE:
+                connections.add( entry[1:] )
+            elif entry[0] == dirtyState.PLUG_TYPE:
+                plugs.add( entry[1] )
+            else:
+                data.add( entry[1] )
+
+        self.plugs = sorted( plugs )
+        self.data = sorted( data )
+        self.connections = sorted( connections )
 
     #======================================================================
     def write(self, fileName=None):
@@ -186,14 +327,18 @@ class dirtyState(object):
         if fileName:
             out = open(fileName, 'w')
 
-        for data in self.data:
-            out.write( '%s\t%s\n' % (dirtyState.DATA_TYPE, data) )
+        try:
+            for data in self.data:
+                out.write( '%s\t%s\n' % (dirtyState.DATA_TYPE, data) )
 
-        for plug in self.plugs:
-            out.write( '%s\t%s\n' % (dirtyState.PLUG_TYPE, plug) )
+            for plug in self.plugs:
+                out.write( '%s\t%s\n' % (dirtyState.PLUG_TYPE, plug) )
 
-        for (src,dst) in self.connections:
-            out.write( '%s\t%s\t%s\n' % (dirtyState.CONNECTION_TYPE, src, dst) )
+            for (src,dst) in self.connections:
+                out.write( '%s\t%s\t%s\n' % (dirtyState.CONNECTION_TYPE, src, dst) )
+        finally:
+            if fileName:
+                out.close()
 
     #======================================================================
     def _get_plug_differences(self, other, made_dirty):
@@ -204,20 +349,8 @@ class dirtyState(object):
             made_dirty    : If true return plugs dirty in other but not in self
                           If false return plugs dirty in self but not in other
         """
-        differences = []
-
-        if made_dirty:
-            for plug in other.plugs:
-                if plug in self.plugs:
-                    continue
-                differences.append( plug )
-        else:
-            for plug in self.plugs:
-                if plug in other.plugs:
-                    continue
-                differences.append( plug )
-
-        return differences
+        return [entry for (entry, in_self) in sorted_differences( self.plugs, other.plugs )
+                if in_self != made_dirty]
 
     #======================================================================
     def _get_data_differences(self, other, made_dirty):
@@ -228,20 +361,8 @@ class dirtyState(object):
             made_dirty    : If true return data dirty in other but not in self
                           If false return data dirty in self but not in other
         """
-        differences = []
-
-        if made_dirty:
-            for data in other.data:
-                if data in self.data:
-                    continue
-                differences.append( data )
-        else:
-            for data in self.data:
-                if data in other.data:
-                    continue
-                differences.append( data )
-
-        return differences
+        return [entry for (entry, in_self) in sorted_differences( self.data, other.data )
+                if in_self != made_dirty]
 
     #======================================================================
     def _get_connection_differences(self, other, made_dirty):
@@ -252,20 +373,8 @@ class dirtyState(object):
             made_dirty    : If true return connections dirty in other but not in self
                           If false return connections dirty in self but not in other
         """
-        differences = []
-
-        if made_dirty:
-            for connection in other.connections:
-                if connection in self.connections:
-                    continue
-                differences.append( connection )
-        else:
-            for connection in self.connections:
-                if connection in other.connections:
-                    continue
-                differences.append( connection )
-
-        return differences
+        return [entry for (entry, in_self) in sorted_differences( self.connections, other.connections )
+                if in_self != made_dirty]
 
     #======================================================================
     def compare(self, other):
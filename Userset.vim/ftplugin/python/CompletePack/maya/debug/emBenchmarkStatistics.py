@@ -0,0 +1,270 @@
+"""
+Statistics, result files and regression checks for the benchmark mode of
+the evaluation manager performance tests (see emBenchmarkTest). Nothing in
+here needs Maya so result files can be compared anywhere:
+
+    python emBenchmarkStatistics.py Baseline.json New.json --threshold 5
+
+or from Python:
+
+    from maya.debug.emBenchmarkStatistics import emBenchmarkCompare
+    regressions = emBenchmarkCompare( 'Baseline.json', 'New.json', threshold=0.05 )
+
+The result files are JSON, with the raw timings kept alongside the
+statistics so that they can be recomputed differently later:
+
+    {
+        "version" : 1,
+        "options" : { OPTION : VALUE },
+        "results" :
+        {
+            FILE :
+            {
+                "VIEWPORT TEST MODE" : { "count" : N, "median" : SECONDS, ..., "times" : [SECONDS] }
+            }
+        }
+    }
+"""
+
+import sys
+import json
+import math
+import argparse
+
+__all__ = [ 'benchmarkStatistics'
+          , 'emBenchmarkCompare'
+          , 'readBenchmarkResults'
+          , 'writeBenchmarkResults'
+          , 'BENCHMARK_REGRESSION_THRESHOLD'
+          ]
+
+# Version of the result file format
+BENCHMARK_FILE_VERSION = 1
+
+# Default relative slowdown of the median above which a test is flagged
+BENCHMARK_REGRESSION_THRESHOLD = 0.05
+
+# Multiple of the interquartile range beyond which a timing is an outlier
+OUTLIER_FENCE = 1.5
+
+# Two-sided critical values of Student's t distribution for 1 to 30 degrees
+# of freedom, followed by the normal distribution value used beyond that.
+T_CRITICAL_VALUES = {
+    0.90 : [ 6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833, 1.812,
+             1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734, 1.729, 1.725,
+             1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703, 1.701, 1.699, 1.697, 1.645 ],
+    0.95 : [ 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+             2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+             2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042, 1.960 ],
+    0.99 : [ 63.657, 9.925, 5.841, 4.604, 4.032, 3.707, 3.499, 3.355, 3.250, 3.169,
+             3.106, 3.055, 3.012, 2.977, 2.947, 2.921, 2.898, 2.878, 2.861, 2.845,
+             2.831, 2.819, 2.807, 2.797, 2.787, 2.779, 2.771, 2.763, 2.756, 2.750, 2.576 ]
+}
+
+#======================================================================
+def tCriticalValue(confidence, degreesOfFreedom):
+    """
+    Get the two-sided critical value of Student's t distribution for the
+    given confidence level (0.90, 0.95 or 0.99).
+    """
+    if confidence not in T_CRITICAL_VALUES:
+        raise ValueError( 'Unsupported confidence level %s, use one of %s' % (str(confidence), str(sorted(T_CRITICAL_VALUES.keys()))) )
+    values = T_CRITICAL_VALUES[confidence]
+    return values[min(degreesOfFreedom, len(values)) - 1]
+
+#======================================================================
+def percentile(sortedValues, fraction):
+    """
+    Get the value below which the given fraction of the sorted values lie,
+    interpolating linearly between the two closest ones.
+    """
+    if not sortedValues:
+        return 0.0
+    position = (len(sortedValues) - 1) * fraction
+    lower = int(math.floor(position))
+    upper = min(lower + 1, len(sortedValues) - 1)
+    return sortedValues[lower] + (sortedValues[upper] - sortedValues[lower]) * (position - lower)
+
+#======================================================================
+class benchmarkStatistics(object):
+    """
+    Summary statistics of a set of timings of the same test.
+
+        count        : Number of timings kept
+        outliers     : Number of timings rejected as outliers
+        mean         : Average of the kept timings
+        median       : Median of the kept timings
+        stddev       : Sample standard deviation of the kept timings
+        p95          : 95th percentile of the kept timings
+        minimum      : Shortest kept timing
+        maximum      : Longest kept timing
+        halfWidth    : Half-width of the confidence interval of the mean,
+                       None when there are not enough timings to know
+        confidence   : Confidence level of that interval
+        times        : All of the timings, including outliers
+
+    Outliers are timings beyond OUTLIER_FENCE interquartile ranges from the
+    first or third quartile, usually caused by something else running on
+    the machine. They are only rejected when there are at least 4 timings.
+    """
+    def __init__(self, times, rejectOutliers=True, confidence=0.95):
+        self.times = list(times)
+        self.confidence = confidence
+        kept = sorted(self.times)
+        if rejectOutliers and len(kept) >= 4:
+            firstQuartile = percentile(kept, 0.25)
+            thirdQuartile = percentile(kept, 0.75)
+            fence = OUTLIER_FENCE * (thirdQuartile - firstQuartile)
+            kept = [time for time in kept if firstQuartile - fence <= time <= thirdQuartile + fence]
+        self.count = len(kept)
+        self.outliers = len(self.times) - self.count
+        self.mean = sum(kept) / self.count if self.count else 0.0
+        self.median = percentile(kept, 0.5)
+        self.p95 = percentile(kept, 0.95)
+        self.minimum = kept[0] if kept else 0.0
+        self.maximum = kept[-1] if kept else 0.0
+        if self.count > 1:
+            self.stddev = math.sqrt( sum([(time - self.mean) ** 2 for time in kept]) / (self.count - 1) )
+            self.halfWidth = tCriticalValue(confidence, self.count - 1) * self.stddev / math.sqrt(self.count)
+        else:
+            self.stddev = 0.0
+            self.halfWidth = None
+
+    #----------------------------------------------------------------------
+    def relativeHalfWidth(self):
+        """
+        Get the half-width of the confidence interval as a fraction of the
+        mean, None if it is not known yet.
+        """
+        if self.halfWidth is None:
+            return None
+        if self.mean == 0.0:
+            return 0.0
+        return self.halfWidth / self.mean
+
+    #----------------------------------------------------------------------
+    def isPrecise(self, targetPrecision):
+        """
+        Check to see if the confidence interval is narrower than the target
+        precision, given as a fraction of the mean.
+        """
+        relativeHalfWidth = self.relativeHalfWidth()
+        return relativeHalfWidth is not None and relativeHalfWidth <= targetPrecision
+
+    #----------------------------------------------------------------------
+    def toJson(self):
+        """
+        Get the statistics as a dictionary for the result files.
+        """
+        return { 'count'      : self.count
+               , 'outliers'   : self.outliers
+               , 'mean'       : self.mean
+               , 'median'     : self.median
+               , 'stddev'     : self.stddev
+               , 'p95'        : self.p95
+               , 'min'        : self.minimum
+               , 'max'        : self.maximum
+               , 'halfWidth'  : self.halfWidth
+               , 'confidence' : self.confidence
+               , 'times'      : self.times
+               }
+
+    #----------------------------------------------------------------------
+    def __str__(self):
+        'Convert the statistics to a human readable string'
+        halfWidth = '?' if self.halfWidth is None else '%f' % self.halfWidth
+        return 'Median = %f, Mean = %f +/- %s, StdDev = %f, P95 = %f (%d timings, %d outliers)' % \
+               (self.median, self.mean, halfWidth, self.stddev, self.p95, self.count, self.outliers)
+
+#======================================================================
+def writeBenchmarkResults(fileName, results, options=None):
+    """
+    Write benchmark results to a file.
+
+        fileName : Name of the result file
+        results  : { FILE : { TEST : benchmarkStatistics } }
+        options  : Dictionary of the options used to run the benchmark
+    """
+    resultsJson = {}
+    for (mayaFile, tests) in results.iteritems():
+        resultsJson[mayaFile] = dict( [(test, statistics.toJson()) for (test, statistics) in tests.iteritems()] )
+    with open(fileName, 'w') as resultsFile:
+        json.dump( { 'version' : BENCHMARK_FILE_VERSION
+                   , 'options' : options or {}
+                   , 'results' : resultsJson }, resultsFile, indent=4, sort_keys=True )
+
+#======================================================================
+def readBenchmarkResults(fileName):
+    """
+    Read benchmark results written by writeBenchmarkResults().
+
+    Returns { FILE : { TEST : STATISTICS_DICTIONARY } }
+    """
+    with open(fileName, 'r') as resultsFile:
+        resultsJson = json.load( resultsFile )
+    if resultsJson.get('version') != BENCHMARK_FILE_VERSION:
+        raise ValueError( '%s is not a version %d benchmark result file' % (fileName, BENCHMARK_FILE_VERSION) )
+    return resultsJson['results']
+
+#======================================================================
+def emBenchmarkCompare(baselineFileName, newFileName, threshold=BENCHMARK_REGRESSION_THRESHOLD, verbose=False):
+    """
+    Compare two benchmark result files and find the tests that got slower.
+
+        baselineFileName : Result file taken as the reference
+        newFileName      : Result file being checked
+        threshold        : Relative slowdown of the median, 0.05 = 5%, above
+                           which a test is flagged
+        verbose          : If True print every test compared, not just the
+                           regressions
+
+    A test is only a regression when its median slowed down by more than
+    the threshold and the confidence intervals of the two means do not
+    overlap, so that a noisy test is not flagged on noise alone.
+
+    Returns the list of regressions as (FILE, TEST, BASELINE_MEDIAN,
+    NEW_MEDIAN, RELATIVE_CHANGE) tuples. Tests present in only one of the
+    files are reported but not counted as regressions.
+    """
+    baseline = readBenchmarkResults( baselineFileName )
+    current = readBenchmarkResults( newFileName )
+    regressions = []
+    for mayaFile in sorted(set(baseline.keys() + current.keys())):
+        baselineTests = baseline.get( mayaFile, {} )
+        currentTests = current.get( mayaFile, {} )
+        for test in sorted(set(baselineTests.keys() + currentTests.keys())):
+            if test not in baselineTests or test not in currentTests:
+                print 'WARN: %s "%s" is only in %s' % (mayaFile, test, baselineFileName if test in baselineTests else newFileName)
+                continue
+            before = baselineTests[test]
+            after = currentTests[test]
+            if before['median'] > 0.0:
+                change = (after['median'] - before['median']) / before['median']
+            else:
+                change = 0.0
+            separated = (after['mean'] - (after['halfWidth'] or 0.0)) > (before['mean'] + (before['halfWidth'] or 0.0))
+            if change > threshold and separated:
+                regressions.append( (mayaFile, test, before['median'], after['median'], change) )
+                print 'REGRESSION: %s "%s" %f -> %f (%+.1f%%)' % (mayaFile, test, before['median'], after['median'], change * 100.0)
+            elif verbose:
+                print '%s "%s" %f -> %f (%+.1f%%)' % (mayaFile, test, before['median'], after['median'], change * 100.0)
+    return regressions
+
+#======================================================================
+def main():
+    """
+    Compare two benchmark result files from the command line. The exit
+    status is the number of regressions found, capped at 127.
+    """
+    parser = argparse.ArgumentParser( description='Flag the tests that got slower between two benchmark result files' )
+    parser.add_argument( 'baseline', help='Result file taken as the reference' )
+    parser.add_argument( 'new', help='Result file being checked' )
+    parser.add_argument( '-t', '--threshold', type=float, default=BENCHMARK_REGRESSION_THRESHOLD * 100.0,
+                         help='Percentage slowdown of the median above which a test is flagged' )
+    parser.add_argument( '-v', '--verbose', action='store_true', help='Show every test compared' )
+    args = parser.parse_args()
+    regressions = emBenchmarkCompare( args.baseline, args.new, threshold=args.threshold / 100.0, verbose=args.verbose )
+    return min(len(regressions), 127)
+
+if __name__ == '__main__':
+    sys.exit( main() )
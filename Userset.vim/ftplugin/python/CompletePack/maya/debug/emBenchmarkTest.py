@@ -0,0 +1,263 @@
+"""
+Benchmark mode of the evaluation manager performance tests. The tests are
+the same as in emPerformanceTest but instead of averaging a fixed number of
+iterations each test is:
+
+    - run a few times untimed to warm up caches and graphs
+    - repeated until the confidence interval of its mean is narrow enough,
+      within a minimum and maximum number of iterations
+    - summarized by its median, mean, standard deviation and 95th percentile,
+      after rejecting outliers
+
+The results are written to a JSON file (see emBenchmarkStatistics) which can
+be kept as a baseline and compared with later runs to flag regressions.
+
+Sample usage to benchmark the playback of the files in a directory in EM
+parallel mode and compare them with an earlier run:
+
+    from maya.debug.emBenchmarkTest import emBenchmarkTest
+    from maya.debug.emBenchmarkTest import emBenchmarkOptions as ebo
+    from maya.debug.emBenchmarkStatistics import emBenchmarkCompare
+    options = ebo()
+    options.setEvalModes( ebo.EVALUATION_MODE_EM_PARALLEL )
+    options.setTestTypes( ebo.TEST_PLAYBACK )
+    options.setViewports( ebo.VIEWPORT_2 )
+    options.setTargetPrecision( 0.02 )
+    emBenchmarkTest( ['MyDirectory'], resultsFileName='MyDirectory/emBenchmark.json', options=options )
+    emBenchmarkCompare( 'MyDirectory/emBaseline.json', 'MyDirectory/emBenchmark.json', threshold=0.05 )
+"""
+
+import os
+from maya.debug.emPerformanceTest import emPerformanceOptions as emPerformanceOptions
+from maya.debug.emPerformanceTest import emPerformanceRun as emPerformanceRun
+from maya.debug.emPerformanceTest import evaluationManagerExists as evaluationManagerExists
+from maya.debug.emPerformanceTest import findMayaFiles as findMayaFiles
+from maya.debug.emPerformanceTest import isMayaFile as isMayaFile
+from maya.debug.emPerformanceTest import progressState as progressState
+from maya.debug.emBenchmarkStatistics import benchmarkStatistics as benchmarkStatistics
+from maya.debug.emBenchmarkStatistics import writeBenchmarkResults as writeBenchmarkResults
+
+__all__ = ['emBenchmarkTest', 'emBenchmarkOptions', 'emBenchmarkRun']
+
+#======================================================================
+
+class emBenchmarkOptions(emPerformanceOptions):
+    """
+    Options of the performance tests, plus the ones controlling the
+    repetitions of the benchmark mode. iterationCount is not used.
+
+        warmupCount      : Number of untimed iterations run before the timed ones (default 2)
+
+        minIterations    : Minimum number of timed iterations (default 5)
+
+        maxIterations    : Maximum number of timed iterations, used when the target
+                           precision cannot be reached (default 50)
+
+        targetPrecision  : Half-width of the confidence interval of the mean, as a
+                           fraction of the mean, at which the iterations stop (default 0.02)
+
+        confidence       : Confidence level of the interval, 0.90, 0.95 or 0.99 (default 0.95)
+
+        rejectOutliers   : If True then ignore timings far from the others (default True)
+    """
+    #----------------------------------------------------------------------
+    def __init__(self):
+        emPerformanceOptions.__init__(self)
+        self.warmupCount = 2
+        self.minIterations = 5
+        self.maxIterations = 50
+        self.targetPrecision = 0.02
+        self.confidence = 0.95
+        self.rejectOutliers = True
+
+    #----------------------------------------------------------------------
+    def setWarmupCount(self, newWarmupCount):
+        """
+        Set the number of untimed iterations run before the timed ones so that
+        one-time costs such as cache filling do not pollute the results.
+        """
+        self.warmupCount = newWarmupCount
+
+    #----------------------------------------------------------------------
+    def setIterationRange(self, newMinIterations, newMaxIterations):
+        """
+        Set the minimum and maximum number of timed iterations. The iterations
+        stop as soon as the target precision is reached after the minimum.
+        """
+        self.minIterations = max(2, newMinIterations)
+        self.maxIterations = max(self.minIterations, newMaxIterations)
+
+    #----------------------------------------------------------------------
+    def setTargetPrecision(self, newTargetPrecision, newConfidence=None):
+        """
+        Set the precision to reach, as the half-width of the confidence
+        interval of the mean divided by the mean, and optionally the
+        confidence level of that interval (0.90, 0.95 or 0.99).
+        """
+        self.targetPrecision = newTargetPrecision
+        if newConfidence is not None:
+            self.confidence = newConfidence
+
+    #----------------------------------------------------------------------
+    def setRejectOutliers(self, newRejectOutliers):
+        """
+        Turn on or off the rejection of outlying timings. See benchmarkStatistics.
+        """
+        self.rejectOutliers = newRejectOutliers
+
+    #----------------------------------------------------------------------
+    def statistics(self, results):
+        """
+        Get the benchmarkStatistics of an emPerformanceResults object using
+        these options.
+        """
+        return benchmarkStatistics( results.elapsedTimes(), rejectOutliers=self.rejectOutliers,
+                                    confidence=self.confidence )
+
+    #----------------------------------------------------------------------
+    def statTitles(self):
+        """
+        Build the list of statistics reported for every test, in the same
+        order as emBenchmarkRun.timingColumns() returns them.
+        """
+        if self.allColumns:
+            return ['Median', 'Mean', 'StdDev', 'P95', 'CI', 'Count', 'Outliers']
+        return ['Median']
+
+    #----------------------------------------------------------------------
+    def toJson(self):
+        """
+        Get the options as a dictionary, stored with the results so that
+        runs can be checked for comparability.
+        """
+        return { 'evalModes'       : self.evalModes
+               , 'testTypes'       : self.testTypes
+               , 'viewports'       : self.viewports
+               , 'warmupCount'     : self.warmupCount
+               , 'minIterations'   : self.minIterations
+               , 'maxIterations'   : self.maxIterations
+               , 'targetPrecision' : self.targetPrecision
+               , 'confidence'      : self.confidence
+               , 'rejectOutliers'  : self.rejectOutliers
+               }
+
+#======================================================================
+
+class emBenchmarkRun(emPerformanceRun):
+    """
+    Performance run repeating each test until its timing is precise enough.
+    See emPerformanceRun for the parameters, the options must be
+    emBenchmarkOptions.
+    """
+    #----------------------------------------------------------------------
+
+    def repeatTimings(self, iterationCount, steps):
+        """
+        Run the steps untimed options.warmupCount times, then timed until the
+        last timed step reaches the target precision or the maximum number
+        of iterations is done. iterationCount is ignored.
+        """
+        for idx in range(0, self.options.warmupCount):
+            for (_, step) in steps:
+                step()
+
+        measuredResults = [results for (results, _) in steps if results is not None][-1]
+        for idx in range(0, self.options.maxIterations):
+            self.timeSteps( idx, steps )
+            if idx + 1 < self.options.minIterations:
+                continue
+            if self.options.statistics( measuredResults ).isPrecise( self.options.targetPrecision ):
+                break
+
+    #----------------------------------------------------------------------
+
+    def timingColumns(self, results):
+        """
+        Return the list of statistics from the results object passed in.
+        """
+        columnCount = len(self.options.statTitles())
+        if results == None:
+            return [-1.0] * columnCount
+        statistics = self.options.statistics( results )
+        if columnCount == 1:
+            return [statistics.median]
+        halfWidth = statistics.halfWidth if statistics.halfWidth is not None else -1.0
+        return [statistics.median, statistics.mean, statistics.stddev, statistics.p95,
+                halfWidth, statistics.count, statistics.outliers]
+
+    #----------------------------------------------------------------------
+
+    def statistics(self):
+        """
+        Get the statistics of every test that was run, indexed by the test
+        name "VIEWPORT TEST MODE" used in the column titles.
+        """
+        return dict( [('%s %s %s' % (viewport, testType, mode), self.options.statistics( results ))
+                      for ((mode, testType, viewport), results) in self.results.iteritems()] )
+
+#======================================================================
+def emBenchmarkTest(
+    filesAndDirectories=None,
+    resultsFileName=None,
+    options=None ):
+    """
+    Benchmark the files in a set of locations and store the results.
+
+        filesAndDirectories : List of locations in which to find Maya files to test.
+                              If None then the current scene is tested.
+        resultsFileName     : Name of the JSON result file. Defaults to
+                              "emBenchmark.json" in the directory when a single
+                              one was given, or in the current directory.
+        options             : emBenchmarkOptions for the run.
+
+    Returns the results as { FILE : { TEST : benchmarkStatistics } }, the
+    current scene being reported with the file name "__SCENE__".
+    """
+    dirList = []
+    mayaFiles = []
+    if filesAndDirectories:
+        for path in filesAndDirectories:
+            if os.path.isdir( path ):
+                dirList.append( path )
+                mayaFiles += findMayaFiles( path )
+            elif os.path.isfile( path ) and isMayaFile( path ):
+                mayaFiles.append( path )
+            else:
+                print 'WARN: "%s" is neither a Maya file nor a directory. Skipping.' % path
+        if len(mayaFiles) == 0:
+            print 'ERR: No files found at the given locations. Exiting.'
+            return None
+    else:
+        mayaFiles = [None]
+
+    if resultsFileName == None:
+        resultsFileName = 'emBenchmark.json'
+        if len(dirList) == 1:
+            resultsFileName = os.path.join( dirList[0], resultsFileName )
+
+    if not options:
+        options = emBenchmarkOptions()
+    if options.usesEvaluationManager() and not evaluationManagerExists():
+        print 'WARN: Evaluation manager modes requested with no evaluation manager available. Using DG mode only'
+        options.setEvalModes( emBenchmarkOptions.EVALUATION_MODE_DG )
+
+    phaseCount = len(options.evalModes) * len(options.testTypes) * len(options.viewports)
+    if mayaFiles[0] != None:
+        phaseCount += 2
+    currentProgress = progressState(len(mayaFiles), phaseCount, options.reportProgress)
+
+    results = {}
+    for fileName in mayaFiles:
+        currentProgress.startFile( os.path.basename(fileName) if fileName else 'Current Scene' )
+        benchmark = emBenchmarkRun( fileName=fileName, options=options, progress=currentProgress )
+        benchmark.runTests()
+        results[fileName or '__SCENE__'] = benchmark.statistics()
+
+        # Write as the tests go so that an interrupted run keeps its results
+        writeBenchmarkResults( resultsFileName, results, options.toJson() )
+
+        # Allow premature cancellation
+        if currentProgress.aborting():
+            break
+
+    return results
@@ -26,13 +26,20 @@ Sample usage to run the tests on the current scene in parallel mode with the def
 
     from maya.debug.emCorrectnessTest import emCorrectnessTest
     parallelErrors = emCorrectnessTest(modes=['emp+deformer'])
+
+Sample usage to find the first frame on which parallel mode differs from the DG:
+
+    from maya.debug.emCorrectnessTest import emCorrectnessTimelineTest
+    (frame, plug, match) = emCorrectnessTimelineTest(fileName='MyDir/MyFile.ma', modes=['emp'])['emp']
 """
 
 from maya.debug.correctnessUtils import run_correctness_test as run_correctness_test
+from maya.debug.correctnessUtils import run_timeline_correctness_test as run_timeline_correctness_test
 from maya.debug.correctnessUtils import CORRECTNESS_MAX_FRAMECOUNT as CORRECTNESS_MAX_FRAMECOUNT
 from maya.debug.correctnessUtils import CORRECTNESS_NO_SETUP as CORRECTNESS_NO_SETUP
 
-__all__ = [ 'emCorrectnessTest' ]
+__all__ = [ 'emCorrectnessTest'
+          , 'emCorrectnessTimelineTest' ]
 
 #======================================================================
 
@@ -94,6 +101,42 @@ def emCorrectnessTest( fileName=None
         dataTypes,
         emSetup
         )
+
+#======================================================================
+
+def emCorrectnessTimelineTest( fileName=None
+                             , resultsPath=None
+                             , verbose=False
+                             , modes=['ems']
+                             , maxFrames=CORRECTNESS_MAX_FRAMECOUNT
+                             , dataTypes=['matrix','vertex']
+                             , emSetup=CORRECTNESS_NO_SETUP
+                             , stopAtFirst=True ):
+    """
+    Evaluate the file in multiple evaluation manager modes and compare the
+    results on every frame of the playback range.
+
+    modes:       See modes parameter in emCorrectnessTest.
+    stopAtFirst: See stopAtFirst parameter in run_timeline_correctness_test.
+    The other parameters are the same as in run_timeline_correctness_test.
+
+    Returns the output of run_timeline_correctness_test().
+    """
+
+    referenceMode = 'dg'
+    testModes = [EMCorrectnessMode(mode) for mode in modes]
+
+    return run_timeline_correctness_test(
+        referenceMode,
+        testModes,
+        fileName,
+        resultsPath,
+        verbose,
+        maxFrames,
+        dataTypes,
+        emSetup,
+        stopAtFirst
+        )
 # ===========================================================================
 # Copyright 2016 Autodesk, Inc. All rights reserved.
 #
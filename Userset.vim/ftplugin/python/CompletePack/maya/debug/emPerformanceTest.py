@@ -19,6 +19,12 @@ to the same file name in the current working directory.
 
 Results are posted in seconds for a single evaluation (min, max, and/or
 average times when mutiple frames are evaluated).
+
+To see where the time goes rather than only how long it took, turn on
+tracing with emPerformanceOptions.setTrace(). Every file, test, iteration,
+graph creation and scheduling phase and played frame is then recorded as a
+span and exported as a Chrome trace and/or folded stacks for flame graphs.
+See emPerformanceTrace for details.
 """
 
 import os, sys
@@ -26,6 +32,9 @@ import maya.cmds as cmds
 import maya.mel as mel
 from maya.debug.emModeManager import *
 from maya.debug.TODO import TODO as TODO
+from maya.debug.emPerformanceTrace import emTraceRecorder as emTraceRecorder
+from maya.debug.emPerformanceTrace import emNullTraceRecorder as emNullTraceRecorder
+from maya.debug.emPerformanceTrace import emFrameTracer as emFrameTracer
 
 __all__ = ['emPerformance', 'emPerformanceTest', 'emPerformanceOptions']
 
@@ -73,8 +82,10 @@ class emPerformanceRun(object):
                       If None then use the current file
         options        : Options for running the tests
         progress    : Progress object for reporting current status
+        trace        : emTraceRecorder receiving the timeline of the tests,
+                      None if it is not wanted
     """
-    def __init__(self, fileName=None, options=None, progress=None):
+    def __init__(self, fileName=None, options=None, progress=None, trace=None):
         """
         Nothing to initialize for the timing tester
         """
@@ -90,6 +101,7 @@ class emPerformanceRun(object):
 
         self.options = options
         self.progress = progress
+        self.trace = trace if trace is not None else emNullTraceRecorder()
         self.evalMode = emPerformanceOptions.EVALUATION_MODE_DG
         self.hasEvaluationManager = evaluationManagerExists()
 
@@ -213,9 +225,10 @@ class emPerformanceRun(object):
             if self.fileName:
                 cmds.file( force=True, new=True )
                 self.progress.startPhase( 'Reading' )
-                self.fileLoadResults.startRep( 0 )
-                cmds.file( self.fileName, force=True, open=True )
-                self.fileLoadResults.endRep( 0 )
+                with self.trace.span( 'Load', 'file' ):
+                    self.fileLoadResults.startRep( 0 )
+                    cmds.file( self.fileName, force=True, open=True )
+                    self.fileLoadResults.endRep( 0 )
 
             # Run all combinations of tests specified by the options
             for mode in self.options.evalModes:
@@ -226,7 +239,8 @@ class emPerformanceRun(object):
                         testRun = (mode, testType, viewport)
                         # Dirty refresh measures both the refresh and the dirty
                         # times so it has to collect the results separately
-                        timingResults = self.testTheType( testType )
+                        with self.trace.span( '%s %s %s' % (viewport, testType, mode), 'test' ):
+                            timingResults = self.testTheType( testType )
                         if not timingResults:
                             pass
                         elif testType == emPerformanceOptions.TEST_DIRTY_REFRESH:
@@ -261,9 +275,42 @@ class emPerformanceRun(object):
             # If no file was loaded don't delete the current scene
             if self.fileName:
                 self.progress.startPhase( 'New' )
-                self.fileNewResults.startRep( 0 )
-                cmds.file( force=True, new=True )
-                self.fileNewResults.endRep( 0 )
+                with self.trace.span( 'New', 'file' ):
+                    self.fileNewResults.startRep( 0 )
+                    cmds.file( force=True, new=True )
+                    self.fileNewResults.endRep( 0 )
+
+    #----------------------------------------------------------------------
+
+    def repeatTimings(self, iterationCount, steps):
+        """
+        Run a sequence of steps 'iterationCount' times, timing each of them.
+
+            iterationCount : Number of times to run the sequence
+            steps          : List of (emPerformanceResults, FUNCTION) run in order
+                             on every iteration. The time taken by FUNCTION is
+                             added to the results, unless they are None in which
+                             case the step is run without being timed.
+
+        Derived classes can override this to decide how many iterations to run.
+        """
+        for idx in range(0, iterationCount):
+            self.timeSteps( idx, steps )
+
+    #----------------------------------------------------------------------
+
+    def timeSteps(self, idx, steps):
+        """
+        Run a single iteration 'idx' of the steps passed to repeatTimings().
+        """
+        with self.trace.span( 'Iteration %d' % idx, 'iteration' ):
+            for (results, step) in steps:
+                if results is None:
+                    step()
+                    continue
+                results.startRep( idx )
+                step()
+                results.endRep( idx )
 
     #----------------------------------------------------------------------
 
@@ -316,26 +363,32 @@ class emPerformanceRun(object):
         # the current time back and forth.
         if graphCreationResults:
             currentFrame = cmds.currentTime( query=True )
-            graphCreationResults.startRep( 0 )
-            cmds.currentTime( currentFrame + 1, edit=True )
-            graphCreationResults.endRep( 0 )
-            graphSchedulingResults.startRep( 0 )
-            cmds.currentTime( currentFrame + 2, edit=True )
-            graphSchedulingResults.endRep( 0 )
+            with self.trace.span( emPerformanceOptions.TEST_GRAPH_CREATION, 'graph' ):
+                graphCreationResults.startRep( 0 )
+                cmds.currentTime( currentFrame + 1, edit=True )
+                graphCreationResults.endRep( 0 )
+            with self.trace.span( emPerformanceOptions.TEST_GRAPH_SCHEDULING, 'graph' ):
+                graphSchedulingResults.startRep( 0 )
+                cmds.currentTime( currentFrame + 2, edit=True )
+                graphSchedulingResults.endRep( 0 )
             # The currentTime call before playback will take care of any
             # uninitialized caches.
 
         self.progress.startPhase( '%s Play (%d times)' % (self.evalMode, self.options.iterationCount) )
 
-        for idx in range(0, self.options.iterationCount):
-            # Move to first frame to avoid slight variation in self.options.iterationCount
-            # caused by the initialization of playback from different frames.
-            cmds.currentTime( self.startFrame, edit=True )
-
-            # Time a single runthrough of the entire animation sequence
-            playbackResults.startRep( idx )
-            cmds.play( wait=True )
-            playbackResults.endRep( idx )
+        # Move to first frame before each iteration to avoid slight variation in
+        # self.options.iterationCount caused by the initialization of playback
+        # from different frames, then time a single runthrough of the entire
+        # animation sequence.
+        playSteps = [ (None, lambda: cmds.currentTime( self.startFrame, edit=True ))
+                    , (playbackResults, lambda: cmds.play( wait=True )) ]
+        if self.trace.enabled:
+            # Each frame is recorded from a time change callback, which would
+            # add to the timing so it is only used when tracing.
+            with emFrameTracer( self.trace ):
+                self.repeatTimings( self.options.iterationCount, playSteps )
+        else:
+            self.repeatTimings( self.options.iterationCount, playSteps )
 
         # Restore the original options
         cmds.playbackOptions( loop=oldLoopStyle )
@@ -368,11 +421,8 @@ class emPerformanceRun(object):
 
         # Since refreshes are fast compared to playback do it 10 times
         self.progress.startPhase( '%s Refresh (%d times)' % (self.evalMode, self.options.iterationCount * 10) )
-        for idx in range(0, self.options.iterationCount * 10):
-
-            results.startRep( idx )
-            cmds.refresh( force=True )
-            results.endRep( idx )
+        self.repeatTimings( self.options.iterationCount * 10,
+                            [ (results, lambda: cmds.refresh( force=True )) ] )
 
         return results
 
@@ -391,16 +441,10 @@ class emPerformanceRun(object):
         dirtyResults = emPerformanceResults()
         # Since refreshes are fast compared to playback do it 10 times
         self.progress.startPhase( '%s Dirty Refresh (%d times)' % (self.evalMode, self.options.iterationCount * 10) )
-        for idx in range(0, self.options.iterationCount * 10):
-
-            # Make everything dirty so that the maximum evaluation happens
-            dirtyResults.startRep( idx )
-            cmds.dgdirty( a=True )
-            dirtyResults.endRep( idx )
-
-            results.startRep( idx )
-            cmds.refresh( force=True )
-            results.endRep( idx )
+        # Make everything dirty so that the maximum evaluation happens
+        self.repeatTimings( self.options.iterationCount * 10,
+                            [ (dirtyResults, lambda: cmds.dgdirty( a=True ))
+                            , (results, lambda: cmds.refresh( force=True )) ] )
 
         return (results, dirtyResults)
 
@@ -438,6 +482,15 @@ class emPerformanceOptions(object):
                             VIEWPORT_1            Run tests in original viewport
                             VIEWPORT_2            Run tests in VP2 (OGS)
 
+        traceFileName    : If not None then record the timeline of the tests and
+                           write it to this file in the Chrome trace format.
+
+        foldedFileName   : If not None then record the timeline of the tests and
+                           write it to this file as folded stacks.
+
+        externalTraceFiles : Chrome trace files from other profilers to merge
+                           into the timeline before it is written.
+
     Total number of tests run will be:
         len(evalModes) * len(testTypes) * len(viewports)
     """
@@ -482,6 +535,9 @@ class emPerformanceOptions(object):
         self.allColumns = True
         self.iterationCount = 3
         self.reportProgress = False
+        self.traceFileName = None
+        self.foldedFileName = None
+        self.externalTraceFiles = []
 
     #----------------------------------------------------------------------
     def usesEvaluationManager(self):
@@ -528,6 +584,24 @@ class emPerformanceOptions(object):
         """
         self.reportProgress = newReportProgress
 
+    #----------------------------------------------------------------------
+    def setTrace(self, traceFileName, foldedFileName=None, externalTraceFiles=None):
+        """
+        Turn on recording of the timeline of the tests, written at the end of
+        the run in the Chrome trace format to traceFileName and/or as folded
+        stacks to foldedFileName. Pass None for both to turn it off.
+        externalTraceFiles is a list of Chrome trace files from other
+        profilers to merge into the timeline.
+        """
+        self.traceFileName = traceFileName
+        self.foldedFileName = foldedFileName
+        self.externalTraceFiles = externalTraceFiles or []
+
+    #----------------------------------------------------------------------
+    def tracing(self):
+        'Check to see if the timeline of the tests is to be recorded'
+        return self.traceFileName is not None or self.foldedFileName is not None
+
     #----------------------------------------------------------------------
     def setEvalModes(self, newEvalModes):
         """
@@ -570,15 +644,22 @@ class emPerformanceOptions(object):
         else:
             self.viewports = [newViewports]
 
+    #----------------------------------------------------------------------
+    def statTitles(self):
+        """
+        Build the list of statistics reported for every test, in the same
+        order as emPerformanceRun.timingColumns() returns them.
+        """
+        if self.allColumns:
+            return ['Avg', 'Min', 'Max']
+        return ['Time']
+
     #----------------------------------------------------------------------
     def columnTitles(self):
         """
         Build the list of column titles defined by the currently active options.
         """
-        if self.allColumns:
-            stats = ['Avg', 'Min', 'Max']
-        else:
-            stats = ['Time']
+        stats = self.statTitles()
         columns = []
         extras = []
         if emPerformanceOptions.TEST_PLAYBACK in self.testTypes:
@@ -662,6 +743,12 @@ class emPerformanceResults(object):
 
     #----------------------------------------------------------------------
 
+    def elapsedTimes(self):
+        'Get the list of elapsed times of all the repetitions'
+        return [repData.elapsedTime for repData in self.repData]
+
+    #----------------------------------------------------------------------
+
     def startRep(self, rep):
         'Start a repetition, initializing the timing data'
         self.repData.append( emPerformanceResults.RepData() )
@@ -942,6 +1029,7 @@ def emPerformanceTest(
         phaseCount += 2
 
     currentProgress = progressState(len(mayaFiles), phaseCount, options.reportProgress)
+    trace = emTraceRecorder() if options.tracing() else None
 
     titleObject = emPerformanceRun( fileName=None, options=options )
     if outputFile:
@@ -953,8 +1041,12 @@ def emPerformanceTest(
             currentProgress.startFile( os.path.basename(fileName) )
         else:
             currentProgress.startFile( 'Current Scene' )
-        perform = emPerformanceRun( fileName=fileName, options=options, progress=currentProgress )
-        perform.runTests()
+        perform = emPerformanceRun( fileName=fileName, options=options, progress=currentProgress, trace=trace )
+        if trace:
+            with trace.span( fileName or 'Current Scene', 'file' ):
+                perform.runTests()
+        else:
+            perform.runTests()
         if outputFile:
             outputFile.write( perform.columns() + os.linesep )
         else:
@@ -964,8 +1056,32 @@ def emPerformanceTest(
         if currentProgress.aborting():
             break
 
+    if trace:
+        writeTrace( trace, options )
+
     return outputData
 
+#======================================================================
+def writeTrace(trace, options):
+    """
+    Merge the external traces into the recorded timeline and write it to
+    the files requested in the options.
+    """
+    for externalTraceFile in options.externalTraceFiles:
+        try:
+            trace.mergeChromeTrace( externalTraceFile )
+        except Exception, err:
+            print 'WARN: Could not merge trace file %s: %s' % (externalTraceFile, str(err))
+    if trace.dropped > 0:
+        print 'WARN: The trace buffer was full, the first %d spans were dropped' % trace.dropped
+    try:
+        if options.traceFileName:
+            trace.writeChromeTrace( options.traceFileName )
+        if options.foldedFileName:
+            trace.writeFoldedStacks( options.foldedFileName )
+    except Exception, err:
+        print 'ERR: %s' % str(err)
+
 # ===========================================================================
 # Copyright 2016 Autodesk, Inc. All rights reserved.
 #
@@ -0,0 +1,363 @@
+"""
+Timeline instrumentation for the evaluation manager performance tests.
+
+emTraceRecorder keeps the begin and end times of named spans (files, tests,
+graph creation, scheduling, playback iterations, frames...) in a fixed size
+ring buffer so that recording costs little and memory use is bounded; when
+it is full the oldest spans are dropped. The spans can be exported as:
+
+    - Chrome trace-event JSON, viewable in chrome://tracing or Perfetto
+    - Folded stacks, one "PARENT;CHILD;... MICROSECONDS" line per stack with
+      its self time, the input format of flame graph tools
+
+Trace events from other profilers (e.g. the Maya profiler data converted to
+the Chrome trace-event format) can be merged in so that they appear on the
+same timeline.
+
+Sample usage, with the performance tests:
+
+    from maya.debug.emPerformanceTest import emPerformanceTest
+    from maya.debug.emPerformanceTest import emPerformanceOptions as emo
+    options = emo()
+    options.setTrace( 'MyDir/emTrace.json', foldedFileName='MyDir/emTrace.folded' )
+    emPerformanceTest( ['MyDir'], 'MyDir/emPerformance.csv', options )
+
+or directly:
+
+    from maya.debug.emPerformanceTrace import emTraceRecorder
+    recorder = emTraceRecorder()
+    with recorder.span( 'Playback', 'test' ):
+        cmds.play( wait=True )
+    recorder.mergeChromeTrace( 'MyDir/profiler.json' )
+    recorder.writeChromeTrace( 'MyDir/trace.json' )
+"""
+
+import json
+import array
+from timeit import default_timer
+
+__all__ = [ 'emTraceRecorder', 'emNullTraceRecorder', 'emFrameTracer', 'readChromeTrace' ]
+
+# Default number of spans kept by a recorder
+TRACE_CAPACITY = 100000
+
+# Thread id used for the recorded spans, merged traces go on the following ones
+TRACE_THREAD = 1
+
+#======================================================================
+def readChromeTrace(traceData):
+    """
+    Read trace events in the Chrome trace-event format.
+
+        traceData : Name of a JSON file, or its parsed contents. Either a
+                    list of events or a dictionary with a 'traceEvents' list.
+
+    Complete events ('X') are used as-is, begin/end pairs ('B'/'E') are
+    matched per thread. Other event types are ignored.
+
+    Returns a list of (NAME, CATEGORY, START, END, THREAD, ARGS) with times in
+    microseconds, sorted by start time.
+    """
+    if isinstance(traceData, basestring):
+        with open(traceData, 'r') as traceFile:
+            traceData = json.load( traceFile )
+    if isinstance(traceData, dict):
+        traceData = traceData.get( 'traceEvents', [] )
+
+    spans = []
+    openSpans = {}
+    for event in traceData:
+        phase = event.get( 'ph' )
+        thread = event.get( 'tid', 0 )
+        if phase == 'X':
+            start = float(event['ts'])
+            spans.append( (event.get('name', ''), event.get('cat', ''), start, start + float(event.get('dur', 0.0)),
+                           thread, event.get('args', {})) )
+        elif phase == 'B':
+            openSpans.setdefault( thread, [] ).append( event )
+        elif phase == 'E' and openSpans.get( thread ):
+            begin = openSpans[thread].pop()
+            spans.append( (begin.get('name', ''), begin.get('cat', ''), float(begin['ts']), float(event['ts']),
+                           thread, begin.get('args', {})) )
+    spans.sort( key=lambda span: span[2] )
+    return spans
+
+#======================================================================
+class emTraceRecorder(object):
+    """
+    Ring buffer of timed spans.
+
+        capacity : Maximum number of spans kept
+        dropped  : Number of spans dropped because the buffer was full
+
+    Spans opened with begin() and closed with end() can be nested, which is
+    what the folded stacks are built from. Times are kept in seconds from
+    timeit.default_timer and exported in microseconds.
+    """
+    enabled = True
+
+    #----------------------------------------------------------------------
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.capacity = capacity
+        self.dropped = 0
+        self.__starts = array.array( 'd', [0.0] * capacity )
+        self.__ends = array.array( 'd', [0.0] * capacity )
+        self.__sequences = array.array( 'l', [-1] * capacity )
+        self.__names = [None] * capacity
+        self.__categories = [None] * capacity
+        self.__args = [None] * capacity
+        self.__count = 0
+        self.__merged = []
+
+    #----------------------------------------------------------------------
+    def begin(self, name, category='', args=None):
+        """
+        Open a span. Returns the token to pass to end().
+        """
+        token = self.__count
+        slot = token % self.capacity
+        if token >= self.capacity:
+            self.dropped += 1
+        self.__count += 1
+        self.__sequences[slot] = token
+        self.__names[slot] = name
+        self.__categories[slot] = category
+        self.__args[slot] = args
+        self.__ends[slot] = -1.0
+        self.__starts[slot] = default_timer()
+        return token
+
+    #----------------------------------------------------------------------
+    def end(self, token):
+        """
+        Close the span opened by begin(). Spans already dropped from the
+        buffer are ignored.
+        """
+        now = default_timer()
+        slot = token % self.capacity
+        if self.__sequences[slot] == token:
+            self.__ends[slot] = now
+
+    #----------------------------------------------------------------------
+    def span(self, name, category='', args=None):
+        """
+        Context manager recording the time spent in its block as a span.
+        """
+        return _traceSpan( self, name, category, args )
+
+    #----------------------------------------------------------------------
+    def clear(self):
+        """
+        Forget all spans, recorded and merged.
+        """
+        self.__sequences = array.array( 'l', [-1] * self.capacity )
+        self.__count = 0
+        self.dropped = 0
+        self.__merged = []
+
+    #----------------------------------------------------------------------
+    def spans(self):
+        """
+        Get the closed spans as a list of (NAME, CATEGORY, START, END, THREAD,
+        ARGS), times in microseconds, sorted by start time. Merged spans are
+        included.
+        """
+        spans = []
+        first = max(0, self.__count - self.capacity)
+        for token in range(first, self.__count):
+            slot = token % self.capacity
+            if self.__ends[slot] < 0.0:
+                continue
+            spans.append( (self.__names[slot], self.__categories[slot], self.__starts[slot] * 1e6,
+                           self.__ends[slot] * 1e6, TRACE_THREAD, self.__args[slot] or {}) )
+        spans += self.__merged
+        spans.sort( key=lambda span: span[2] )
+        return spans
+
+    #----------------------------------------------------------------------
+    def mergeChromeTrace(self, traceData, timeOffset=None, thread=None):
+        """
+        Merge trace events from another profiler into this trace.
+
+            traceData  : See readChromeTrace()
+            timeOffset : Microseconds to add to the merged times to bring
+                         them onto this recorder's clock. If None the first
+                         merged event is aligned with the first recorded one.
+            thread     : Thread id given to the merged spans, by default one
+                         beyond the threads already in use. If the events
+                         have several threads they keep their relative ids.
+        """
+        external = readChromeTrace( traceData )
+        if not external:
+            return
+        existing = self.spans()
+        if timeOffset is None:
+            timeOffset = (existing[0][2] if existing else 0.0) - external[0][2]
+        if thread is None:
+            thread = max( [span[4] for span in existing] + [TRACE_THREAD] ) + 1
+        firstThread = min( [span[4] for span in external] )
+        self.__merged += [(name, category, start + timeOffset, end + timeOffset, thread + spanThread - firstThread, args)
+                          for (name, category, start, end, spanThread, args) in external]
+
+    #----------------------------------------------------------------------
+    def chromeTrace(self):
+        """
+        Get the spans in the Chrome trace-event format, as a dictionary to be
+        dumped to JSON. Times are relative to the first span.
+        """
+        spans = self.spans()
+        origin = spans[0][2] if spans else 0.0
+        events = [ { 'name' : name
+                   , 'cat'  : category
+                   , 'ph'   : 'X'
+                   , 'ts'   : start - origin
+                   , 'dur'  : end - start
+                   , 'pid'  : 1
+                   , 'tid'  : thread
+                   , 'args' : args
+                   } for (name, category, start, end, thread, args) in spans ]
+        return { 'traceEvents' : events, 'displayTimeUnit' : 'ms' }
+
+    #----------------------------------------------------------------------
+    def writeChromeTrace(self, fileName):
+        """
+        Write the spans to a file in the Chrome trace-event format.
+        """
+        with open(fileName, 'w') as traceFile:
+            json.dump( self.chromeTrace(), traceFile )
+
+    #----------------------------------------------------------------------
+    def foldedStacks(self):
+        """
+        Get the self time of every stack of nested spans.
+
+        Returns a dictionary of { "THREAD;PARENT;...;NAME" : MICROSECONDS }.
+        A span is nested in another one on the same thread when it starts
+        and ends within it.
+        """
+        folded = {}
+        byThread = {}
+        for span in self.spans():
+            byThread.setdefault( span[4], [] ).append( span )
+        for (thread, spans) in byThread.iteritems():
+            # Parents come before their children when sorting on (start, -end)
+            spans.sort( key=lambda span: (span[2], -span[3]) )
+            stack = []
+            for (name, _, start, end, _, _) in spans:
+                while stack and stack[-1][1] < end:
+                    self.__popFolded( stack, folded )
+                path = '%s;%s' % (stack[-1][0], name) if stack else 'Thread %d;%s' % (thread, name)
+                # Self time starts as the whole span, children are taken off
+                if stack:
+                    stack[-1][2] -= end - start
+                stack.append( [path, end, end - start] )
+            while stack:
+                self.__popFolded( stack, folded )
+        return folded
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def __popFolded(stack, folded):
+        """ Close the innermost open span, adding its self time to its stack """
+        (path, _, selfTime) = stack.pop()
+        folded[path] = folded.get( path, 0.0 ) + max(selfTime, 0.0)
+
+    #----------------------------------------------------------------------
+    def writeFoldedStacks(self, fileName):
+        """
+        Write the folded stacks to a file, one "STACK MICROSECONDS" line per
+        stack, ready for flame graph tools.
+        """
+        with open(fileName, 'w') as foldedFile:
+            for (path, selfTime) in sorted( self.foldedStacks().iteritems() ):
+                foldedFile.write( '%s %d\n' % (path.replace(' ', '_'), int(round(selfTime))) )
+
+#======================================================================
+class emNullTraceRecorder(object):
+    """
+    Recorder with the same interface as emTraceRecorder that records
+    nothing, used when tracing is off so that callers need no checks.
+    """
+    enabled = False
+
+    def begin(self, name, category='', args=None):
+        'Nothing is recorded'
+        return None
+
+    def end(self, token):
+        'Nothing is recorded'
+        pass
+
+    def span(self, name, category='', args=None):
+        'Context manager that records nothing'
+        return _nullSpan
+
+#======================================================================
+class _nullSpanContext(object):
+    """
+    Context manager returned by emNullTraceRecorder.span()
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_nullSpan = _nullSpanContext()
+
+#======================================================================
+class _traceSpan(object):
+    """
+    Context manager returned by emTraceRecorder.span()
+    """
+    def __init__(self, recorder, name, category, args):
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+        self.token = None
+
+    def __enter__(self):
+        self.token = self.recorder.begin( self.name, self.category, self.args )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.recorder.end( self.token )
+        return False
+
+#======================================================================
+class emFrameTracer(object):
+    """
+    Context manager recording one span per frame evaluated while it is
+    active, from a time change callback. A frame's span runs from its time
+    change to the next one, so it includes its evaluation and refresh.
+
+        recorder : emTraceRecorder receiving the spans
+        category : Category of the frame spans
+    """
+    def __init__(self, recorder, category='frame'):
+        self.recorder = recorder
+        self.category = category
+        self.callbackId = None
+        self.frameToken = None
+
+    def __enter__(self):
+        import maya.OpenMaya as OpenMaya
+        self.callbackId = OpenMaya.MDGMessage.addTimeChangeCallback( self.timeChanged, None )
+        return self
+
+    def timeChanged(self, time, clientData):
+        'Close the span of the previous frame and open the one of the new frame'
+        if self.frameToken is not None:
+            self.recorder.end( self.frameToken )
+        self.frameToken = self.recorder.begin( 'Frame %g' % time.value(), self.category )
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        import maya.OpenMaya as OpenMaya
+        if self.frameToken is not None:
+            self.recorder.end( self.frameToken )
+            self.frameToken = None
+        if self.callbackId is not None:
+            OpenMaya.MMessage.removeCallback( self.callbackId )
+            self.callbackId = None
+        return False
@@ -0,0 +1,618 @@
+"""
+Compact indexed form of the graph structure information read by
+graphStructure, built for comparing and querying large graphs.
+
+Node and plug names are kept once each, in sorted lists, and everything else
+refers to them by their position in those lists:
+
+    nodes        : Sorted list of interned node names
+    plugs        : Sorted list of interned plug names, "NODE.ATTRIBUTE"
+    plug_nodes   : Node id of every plug
+    node_list    : Sorted ids of the nodes listed by dbpeek (the 'nodes' inclusion)
+    plug_sets    : { KEY_PLUGS_INPUT|KEY_PLUGS_OUTPUT|KEY_PLUGS_WORLD : sorted plug ids }
+
+Connections are stored twice, as compressed sparse row adjacency arrays:
+
+    down_offsets, down_plugs : Destinations of plug i are down_plugs[down_offsets[i]:down_offsets[i+1]]
+    up_offsets, up_plugs     : Sources of plug i are up_plugs[up_offsets[i]:up_offsets[i+1]]
+
+Since the names are sorted, two graphs are compared by merging their name
+lists once and then taking differences of sorted integer arrays, rather than
+by hashing every node, plug and connection string.
+
+When numpy is available the id arrays are numpy arrays and the differences
+and closure queries are vectorized, otherwise they are array.array objects.
+
+The binary file format, all integers little-endian, with every section
+padded to a multiple of 8 bytes:
+
+    MAGIC                               8 bytes
+    NODE_COUNT, PLUG_COUNT,
+    CONNECTION_COUNT, NODE_LIST_COUNT,
+    INPUT_COUNT, OUTPUT_COUNT,
+    WORLD_COUNT, NODE_NAMES_SIZE,
+    PLUG_NAMES_SIZE                     9 unsigned 64-bit integers
+    NODE_NAMES                          Newline-separated node names
+    PLUG_NAMES                          Newline-separated plug names
+    PLUG_NODES, NODE_LIST, INPUT,
+    OUTPUT, WORLD, DOWN_OFFSETS,
+    DOWN_PLUGS, UP_OFFSETS, UP_PLUGS    Signed 64-bit integer arrays
+
+Usage, Maya is not needed:
+    from maya.debug.graphIndex import GraphIndex
+    graph1 = GraphIndex.read( 'Before.dg' )
+    graph2 = GraphIndex.read( 'After.dg' )
+    graph1.save( 'Before.dgi' )
+    for (category, (added, removed)) in graph1.diff( graph2 ).iteritems():
+        print category, len(added), len(removed)
+    print graph1.downstream( ['pCube1.translateX'] )
+"""
+
+import json
+import array
+import struct
+from collections import deque
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = [ 'GraphIndex' ]
+
+# JSON keywords used in parsing the dbpeek output, same as in graphStructure
+KEY_CONNECTIONS  = 'connections'
+KEY_NODES        = 'nodes'
+KEY_PLUGS        = 'plugs'
+KEY_PLUGS_INPUT  = 'input'
+KEY_PLUGS_OUTPUT = 'output'
+KEY_PLUGS_WORLD  = 'affectsWorld'
+KEY_DOWNSTREAM   = 'downstream'
+KEY_UPSTREAM     = 'upstream'
+PLUG_SET_KEYS    = [KEY_PLUGS_INPUT, KEY_PLUGS_OUTPUT, KEY_PLUGS_WORLD]
+
+# Identification of the binary file format, including its version
+MAGIC = 'DGGRAPH1'
+HEADER_FORMAT = '<8s9Q'
+
+#----------------------------------------------------------------------
+def _padding(size):
+    """
+    Returns the number of bytes needed to pad size to a multiple of 8.
+    """
+    return (8 - size % 8) % 8
+
+#----------------------------------------------------------------------
+def _id_array(id_list):
+    """ Column of ids in the best available form """
+    if numpy is not None:
+        return numpy.array( id_list, dtype=numpy.int64 )
+    return array.array( 'l', id_list )
+
+#----------------------------------------------------------------------
+def _intern(name):
+    """ Returns the interned byte string form of a name, which JSON reads as unicode """
+    if isinstance(name, unicode):
+        name = name.encode( 'utf-8' )
+    return intern( name )
+
+#----------------------------------------------------------------------
+def _plug_node(plug):
+    """ Returns the name of the node a plug belongs to """
+    return plug.split('.', 1)[0]
+
+#----------------------------------------------------------------------
+def _merge_names(first_names, second_names):
+    """
+    Merge two sorted name lists into their sorted union.
+
+    Returns ( [UNION], FIRST_IDS, SECOND_IDS ) where FIRST_IDS[i] is the
+    position of first_names[i] in the union, and the same for SECOND_IDS.
+    Both mappings are increasing so they keep id arrays sorted.
+    """
+    union = []
+    first_ids = []
+    second_ids = []
+    first_count = len(first_names)
+    second_count = len(second_names)
+    (first_index, second_index) = (0, 0)
+    while first_index < first_count or second_index < second_count:
+        if second_index == second_count:
+            name = first_names[first_index]
+        elif first_index == first_count:
+            name = second_names[second_index]
+        else:
+            name = min( first_names[first_index], second_names[second_index] )
+        if first_index < first_count and first_names[first_index] == name:
+            first_ids.append( len(union) )
+            first_index += 1
+        if second_index < second_count and second_names[second_index] == name:
+            second_ids.append( len(union) )
+            second_index += 1
+        union.append( name )
+    return (union, _id_array(first_ids), _id_array(second_ids))
+
+#----------------------------------------------------------------------
+def _sorted_difference(first, second):
+    """
+    Returns the members of the sorted unique integer sequence first that
+    are not in the sorted unique integer sequence second, in order.
+    """
+    if numpy is not None:
+        return numpy.setdiff1d( first, second, assume_unique=True )
+    difference = []
+    second_count = len(second)
+    second_index = 0
+    for value in first:
+        while second_index < second_count and second[second_index] < value:
+            second_index += 1
+        if second_index == second_count or second[second_index] != value:
+            difference.append( value )
+    return difference
+
+#----------------------------------------------------------------------
+def _build_csr(keys, values, key_count):
+    """
+    Build compressed sparse row arrays from (keys[i], values[i]) pairs that
+    are already sorted by key.
+
+    Returns ( OFFSETS, VALUES ), the values of key k being
+    VALUES[OFFSETS[k]:OFFSETS[k+1]].
+    """
+    if numpy is not None:
+        keys = numpy.asarray( keys, dtype=numpy.int64 )
+        offsets = numpy.searchsorted( keys, numpy.arange( key_count + 1 ), side='left' ).astype( numpy.int64 )
+        return (offsets, numpy.asarray( values, dtype=numpy.int64 ))
+    offsets = array.array( 'l', [0] * (key_count + 1) )
+    for key in keys:
+        offsets[key + 1] += 1
+    for key in range(key_count):
+        offsets[key + 1] += offsets[key]
+    return (offsets, array.array( 'l', values ))
+
+#======================================================================
+class GraphIndex(object):
+    """
+    Indexed graph structure. See the module documentation for the layout.
+    """
+    #----------------------------------------------------------------------
+    def __init__(self, nodes=None, plugs=None, plug_nodes=None, node_list=None, plug_sets=None,
+                       down_offsets=None, down_plugs=None, up_offsets=None, up_plugs=None):
+        """
+        Create an index from existing arrays. Use from_lists(), from_json()
+        or read() to create one from the usual sources.
+        """
+        self.nodes = nodes if nodes is not None else []
+        self.plugs = plugs if plugs is not None else []
+        self.plug_nodes = plug_nodes if plug_nodes is not None else _id_array( [] )
+        self.node_list = node_list if node_list is not None else _id_array( [] )
+        self.plug_sets = plug_sets if plug_sets is not None else {}
+        for key in PLUG_SET_KEYS:
+            self.plug_sets.setdefault( key, _id_array( [] ) )
+        self.down_offsets = down_offsets if down_offsets is not None else _id_array( [0] * (len(self.plugs) + 1) )
+        self.down_plugs = down_plugs if down_plugs is not None else _id_array( [] )
+        self.up_offsets = up_offsets if up_offsets is not None else _id_array( [0] * (len(self.plugs) + 1) )
+        self.up_plugs = up_plugs if up_plugs is not None else _id_array( [] )
+        self.__node_plugs = None
+        self.__node_ids = None
+        self.__plug_ids = None
+
+    #----------------------------------------------------------------------
+    def connection_count(self):
+        """ Returns the number of connections in the graph """
+        return len(self.down_plugs)
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def from_lists(nodes, connections, plugs_in=None, plugs_out=None, plugs_world=None):
+        """
+        Build the index from lists of names.
+
+        nodes:       Names of the nodes in the graph
+        connections: List of ( SOURCE_PLUG, DESTINATION_PLUG ) pairs
+        plugs_in, plugs_out, plugs_world: Names of the plugs in each category
+        """
+        nodes = [_intern(node) for node in nodes]
+        connections = [(_intern(src), _intern(dst)) for (src, dst) in connections]
+        plug_set_names = { KEY_PLUGS_INPUT  : [_intern(plug) for plug in plugs_in or []]
+                         , KEY_PLUGS_OUTPUT : [_intern(plug) for plug in plugs_out or []]
+                         , KEY_PLUGS_WORLD  : [_intern(plug) for plug in plugs_world or []] }
+
+        plug_names = set()
+        for (src, dst) in connections:
+            plug_names.add( src )
+            plug_names.add( dst )
+        for names in plug_set_names.values():
+            plug_names.update( names )
+        plugs = sorted( plug_names )
+        plug_ids = dict( (plug, plug_id) for (plug_id, plug) in enumerate(plugs) )
+
+        # Nodes owning plugs are part of the graph even when they are not listed
+        node_names = set( nodes )
+        node_names.update( [intern(_plug_node(plug)) for plug in plugs] )
+        all_nodes = sorted( node_names )
+        node_ids = dict( (node, node_id) for (node_id, node) in enumerate(all_nodes) )
+
+        plug_nodes = _id_array( [node_ids[_plug_node(plug)] for plug in plugs] )
+        node_list = _id_array( sorted( set( [node_ids[node] for node in nodes] ) ) )
+        plug_sets = dict( (key, _id_array( sorted( set( [plug_ids[plug] for plug in names] ) ) ))
+                          for (key, names) in plug_set_names.iteritems() )
+
+        plug_count = max( len(plugs), 1 )
+        if numpy is not None:
+            keys = numpy.unique( numpy.array( [plug_ids[src] * plug_count + plug_ids[dst] for (src, dst) in connections],
+                                              dtype=numpy.int64 ) )
+            (sources, destinations) = (keys // plug_count, keys % plug_count)
+            # A stable sort on the destination keeps the sources sorted within each one
+            up_order = numpy.argsort( destinations, kind='mergesort' )
+            (up_keys, up_values) = (destinations[up_order], sources[up_order])
+        else:
+            pairs = sorted( set( [(plug_ids[src], plug_ids[dst]) for (src, dst) in connections] ) )
+            sources = [src for (src, _) in pairs]
+            destinations = [dst for (_, dst) in pairs]
+            up_pairs = sorted( pairs, key=lambda pair: pair[1] )
+            (up_keys, up_values) = ([dst for (_, dst) in up_pairs], [src for (src, _) in up_pairs])
+        (down_offsets, down_plugs) = _build_csr( sources, destinations, len(plugs) )
+        (up_offsets, up_plugs) = _build_csr( up_keys, up_values, len(plugs) )
+
+        return GraphIndex( all_nodes, plugs, plug_nodes, node_list, plug_sets,
+                           down_offsets, down_plugs, up_offsets, up_plugs )
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def from_json(raw_json, evaluation_graph=False):
+        """
+        Build the index from the JSON produced by the dbpeek command using
+        the 'graph' operation, as parsed by graphStructure.
+
+        raw_json:         Parsed JSON data
+        evaluation_graph: If True read the evaluation graph plug lists
+        """
+        nodes = raw_json.get( KEY_NODES, [] )
+
+        plug_lists = dict( (key, []) for key in PLUG_SET_KEYS )
+        if evaluation_graph:
+            for (node, plug_dictionary) in raw_json.get( KEY_PLUGS, {} ).iteritems():
+                for key in PLUG_SET_KEYS:
+                    plug_lists[key] += ['{0:s}.{1:s}'.format(node, plug) for plug in plug_dictionary.get( key, [] )]
+
+        # Same as graphStructure, only the downstream side of each connection is used
+        connections = []
+        for node_connections in raw_json.get( KEY_CONNECTIONS, {} ).itervalues():
+            for connection in node_connections.get( KEY_DOWNSTREAM, [] ):
+                connections += connection.items()
+
+        return GraphIndex.from_lists( nodes, connections,
+                                      plug_lists[KEY_PLUGS_INPUT], plug_lists[KEY_PLUGS_OUTPUT], plug_lists[KEY_PLUGS_WORLD] )
+
+    #----------------------------------------------------------------------
+    def to_json(self):
+        """
+        Returns the graph in the dbpeek JSON form, the inverse of from_json().
+        Only the downstream side of the connections is recreated.
+        """
+        raw_json = {}
+        if len(self.node_list) > 0:
+            raw_json[KEY_NODES] = [self.nodes[node_id] for node_id in self.node_list]
+        plugs = {}
+        for key in PLUG_SET_KEYS:
+            for plug_id in self.plug_sets[key]:
+                (node, attribute) = self.plugs[plug_id].split('.', 1)
+                plug_dictionary = plugs.setdefault( node, dict( (plug_key, []) for plug_key in PLUG_SET_KEYS ) )
+                plug_dictionary[key].append( attribute )
+        if plugs:
+            raw_json[KEY_PLUGS] = plugs
+        connections = {}
+        for (src, dst) in self.connections():
+            node_connections = connections.setdefault( _plug_node(src), { KEY_DOWNSTREAM : [], KEY_UPSTREAM : [] } )
+            node_connections[KEY_DOWNSTREAM].append( { src : dst } )
+        raw_json[KEY_CONNECTIONS] = connections
+        return raw_json
+
+    #----------------------------------------------------------------------
+    def connections(self):
+        """
+        Generator returning the ( SOURCE_PLUG, DESTINATION_PLUG ) names of
+        every connection, sorted by source then destination.
+        """
+        for src in range(len(self.plugs)):
+            for position in range(self.down_offsets[src], self.down_offsets[src+1]):
+                yield (self.plugs[src], self.plugs[self.down_plugs[position]])
+
+    #----------------------------------------------------------------------
+    def node_id(self, node):
+        """ Returns the id of the named node, None if it is not in the graph """
+        if self.__node_ids is None:
+            self.__node_ids = dict( (name, node_id) for (node_id, name) in enumerate(self.nodes) )
+        return self.__node_ids.get( node )
+
+    #----------------------------------------------------------------------
+    def plug_id(self, plug):
+        """ Returns the id of the named plug, None if it is not in the graph """
+        if self.__plug_ids is None:
+            self.__plug_ids = dict( (name, plug_id) for (plug_id, name) in enumerate(self.plugs) )
+        return self.__plug_ids.get( plug )
+
+    #----------------------------------------------------------------------
+    def __connection_keys(self, plug_map, plug_count):
+        """
+        Returns the sorted connection keys SOURCE * plug_count + DESTINATION,
+        after mapping the plug ids through plug_map. Since plug_map is
+        increasing the keys come out sorted.
+        """
+        if numpy is not None:
+            plug_map = numpy.asarray( plug_map, dtype=numpy.int64 )
+            offsets = numpy.asarray( self.down_offsets, dtype=numpy.int64 )
+            sources = numpy.repeat( numpy.arange( len(self.plugs), dtype=numpy.int64 ), numpy.diff( offsets ) )
+            return plug_map[sources] * plug_count + plug_map[numpy.asarray( self.down_plugs, dtype=numpy.int64 )]
+        keys = []
+        for src in range(len(self.plugs)):
+            mapped_src = plug_map[src] * plug_count
+            for position in range(self.down_offsets[src], self.down_offsets[src+1]):
+                keys.append( mapped_src + plug_map[self.down_plugs[position]] )
+        return keys
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def __mapped(ids, id_map):
+        """ Returns the ids mapped through id_map """
+        if numpy is not None:
+            return numpy.asarray( id_map, dtype=numpy.int64 )[numpy.asarray( ids, dtype=numpy.int64 )]
+        return [id_map[original_id] for original_id in ids]
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def __difference_names(first, second, names):
+        """
+        Returns the ( ADDED, REMOVED ) names, ADDED being the members of
+        second not in first and REMOVED those of first not in second.
+        """
+        return ( [names[name_id] for name_id in _sorted_difference( second, first )],
+                 [names[name_id] for name_id in _sorted_difference( first, second )] )
+
+    #----------------------------------------------------------------------
+    def diff(self, other, categories=None):
+        """
+        Compare this graph against another one, in the same terms as
+        graphStructure.compare().
+
+        other:      GraphIndex to compare against
+        categories: Subset of KEY_NODES, KEY_PLUGS_INPUT, KEY_PLUGS_OUTPUT,
+                    KEY_PLUGS_WORLD and KEY_CONNECTIONS to compare. None
+                    means all of them.
+
+        Returns a dictionary of { CATEGORY : ( [ADDED], [REMOVED] ) } with
+        the names of what is in other but not in this graph as ADDED, and
+        what is in this graph but not in other as REMOVED. Connections are
+        named "SOURCE_PLUG DESTINATION_PLUG".
+        """
+        if categories is None:
+            categories = [KEY_NODES] + PLUG_SET_KEYS + [KEY_CONNECTIONS]
+        differences = {}
+
+        if KEY_NODES in categories:
+            (nodes, self_node_map, other_node_map) = _merge_names( self.nodes, other.nodes )
+            differences[KEY_NODES] = self.__difference_names( self.__mapped( self.node_list, self_node_map ),
+                                                              self.__mapped( other.node_list, other_node_map ),
+                                                              nodes )
+
+        if [category for category in categories if category != KEY_NODES]:
+            (plugs, self_plug_map, other_plug_map) = _merge_names( self.plugs, other.plugs )
+            for key in PLUG_SET_KEYS:
+                if key in categories:
+                    differences[key] = self.__difference_names( self.__mapped( self.plug_sets[key], self_plug_map ),
+                                                                self.__mapped( other.plug_sets[key], other_plug_map ),
+                                                                plugs )
+
+            if KEY_CONNECTIONS in categories:
+                plug_count = max( len(plugs), 1 )
+                self_keys = self.__connection_keys( self_plug_map, plug_count )
+                other_keys = other.__connection_keys( other_plug_map, plug_count )
+                names = lambda keys: ['{} {}'.format( plugs[key // plug_count], plugs[key % plug_count] ) for key in keys]
+                differences[KEY_CONNECTIONS] = ( names( _sorted_difference( other_keys, self_keys ) ),
+                                                 names( _sorted_difference( self_keys, other_keys ) ) )
+
+        return differences
+
+    #----------------------------------------------------------------------
+    def __node_plug_csr(self):
+        """
+        Returns the ( OFFSETS, PLUGS ) compressed sparse row arrays listing
+        the plugs of every node.
+        """
+        if self.__node_plugs is None:
+            if numpy is not None:
+                plug_nodes = numpy.asarray( self.plug_nodes, dtype=numpy.int64 )
+                order = numpy.argsort( plug_nodes, kind='mergesort' )
+                self.__node_plugs = _build_csr( plug_nodes[order], order, len(self.nodes) )
+            else:
+                order = sorted( range(len(self.plugs)), key=lambda plug_id: self.plug_nodes[plug_id] )
+                self.__node_plugs = _build_csr( [self.plug_nodes[plug_id] for plug_id in order], order, len(self.nodes) )
+        return self.__node_plugs
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def __gather(offsets, values, ids):
+        """
+        Returns the concatenation of values[offsets[i]:offsets[i+1]] for
+        every i in ids.
+        """
+        if numpy is not None:
+            offsets = numpy.asarray( offsets, dtype=numpy.int64 )
+            starts = offsets[ids]
+            lengths = offsets[ids + 1] - starts
+            total = lengths.sum()
+            if total == 0:
+                return numpy.zeros( 0, dtype=numpy.int64 )
+            positions = numpy.arange( total ) - numpy.repeat( numpy.cumsum( lengths ) - lengths, lengths )
+            return numpy.asarray( values, dtype=numpy.int64 )[numpy.repeat( starts, lengths ) + positions]
+        gathered = []
+        for one_id in ids:
+            gathered.extend( values[offsets[one_id]:offsets[one_id+1]] )
+        return gathered
+
+    #----------------------------------------------------------------------
+    def __closure(self, start_ids, offsets, values, node_level):
+        """
+        Breadth-first walk of the adjacency arrays from the given plug ids.
+        When node_level is True every plug of a reached node is reached too.
+
+        Returns the visited plug ids as a boolean column.
+        """
+        plug_count = len(self.plugs)
+        if node_level:
+            (node_offsets, node_plugs) = self.__node_plug_csr()
+
+        if numpy is not None:
+            visited = numpy.zeros( plug_count, dtype=bool )
+            plug_nodes = numpy.asarray( self.plug_nodes, dtype=numpy.int64 )
+            frontier = numpy.unique( numpy.asarray( start_ids, dtype=numpy.int64 ) )
+            while len(frontier) > 0:
+                if node_level:
+                    frontier = numpy.union1d( frontier, self.__gather( node_offsets, node_plugs,
+                                                                       numpy.unique( plug_nodes[frontier] ) ) )
+                    frontier = frontier[~visited[frontier]]
+                visited[frontier] = True
+                frontier = numpy.unique( self.__gather( offsets, values, frontier ) )
+                frontier = frontier[~visited[frontier]]
+            return visited
+
+        visited = [False] * plug_count
+        queue = deque( start_ids )
+        while queue:
+            plug_id = queue.popleft()
+            if visited[plug_id]:
+                continue
+            visited[plug_id] = True
+            neighbours = values[offsets[plug_id]:offsets[plug_id+1]]
+            if node_level:
+                node_id = self.plug_nodes[plug_id]
+                neighbours = list(neighbours) + list(node_plugs[node_offsets[node_id]:node_offsets[node_id+1]])
+            queue.extend( [neighbour for neighbour in neighbours if not visited[neighbour]] )
+        return visited
+
+    #----------------------------------------------------------------------
+    def __closure_names(self, names, offsets, values, node_level):
+        """ Shared implementation of upstream() and downstream() """
+        start_ids = []
+        for name in names:
+            plug_id = self.plug_id( name )
+            if plug_id is not None:
+                start_ids.append( plug_id )
+                continue
+            node_id = self.node_id( name )
+            if node_id is not None:
+                (node_offsets, node_plugs) = self.__node_plug_csr()
+                start_ids += list( node_plugs[node_offsets[node_id]:node_offsets[node_id+1]] )
+        visited = self.__closure( start_ids, offsets, values, node_level )
+        if node_level:
+            return sorted( set( [self.nodes[self.plug_nodes[visited_id]]
+                                 for visited_id in range(len(self.plugs)) if visited[visited_id]] ) )
+        return [self.plugs[visited_id] for visited_id in range(len(self.plugs)) if visited[visited_id]]
+
+    #----------------------------------------------------------------------
+    def downstream(self, names, node_level=False):
+        """
+        Find everything reachable by following connections downstream.
+
+        names:      Plugs or nodes to start from. A node starts from all
+                    of its connected plugs.
+        node_level: If False follow only the connections, returning plugs.
+                    If True consider that every plug of a node affects
+                    every other one, returning nodes. The real attribute
+                    dependencies are somewhere in between.
+
+        Returns the sorted list of names reached, including the starting ones.
+        """
+        return self.__closure_names( names, self.down_offsets, self.down_plugs, node_level )
+
+    #----------------------------------------------------------------------
+    def upstream(self, names, node_level=False):
+        """
+        Find everything reachable by following connections upstream.
+        The arguments and result are the same as for downstream().
+        """
+        return self.__closure_names( names, self.up_offsets, self.up_plugs, node_level )
+
+    #----------------------------------------------------------------------
+    def __arrays(self):
+        """ Returns the id arrays in the order they are saved in """
+        return ( [self.plug_nodes, self.node_list]
+               + [self.plug_sets[key] for key in PLUG_SET_KEYS]
+               + [self.down_offsets, self.down_plugs, self.up_offsets, self.up_plugs] )
+
+    #----------------------------------------------------------------------
+    def save(self, file_name):
+        """
+        Write the index to a file in the binary format.
+        """
+        node_names = '\n'.join( self.nodes )
+        plug_names = '\n'.join( self.plugs )
+        with open(file_name, 'wb') as graph_fd:
+            graph_fd.write( struct.pack( HEADER_FORMAT, MAGIC, len(self.nodes), len(self.plugs),
+                                         len(self.down_plugs), len(self.node_list),
+                                         len(self.plug_sets[KEY_PLUGS_INPUT]),
+                                         len(self.plug_sets[KEY_PLUGS_OUTPUT]),
+                                         len(self.plug_sets[KEY_PLUGS_WORLD]),
+                                         len(node_names), len(plug_names) ) )
+            graph_fd.write( node_names + '\0' * _padding(len(node_names)) )
+            graph_fd.write( plug_names + '\0' * _padding(len(plug_names)) )
+            for id_array in self.__arrays():
+                if numpy is not None:
+                    graph_fd.write( numpy.asarray( id_array, dtype='<i8' ).tostring() )
+                else:
+                    graph_fd.write( struct.pack( '<%dq' % len(id_array), *id_array ) )
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def is_index_file(file_name):
+        """
+        Returns True if the file is in the binary graph index format.
+        """
+        try:
+            with open(file_name, 'rb') as graph_fd:
+                return graph_fd.read( len(MAGIC) ) == MAGIC
+        except IOError:
+            return False
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def load(file_name):
+        """
+        Read an index from a file in the binary format.
+        """
+        with open(file_name, 'rb') as graph_fd:
+            header = graph_fd.read( struct.calcsize(HEADER_FORMAT) )
+            (magic, node_count, plug_count, connection_count, node_list_count,
+             input_count, output_count, world_count, node_names_size, plug_names_size) = struct.unpack( HEADER_FORMAT, header )
+            if magic != MAGIC:
+                raise ValueError( '%s is not a graph index file' % file_name )
+            node_names = graph_fd.read( node_names_size + _padding(node_names_size) )[:node_names_size]
+            plug_names = graph_fd.read( plug_names_size + _padding(plug_names_size) )[:plug_names_size]
+
+            id_arrays = []
+            for count in [plug_count, node_list_count, input_count, output_count, world_count,
+                          plug_count+1, connection_count, plug_count+1, connection_count]:
+                if numpy is not None:
+                    id_arrays.append( numpy.fromfile( graph_fd, dtype='<i8', count=count ).astype( numpy.int64 ) )
+                else:
+                    id_arrays.append( array.array( 'l', struct.unpack( '<%dq' % count, graph_fd.read( 8 * count ) ) ) )
+
+        nodes = [intern(node) for node in node_names.split('\n')] if node_count > 0 else []
+        plugs = [intern(plug) for plug in plug_names.split('\n')] if plug_count > 0 else []
+        plug_sets = dict( zip( PLUG_SET_KEYS, id_arrays[2:5] ) )
+        return GraphIndex( nodes, plugs, id_arrays[0], id_arrays[1], plug_sets, *id_arrays[5:] )
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def read(file_name, evaluation_graph=False):
+        """
+        Read an index from either a binary index file or a .dg file written
+        by graphStructure. Maya is not needed for either.
+
+        evaluation_graph: See from_json()
+        """
+        if GraphIndex.is_index_file( file_name ):
+            return GraphIndex.load( file_name )
+        with open(file_name, 'r') as structure_file:
+            return GraphIndex.from_json( json.load( structure_file ), evaluation_graph=evaluation_graph )
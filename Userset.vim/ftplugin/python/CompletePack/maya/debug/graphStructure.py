@@ -21,12 +21,21 @@ text comparision of two graphs, or a merged comparison of two graphs.
         print 'Oh noooes, the graph structure has changed!'
         # Now visualize the differences
         graph1.compare_as_dot(graph2, structure_file_name='GraphCompare.dot', show_only_differences=True)
+
+    # Large graphs can be stored in the compact binary index format, which
+    # reads back much faster than the .dg JSON.
+    graph1.write_index( 'FileForGraph.dgi' )
+    graph3 = graphStructure( structure_file_name='FileForGraph.dgi' )
+
+    # Find everything affected by a plug
+    print graph3.index().downstream( ['pCube1.translateX'] )
 """
 
 __all__ = ['graphStructure']
 
 import sys
 import json
+from maya.debug.graphIndex import GraphIndex
 
 # JSON keywords used in parsing the dbpeek output
 KEY_CONNECTIONS  = 'connections'   # Plug list for dbpeek(op='graph', a='connections')
@@ -317,6 +326,7 @@ class graphStructure(object):
         self.connections = []
         self.raw_json = {}
         self.operation = None   # The operation that created the graph to be compared
+        self.__index = None     # GraphIndex of the graph, created when first needed
 
         if structure_file_name == None:
             self.__init_from_scene()
@@ -339,16 +349,24 @@ class graphStructure(object):
         Initialize the graph structure information from the raw JSON obtained
         from the dbpeek command (or file contents with the equivalent).
         """
+        try:
+            self.raw_json = json.loads( json_string )
+        except Exception, ex:
+            print 'ERROR: Could not parse raw JSON ({0:s})'.format( ex )
+        self.__init_from_raw_json()
+
+    #======================================================================
+    def __init_from_raw_json(self):
+        """
+        Initialize the graph structure information from the already parsed
+        JSON in self.raw_json.
+        """
         self.nodes = []
         self.plugs_in = []
         self.plugs_out = []
         self.plugs_world = []
         self.connections = []
-
-        try:
-            self.raw_json = json.loads( json_string )
-        except Exception, ex:
-            print 'ERROR: Could not parse raw JSON ({0:s})'.format( ex )
+        self.__index = None
 
         try:
             self.nodes = self.raw_json[KEY_NODES]
@@ -408,6 +426,15 @@ class graphStructure(object):
         output of the dbpeek command using the 'graph' operation.
         """
         self.name = structure_file_name
+        if GraphIndex.is_index_file( structure_file_name ):
+            try:
+                graph_index = GraphIndex.load( structure_file_name )
+                self.raw_json = graph_index.to_json()
+                self.__init_from_raw_json()
+                self.__index = graph_index
+            except Exception, ex:
+                print 'ERROR: Could not read graph index file {0:s} ({1:s})'.format( structure_file_name, ex )
+            return
         try:
             structure_file = open(structure_file_name, 'r')
             self.__init_from_json( structure_file.read() )
@@ -431,6 +458,26 @@ class graphStructure(object):
         out.write( json.dumps( self.raw_json, indent=4 ) )
         out.close()
 
+    #======================================================================
+    def index(self):
+        """
+        Returns the GraphIndex of the graph, in which the names are replaced
+        by integer ids and the connections are kept in adjacency arrays. It
+        is what the comparisons use and it answers upstream and downstream
+        queries.
+        """
+        if self.__index is None:
+            self.__index = GraphIndex.from_json( self.raw_json, evaluation_graph=self.evaluation_graph )
+        return self.__index
+
+    #======================================================================
+    def write_index(self, fileName):
+        """
+        Dump the graph in the binary GraphIndex format, which can be read
+        back the same way as the .dg format.
+        """
+        self.index().save( fileName )
+
     #======================================================================
     def write_as_dot(self, fileName=None):
         """
@@ -501,25 +548,31 @@ class graphStructure(object):
         # ones were shown so that we can do it explicitly.
         nodes_shown = {}
 
+        # Membership tests on the lists are too slow for large graphs
+        self_nodes = set(self.nodes)
+        other_nodes = set(other.nodes)
+        self_connections = set(self.connections)
+        other_connections = set(other.connections)
+
         # Pass 1: Write out nodes in both graphs
         if not show_only_differences:
             out.write( dot.simple_node_format() )
             for node in self.nodes:
-                if node in other.nodes:
+                if node in other_nodes:
                     nodes_shown[node] = True
                     out.write( dot.node(node) )
 
         # Pass 2: Write out nodes in graph 1 but not graph 2
         out.write( dot.altered_node_format(True) )
         for node in self.nodes:
-            if node not in other.nodes:
+            if node not in other_nodes:
                 nodes_shown[node] = True
                 out.write( dot.node(node) )
 
         # Pass 3: Write out nodes in graph 2 but not graph 1
         out.write( dot.altered_node_format(False) )
         for node in other.nodes:
-            if node not in self.nodes:
+            if node not in self_nodes:
                 nodes_shown[node] = True
                 out.write( dot.node(node) )
 
@@ -532,13 +585,13 @@ class graphStructure(object):
         # Pass 4: Write out connections in both graphs
         if not show_only_differences:
             for connection in self.connections:
-                if connection in other.connections:
+                if connection in other_connections:
                     (src,dst) = connection.split(' ')
                     out.write( dot.simple_connection(src,dst) )
 
         # Pass 5: Write out connections in graph 1 but not graph 2
         for connection in self.connections:
-            if connection not in other.connections:
+            if connection not in other_connections:
                 (src,dst) = connection.split(' ')
                 (src_node,_) = split_connection( src )
                 if src_node not in nodes_shown:
@@ -550,7 +603,7 @@ class graphStructure(object):
 
         # Pass 6: Write out connections in graph 2 but not graph 1
         for connection in other.connections:
-            if connection not in self.connections:
+            if connection not in self_connections:
                 (src,dst) = connection.split(' ')
                 (src_node,_) = split_connection( src )
                 if src_node not in nodes_shown:
@@ -562,41 +615,6 @@ class graphStructure(object):
 
         out.write( dot.footer() )
 
-    #======================================================================
-    @staticmethod
-    def __compare_lists(list1, list2):
-        """
-        Compare two lists and output generate a 2-tuple of lists with
-        differences between them. The first element is the list of objects
-        in the first list but not the second, the second elements contains
-        objects in the second list but not the first.
-
-        The naive implementation (walking each list and checking membership
-        in the other) was too slow so a faster algorithm was put into place.
-        A dictionary is populated, adding 1 if the entry is in the first list
-        and 2 if the entry is in the second list. Any entries with both will
-        have a value of 3 and can be ignored. Adds will have value 2 and
-        removals will have value 1.
-
-        list1: Baseline list for comparison
-        list2: List against which it is compared
-        """
-        list_totals = {}
-        for entry in list1:
-            list_totals[entry] = 1
-
-        for entry in list2:
-            list_totals[entry] = list_totals.get(entry,0) + 2
-
-        additions = []
-        removals = []
-        for (entry,entry_count) in list_totals.iteritems():
-            if entry_count == 1:
-                removals.append(entry)
-            elif entry_count == 2:
-                additions.append(entry)
-        return (additions, removals)
-
     #======================================================================
     def compare(self, other):
         """
@@ -638,30 +656,43 @@ class graphStructure(object):
         }
 
         All of the 'plugs' lists are for evaluation graph mode only.
+
+        The lists are compared through the GraphIndex of each graph so that
+        even graphs with hundreds of thousands of connections are compared
+        quickly.
         """
         # Build up the structure using all found differences.
         json_compare = { 'original' : self.name, 'compared_with' : other.name }
         if self.operation is not None:
             json_compare['operation'] = self.operation
 
+        categories = []
+        if KEY_NODES in self.inclusions:
+            categories.append( KEY_NODES )
+        if KEY_PLUGS in self.inclusions:
+            categories += [KEY_PLUGS_INPUT, KEY_PLUGS_OUTPUT, KEY_PLUGS_WORLD]
+        if KEY_CONNECTIONS in self.inclusions:
+            categories.append( KEY_CONNECTIONS )
+        differences = self.index().diff( other.index(), categories )
+
         total_differences = 0
         if KEY_NODES in self.inclusions:
             print 'Comparing node lists of sizes {} and {}'.format( len(self.nodes), len(other.nodes) )
-            (nodes_added,nodes_removed) = self.__compare_lists( self.nodes, other.nodes )
+            (nodes_added,nodes_removed) = differences[KEY_NODES]
             total_differences += len(nodes_added) + len(nodes_removed)
             json_compare[KEY_NODES]        = { KEY_ADDED : nodes_added,       KEY_REMOVED : nodes_removed }
 
         if KEY_PLUGS in self.inclusions:
             print 'Comparing in plug lists of sizes {} and {}'.format( len(self.plugs_in), len(other.plugs_in) )
-            (plugs_in_added,plugs_in_removed) = self.__compare_lists( self.plugs_in, other.plugs_in )
+            (plugs_in_added,plugs_in_removed) = differences[KEY_PLUGS_INPUT]
             total_differences += len(plugs_in_added) + len(plugs_in_removed)
 
             print 'Comparing out plug lists of sizes {} and {}'.format( len(self.plugs_out), len(other.plugs_out) )
-            (plugs_out_added,plugs_out_removed) = self.__compare_lists( self.plugs_out, other.plugs_out )
+            (plugs_out_added,plugs_out_removed) = differences[KEY_PLUGS_OUTPUT]
             total_differences += len(plugs_out_added) + len(plugs_out_removed)
 
             print 'Comparing world plug lists of sizes {} and {}'.format( len(self.plugs_world), len(other.plugs_world) )
-            (plugs_world_added,plugs_world_removed) = self.__compare_lists( self.plugs_world, other.plugs_world )
+            (plugs_world_added,plugs_world_removed) = differences[KEY_PLUGS_WORLD]
             total_differences += len(plugs_world_added) + len(plugs_world_removed)
 
             json_compare[KEY_PLUGS_INPUT]  = { KEY_ADDED : plugs_in_added,    KEY_REMOVED : plugs_in_removed }
@@ -670,7 +701,7 @@ class graphStructure(object):
 
         if KEY_CONNECTIONS in self.inclusions:
             print 'Comparing connection lists of sizes {} and {}'.format( len(self.connections), len(other.connections) )
-            (connections_added,connections_removed) = self.__compare_lists( self.connections, other.connections )
+            (connections_added,connections_removed) = differences[KEY_CONNECTIONS]
             total_differences += len(connections_added) + len(connections_removed)
             json_compare[KEY_CONNECTIONS]  = { KEY_ADDED : connections_added, KEY_REMOVED : connections_removed }
 
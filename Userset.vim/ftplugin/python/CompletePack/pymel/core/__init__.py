@@ -300,6 +300,11 @@ def _installCallbacks():
         for plugin in preLoadedPlugins:
             _pluginLoaded(plugin)
 
+# in lazy function mode, make the commands which have not been created yet
+# available from here, without creating them
+_factories.addLazyFunctions(__name__)
+_module = sys.modules[__name__]
+
 _installCallbacks()
 
 # run userSetup.py / initialize MEL...
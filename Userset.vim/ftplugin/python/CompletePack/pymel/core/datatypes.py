@@ -8,11 +8,13 @@ import math
 import copy
 import operator
 import colorsys
+import array as _array
+from __builtin__ import sum as _sum, all as _all
 
 import pymel.util as util
 import pymel.api as _api
 from pymel.util.arrays import *
-from pymel.util.arrays import _toCompOrArrayInstance
+from pymel.util.arrays import _toCompOrArrayInstance, _numpy
 import pymel.internal.factories as _factories
 
 # in python2.6/maya2010 'as' becomes a keyword.
@@ -2832,6 +2834,515 @@ class BoundingBox(_api.MBoundingBox):
     h = property(_factories.wrapApiMethod(_api.MBoundingBox, 'height'))
     d = property(_factories.wrapApiMethod(_api.MBoundingBox, 'depth'))
 
+#------------------------------------------------------------------------------
+# Batched data types
+#------------------------------------------------------------------------------
+
+# Vector, Point and Matrix wrap a single api object each, which makes working
+# on large sets of them (ie, all the points of a mesh) costly.  The classes
+# below store n items in one flat array of doubles instead, and operate on all
+# of them at once - with numpy when it is available, through a view on the
+# same buffer, with plain loops otherwise.
+
+class _DataArray(object):
+
+    """ Base class for flat, batched arrays of n items of `stride` doubles each """
+    stride = 1
+    itemType = None
+    apiArrayType = None
+
+    def __init__(self, data=None):
+        """ Initializes from another array of the same kind, from an api array (ie, MPointArray),
+            from a flat buffer or sequence of floats, or from a sequence of items """
+        if data is None:
+            self._data = _array.array('d')
+        elif isinstance(data, _DataArray):
+            if data.stride != self.stride:
+                raise TypeError, "cannot initialize a %s from a %s" % (util.clsname(self), util.clsname(data))
+            self._data = _array.array('d', data._data)
+        elif self.apiArrayType is not None and isinstance(data, self.apiArrayType):
+            self._data = _array.array('d')
+            for i in xrange(data.length()):
+                self._data.extend(self._itemComponents(data[i]))
+        else:
+            self._data = self._toBuffer(data)
+        if len(self._data) % self.stride:
+            raise ValueError, "%s data size must be a multiple of %s, got %s" % (util.clsname(self), self.stride, len(self._data))
+
+    def _toBuffer(self, data):
+        if isinstance(data, _array.array) and data.typecode == 'd':
+            # shared, not copied
+            return data
+        if _numpy is not None and isinstance(data, _numpy.ndarray):
+            buf = _array.array('d')
+            buf.fromstring(_numpy.ascontiguousarray(data, dtype=_numpy.float64).tostring())
+            return buf
+        data = list(data)
+        if data and hasattr(data[0], '__iter__'):
+            buf = _array.array('d')
+            for item in data:
+                buf.extend(self._itemComponents(item))
+            return buf
+        return _array.array('d', data)
+
+    @classmethod
+    def _itemComponents(cls, item):
+        if not isinstance(item, cls.itemType):
+            item = cls.itemType(item)
+        return item.get()
+
+    @classmethod
+    def fromBuffer(cls, buf):
+        """ Creates an array from a flat buffer of doubles, array.array('d') buffers are shared, not copied """
+        return cls(buf)
+
+    @classmethod
+    def fromApi(cls, apiArray):
+        """ Creates an array from an api array of the matching type (ie, MPointArray) """
+        return cls(apiArray)
+
+    def asBuffer(self):
+        """ Returns the flat array.array('d') buffer of doubles storing the items (not a copy) """
+        return self._data
+
+    def asNumpy(self):
+        """ Returns a (n, stride) numpy view on the items, without copying them """
+        if _numpy is None:
+            raise ImportError, "asNumpy requires numpy"
+        return self._view()
+
+    def _view(self):
+        if not len(self._data):
+            return _numpy.zeros((0, self.stride))
+        return _numpy.frombuffer(self._data, dtype=_numpy.float64).reshape(-1, self.stride)
+
+    def _fromView(self, view):
+        buf = _array.array('d')
+        buf.fromstring(_numpy.ascontiguousarray(view, dtype=_numpy.float64).tostring())
+        return self.__class__(buf)
+
+    def toApi(self):
+        """ Returns the items as an api array of the matching type (ie, MPointArray) """
+        result = self.apiArrayType()
+        for item in self:
+            result.append(item)
+        return result
+
+    def __len__(self):
+        return len(self._data) // self.stride
+
+    def _components(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError, "%s index out of range" % util.clsname(self)
+        start = index * self.stride
+        return self._data[start:start + self.stride]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            result = self.__class__()
+            for i in xrange(start, stop, step):
+                result._data.extend(self._components(i))
+            return result
+        return self.itemType(*self._components(index))
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError, "%s index out of range" % util.clsname(self)
+        start = index * self.stride
+        self._data[start:start + self.stride] = _array.array('d', self._itemComponents(value))
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self.itemType(*self._components(i))
+
+    def append(self, value):
+        """ Appends an item, note that numpy views previously returned by asNumpy should not be used anymore """
+        self._data.extend(self._itemComponents(value))
+
+    def __repr__(self):
+        return "%s(%s)" % (util.clsname(self), list(self))
+
+    def __eq__(self, other):
+        if isinstance(other, _DataArray):
+            return self.stride == other.stride and self._data == other._data
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    # helpers to accept either a single item or an array of items of the same length
+    def _other(self, other, cls=None):
+        if cls is None:
+            cls = self.__class__
+        if isinstance(other, cls):
+            if len(other) != len(self):
+                raise ValueError, "%s of length %s and %s of length %s are not conformable" % (util.clsname(self), len(self), util.clsname(other), len(other))
+            return other, False
+        return cls([other]), True
+
+    def _rows(self):
+        stride = self.stride
+        data = self._data
+        return [data[i:i + stride] for i in xrange(0, len(data), stride)]
+
+
+class VectorArray(_DataArray):
+
+    """ A flat array of n 3 dimensional vectors, with batched vector operations.
+
+        Methods which return one value per vector (ie, dot or length) return a flat
+        array.array('d') of n floats.
+
+        >>> import pymel.core.datatypes as dt
+        >>> va = dt.VectorArray([dt.Vector(1, 0, 0), dt.Vector(0, 2, 0)])
+        >>> len(va)
+        2
+        >>> list(va.length())
+        [1.0, 2.0]
+        >>> va.cross(dt.Vector(0, 0, 1))
+        VectorArray([dt.Vector([0.0, -1.0, 0.0]), dt.Vector([2.0, 0.0, 0.0])])
+    """
+    stride = 3
+    itemType = Vector
+    apiArrayType = _api.MVectorArray
+
+    # operations on the x, y, z components of each item
+    def _xyz(self):
+        if self.stride == 3:
+            return self._rows()
+        return [row[:3] for row in self._rows()]
+
+    def dot(self, other):
+        """ Returns the dot products of each vector with the matching vector of other, or with other
+            if it is a single Vector """
+        other, single = self._other(other, VectorArray)
+        if _numpy is not None:
+            a = self._view()[:, :3]
+            b = other._view()[:, :3]
+            return _array.array('d', (a * b).sum(axis=1).tolist())
+        if single:
+            bx, by, bz = other._xyz()[0]
+            return _array.array('d', (x * bx + y * by + z * bz for x, y, z in self._xyz()))
+        return _array.array('d', (a[0] * b[0] + a[1] * b[1] + a[2] * b[2] for a, b in zip(self._xyz(), other._xyz())))
+
+    def cross(self, other):
+        """ Returns a VectorArray of the cross products of each vector with the matching vector of other,
+            or with other if it is a single Vector """
+        other, single = self._other(other, VectorArray)
+        if _numpy is not None:
+            return VectorArray(_numpy.cross(self._view()[:, :3], other._view()[:, :3]))
+        rows = other._xyz()
+        if single:
+            rows = rows * len(self)
+        buf = _array.array('d')
+        for (ax, ay, az), (bx, by, bz) in zip(self._xyz(), rows):
+            buf.extend((ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx))
+        return VectorArray(buf)
+
+    def sqlength(self):
+        """ Returns the square lengths of the vectors """
+        if _numpy is not None:
+            a = self._view()[:, :3]
+            return _array.array('d', (a * a).sum(axis=1).tolist())
+        return _array.array('d', (x * x + y * y + z * z for x, y, z in self._xyz()))
+
+    def length(self):
+        """ Returns the lengths of the vectors """
+        if _numpy is not None:
+            return _array.array('d', _numpy.sqrt(_numpy.frombuffer(self.sqlength(), dtype=_numpy.float64)).tolist())
+        return _array.array('d', (math.sqrt(x) for x in self.sqlength()))
+
+    def normal(self):
+        """ Returns a VectorArray of the normalized vectors, null vectors are left unchanged """
+        result = VectorArray(self)
+        result.normalize()
+        return result
+
+    def normalize(self):
+        """ Normalizes all the vectors in place, null vectors are left unchanged """
+        lengths = self.length()
+        data = self._data
+        stride = self.stride
+        if _numpy is not None:
+            view = self._view()
+            l = _numpy.frombuffer(lengths, dtype=_numpy.float64).copy()
+            l[l == 0.0] = 1.0
+            view[:, :3] /= l[:, None]
+            return
+        for i, l in enumerate(lengths):
+            if l:
+                start = i * stride
+                data[start] /= l
+                data[start + 1] /= l
+                data[start + 2] /= l
+
+    def dist(self, other):
+        """ Returns the distances between each item and the matching item of other, or other if it is a single item """
+        return (self - other).length()
+
+    distanceTo = dist
+
+    def blend(self, other, weight=0.5):
+        """ Returns the 0.0-1.0 blend between each item and the matching item of other (or other if it is
+            a single item), weight can be a single value or one value per item """
+        other, single = self._other(other)
+        if hasattr(weight, '__iter__'):
+            weights = list(weight)
+            if len(weights) != len(self):
+                raise ValueError, "expected %s weights, got %s" % (len(self), len(weights))
+        else:
+            weights = None
+        if _numpy is not None:
+            a = self._view()
+            b = other._view()
+            if weights is None:
+                w = weight
+            else:
+                w = _numpy.array(weights, dtype=_numpy.float64)[:, None]
+            return self._fromView(a + (b - a) * w)
+        rows = other._rows()
+        if single:
+            rows = rows * len(self)
+        if weights is None:
+            weights = [weight] * len(self)
+        buf = _array.array('d')
+        for a, b, w in zip(self._rows(), rows, weights):
+            buf.extend(x + (y - x) * w for x, y in zip(a, b))
+        return self.__class__(buf)
+
+    def transform(self, matrix):
+        """ Returns the items transformed by matrix (a single Matrix or a MatrixArray of the same length),
+            in the same way as Vector * Matrix and Point * Matrix """
+        if not isinstance(matrix, MatrixArray):
+            matrix = MatrixArray([matrix])
+        elif len(matrix) != len(self):
+            raise ValueError, "%s of length %s and %s of length %s are not conformable" % (util.clsname(self), len(self), util.clsname(matrix), len(matrix))
+        # vectors are transformed as directions (w = 0), points with their w component
+        n = self.stride
+        if _numpy is not None:
+            m = matrix._view().reshape(-1, 4, 4)[:, :n, :n]
+            a = self._view()
+            if len(m) == 1:
+                return self._fromView(_numpy.dot(a, m[0]))
+            return self._fromView(_numpy.einsum('ij,ijk->ik', a, m))
+        mats = matrix._rows()
+        if len(mats) == 1:
+            mats = mats * len(self)
+        buf = _array.array('d')
+        for v, m in zip(self._rows(), mats):
+            buf.extend(_sum(v[i] * m[i * 4 + j] for i in xrange(n)) for j in xrange(n))
+        return self.__class__(buf)
+
+    def __mul__(self, other):
+        """ u.__mul__(m) <==> u*m
+            If m is a Matrix or MatrixArray, transforms the items, otherwise scales them by the numeric value m """
+        if isinstance(other, (Matrix, MatrixArray, _api.MMatrix)):
+            return self.transform(other)
+        if isinstance(other, (int, long, float)):
+            return self.__class__(_array.array('d', (x * other for x in self._data)))
+        return NotImplemented
+
+    def __rmul__(self, other):
+        if isinstance(other, (int, long, float)):
+            return self.__mul__(other)
+        return NotImplemented
+
+    def __div__(self, other):
+        if isinstance(other, (int, long, float)):
+            return self.__mul__(1.0 / other)
+        return NotImplemented
+
+    __truediv__ = __div__
+
+    def __neg__(self):
+        return self.__mul__(-1.0)
+
+    def _addSub(self, other, sign):
+        other, single = self._other(other)
+        if _numpy is not None:
+            return self._fromView(self._view() + sign * other._view())
+        rows = other._rows()
+        if single:
+            rows = rows * len(self)
+        buf = _array.array('d')
+        for a, b in zip(self._rows(), rows):
+            buf.extend(x + sign * y for x, y in zip(a, b))
+        return self.__class__(buf)
+
+    def __add__(self, other):
+        return self._addSub(other, 1.0)
+
+    def __sub__(self, other):
+        return self._addSub(other, -1.0)
+
+
+class PointArray(VectorArray):
+
+    """ A flat array of n points (stored with their w component), with batched point operations.
+
+        >>> import pymel.core.datatypes as dt
+        >>> pa = dt.PointArray([dt.Point(0, 0, 0), dt.Point(2, 0, 0), dt.Point(2, 2, 0), dt.Point(0, 2, 0)])
+        >>> pa.center()
+        dt.Point([1.0, 1.0, 0.0])
+        >>> pa.planar()
+        True
+        >>> list(pa.dist(dt.Point(0, 0, 0)))
+        [0.0, 2.0, 2.8284271247461903, 2.0]
+        >>> (pa + pa)[1] == dt.Point(2, 0, 0) + dt.Point(2, 0, 0)
+        True
+        >>> (pa + dt.Point(1, 1, 1))[3] == dt.Point(0, 2, 0) + dt.Point(1, 1, 1)
+        True
+    """
+    stride = 4
+    itemType = Point
+    apiArrayType = _api.MPointArray
+
+    def _addSub(self, other, sign):
+        # like Point + Point, other points are added as vectors, their w is not added
+        if isinstance(other, PointArray):
+            other = VectorArray([row[:3] for row in other._rows()])
+        elif isinstance(other, (Point, _api.MPoint)):
+            other = Vector(other)
+        if isinstance(other, VectorArray) and not isinstance(other, PointArray):
+            # vectors are added to points as directions (w = 0)
+            buf = _array.array('d')
+            for row in other._rows():
+                buf.extend(row)
+                buf.append(0.0)
+            other = PointArray(buf)
+        elif isinstance(other, (Vector, _api.MVector)) and not isinstance(other, (Point, _api.MPoint)):
+            other = PointArray(_array.array('d', list(other) + [0.0]))
+        return VectorArray._addSub(self, other, sign)
+
+    def __sub__(self, other):
+        # like Point - Point, differences of points are vectors
+        if isinstance(other, (PointArray, Point, _api.MPoint)):
+            diff = self._addSub(other, -1.0)
+            return VectorArray([row[:3] for row in diff._rows()])
+        return self._addSub(other, -1.0)
+
+    def cartesian(self):
+        """ Returns the cartesianized version of the points, see Point.cartesian """
+        buf = _array.array('d')
+        for x, y, z, w in self._rows():
+            if w and w != 1.0:
+                buf.extend((x / w, y / w, z / w, 1.0))
+            else:
+                buf.extend((x, y, z, w))
+        return PointArray(buf)
+
+    def center(self):
+        """ Returns the Point that is the center of all the points """
+        if not len(self):
+            raise ValueError, "center is not defined for an empty PointArray"
+        if _numpy is not None:
+            return Point(*self._view().mean(axis=0).tolist())
+        n = float(len(self))
+        return Point(*[_sum(row[i] for row in self._rows()) / n for i in xrange(self.stride)])
+
+    def planar(self, tol=None):
+        """ Returns True if all the points are planar within given tolerance, see Point.planar """
+        if len(self) < 4:
+            return True
+        first = self[0]
+        vectors = self[1:] - first
+        n = vectors[0] ^ vectors[1]
+        normals = vectors[2:].cross(vectors[0])
+        return _all(n.isParallel(x, tol) for x in normals)
+
+    def bWeights(self, *args):
+        """ Returns a list of the normalized barycentric weights tuples of each point in the face
+            delimited by the points given as arguments, see Point.bWeights """
+        return [p.bWeights(*args) for p in self]
+
+    def dist(self, other):
+        """ Returns the distances between each point and the matching point of other (or other if it is a single Point) """
+        return (self.cartesian() - other).length()
+
+    distanceTo = dist
+
+
+class MatrixArray(_DataArray):
+
+    """ A flat array of n 4x4 matrices, with batched matrix operations.
+
+        >>> import pymel.core.datatypes as dt
+        >>> ma = dt.MatrixArray([dt.Matrix(), dt.Matrix()])
+        >>> ma.inverse() == ma
+        True
+    """
+    stride = 16
+    itemType = Matrix
+    apiArrayType = _api.MMatrixArray
+
+    @classmethod
+    def _itemComponents(cls, item):
+        if not isinstance(item, Matrix):
+            item = Matrix(item)
+        return [x for row in item.get() for x in row]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return _DataArray.__getitem__(self, index)
+        c = self._components(index)
+        return Matrix([c[0:4], c[4:8], c[8:12], c[12:16]])
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
+
+    def __mul__(self, other):
+        """ Returns the products of each matrix with the matching matrix of other, or with other if it is a single Matrix """
+        if not isinstance(other, (Matrix, MatrixArray, _api.MMatrix)):
+            return NotImplemented
+        other, single = self._other(other)
+        if _numpy is not None:
+            a = self._view().reshape(-1, 4, 4)
+            b = other._view().reshape(-1, 4, 4)
+            if single:
+                return self._fromView(_numpy.dot(a, b[0]).reshape(-1, 16))
+            return self._fromView(_numpy.einsum('nij,njk->nik', a, b).reshape(-1, 16))
+        rows = other._rows()
+        if single:
+            rows = rows * len(self)
+        buf = _array.array('d')
+        for a, b in zip(self._rows(), rows):
+            buf.extend(_sum(a[i * 4 + k] * b[k * 4 + j] for k in xrange(4)) for i in xrange(4) for j in xrange(4))
+        return MatrixArray(buf)
+
+    def transpose(self):
+        """ Returns a MatrixArray of the transposed matrices """
+        buf = _array.array('d')
+        for m in self._rows():
+            buf.extend(m[j * 4 + i] for i in xrange(4) for j in xrange(4))
+        return MatrixArray(buf)
+
+    def inverse(self):
+        """ Returns a MatrixArray of the inverse matrices, raises a ValueError if one of them is not invertible """
+        if _numpy is not None:
+            try:
+                inv = _numpy.linalg.inv(self._view().reshape(-1, 4, 4))
+            except _numpy.linalg.LinAlgError:
+                raise ValueError, "MatrixArray contains a matrix that is not invertible"
+            return self._fromView(inv.reshape(-1, 16))
+        return MatrixArray([m.inverse() for m in self])
+
+    def blend(self, other, weight=0.5):
+        """ Returns the blends between each matrix and the matching matrix of other, see Matrix.blend """
+        other, single = self._other(other)
+        if single:
+            other = [other[0]] * len(self)
+        return MatrixArray([a.blend(b, weight=weight) for a, b in zip(self, other)])
+
+
 #_factories.ApiTypeRegister.register( 'MVector', Vector )
 #_factories.ApiTypeRegister.register( 'MMatrix', Matrix )
 #_factories.ApiTypeRegister.register( 'MPoint', Point )
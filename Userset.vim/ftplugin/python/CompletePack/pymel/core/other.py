@@ -4,6 +4,7 @@ as well as the name parsing classes `DependNodeName`, `DagNodeName`, and `Attrib
 """
 
 import re
+import sys
 import inspect
 
 import pymel.internal.pmcmds as cmds
@@ -483,3 +484,8 @@ def _getParserClass(strObj):
         else:
             newcls = DependNodeName
     return newcls
+
+# if the commands above were created lazily, this module has been replaced by
+# a LazyLoadModule, which still needs everything defined since
+if hasattr(sys.modules[__name__], '_lazyModule_update'):
+    sys.modules[__name__]._lazyModule_update()
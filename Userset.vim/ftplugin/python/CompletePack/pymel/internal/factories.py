@@ -28,6 +28,7 @@ from . import apicache
 from . import cmdcache
 from . import plogging
 from . import pmcmds
+from . import startup as _startup
 
 _logger = plogging.getLogger(__name__)
 
@@ -845,7 +846,7 @@ def functionFactory(funcNameOrObject, returnFunc=None, module=None, rename=None,
         # so be sure to check if it's None, not "if not inFunc"!
         if inFunc is None:
             try:
-                inFunc = getattr(pmcmds, funcName)
+                inFunc = pmcmds.getWrappedCmd(funcName)
                 customFunc = False
                 # if funcName == 'lsThroughFilter': #_logger.debug("function %s found in module %s: %s" % ( funcName, cmds.__name__, inFunc.__name__))
             except AttributeError:
@@ -1204,6 +1205,8 @@ def listForNoneQuery(res, kwargs, flags):
 
 
 def createFunctions(moduleName, returnFunc=None):
+    if _startup.lazyFunctionsEnabled():
+        return createLazyFunctions(moduleName, returnFunc=returnFunc)
     module = sys.modules[moduleName]
     moduleShortName = moduleName.split('.')[-1]
     for funcName in moduleCmds[moduleShortName]:
@@ -1215,6 +1218,133 @@ def createFunctions(moduleName, returnFunc=None):
             func.__module__ = moduleName
             setattr(module, funcName, func)
 
+#: names of the functions deferred by createLazyFunctions, by module name
+lazyFunctions = {}
+_lazyFunctionsCreated = [0]
+_replacedModules = []
+
+def _makeLazyModule(moduleName):
+    module = sys.modules[moduleName]
+    if hasattr(module, '_lazyModule_update'):
+        return module
+    # keep the original module alive - when a module is deleted, python
+    # clears its globals, which the functions defined in it still use
+    _replacedModules.append(module)
+    return util.LazyLoadModule(moduleName, module.__dict__)
+
+def _namesUsedByModule(module):
+    """
+    Return the set of global names referenced by the functions and classes
+    defined in the given module.
+    """
+    names = set()
+    seen = set()
+
+    def addCode(code):
+        names.update(code.co_names)
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                addCode(const)
+
+    def addObj(obj):
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+        if isinstance(obj, (staticmethod, classmethod)):
+            obj = obj.__func__
+        elif isinstance(obj, property):
+            for accessor in (obj.fget, obj.fset, obj.fdel):
+                if accessor is not None:
+                    addObj(accessor)
+            return
+        if isinstance(obj, types.FunctionType):
+            if obj.__module__ == module.__name__:
+                addCode(obj.func_code)
+        elif isinstance(obj, (type, types.ClassType)):
+            if obj.__module__ == module.__name__:
+                for attr in obj.__dict__.values():
+                    addObj(attr)
+
+    for obj in module.__dict__.values():
+        addObj(obj)
+    return names
+
+def _createLazyFunction(funcName, returnFunc, moduleName):
+    func = functionFactory(funcName, returnFunc=returnFunc,
+                           module=sys.modules[moduleName])
+    _lazyFunctionsCreated[0] += 1
+    return func
+
+def createLazyFunctions(moduleName, returnFunc=None):
+    """
+    Like createFunctions, but only creates each wrapped function the first
+    time it is accessed.
+
+    The module is replaced with a `util.LazyLoadModule`.  Functions which
+    are already defined in the module (and so are wrapped, rather than
+    created from pmcmds), or which are referenced by name from the module's
+    own code, are still created immediately.
+    """
+    module = sys.modules[moduleName]
+    moduleShortName = moduleName.split('.')[-1]
+    usedNames = _namesUsedByModule(module)
+    deferred = []
+    for funcName in moduleCmds[moduleShortName]:
+        if funcName in nodeCommandList:
+            funcReturn = returnFunc
+        else:
+            funcReturn = None
+        if funcName in module.__dict__ or funcName in usedNames:
+            func = functionFactory(funcName, returnFunc=funcReturn, module=module)
+            if func:
+                func.__module__ = moduleName
+                setattr(module, funcName, func)
+        else:
+            deferred.append((funcName, funcReturn))
+
+    if not deferred:
+        return
+    module = _makeLazyModule(moduleName)
+    for funcName, funcReturn in deferred:
+        module[funcName] = (_createLazyFunction, (funcName, funcReturn, moduleName))
+    # keep the deferred functions from being forced by a 'from module import *'
+    # while pymel.core is imported - addLazyFunctions will forward them instead
+    module._lazyModule_hidden = frozenset(module._lazyModule_hidden).union(
+        x[0] for x in deferred)
+    lazyFunctions.setdefault(moduleName, []).extend(x[0] for x in deferred)
+
+def _getLazyFunction(funcName, moduleName):
+    return getattr(sys.modules[moduleName], funcName)
+
+def addLazyFunctions(moduleName):
+    """
+    Make the functions deferred by createLazyFunctions available from the
+    given module (ie, pymel.core), without creating them.
+
+    Afterwards, a 'from module import *' on the modules holding the deferred
+    functions will create them, as it would for any other LazyLoadModule.
+    """
+    if not lazyFunctions:
+        return
+    module = _makeLazyModule(moduleName)
+    for srcModuleName, funcNames in lazyFunctions.iteritems():
+        for funcName in funcNames:
+            if funcName not in module.__dict__:
+                module[funcName] = (_getLazyFunction, (funcName, srcModuleName))
+        sys.modules[srcModuleName]._lazyModule_hidden = frozenset()
+
+def lazyFunctionStats():
+    """
+    Return how many wrapped functions were deferred, and how many of those
+    have actually been created so far, for both the pymel.core functions and
+    the pmcmds wrappers.
+
+    :rtype: `dict`
+    """
+    return {'functions': {'deferred': sum(len(x) for x in lazyFunctions.itervalues()),
+                          'created': _lazyFunctionsCreated[0]},
+            'wrappedCmds': dict(pmcmds.lazyCmdStats)}
+
 
 #: overrideMethods specifies methods of base classes which should not be overridden by sub-classes
 overrideMethods = {}
@@ -2703,7 +2833,7 @@ class _MetaMayaCommandWrapper(MetaMayaTypeWrapper):
                 func = getattr(cmdModule, melCmdName)
                 pmSourceFunc = True
             except (AttributeError, TypeError):
-                func = getattr(pmcmds, melCmdName)
+                func = pmcmds.getWrappedCmd(melCmdName)
 
             # add documentation
             classdict['__doc__'] = util.LazyDocString((newcls, cls.docstring, (melCmdName,), {}))
@@ -201,6 +201,45 @@ def removeWrappedCmd(cmdname):
     except NameError:
         warnings.warn("%s not found in %s" % (cmdname, __name__))
 
-def addAllWrappedCmds():
+def getWrappedCmd(cmdname):
+    '''Return the wrapped version of the given maya command, creating it
+    first if its creation was deferred by addAllWrappedCmds'''
+    return getattr(_thisModule, cmdname)
+
+#: number of wrapped commands deferred / actually created by lazy mode
+lazyCmdStats = {'deferred': 0, 'created': 0}
+
+def _createDeferredCmd(cmdname):
+    addWrappedCmd(cmdname)
+    lazyCmdStats['created'] += 1
+    return _thisModule.__dict__[cmdname]
+
+def addAllWrappedCmds(lazy=None):
+    '''Wrap all the commands in maya.cmds
+
+    If lazy is True (by default, if lazy functions are enabled in the pymel
+    config), this module is replaced with a LazyLoadModule, and each command
+    is only wrapped the first time it is accessed.
+    '''
+    global _thisModule, _originalModule
+    if lazy is None:
+        import pymel.internal.startup
+        lazy = pymel.internal.startup.lazyFunctionsEnabled()
+    if not lazy:
+        for cmdname, cmd in inspect.getmembers(maya.cmds, callable):
+            addWrappedCmd(cmdname, cmd)
+        return
+
+    if not hasattr(_thisModule, '_lazyModule_update'):
+        # keep the original module alive - when a module is deleted, python
+        # clears its globals, which our functions still use
+        _originalModule = _thisModule
+        _thisModule = util.LazyLoadModule(__name__, globals())
+        # modules which 'import pymel.internal.pmcmds as cmds' look us up
+        # through the package, so point that at the lazy module too
+        setattr(sys.modules[__name__.rsplit('.', 1)[0]], 'pmcmds', _thisModule)
     for cmdname, cmd in inspect.getmembers(maya.cmds, callable):
-        addWrappedCmd(cmdname, cmd)
+        if cmdname in _thisModule.__dict__:
+            continue
+        _thisModule[cmdname] = (_createDeferredCmd, (cmdname,))
+        lazyCmdStats['deferred'] += 1
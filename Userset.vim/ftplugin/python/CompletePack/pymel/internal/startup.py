@@ -11,7 +11,7 @@ import maya
 import maya.OpenMaya as om
 import maya.utils
 
-from pymel.util import picklezip, shellOutput, subpackages, refreshEnviron, namedtuple
+from pymel.util import picklezip, picklemmap, shellOutput, subpackages, refreshEnviron, namedtuple
 import pymel.versions as versions
 from pymel.mayautils import getUserPrefsDir
 from pymel.versions import shortName, installName
@@ -546,6 +546,14 @@ class SubItemCache(PymelCache):
     DEFAULT_TYPE = dict
     AUTO_SAVE = True
 
+    # Set this to True to also keep an indexed, memory-mapped copy of the
+    # cache (see `pymel.util.picklemmap`), which is used in preference to the
+    # compressed cache when it is up to date.  Each entry of a dictionary
+    # item is then only unpickled the first time it is accessed.  This may
+    # also be turned on for all caches with the 'memory_mapped_caches'
+    # config option, or the PYMEL_MMAP_CACHES environment variable.
+    MEMORY_MAPPED = False
+
     def __init__(self):
         for name in self._CACHE_NAMES:
             self.initVal(name)
@@ -564,6 +572,72 @@ class SubItemCache(PymelCache):
     def itemType(self, name):
         return self.ITEM_TYPES.get(name, self.DEFAULT_TYPE)
 
+    def useMemoryMap(self):
+        return bool(self.MEMORY_MAPPED
+                    or os.environ.get('PYMEL_MMAP_CACHES')
+                    or pymel_options.get('memory_mapped_caches', False))
+
+    def mmapPath(self):
+        return os.path.splitext(self.path())[0] + '.pmc'
+
+    def _mmapStamp(self):
+        # ties the memory-mapped file to the cache it was made from, and to
+        # the current layout of the cache items
+        return '%s:%s' % (os.path.basename(self.path()),
+                          ' '.join(self._CACHE_NAMES))
+
+    def loadMapped(self):
+        '''Attempts to load the memory-mapped copy of the cache.
+
+        If it succeeds, it will update itself, and return the loaded items;
+        dictionary items are `picklemmap.LazyDict` objects, whose entries are
+        only decoded when they are first accessed.  If the file is missing,
+        stale or invalid, returns None
+        '''
+        mmapPath = self.mmapPath()
+        if not os.path.isfile(mmapPath):
+            return None
+        srcPath = self.path()
+        if (os.path.isfile(srcPath)
+                and os.path.getmtime(srcPath) > os.path.getmtime(mmapPath)):
+            _logger.debug(self._actionMessage('Ignoring stale', 'at', mmapPath))
+            return None
+
+        _logger.debug(self._actionMessage('Mapping', 'from', mmapPath))
+        try:
+            sections = picklemmap.load(mmapPath, stamp=self._mmapStamp())
+        except picklemmap.PickleMMapError, e:
+            _logger.debug(self._actionMessage('Ignoring invalid', 'at', mmapPath) + ': %s' % e)
+            return None
+        except Exception, e:
+            self._errorMsg('read', 'from', mmapPath, e)
+            return None
+
+        data = []
+        for name in self._CACHE_NAMES:
+            val = sections[name]
+            # dictionaries are mapped as LazyDicts, which stand for a dict
+            # without decoding their entries
+            if (name in self.STORAGE_TYPES
+                    and not (isinstance(val, picklemmap.LazyDict)
+                             and self.itemType(name) is dict)):
+                val = self.itemType(name)(val)
+            data.append(val)
+        data = tuple(data)
+        self.update(data, cacheNames=self._CACHE_NAMES)
+        return data
+
+    def writeMapped(self, data):
+        '''Writes the given storage data (as returned by read) to the
+        memory-mapped copy of the cache'''
+        mmapPath = self.mmapPath()
+        _logger.debug(self._actionMessage('Saving', 'to', mmapPath))
+        try:
+            picklemmap.dump(zip(self._CACHE_NAMES, data), mmapPath, 2,
+                            stamp=self._mmapStamp())
+        except Exception, e:
+            self._errorMsg('write', 'to', mmapPath, e)
+
     def build(self):
         """
         Used to rebuild cache, either by loading from a cache file, or rebuilding from scratch.
@@ -608,9 +682,20 @@ class SubItemCache(PymelCache):
 
         If it succeeds, it will update itself, and return the loaded items;
         if it fails, it will return None
+
+        If memory mapping is enabled, and an up to date memory-mapped copy of
+        the cache exists, it is used instead, and the entries of the returned
+        dictionaries are only decoded as they are accessed.
         '''
+        useMemoryMap = self.useMemoryMap()
+        if useMemoryMap:
+            data = self.loadMapped()
+            if data is not None:
+                return data
         data = self.read()
         if data is not None:
+            if useMemoryMap and len(data) == len(self._CACHE_NAMES):
+                self.writeMapped(data)
             data = list(data)
             # if STORAGE_TYPES, need to convert back from the storage type to
             # the 'normal' type
@@ -643,6 +728,8 @@ class SubItemCache(PymelCache):
             data = tuple(newData)
 
         self.write(data)
+        if self.useMemoryMap():
+            self.writeMapped(data)
 
     # was called 'caches'
     def contents(self):
@@ -662,12 +749,16 @@ def parsePymelConfig():
         'skip_mel_init': 'boolean',
         'check_attr_before_lock': 'boolean',
         'fix_linux_mayapy_segfault': 'boolean',
+        'memory_mapped_caches': 'boolean',
+        'lazy_functions': 'boolean',
     }
     defaults = {
         'skip_mel_init': 'off',
         'check_attr_before_lock': 'off',
         'preferred_python_qt_binding': 'pyqt',
         'fix_linux_mayapy_segfault': 'on',
+        'memory_mapped_caches': 'off',
+        'lazy_functions': 'off',
     }
 
     config = ConfigParser.ConfigParser(defaults)
@@ -683,3 +774,9 @@ def parsePymelConfig():
     return d
 
 pymel_options = parsePymelConfig()
+
+def lazyFunctionsEnabled():
+    '''Whether the wrapped maya commands should only be created when first
+    accessed, rather than all at once when pymel.core is imported'''
+    return bool(os.environ.get('PYMEL_LAZY_FUNCTIONS')
+                or pymel_options.get('lazy_functions', False))
@@ -165,6 +165,8 @@ quickly as i can.
 """
 
 import melparse
+import melcache
+import melstream
 try:
     from pymel.util.external.ply.lex import LexError
 except ImportError:
@@ -371,9 +373,7 @@ def melInfo(input):
         raise ValueError, "input must be a mel script or a known procedure from a sourced mel script."
     f = res[0][1]
 
-    cbParser = melparse.MelScanner()
-    cbParser.build()
-    return cbParser.parse(f.bytes())
+    return melstream.scanFile(f)
 
 def mel2pyStr(data, currentModule=None, pymelNamespace='', forceCompatibility=False, verbosity=0, basePackage=None):
     """
@@ -410,19 +410,26 @@ def mel2pyStr(data, currentModule=None, pymelNamespace='', forceCompatibility=Fa
         Set to non-zero for a *lot* of feedback
     """
 
+    return _mel2pyStrWithDependencies(data, currentModule, pymelNamespace=pymelNamespace,
+                                      forceCompatibility=forceCompatibility, verbosity=verbosity)[0]
+
+def _mel2pyStrWithDependencies(data, currentModule=None, pymelNamespace='', forceCompatibility=False, verbosity=0):
+    """
+    Same as mel2pyStr, but also returns how the procedures and scripts used by the code were resolved.
+    """
     mparser = melparse.MelParser()
     mparser.build(currentModule, pymelNamespace=pymelNamespace, forceCompatibility=forceCompatibility, verbosity=verbosity)
 
     results = mparser.parse(data)
     # print mparser.lexer.global_procs
-    return results
+    return results, mparser.lexer.dependencies
 
 
 def mel2py(input, outputDir=None,
            pymelNamespace='', forceCompatibility=False,
            verbosity=0, test=False,
            recurse=False, exclude=(), melPathOnly=False,
-           basePackage=None):
+           basePackage=None, jobs=1, cacheFile=None, streamSize=None):
     """
     Batch convert an entire directory
 
@@ -465,6 +472,18 @@ def mel2py(input, outputDir=None,
     basePackage : `str`
         Gives the package that all translated modules will be a part of; if None or an empty string, all
         translated modules are assumed to have no base package.
+    jobs : `int`
+        Number of worker processes the files are translated in.  Each worker has its own parser and batch data.
+        Whatever the number of jobs, the global procedures of all the files are scanned first (see
+        `melparse.resolveGlobalProcs`), and each file is translated starting from them only, so that calls
+        between translated modules resolve in the same way whichever worker translates them, and in whichever
+        order.  Only supported from a standalone interpreter (ie, mayapy), not from within the Maya gui.
+    cacheFile : `str`
+        Path of a translation cache.  When given, files which were translated before with the same options,
+        and which did not change since - along with the mel procedures and scripts they use - are skipped.
+    streamSize : `int`
+        Files larger than this many bytes are read and translated one top-level statement or procedure at a
+        time, and written out as they go, instead of being loaded in memory (see `melstream`).
     """
     if basePackage is None:
         basePackage = ''
@@ -485,44 +504,83 @@ def mel2py(input, outputDir=None,
 
     _makePackages()
 
+    cache = None
+    skipped = set()
+    options = (pymel.__version__, pymelNamespace, forceCompatibility, basePackage)
+    if cacheFile is not None:
+        cache = melcache.TranslationCache(cacheFile)
+        cache.prepare(batchData.currentModules)
+        # resolve procedures from the scanned batch, as the cache checks them
+        batchData.batch_procs = cache.procMap
+        for moduleName, melfile in batchData.currentModules.iteritems():
+            if cache.isUpToDate(moduleName, melfile, options, _pyfilePath(moduleName, melfile, outputDir)):
+                skipped.add(moduleName)
+
+    dependencies = {}
+    toConvert = [moduleName for moduleName, melfile in batchData.currentModules.iteritems()
+                 if moduleName not in skipped and not _streamed(melfile, streamSize)]
+    parallel = jobs > 1 and len(toConvert) > 1
+    if cache is None:
+        batchData.batch_procs = _scanGlobalProcs(jobs if parallel else 1)
+    if parallel:
+        dependencies.update(_convertParallel(jobs, toConvert, pymelNamespace=pymelNamespace, verbosity=verbosity))
+
     importCnt = 0
     succeeded = []
-    for moduleName, melfile in batchData.currentModules.iteritems():
-        print melfile, moduleName
-
-        if melfile in batchData.scriptPath_to_moduleText:
-            print "Using pre-converted mel script", melfile
-            converted = batchData.scriptPath_to_moduleText[melfile]
-
-        else:
-            data = melfile.bytes()
-            print "Converting mel script", melfile
-            try:
-                converted = mel2pyStr(data, moduleName, pymelNamespace=pymelNamespace, verbosity=verbosity)
-            except melparse.MelParseError, e:
-                if e.file is None:
-                    e.file = melfile
-                raise
+    try:
+        for moduleName, melfile in batchData.currentModules.iteritems():
+            print melfile, moduleName
+            pyfile = _pyfilePath(moduleName, melfile, outputDir)
+
+            if moduleName in skipped:
+                print "Skipping unchanged mel script", melfile
+                succeeded.append(pyfile)
+                continue
 
-        header = """%s from mel file:
+            header = """%s from mel file:
 # %s
 
 """ % (melparse.tag, melfile)
 
-        converted = header + converted
-
-        splitModule = moduleName.split('.')
-        if outputDir is None:
-            currOutDir = melfile.parent
-        else:
-            currOutDir = outputDir
-            if len(splitModule) > 1:
-                currOutDir = currOutDir.joinpath(*splitModule[:-1])
+            if melfile in batchData.scriptPath_to_moduleText:
+                print "Using pre-converted mel script", melfile
+                converted = batchData.scriptPath_to_moduleText[melfile]
+
+            elif _streamed(melfile, streamSize):
+                print "Converting and writing mel script in chunks", melfile, "to", pyfile
+                _resetProcs()
+                output = open(pyfile, 'wb')
+                try:
+                    output.write(header)
+                    dependencies[moduleName] = melstream.translateFile(melfile, output, moduleName, pymelNamespace=pymelNamespace, verbosity=verbosity)
+                finally:
+                    output.close()
+                succeeded.append(pyfile)
+                if cache is not None:
+                    cache.update(moduleName, melfile, options, dependencies[moduleName], pyfile)
+                continue
 
-        pyfile = currOutDir.joinpath(splitModule[-1] + '.py')
-        print "Writing converted python script: %s" % pyfile
-        pyfile.write_bytes(converted)
-        succeeded.append(pyfile)
+            else:
+                data = melfile.bytes()
+                print "Converting mel script", melfile
+                _resetProcs()
+                try:
+                    converted, dependencies[moduleName] = _mel2pyStrWithDependencies(data, moduleName, pymelNamespace=pymelNamespace, verbosity=verbosity)
+                except melparse.MelParseError, e:
+                    if e.file is None:
+                        e.file = melfile
+                    raise
+
+            converted = header + converted
+
+            print "Writing converted python script: %s" % pyfile
+            pyfile.write_bytes(converted)
+            succeeded.append(pyfile)
+            if cache is not None and moduleName in dependencies:
+                cache.update(moduleName, melfile, options, dependencies[moduleName], pyfile)
+    finally:
+        if cache is not None:
+            cache.save()
 
         # except (ValueError, IndexError, TypeError, LexError), msg:
         #    if ignoreErrors:
@@ -548,6 +606,8 @@ def mel2py(input, outputDir=None,
 
     succCnt = len(succeeded)
     print "%d total processed for conversion" % len(batchData.currentModules)
+    if cache is not None:
+        print "%d files skipped as unchanged" % len(skipped)
     print "%d files succeeded" % succCnt
     print "%d files failed" % (len(batchData.currentModules) - succCnt)
     if test:
@@ -556,6 +616,126 @@ def mel2py(input, outputDir=None,
     succCnt = 0
 
 
+def _streamed(melfile, streamSize):
+    return streamSize is not None and melfile.getsize() > streamSize
+
+def _pyfilePath(moduleName, melfile, outputDir):
+    splitModule = moduleName.split('.')
+    if outputDir is None:
+        currOutDir = melfile.parent
+    else:
+        currOutDir = outputDir
+        if len(splitModule) > 1:
+            currOutDir = currOutDir.joinpath(*splitModule[:-1])
+    return currOutDir.joinpath(splitModule[-1] + '.py')
+
+def _resetProcs():
+    # translate each module from the procedures of the batch only, so that how
+    # its calls resolve does not depend on the modules translated before it
+    melparse.batchData.proc_to_module = dict(melparse.batchData.batch_procs)
+
+def _batchModules():
+    # sorted, so that results do not depend on the order of the batch dictionary
+    return sorted((moduleName, str(melfile)) for moduleName, melfile in melparse.batchData.currentModules.iteritems())
+
+def _workerSetup(modules):
+    batchData = melparse.batchData
+    return (modules, batchData.basePackage,
+            str(batchData.outputDir) if batchData.outputDir is not None else None,
+            batchData.batch_procs)
+
+def _initWorker(modules, basePackage, outputDir, batchProcs):
+    # runs in each worker process: set up its own batch data, the parser is
+    # built on first use
+    melparse.batchData = melparse.BatchData()
+    batchData = melparse.batchData
+    batchData.basePackage = basePackage
+    if outputDir is not None:
+        outputDir = util.path(outputDir)
+    batchData.outputDir = outputDir
+    for moduleName, melfile in modules:
+        batchData.currentModules[moduleName] = util.path(melfile)
+    batchData.batch_procs = batchProcs
+
+def _scanWorker(item):
+    moduleName, melfile = item
+    scanner = melparse.MelScanner()
+    scanner.build()
+    try:
+        global_procs = scanner.parse(util.path(melfile).bytes())[1]
+    except Exception:
+        return moduleName, None
+    return moduleName, dict((proc, info['returnType']) for proc, info in global_procs.iteritems())
+
+def _convertWorker(args):
+    moduleName, melfile, pymelNamespace, verbosity = args
+    _resetProcs()
+    try:
+        converted, dependencies = _mel2pyStrWithDependencies(util.path(melfile).bytes(), moduleName,
+                                                             pymelNamespace=pymelNamespace, verbosity=verbosity)
+    except melparse.MelParseError, e:
+        # parse errors hold the lexer, which can't be sent back to the main process
+        return moduleName, None, None, str(e)
+    return moduleName, converted, dependencies, None
+
+def _scanGlobalProcs(jobs=1):
+    """
+    Scan the files of the current batch for the global procedures they define, in a pool of `jobs` processes
+    if there is more than one.  Returns the (module, returnType) each procedure resolves to, see
+    `melparse.resolveGlobalProcs`.
+    """
+    batchData = melparse.batchData
+    modules = _batchModules()
+    if jobs > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs, _initWorker, _workerSetup(modules))
+        try:
+            scanned = pool.map(_scanWorker, modules)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        scanned = map(_scanWorker, modules)
+    moduleProcs = {}
+    for moduleName, procs in scanned:
+        if procs is None:
+            log.warning("Could not scan mel file %s for procedures" % batchData.currentModules[moduleName])
+            continue
+        moduleProcs[moduleName] = procs
+    return melparse.resolveGlobalProcs(moduleProcs)
+
+def _convertParallel(jobs, moduleNames, pymelNamespace='', verbosity=0):
+    """
+    Translate the given modules of the current batch in a pool of `jobs` processes, and store the results in
+    the batch data's scriptPath_to_moduleText, to be written out by mel2py.
+
+    Each module is translated starting from the batch data's batch_procs, see `_scanGlobalProcs`.  Returns
+    the dependencies gathered by the parser for each translated module.
+    """
+    import multiprocessing
+
+    batchData = melparse.batchData
+    modules = _batchModules()
+
+    moduleNames = set(moduleNames)
+    toConvert = [(moduleName, melfile, pymelNamespace, verbosity)
+                 for moduleName, melfile in modules if moduleName in moduleNames]
+    print "Converting %d mel scripts in %d processes" % (len(toConvert), jobs)
+    pool = multiprocessing.Pool(jobs, _initWorker, _workerSetup(modules))
+    try:
+        results = pool.map(_convertWorker, toConvert)
+    finally:
+        pool.close()
+        pool.join()
+    dependencies = {}
+    for moduleName, converted, moduleDependencies, error in results:
+        melfile = batchData.currentModules[moduleName]
+        if error is not None:
+            raise melparse.MelParseError(error, file=melfile)
+        batchData.scriptPath_to_moduleText[melfile] = converted
+        dependencies[moduleName] = moduleDependencies
+    return dependencies
+
 def findMelOnlyCommands():
     """
     Using maya's documentation, find commands which were not ported to python.
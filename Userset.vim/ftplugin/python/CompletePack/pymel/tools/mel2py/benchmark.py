@@ -0,0 +1,176 @@
+"""
+Regression benchmark for the mel2py translator.
+
+Measures, in a fresh interpreter, the time it takes to import `melparse` and
+to build its lexer and parser, then the parse throughput on a set of mel
+files.  Results can be saved to a json file, and compared against a previously
+saved baseline::
+
+    mayapy -m pymel.tools.mel2py.benchmark --save baseline.json scripts/
+    mayapy -m pymel.tools.mel2py.benchmark --baseline baseline.json scripts/
+
+The process exits with a non-zero status if a measure regressed by more than
+the given tolerance.
+"""
+
+import os
+import sys
+import json
+import time
+import optparse
+import subprocess
+
+_IMPORT_SCRIPT = """
+import time, json
+start = time.time()
+import pymel.tools.mel2py.melparse as melparse
+imported = time.time()
+melparse.getLexer()
+melparse.getParser()
+melparse.getScanner()
+built = time.time()
+print json.dumps({'import': imported - start, 'build': built - imported})
+"""
+
+
+def timeImport(python=None, repeat=3):
+    """
+    Returns the best times, in seconds, to import `melparse` ('import') and
+    to build its lexer, parser and scanner ('build'), each measured in a new
+    `python` process (defaults to the current interpreter).
+    """
+    if python is None:
+        python = sys.executable
+    best = {}
+    for i in xrange(repeat):
+        proc = subprocess.Popen([python, '-c', _IMPORT_SCRIPT], stdout=subprocess.PIPE)
+        output = proc.communicate()[0]
+        if proc.returncode:
+            raise RuntimeError, "timing the import of melparse failed with exit code %d" % proc.returncode
+        # the last line holds the timings, maya may print before it
+        times = json.loads(output.strip().splitlines()[-1])
+        for key, value in times.iteritems():
+            best[key] = min(value, best.get(key, value))
+    return best
+
+
+def timeParse(files, repeat=3, scanOnly=False):
+    """
+    Parses each of the given mel files `repeat` times, with a MelParser, or
+    with a MelScanner if scanOnly is True, and returns the best total time
+    along with the throughput, in files and bytes per second.
+    """
+    import pymel.tools.mel2py.melparse as melparse
+    data = []
+    for melfile in files:
+        f = open(melfile, 'rb')
+        try:
+            data.append((os.path.splitext(os.path.basename(melfile))[0], f.read()))
+        finally:
+            f.close()
+    # build outside of the timed loop
+    melparse.getLexer()
+    if scanOnly:
+        melparse.getScanner()
+    else:
+        melparse.getParser()
+
+    best = None
+    for i in xrange(repeat):
+        start = time.time()
+        for moduleName, melData in data:
+            if scanOnly:
+                parser = melparse.MelScanner()
+                parser.build()
+            else:
+                parser = melparse.MelParser()
+                parser.build(moduleName)
+            parser.parse(melData)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    size = sum(len(x[1]) for x in data)
+    best = max(best, 1e-9)
+    return {'files': len(data),
+            'bytes': size,
+            'parse': best,
+            'filesPerSecond': len(data) / best,
+            'bytesPerSecond': size / best}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Returns a list of (measure, baselineValue, value) for the measures of
+    results that are more than tolerance (a fraction) worse than baseline.
+    Times are worse when higher, throughputs when lower.
+    """
+    regressions = []
+    for key in ('import', 'build', 'parse'):
+        if key in results and key in baseline:
+            if results[key] > baseline[key] * (1.0 + tolerance):
+                regressions.append((key, baseline[key], results[key]))
+    for key in ('filesPerSecond', 'bytesPerSecond'):
+        if key in results and key in baseline:
+            if results[key] < baseline[key] * (1.0 - tolerance):
+                regressions.append((key, baseline[key], results[key]))
+    return regressions
+
+
+def _melFiles(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, x) for x in sorted(names) if x.endswith('.mel'))
+        else:
+            files.append(path)
+    return files
+
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage="%prog [options] MEL_FILE_OR_DIR ...")
+    parser.add_option('-n', '--repeat', type='int', default=3,
+                      help="number of runs of each measure, the best is kept")
+    parser.add_option('--python', default=None,
+                      help="interpreter used to time the import (default: the current one)")
+    parser.add_option('--scan', action='store_true', default=False,
+                      help="time the MelScanner instead of the MelParser")
+    parser.add_option('--save', default=None,
+                      help="save the results to this json file")
+    parser.add_option('--baseline', default=None,
+                      help="compare the results to this json file")
+    parser.add_option('--tolerance', type='float', default=0.2,
+                      help="allowed fraction of regression against the baseline")
+    options, args = parser.parse_args(argv)
+
+    results = timeImport(python=options.python, repeat=options.repeat)
+    files = _melFiles(args)
+    if files:
+        results.update(timeParse(files, repeat=options.repeat, scanOnly=options.scan))
+
+    for key in sorted(results):
+        print "%-16s %s" % (key, results[key])
+
+    if options.save:
+        f = open(options.save, 'w')
+        try:
+            json.dump(results, f, indent=4, sort_keys=True)
+        finally:
+            f.close()
+
+    if options.baseline:
+        f = open(options.baseline)
+        try:
+            baseline = json.load(f)
+        finally:
+            f.close()
+        regressions = compare(results, baseline, tolerance=options.tolerance)
+        for key, old, new in regressions:
+            print "REGRESSION %s: %s -> %s" % (key, old, new)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Persistent cache of mel2py translations.
+
+For each translated mel file, the cache records the hash of its contents,
+the translator options, the global procedures it defines, and how each
+procedure and script it uses was resolved (see MelParser's lexer
+``dependencies``).  A file of a new batch is up to date, and does not need to
+be translated again, if none of these changed.
+"""
+
+import os
+import hashlib
+try:
+    import cPickle as pickle
+except:
+    import pickle
+
+import pymel.util as util
+import melparse
+
+CACHE_VERSION = 1
+
+
+def fileHash(melfile):
+    return hashlib.sha1(util.path(melfile).bytes()).hexdigest()
+
+
+class TranslationCache(object):
+
+    """
+    Persistent mapping from mel files to the state they were in when they were last translated.
+
+    Before checking files with `isUpToDate`, `prepare` must be called with the modules of the
+    current batch, to hash them and find out which module each global procedure is defined in.
+    """
+
+    def __init__(self, filename):
+        self.filename = util.path(filename)
+        self.entries = {}
+        self.hashes = {}
+        self.procs = {}
+        self.procMap = {}
+        self.load()
+
+    def load(self):
+        self.entries = {}
+        if not self.filename.isfile():
+            return
+        try:
+            f = open(self.filename, 'rb')
+            try:
+                version, entries = pickle.load(f)
+            finally:
+                f.close()
+        except Exception:
+            # unreadable caches are simply rebuilt
+            return
+        if version == CACHE_VERSION:
+            self.entries = entries
+
+    def save(self):
+        tmpName = '%s.%d.tmp' % (self.filename, os.getpid())
+        f = open(tmpName, 'wb')
+        try:
+            pickle.dump((CACHE_VERSION, self.entries), f, -1)
+        finally:
+            f.close()
+        if os.name == 'nt' and self.filename.exists():
+            self.filename.remove()
+        os.rename(tmpName, self.filename)
+
+    def _globalProcs(self, melfile, digest):
+        entry = self.entries.get(str(melfile))
+        if entry is not None and entry['hash'] == digest:
+            return entry['procs']
+        scanner = melparse.MelScanner()
+        scanner.build()
+        global_procs = scanner.parse(util.path(melfile).bytes())[1]
+        return dict((proc, info['returnType']) for proc, info in global_procs.iteritems())
+
+    def prepare(self, currentModules):
+        """
+        Hash the files of the batch, given as a dictionary of module names to mel files, and map the
+        global procedures they define to their modules.  Files which changed since they were cached
+        are scanned again.
+        """
+        self.hashes = {}
+        self.procs = {}
+        for moduleName, melfile in sorted(currentModules.iteritems()):
+            digest = fileHash(melfile)
+            self.hashes[moduleName] = digest
+            try:
+                procs = self._globalProcs(melfile, digest)
+            except Exception:
+                procs = {}
+            self.procs[moduleName] = procs
+        self.procMap = melparse.resolveGlobalProcs(self.procs)
+
+    def _dependencyIsUpToDate(self, key, value):
+        kind, name = key
+        if kind == 'proc':
+            moduleName, returnType, digest = value
+            if moduleName is None:
+                return name not in self.procMap
+            return (self.procMap.get(name) == (moduleName, returnType)
+                    and self.hashes.get(moduleName) == digest)
+        moduleName, digest = value
+        if melparse._melObj_to_pyModule(name) != moduleName:
+            return False
+        return moduleName is None or self.hashes.get(moduleName) == digest
+
+    def isUpToDate(self, moduleName, melfile, options, pyfile):
+        """
+        Returns True if melfile was translated to pyfile with the same options, and neither it nor
+        the procedures and scripts it depends on changed since.
+        """
+        entry = self.entries.get(str(melfile))
+        if entry is None:
+            return False
+        if (entry['hash'] != self.hashes.get(moduleName)
+                or entry['moduleName'] != moduleName
+                or entry['options'] != options
+                or entry['pyfile'] != str(pyfile)
+                or not util.path(pyfile).isfile()):
+            return False
+        for key, value in entry['dependencies'].iteritems():
+            if not self._dependencyIsUpToDate(key, value):
+                return False
+        return True
+
+    def update(self, moduleName, melfile, options, dependencies, pyfile):
+        """
+        Record the translation of melfile to pyfile, given the dependencies gathered by the parser.
+        """
+        resolved = {}
+        for key, value in dependencies.iteritems():
+            if key[0] == 'proc':
+                resolved[key] = value + (self.hashes.get(value[0]),)
+            else:
+                resolved[key] = (value, self.hashes.get(value))
+        self.entries[str(melfile)] = {'hash': self.hashes.get(moduleName),
+                                      'moduleName': moduleName,
+                                      'options': options,
+                                      'procs': self.procs.get(moduleName, {}),
+                                      'dependencies': resolved,
+                                      'pyfile': str(pyfile)}
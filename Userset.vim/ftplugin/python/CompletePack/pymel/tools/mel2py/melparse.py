@@ -156,6 +156,7 @@ def format_source(x, t):
     name = os.path.splitext(os.path.basename(script))[0]
     # print "formatting source", name
     moduleName = _melObj_to_pyModule(name)
+    t.lexer.dependencies[('script', name)] = moduleName
     if moduleName:
         if moduleName not in t.lexer.imported_modules:
             t.lexer.imported_modules.add(moduleName)
@@ -203,6 +204,7 @@ def format_command(command, args, t):
                 return '%s(%s)' % (command, args)
 
             module, returnType = _melProc_to_pyModule(t, command)
+            t.lexer.dependencies[('proc', command)] = (module, returnType)
 
             if module:
                 # the procedure is in the currently parsed script, but has not yet been placed in global or local procs.
@@ -336,6 +338,7 @@ def format_command(command, args, t):
                         assert tmpToken.strip()
 
                         t.lexer.imported_modules.update(cbParser.lexer.imported_modules)
+                        t.lexer.dependencies.update(cbParser.lexer.dependencies)
 
                         # post-parse cleanup
                         statements = [x.strip() for x in tmpToken.split('\n') if x.strip()]
@@ -797,6 +800,30 @@ def _melObj_to_pyModule(script):
             return batchData.currentModules.get_key(melfile)
     return None
 
+def resolveGlobalProcs(moduleProcs):
+    """
+    Given a dictionary of module names to the global procedures defined in their mel files, as a dictionary
+    of procedure names to return types, return the (module, returnType) each procedure resolves to.
+
+    As when procedures are looked up while parsing, a procedure defined in several files of the batch
+    resolves to the one maya finds it in (see `_melObj_to_pyModule`), otherwise to the first of their
+    modules, in sorted order.
+    """
+    definitions = {}
+    for moduleName, procs in sorted(moduleProcs.iteritems()):
+        for proc, returnType in procs.iteritems():
+            definitions.setdefault(proc, []).append((moduleName, returnType))
+    procMap = {}
+    for proc, procDefinitions in definitions.iteritems():
+        procMap[proc] = procDefinitions[0]
+        if len(procDefinitions) > 1:
+            mayaModule = _melObj_to_pyModule(proc)
+            for moduleName, returnType in procDefinitions:
+                if moduleName == mayaModule:
+                    procMap[proc] = (moduleName, returnType)
+                    break
+    return procMap
+
 def _melProc_to_pyModule(t, procedure):
     """
     determine if this procedure has been or will be converted into python, and if so, what module it belongs to
@@ -1062,6 +1089,8 @@ class BatchData(object):
     def __init__(self, **kwargs):
         self.currentModules = TwoWayDict()
         self.proc_to_module = {}
+        # module of each global proc defined by the files of the batch, see resolveGlobalProcs
+        self.batch_procs = {}
         self.scriptPath_to_parser = {}
         self.scriptPath_to_moduleText = {}
         self.basePackage = None
@@ -2834,10 +2863,73 @@ def p_error(t):
 #import profile
 # Build the grammar
 
-lexer = lex.lex(module=mellex)
+# The lexer, the parser and the scanner are built on first use rather than on
+# import.  Their LALR tables are read from the pickled tables shipped alongside
+# this module (see buildTables).  yacc checks them against the grammar, and if
+# they do not match, generates them again and saves them in their place, or in
+# _outputdir when this module's directory is not writable.  The parser and the
+# scanner each get their own table file, so that they no longer overwrite each
+# other's tables and force a regeneration every time.
 
 _outputdir = tempfile.gettempdir()
-parser = yacc.yacc(method='''LALR''', debug=0, outputdir=_outputdir )
+_tablesdir = os.path.dirname(os.path.abspath(__file__))
+
+_lexer = None
+_parser = None
+_scanner = None
+
+def _tablesFilename(name):
+    return '%s_tables.pkl' % name
+
+def _buildParser(module, name):
+    for picklefile in (os.path.join(_tablesdir, _tablesFilename(name)),
+                       os.path.join(_outputdir, 'pymel_' + _tablesFilename(name))):
+        try:
+            return yacc.yacc(method='''LALR''', debug=0, module=module, picklefile=picklefile)
+        except IOError:
+            pass
+    # the tables could not be saved: build them in memory only
+    return yacc.yacc(method='''LALR''', debug=0, module=module, write_tables=0)
+
+def getLexer():
+    """Returns the mel lexer, building it on first use.  MelParser and MelScanner
+    instances work on their own clone of it."""
+    global _lexer
+    if _lexer is None:
+        _lexer = lex.lex(module=mellex)
+    return _lexer
+
+def getParser():
+    """Returns the mel to python LALR parser, building it on first use.  It is
+    shared by all MelParser instances."""
+    global _parser
+    if _parser is None:
+        _parser = _buildParser(sys.modules[__name__], 'melparse')
+    return _parser
+
+def getScanner():
+    """Returns the LALR parser used by MelScanner, building it on first use."""
+    global _scanner
+    if _scanner is None:
+        _scanner = _buildParser(melscan, 'melscan')
+    return _scanner
+
+def buildTables(outputDir=None):
+    """Regenerates the pickled parser and scanner tables, which are shipped
+    alongside this module so that they do not have to be generated on first
+    use.  Should be run whenever the grammar in melparse or melscan changes.
+
+    Returns the list of written files."""
+    if outputDir is None:
+        outputDir = _tablesdir
+    written = []
+    for module, name in ((sys.modules[__name__], 'melparse'), (melscan, 'melscan')):
+        picklefile = os.path.join(outputDir, _tablesFilename(name))
+        if os.path.exists(picklefile):
+            os.remove(picklefile)
+        yacc.yacc(method='''LALR''', debug=0, module=module, picklefile=picklefile)
+        written.append(picklefile)
+    return written
 
 class MelParseError(Exception):
 
@@ -2872,11 +2964,12 @@ class MelParser(object):
               forceCompatibility=True, parentData=None):
 
         # data storage
-        self.lexer = lexer.clone()
+        self.lexer = getLexer().clone()
         self.lexer.proc_list = []  # ordered list of procedures
         self.lexer.local_procs = {}  # dictionary of local procedures and their related data
         self.lexer.global_procs = {}  # dictionary of global procedures and their related data
         self.lexer.imported_modules = set([])  # imported external modules, pymel is assumed
+        self.lexer.dependencies = {}  # how the procedures and scripts used by the code were resolved
         self.lexer.global_vars = set([])
         self.lexer.spillover_pre = []  # some operations require a single line to be split.
         self.lexer.comment_queue = []
@@ -2908,9 +3001,10 @@ class MelParser(object):
         self.lexer.raw_parse_data = data
         try:
             if self.lexer.verbose == 2:
-                lex.input(data)
+                debugLexer = self.lexer.clone()
+                debugLexer.input(data)
                 while 1:
-                    tok = lex.token()
+                    tok = debugLexer.token()
                     if not tok:
                         break      # No more input
                     print tok
@@ -2923,7 +3017,7 @@ class MelParser(object):
             translatedStr = ''
             try:
                 debug = (self.lexer.verbose >= 3)
-                translatedStr = parser.parse(data, lexer=self.lexer, debug=debug)
+                translatedStr = getParser().parse(data, lexer=self.lexer, debug=debug)
                 #translatedStr = simpleParser.parse(data, lexer=self.lexer)
 
             except ValueError:
@@ -2964,8 +3058,6 @@ class MelParser(object):
         finally:
             self.lexer.raw_parse_data = None
 
-scanner = yacc.yacc(method='''LALR''', debug=0, module=melscan, outputdir=_outputdir)
-
 
 #simple = SimpleMelGrammar()
 #standard = MelGrammar()
@@ -2979,7 +3071,7 @@ class MelScanner(object):
     def build(self):
 
         # data storage
-        self.lexer = lexer.clone()
+        self.lexer = getLexer().clone()
         self.lexer.proc_list = []  # ordered list of procedures
         self.lexer.local_procs = {}  # dictionary of local procedures and their related data
         self.lexer.global_procs = {}  # dictionary of global procedures and their related data
@@ -2990,7 +3082,7 @@ class MelScanner(object):
         #data = data.encode( 'utf-8', 'ignore')
         data = data.replace('\r', '\n')
 
-        scanner.parse(data, lexer=self.lexer)
+        getScanner().parse(data, lexer=self.lexer)
         #translatedStr = simpleParser.parse(data, lexer=self.lexer)
 
         return self.lexer.proc_list, self.lexer.global_procs, self.lexer.local_procs
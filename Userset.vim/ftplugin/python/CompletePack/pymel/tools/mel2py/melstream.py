@@ -0,0 +1,254 @@
+"""
+Streaming front end to the mel lexer and parsers.
+
+Rather than reading a whole mel file into memory, the file is read in blocks
+and split into top-level chunks: a statement ending with a semicolon, or a
+procedure definition.  Each chunk is lexed and parsed on its own, so memory
+stays bounded by the size of the largest statement instead of the size of the
+file.
+
+    >>> from StringIO import StringIO
+    >>> src = StringIO('global proc foo() { print "a;b"; }\\n// done\\nfoo;\\n')
+    >>> for lineno, chunk in iterChunks(src, blockSize=4):
+    ...     print lineno, repr(chunk)
+    1 'global proc foo() { print "a;b"; }\\n'
+    2 '// done\\nfoo;\\n'
+
+A top-level block that is not a procedure, such as the body of an if or a for, ends its chunk unless it is
+followed by an else or, for a do block, by its while:
+
+    >>> src = StringIO('if (1) { print 1; }\\nelse { print 2; }\\nfor ($i = 0; $i < 2; $i++) { foo; }\\nproc a() {}\\nproc b() {}\\n')
+    >>> for lineno, chunk in iterChunks(src, blockSize=4):
+    ...     print lineno, repr(chunk)
+    1 'if (1) { print 1; }\\nelse { print 2; }\\n'
+    3 'for ($i = 0; $i < 2; $i++) { foo; }\\n'
+    4 'proc a() {}\\n'
+    5 'proc b() {}\\n'
+    >>> src = StringIO('int $a[] = {1, 2};\\nif (1) a; else { b; }\\ndo { c; } while (0);\\nproc a() {}\\n')
+    >>> for lineno, chunk in iterChunks(src, blockSize=4):
+    ...     print lineno, repr(chunk)
+    1 'int $a[] = {1, 2};\\n'
+    2 'if (1) a; else { b; }\\n'
+    3 'do { c; } while (0);\\n'
+    4 'proc a() {}\\n'
+"""
+
+import re
+
+import pymel.util as util
+import melparse
+
+# size of the blocks read from the file
+BLOCK_SIZE = 1 << 16
+
+# characters the chunker has to look at, everything else is skipped at once
+_SPECIAL_RE = re.compile(r'["/{}();\n]')
+# rest of a string literal, after its opening quote
+_STRING_END_RE = re.compile(r'(?:[^"\\\n]|\\.|\\\n)*"', re.DOTALL)
+_COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?(?:\*/|$)', re.DOTALL)
+_PROC_RE = re.compile(r'\s*(?:global\s+)?proc\b')
+# end of the text before a brace opening a block rather than an array
+_BLOCK_START_RE = re.compile(r'(?:^|[;})]|\b(?:else|do))\s*$')
+# whitespace and comments between a terminator and the next token
+_SKIP_RE = re.compile(r'(?:\s+|//[^\n]*\n|/\*.*?\*/)*', re.DOTALL)
+# keywords by which a statement goes on after a terminator, by terminator
+_CONTINUATION_RES = {';': re.compile(r'else\b'), '}': re.compile(r'(?:else|while)\b')}
+# what may follow a terminator on the same line and still belong to its chunk
+_TRAILING_RE = re.compile(r'[ \t\r]*(?://[^\n]*)?\n')
+
+
+def _open(melfile):
+    if hasattr(melfile, 'read'):
+        return melfile, False
+    return open(util.path(melfile), 'rb'), True
+
+
+def _nextToken(buf, pos, eof):
+    # index of the next token from pos on, None if more of the file is needed
+    # to tell whether it is a keyword continuing the statement
+    start = _SKIP_RE.match(buf, pos).end()
+    if not eof and (len(buf) - start < len('while') + 1 or buf.startswith('/', start)):
+        return None
+    return start
+
+
+def iterChunks(melfile, blockSize=BLOCK_SIZE):
+    """
+    Yields (lineno, text) for each top-level chunk of a mel file: a statement ending with a semicolon, or a
+    procedure definition, along with the comments preceding it and a comment ending its last line.
+
+    melfile may be a path or a file object.
+    """
+    f, close = _open(melfile)
+    try:
+        buf = ''
+        pos = 0
+        lineno = 1
+        chunkLineno = 1
+        braces = parens = 0
+        isProc = None
+        isBlock = False
+        eof = False
+
+        while True:
+            # find the next character of interest, reading more of the file if needed
+            match = _SPECIAL_RE.search(buf, pos)
+            needMore = match is None
+            if needMore:
+                pos = len(buf)
+            else:
+                pos = match.start()
+                char = buf[pos]
+                end = pos + 1
+                if char == '"':
+                    strMatch = _STRING_END_RE.match(buf, pos + 1)
+                    if strMatch is not None:
+                        end = strMatch.end()
+                    elif not eof:
+                        needMore = True
+                    else:
+                        end = len(buf)
+                elif char == '/':
+                    if pos + 1 >= len(buf) and not eof:
+                        needMore = True
+                    elif buf.startswith('//', pos):
+                        end = buf.find('\n', pos)
+                        if end == -1:
+                            if not eof:
+                                needMore = True
+                            end = len(buf)
+                    elif buf.startswith('/*', pos):
+                        end = buf.find('*/', pos + 2)
+                        if end == -1:
+                            if not eof:
+                                needMore = True
+                            end = len(buf)
+                        else:
+                            end += 2
+                elif char == ';' or char == '}':
+                    # a terminator: make sure the end of its line is available, and at top level, what follows
+                    # it, which may continue the statement
+                    if buf.find('\n', pos) == -1 and not eof:
+                        needMore = True
+                    elif parens == 0 and braces == (1 if char == '}' else 0) and _nextToken(buf, end, eof) is None:
+                        needMore = True
+
+            if needMore:
+                if eof:
+                    break
+                block = f.read(blockSize)
+                if not block:
+                    eof = True
+                else:
+                    buf += block
+                continue
+
+            lineno += buf.count('\n', pos, end)
+            if char in '{(':
+                if char == '{':
+                    if braces == 0 and parens == 0 and isProc is None:
+                        text = _COMMENT_RE.sub(' ', buf[:pos])
+                        isProc = bool(_PROC_RE.match(text))
+                        isBlock = isProc or bool(_BLOCK_START_RE.search(text))
+                    braces += 1
+                else:
+                    parens += 1
+            elif char in '})':
+                if char == '}':
+                    braces = max(0, braces - 1)
+                else:
+                    parens = max(0, parens - 1)
+
+            terminated = braces == 0 and parens == 0 and (
+                char == ';' or (char == '}' and isBlock))
+            if terminated and not isProc:
+                terminated = not _CONTINUATION_RES[char].match(buf, _nextToken(buf, end, True))
+            if terminated:
+                trailing = _TRAILING_RE.match(buf, end)
+                if trailing is not None:
+                    end = trailing.end()
+                    lineno += 1
+                chunk = buf[:end]
+                yield chunkLineno, chunk
+                buf = buf[end:]
+                pos = 0
+                chunkLineno = lineno
+                isProc = None
+                isBlock = False
+            else:
+                pos = end
+
+        if buf.strip():
+            yield chunkLineno, buf
+    finally:
+        if close:
+            f.close()
+
+
+def iterDeclarations(melfile, blockSize=BLOCK_SIZE):
+    """
+    Yields (lineno, text) for each procedure definition of a mel file, skipping the other top-level statements.
+    """
+    for lineno, chunk in iterChunks(melfile, blockSize=blockSize):
+        if _PROC_RE.match(_COMMENT_RE.sub(' ', chunk)):
+            yield lineno, chunk
+
+
+def iterTokens(melfile, blockSize=BLOCK_SIZE):
+    """
+    Yields the lexer tokens of a mel file, one chunk at a time.  The tokens' lineno are relative to the file,
+    their lexpos to the chunk they belong to.
+    """
+    lexer = melparse.getLexer().clone()
+    for lineno, chunk in iterChunks(melfile, blockSize=blockSize):
+        lexer.lineno = lineno
+        lexer.input(chunk)
+        while True:
+            tok = lexer.token()
+            if not tok:
+                break
+            yield tok
+
+
+def scanFile(melfile, blockSize=BLOCK_SIZE):
+    """
+    Streaming equivalent of MelScanner.parse: returns the ordered list of procedures of a mel file, and
+    dictionaries of its global and local procedures.
+    """
+    scanner = melparse.MelScanner()
+    scanner.build()
+    for lineno, chunk in iterChunks(melfile, blockSize=blockSize):
+        scanner.lexer.lineno = lineno
+        scanner.parse(chunk)
+    return scanner.lexer.proc_list, scanner.lexer.global_procs, scanner.lexer.local_procs
+
+
+def translateFile(melfile, output, currentModule=None, pymelNamespace='', forceCompatibility=False,
+                  verbosity=0, blockSize=BLOCK_SIZE):
+    """
+    Translate a mel file chunk by chunk, writing the python code to the output file object as it goes.
+
+    As each chunk is parsed on its own, procedures are first collected by a scanning pass, so that calls to
+    procedures defined further down the file are resolved.  Import statements for other translated modules
+    are written just before the first chunk which needs them, rather than at the top of the output.
+
+    Returns how the procedures and scripts used by the code were resolved, see MelParser.
+    """
+    procList, globalProcs, localProcs = scanFile(melfile, blockSize=blockSize)
+
+    mparser = melparse.MelParser()
+    mparser.build(currentModule, pymelNamespace=pymelNamespace, forceCompatibility=forceCompatibility,
+                  verbosity=verbosity)
+    if currentModule is not None:
+        mparser.lexer.global_procs.update(globalProcs)
+    mparser.lexer.local_procs.update(localProcs)
+
+    for lineno, chunk in iterChunks(melfile, blockSize=blockSize):
+        mparser.lexer.lineno = lineno
+        try:
+            output.write(mparser.parse(chunk))
+        except melparse.MelParseError, e:
+            if e.file is None and not hasattr(melfile, 'read'):
+                e.file = melfile
+            raise
+    return mparser.lexer.dependencies
@@ -225,6 +225,10 @@ def sum(a, start=0, axis=None):
         Array([6, 15])
     """
     if isinstance(a, Array):
+        if axis is None and _backend is not None:
+            res = _backend.sum(a, start)
+            if res is not NotImplemented:
+                return res
         axis = a._getaxis(axis, fill=True)
         return reduce(operator.add, a.axisiter(*axis), start)
     elif hasattr(a, '__iter__'):
@@ -4200,6 +4204,10 @@ class Array(object):
             >>> print clsname(A+M)
             MatrixN
         """
+        if _backend is not None:
+            res = _backend.binary(operator.add, self, other)
+            if res is not NotImplemented:
+                return res
         try:
             nself, nother = coerce(self, other)
         except:
@@ -4299,6 +4307,10 @@ class Array(object):
         """ a.__sub__(b) <==> a-b
             Returns the result of the element wise substraction of b from a if b is convertible to Array,
             substracts b from every component of a if b is a single numeric value """
+        if _backend is not None:
+            res = _backend.binary(operator.sub, self, other)
+            if res is not NotImplemented:
+                return res
         try:
             nself, nother = coerce(self, other)
         except:
@@ -4310,6 +4322,10 @@ class Array(object):
         """ a.__rsub__(b) <==> b-a
             Returns the result of the element wise substraction of a from b if b is convertible to Array,
             replace every component c of a by b-c if b is a single numeric value """
+        if _backend is not None:
+            res = _backend.binary(operator.sub, self, other, reverse=True)
+            if res is not NotImplemented:
+                return res
         try:
             nself, nother = coerce(self, other)
         except:
@@ -4326,6 +4342,10 @@ class Array(object):
         """ a.__mul__(b) <==> a*b
             Returns the result of the element wise multiplication of a and b if b is convertible to Array,
             multiplies every component of a by b if b is a single numeric value """
+        if _backend is not None:
+            res = _backend.binary(operator.mul, self, other)
+            if res is not NotImplemented:
+                return res
         try:
             nself, nother = coerce(self, other)
         except:
@@ -4379,6 +4399,10 @@ class Array(object):
             when __future__.division is in effect, otherwise __div__() is used.
             Returns the result of the element wise division of a by b if b is convertible to Array,
             divides every component of a by b if b is a single numeric value """
+        if _backend is not None:
+            res = _backend.binary(operator.div, self, other)
+            if res is not NotImplemented:
+                return res
         try:
             nself, nother = coerce(self, other)
         except:
@@ -4392,6 +4416,10 @@ class Array(object):
             when __future__.division is in effect, otherwise __div__() is used.
             Returns the result of the element wise division of b by a if b is convertible to Array,
             replaces every component c of a by b/c if b is a single numeric value """
+        if _backend is not None:
+            res = _backend.binary(operator.div, self, other, reverse=True)
+            if res is not NotImplemented:
+                return res
         try:
             nself, nother = coerce(self, other)
         except:
@@ -4412,6 +4440,10 @@ class Array(object):
             when __future__.division is in effect, otherwise __div__() is used.
             Returns the result of the element wise true division of a by b if b is convertible to Array,
             performs true division of every component of a by b if b is a single numeric value """
+        if _backend is not None:
+            res = _backend.binary(operator.truediv, self, other)
+            if res is not NotImplemented:
+                return res
         try:
             nself, nother = coerce(self, other)
         except:
@@ -4424,6 +4456,10 @@ class Array(object):
             when __future__.division is in effect, otherwise __rdiv__() is used.
             Returns the result of the element wise true division of b by a if b is convertible to Array,
             replaces every component c of a by b/c if b is a single numeric value """
+        if _backend is not None:
+            res = _backend.binary(operator.truediv, self, other, reverse=True)
+            if res is not NotImplemented:
+                return res
         try:
             nself, nother = coerce(self, other)
         except:
@@ -4720,6 +4756,10 @@ class Array(object):
             >>> A.dist(B, 1)
             Array([0.0104403065089, 0.0122065556157, 0.003])
         """
+        if _backend is not None and not args:
+            res = _backend.dist(self, other)
+            if res is not NotImplemented:
+                return res
         try:
             nself, nother = coerce(self, other)
         except:
@@ -4812,6 +4852,10 @@ class Array(object):
              [1, 4, 7],
              [2, 5, 8]]
         """
+        if _backend is not None and not args:
+            res = _backend.transpose(self)
+            if res is not NotImplemented:
+                return res
         axis = self._getaxis(args, fill=True, reverse=True)
         if len(axis) != self.ndim:
             raise ValueError, "Transpose axis %s do not match array shape %s" % (axis, self.shape)
@@ -5457,6 +5501,10 @@ class MatrixN(Array):
             If b is a MatrixN, __mul__ is mapped to matrix multiplication, if b is a VectorN, to MatrixN by VectorN multiplication,
             otherwise, returns the result of the element wise multiplication of a and b if b is convertible to Array,
             multiplies every component of a by b if b is a single numeric value """
+        if _backend is not None and isinstance(other, (MatrixN, VectorN)):
+            res = _backend.matrixProduct(self, other)
+            if res is not NotImplemented:
+                return res
         if isinstance(other, MatrixN):
             return self.__class__._convert([[dot(row, col) for col in other.col] for row in self.row])
         elif isinstance(other, VectorN):
@@ -5866,6 +5914,10 @@ class MatrixN(Array):
         """
         assert self.is_square(), "determinant is only defined for a square MatrixN"
         n = self.nrow
+        if _backend is not None and n >= 4:
+            d = _backend.det(self)
+            if d is not NotImplemented:
+                return d
         if n == 1:
             d = self[0, 0]
         elif n == 2:
@@ -5990,6 +6042,10 @@ class MatrixN(Array):
         """
         assert self.is_square(), "inverse is only defined for a square MatrixN, see linverse and rinverse"
         n = self.nrow
+        if _backend is not None and n >= 4:
+            i = _backend.inverse(self)
+            if i is not NotImplemented:
+                return i
         try:
             if n == 1:
                 i = self.__class__(1.0 / self[0, 0])
@@ -6461,6 +6517,10 @@ class VectorN(Array):
 
 
         """
+        if _backend is not None:
+            res = _backend.dot(self, other)
+            if res is not NotImplemented:
+                return res
         try:
             nself, nother = coerce(VectorN(self), other)
             assert len(nself) == len(nother)
@@ -6630,6 +6690,314 @@ class VectorN(Array):
     # blend and clamp derived from Array
 
 
+#=========================================================================
+# Contiguous storage backends
+#=========================================================================
+
+# Arrays always store their components as nested lists of Array objects, but
+# the operators below can optionally flatten float arrays to one contiguous
+# buffer, compute on that buffer, and only rebuild the nested result at the
+# end, instead of recursing through the sub-arrays.  NumPy is used for the
+# buffers when it can be imported, the array module otherwise.
+
+try:
+    import numpy as _numpy
+except ImportError:
+    _numpy = None
+import array as _array
+
+_backend = None
+
+
+class _ArrayBackend(object):
+
+    """ Flattened computations on list-backed Arrays of floats.
+
+        Every method returns NotImplemented when it can't handle its arguments, in which case
+        the caller falls back to the generic nested list implementation.
+    """
+    name = 'array'
+
+    def flat(self, a):
+        """ Returns a flat buffer of the components of a, or None if a is not a list-backed
+            Array made only of floats """
+        if type(a).apicls is not list or not a.size:
+            return None
+        data = a.data
+        for i in xrange(a.ndim - 1):
+            data = [x for sub in data for x in sub.data]
+        for x in data:
+            if type(x) is not float:
+                return None
+        return self.buffer(data)
+
+    def buffer(self, values):
+        return _array.array('d', values)
+
+    def tolist(self, buf):
+        return buf.tolist()
+
+    def build(self, cls, buf, shape):
+        """ Builds an instance of cls (or of its closest base class) of given shape from a flat buffer """
+        data = self.tolist(buf)
+        for d in reversed(shape[1:]):
+            subs = []
+            for i in xrange(0, len(data), d):
+                sub = super(Array, Array).__new__(Array)
+                sub.data = data[i:i + d]
+                subs.append(sub)
+            data = subs
+        raw = super(Array, Array).__new__(Array)
+        raw.data = data
+        return cls._convert(raw)
+
+    def _operands(self, a, b):
+        fa = self.flat(a)
+        if fa is None:
+            return None, None
+        if type(b) is type(a):
+            if b.shape != a.shape:
+                return None, None
+            fb = self.flat(b)
+        elif isinstance(b, (int, long, float)) and not isinstance(b, bool):
+            fb = b
+        else:
+            fb = None
+        return fa, fb
+
+    def _elementwise(self, op, fa, fb):
+        if isinstance(fb, (int, long, float)):
+            return self.buffer(op(x, fb) for x in fa)
+        return self.buffer(map(op, fa, fb))
+
+    def binary(self, op, a, b, reverse=False):
+        """ Element wise a op b (or b op a if reverse) for a and b of same type and shape, or b a scalar """
+        fa, fb = self._operands(a, b)
+        if fb is None:
+            return NotImplemented
+        try:
+            if reverse:
+                res = self._elementwise(lambda x, y: op(y, x), fa, fb)
+            else:
+                res = self._elementwise(op, fa, fb)
+        except ZeroDivisionError:
+            # let the generic implementation raise with its usual message
+            return NotImplemented
+        return self.build(a.__class__, res, a.shape)
+
+    def sum(self, a, start=0):
+        fa = self.flat(a)
+        if fa is None:
+            return NotImplemented
+        return _sum(fa, start)
+
+    def dot(self, a, b):
+        if a.ndim == 1 and type(b) is type(a) and type(a).apicls is list:
+            # the components of a vector already are a flat list, copying them to a buffer
+            # first would cost more than the product itself
+            if not a.size or b.size != a.size:
+                return NotImplemented
+            return _sum(map(operator.mul, a.data, b.data))
+        fa, fb = self._operands(a, b)
+        if fb is None or isinstance(fb, (int, long, float)):
+            return NotImplemented
+        return _sum(map(operator.mul, fa, fb))
+
+    def dist(self, a, b):
+        fa, fb = self._operands(a, b)
+        if fb is None or isinstance(fb, (int, long, float)):
+            return NotImplemented
+        return math.sqrt(_sum((y - x) * (y - x) for x, y in zip(fa, fb)))
+
+    def transpose(self, a):
+        if a.ndim != 2:
+            return NotImplemented
+        fa = self.flat(a)
+        if fa is None:
+            return NotImplemented
+        m, n = a.shape
+        res = self.buffer(fa[j + i * n] for j in xrange(n) for i in xrange(m))
+        return self.build(a.__class__, res, (n, m))
+
+    def matmul(self, a, b):
+        """ Matrix product of a (m, n) by b (n, p) given as flat buffers, as a flat buffer """
+        m, n, p = a[1], a[2], b[2]
+        fa, fb = a[0], b[0]
+        cols = [fb[j::p] for j in xrange(p)]
+        return self.buffer(_sum(map(operator.mul, fa[i * n:(i + 1) * n], col))
+                           for i in xrange(m) for col in cols)
+
+    def matrixProduct(self, a, b):
+        """ a * b for a MatrixN a, and b a MatrixN (matrix product) or a VectorN of matching size """
+        if a.ndim != 2:
+            return NotImplemented
+        fa = self.flat(a)
+        fb = self.flat(b)
+        if fa is None or fb is None:
+            return NotImplemented
+        m, n = a.shape
+        if isinstance(b, MatrixN):
+            if b.ndim != 2 or b.shape[0] != n:
+                return NotImplemented
+            p = b.shape[1]
+            return self.build(a.__class__, self.matmul((fa, m, n), (fb, n, p)), (m, p))
+        else:
+            if b.size != n:
+                return NotImplemented
+            res = self.tolist(self.matmul((fa, m, n), (fb, n, 1)))[:b.size]
+            return self.build(b.__class__, self.buffer(res), (len(res),))
+
+    def det(self, a):
+        return NotImplemented
+
+    def inverse(self, a):
+        return NotImplemented
+
+
+class _NumpyBackend(_ArrayBackend):
+    name = 'numpy'
+    # below this size, the cost of converting to and from numpy arrays is higher than
+    # what vectorization gains, so the array module buffers are used instead
+    minSize = 64
+
+    def flat(self, a):
+        buf = super(_NumpyBackend, self).flat(a)
+        if buf is not None and len(buf) >= self.minSize:
+            return _numpy.frombuffer(buf, dtype=_numpy.float64)
+        return buf
+
+    def tolist(self, buf):
+        return buf.tolist()
+
+    def _elementwise(self, op, fa, fb):
+        if isinstance(fa, _numpy.ndarray):
+            with _numpy.errstate(divide='raise', invalid='raise'):
+                try:
+                    return op(fa, fb)
+                except FloatingPointError:
+                    raise ZeroDivisionError
+        return super(_NumpyBackend, self)._elementwise(op, fa, fb)
+
+    def sum(self, a, start=0):
+        # builtin sum adds in the same order as the generic implementation
+        fa = _ArrayBackend.flat(self, a)
+        if fa is None:
+            return NotImplemented
+        return _sum(fa, start)
+
+    def dot(self, a, b):
+        # vectors are multiplied on their component lists, see _ArrayBackend.dot
+        if a.ndim == 1:
+            return super(_NumpyBackend, self).dot(a, b)
+        fa, fb = self._operands(a, b)
+        if isinstance(fa, _numpy.ndarray) and isinstance(fb, _numpy.ndarray):
+            return float(_numpy.dot(fa, fb))
+        return super(_NumpyBackend, self).dot(a, b)
+
+    def dist(self, a, b):
+        fa, fb = self._operands(a, b)
+        if isinstance(fa, _numpy.ndarray) and isinstance(fb, _numpy.ndarray):
+            d = fb - fa
+            return math.sqrt(float(_numpy.dot(d, d)))
+        return super(_NumpyBackend, self).dist(a, b)
+
+    def transpose(self, a):
+        if a.ndim != 2:
+            return NotImplemented
+        fa = self.flat(a)
+        if not isinstance(fa, _numpy.ndarray):
+            return super(_NumpyBackend, self).transpose(a)
+        m, n = a.shape
+        return self.build(a.__class__, fa.reshape(m, n).T.ravel(), (n, m))
+
+    def matmul(self, a, b):
+        (fa, m, n), (fb, n, p) = a, b
+        if isinstance(fa, _numpy.ndarray) or isinstance(fb, _numpy.ndarray):
+            fa = _numpy.asarray(fa, dtype=_numpy.float64).reshape(m, n)
+            fb = _numpy.asarray(fb, dtype=_numpy.float64).reshape(n, p)
+            return _numpy.dot(fa, fb).ravel()
+        return super(_NumpyBackend, self).matmul(a, b)
+
+    def _square(self, a):
+        if a.ndim != 2 or a.shape[0] != a.shape[1]:
+            return None
+        fa = _ArrayBackend.flat(self, a)
+        if fa is None:
+            return None
+        return _numpy.frombuffer(fa, dtype=_numpy.float64).reshape(a.shape)
+
+    def det(self, a):
+        fa = self._square(a)
+        if fa is None:
+            return NotImplemented
+        return float(_numpy.linalg.det(fa))
+
+    def inverse(self, a):
+        fa = self._square(a)
+        if fa is None:
+            return NotImplemented
+        try:
+            res = _numpy.linalg.inv(fa)
+        except _numpy.linalg.LinAlgError:
+            raise ValueError, "MatrixN is not invertible"
+        return self.build(a.__class__, res.ravel(), a.shape)
+
+
+_backends = {'array': _ArrayBackend}
+if _numpy is not None:
+    _backends['numpy'] = _NumpyBackend
+
+
+def setArrayBackend(name=None):
+    """ setArrayBackend([name]) --> None
+
+        Sets the storage backend used to accelerate arithmetic, reductions and products on Arrays
+        of floats (and on the MatrixN and VectorN classes deriving from Array) :
+
+        - None or 'list' : always use the nested list implementation (default)
+        - 'numpy' : compute on contiguous NumPy buffers, raises ImportError if NumPy is not available
+        - 'array' : compute on flat array module buffers
+        - 'auto' : 'numpy' if NumPy is available, 'array' otherwise
+
+        The default can also be set with the PYMEL_ARRAY_BACKEND environment variable. Results are
+        returned as the usual nested list Arrays, whatever the backend.
+
+        >>> previous = getArrayBackend()
+        >>> setArrayBackend('array')
+        >>> getArrayBackend()
+        'array'
+        >>> M = MatrixN([[1.0, 2.0], [3.0, 4.0]])
+        >>> print (M * M).formated()
+        [[7.0, 10.0],
+         [15.0, 22.0]]
+        >>> setArrayBackend(previous)
+    """
+    global _backend
+    if name == 'auto':
+        name = 'numpy' if 'numpy' in _backends else 'array'
+    if name is None or name == 'list':
+        _backend = None
+    elif name in _backends:
+        _backend = _backends[name]()
+    elif name == 'numpy':
+        raise ImportError, "the numpy array backend requires numpy"
+    else:
+        raise ValueError, "unknown array backend %r, valid backends are 'list', 'array', 'numpy' or 'auto'" % (name,)
+
+
+def getArrayBackend():
+    """ getArrayBackend() --> str
+
+        Returns the name of the storage backend currently used by Arrays, see setArrayBackend
+    """
+    if _backend is None:
+        return 'list'
+    return _backend.name
+
+import os as _os
+setArrayBackend(_os.environ.get('PYMEL_ARRAY_BACKEND') or None)
+
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod(verbose=True)
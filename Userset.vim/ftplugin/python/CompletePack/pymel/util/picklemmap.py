@@ -0,0 +1,300 @@
+"""
+Indexed storage for a sequence of named pickles, decoded lazily.
+
+The file starts with a fixed header, followed by an index holding the name,
+kind, offset and length of each section, followed by the sections
+themselves.  A section written from a dictionary holds one pickle per entry,
+preceded by the index of its keys; any other section is a single pickle.
+
+On load, the file is memory-mapped just long enough to read the index and
+copy the raw sections; nothing is unpickled yet.  A dictionary section is
+returned as a `LazyDict`, which only unpickles an entry the first time it is
+accessed, and any other section is unpickled the first time it is accessed.
+
+    >>> import os, tempfile
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'test.pmc')
+    >>> dump([('first', {'a': 1, 'b': 2}), ('second', [1, 2, 3])], filename)
+    >>> sections = load(filename)
+    >>> sections.names()
+    ('first', 'second')
+    >>> sections.isDecoded('second')
+    False
+    >>> sections['second']
+    [1, 2, 3]
+    >>> sections.isDecoded('second')
+    True
+    >>> first = sections['first']
+    >>> first.isDecoded('a')
+    False
+    >>> first['a']
+    1
+    >>> first.isDecoded('a'), first.isDecoded('b')
+    (True, False)
+    >>> sorted(first.items())
+    [('a', 1), ('b', 2)]
+"""
+import collections
+import contextlib
+import mmap
+import os
+import struct
+try:
+    import cPickle as pickle
+except:
+    import pickle
+
+__all__ = ['dump', 'load', 'MappedSections', 'LazyDict', 'PickleMMapError']
+
+MAGIC = 'PMLMMAP\0'
+FORMAT_VERSION = 2
+
+# kinds of sections
+PICKLE_SECTION = 0
+MAPPING_SECTION = 1
+
+# magic, format version, number of sections, user version stamp length
+_HEADER = struct.Struct('<8sIII')
+# name length, section kind, section offset, section length
+_INDEX_ENTRY = struct.Struct('<IIQQ')
+# length of the pickled key index at the start of a mapping section
+_KEYS_HEADER = struct.Struct('<Q')
+
+
+class PickleMMapError(Exception):
+    pass
+
+
+def _dumpMapping(obj, protocol):
+    keys = []
+    blobs = []
+    offset = 0
+    for key, val in obj.iteritems():
+        blob = pickle.dumps(val, protocol)
+        keys.append((key, offset, len(blob)))
+        blobs.append(blob)
+        offset += len(blob)
+    keyIndex = pickle.dumps(keys, protocol)
+    return _KEYS_HEADER.pack(len(keyIndex)) + keyIndex + ''.join(blobs)
+
+
+def dump(sections, filename, protocol=-1, stamp=''):
+    """
+    Save a sequence of (name, object) pairs to disk as an indexed file.
+
+    Dictionaries are saved one entry at a time, so that their entries may
+    be decoded separately.  The optional stamp is stored in the header, and
+    may be used by the reader to detect a stale file (ie, one written for
+    another version).  The file is written to a temporary name first, then
+    renamed, so that readers never map a partially written file.
+    """
+    names = []
+    kinds = []
+    blobs = []
+    for name, obj in sections:
+        names.append(str(name))
+        if isinstance(obj, collections.Mapping):
+            kinds.append(MAPPING_SECTION)
+            blobs.append(_dumpMapping(obj, protocol))
+        else:
+            kinds.append(PICKLE_SECTION)
+            blobs.append(pickle.dumps(obj, protocol))
+
+    offset = _HEADER.size + len(stamp)
+    for name in names:
+        offset += _INDEX_ENTRY.size + len(name)
+
+    index = []
+    for name, kind, blob in zip(names, kinds, blobs):
+        index.append(_INDEX_ENTRY.pack(len(name), kind, offset, len(blob)) + name)
+        offset += len(blob)
+
+    tmpName = '%s.%d.tmp' % (filename, os.getpid())
+    file = open(tmpName, 'wb')
+    try:
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(names), len(stamp)))
+        file.write(stamp)
+        file.write(''.join(index))
+        for blob in blobs:
+            file.write(blob)
+    finally:
+        file.close()
+    if os.name == 'nt' and os.path.exists(filename):
+        os.remove(filename)
+    os.rename(tmpName, filename)
+
+
+def load(filename, stamp=None):
+    """
+    Read the index of a file written by `dump`, without decoding any section.
+
+    If stamp is given, and does not match the stamp stored in the file, a
+    PickleMMapError is raised.  The file is closed when this returns.
+    """
+    return MappedSections(filename, stamp=stamp)
+
+
+class LazyDict(collections.MutableMapping):
+
+    """
+    Dictionary read from a mapping section, whose values are unpickled one
+    at a time, the first time they are accessed.
+
+    Looking up, adding or removing a key only decodes that entry; iterating
+    over the values decodes them all.  Once every entry is decoded, the raw
+    data is released.  It is pickled and copied as a plain dict.
+    """
+
+    def __init__(self, buffer, keys):
+        self._buffer = buffer
+        # key => (offset, length) of the entries not decoded yet
+        self._pending = dict((key, (offset, length)) for key, offset, length in keys)
+        self._values = {}
+        if not self._pending:
+            self._buffer = None
+
+    def _decode(self, key):
+        offset, length = self._pending.pop(key)
+        val = pickle.loads(self._buffer[offset:offset + length])
+        self._values[key] = val
+        if not self._pending:
+            self._buffer = None
+        return val
+
+    def isDecoded(self, key):
+        return key in self._values
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        if key in self._pending:
+            return self._decode(key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, val):
+        if self._pending.pop(key, None) is not None and not self._pending:
+            self._buffer = None
+        self._values[key] = val
+
+    def __delitem__(self, key):
+        if self._pending.pop(key, None) is not None:
+            if not self._pending:
+                self._buffer = None
+        else:
+            del self._values[key]
+
+    def __contains__(self, key):
+        return key in self._values or key in self._pending
+
+    has_key = __contains__
+
+    def __len__(self):
+        return len(self._values) + len(self._pending)
+
+    def __iter__(self):
+        # iterate over a copy of the keys, as decoding an entry moves it
+        return iter(self._values.keys() + self._pending.keys())
+
+    def iterkeys(self):
+        return iter(self)
+
+    def copy(self):
+        return dict(self.iteritems())
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.copy())
+
+
+class MappedSections(object):
+
+    """
+    Read-only, lazily decoded view on a file written by `dump`.
+
+    Sections may be accessed by name or by position; once decoded, a
+    section's value is kept, so it is only unpickled once.  Mapping
+    sections are returned as `LazyDict` objects.
+    """
+
+    def __init__(self, filename, stamp=None):
+        self.filename = filename
+        self._values = {}
+        file = open(filename, 'rb')
+        try:
+            with contextlib.closing(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)) as data:
+                self._readIndex(data, stamp)
+        finally:
+            file.close()
+
+    def _readIndex(self, data, stamp):
+        if len(data) < _HEADER.size:
+            raise PickleMMapError("%s: file is truncated" % self.filename)
+        magic, version, count, stampLen = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise PickleMMapError("%s: not a memory-mapped pickle file" % self.filename)
+        if version != FORMAT_VERSION:
+            raise PickleMMapError("%s: unsupported format version %d" % (self.filename, version))
+        pos = _HEADER.size
+        self.stamp = data[pos:pos + stampLen]
+        if stamp is not None and stamp != self.stamp:
+            raise PickleMMapError("%s: stamp %r did not match expected %r"
+                                  % (self.filename, self.stamp, stamp))
+        pos += stampLen
+
+        self._names = []
+        # name => raw pickle of the sections not decoded yet
+        self._pending = {}
+        for i in xrange(count):
+            nameLen, kind, offset, length = _INDEX_ENTRY.unpack_from(data, pos)
+            pos += _INDEX_ENTRY.size
+            name = data[pos:pos + nameLen]
+            pos += nameLen
+            if offset + length > len(data):
+                raise PickleMMapError("%s: section %r is truncated" % (self.filename, name))
+            self._names.append(name)
+            if kind == MAPPING_SECTION:
+                keysLen, = _KEYS_HEADER.unpack_from(data, offset)
+                start = offset + _KEYS_HEADER.size
+                keys = pickle.loads(data[start:start + keysLen])
+                start += keysLen
+                self._values[name] = LazyDict(data[start:offset + length], keys)
+            else:
+                self._pending[name] = data[offset:offset + length]
+
+    def names(self):
+        return tuple(self._names)
+
+    def isDecoded(self, name):
+        return name in self._values
+
+    def get(self, name, default=None):
+        if name not in self:
+            return default
+        return self[name]
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, long)):
+            key = self._names[key]
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        val = pickle.loads(self._pending.pop(key))
+        self._values[key] = val
+        return val
+
+    def __contains__(self, name):
+        return name in self._values or name in self._pending
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        for name in self._names:
+            yield self[name]
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.filename)
@@ -23,13 +23,13 @@ def _loads(filename):
     """
     file = gzip.GzipFile(filename, 'rb')
     try:
-        buffer = ""
+        chunks = []
         while 1:
             data = file.read()
             if data == "":
                 break
-            buffer += data
-        return buffer
+            chunks.append(data)
+        return "".join(chunks)
     finally:
         file.close()
 
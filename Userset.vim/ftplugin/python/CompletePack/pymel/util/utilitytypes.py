@@ -630,9 +630,15 @@ def LazyLoadModule(name, contents):
 
         # update the lazyModule with our new additions (ie, fooExpanded)
         lazyModule._updateLazyModule(globals())
+
+    Lazy attributes whose names are in the module's `_lazyModule_hidden` set
+    are left out of `__all__` until they have been created, so that they are
+    not forced by a ``from module import *``.
     """
     class _LazyLoadModule(types.ModuleType):
 
+        _lazyModule_hidden = frozenset()
+
         class LazyLoader(object):
 
             """
@@ -673,7 +679,9 @@ def LazyLoadModule(name, contents):
 
         @property
         def __all__(self):
-            public = [x for x in self.__dict__.keys() + self.__class__.__dict__.keys() if not x.startswith('_')]
+            hidden = self._lazyModule_hidden
+            public = [x for x in self.__dict__.keys() + self.__class__.__dict__.keys()
+                      if not x.startswith('_') and (x not in hidden or x in self.__dict__)]
             return public
 
         @classmethod